@@ -0,0 +1,37 @@
+"""Shared live assessment session state (Challenge Hub, calibration pools).
+
+Revision ID: assessment_session_state
+Revises: phase_prefetch_entries
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "assessment_session_state"
+down_revision: Union[str, None] = "phase_prefetch_entries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "assessment_session_state",
+        sa.Column("state_key", sa.String(length=120), nullable=False),
+        sa.Column("namespace", sa.String(length=40), nullable=False),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("state_key"),
+    )
+    op.create_index(
+        "ix_assessment_session_state_expires_at",
+        "assessment_session_state",
+        ["expires_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_assessment_session_state_expires_at", table_name="assessment_session_state")
+    op.drop_table("assessment_session_state")
@@ -0,0 +1,33 @@
+"""MinHash signature on challenge_responses for near-duplicate dedupe.
+
+Revision ID: challenge_response_signature
+Revises: question_pool_table
+
+Adds:
+  • challenge_responses.question_signature — MinHash of question_text
+    (app.assessment.near_duplicates), written on insert
+
+Older rows stay NULL; the learner index computes their signatures from
+question_text when it loads them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "challenge_response_signature"
+down_revision: Union[str, None] = "question_pool_table"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "challenge_responses",
+        sa.Column("question_signature", sa.LargeBinary(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("challenge_responses", "question_signature")
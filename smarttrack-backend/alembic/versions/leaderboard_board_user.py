@@ -0,0 +1,51 @@
+"""Leaderboard snapshot: one row per (board, learner) and incremental-refresh index.
+
+Revision ID: leaderboard_board_user
+Revises: notif_rule_key
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "leaderboard_board_user"
+down_revision: Union[str, None] = "notif_rule_key"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the newest row when a learner appears twice on the same board.
+    op.execute(
+        sa.text(
+            "DELETE FROM leaderboards a USING leaderboards b "
+            "WHERE a.domain = b.domain AND a.category = b.category "
+            "AND a.user_id = b.user_id AND a.id < b.id"
+        )
+    )
+    op.create_unique_constraint(
+        "uq_leaderboards_board_user",
+        "leaderboards",
+        ["domain", "category", "user_id"],
+    )
+    op.create_index(
+        "ix_leaderboards_board_updated",
+        "leaderboards",
+        ["domain", "category", "last_updated"],
+    )
+    # Seed each programme's Overall board from lifetime XP so ranks are
+    # meaningful from day one; later XP is credited incrementally.
+    op.execute(
+        sa.text(
+            "INSERT INTO leaderboards (domain, category, user_id, score, last_updated) "
+            "SELECT COALESCE(NULLIF(programme, ''), 'General'), 'Overall', id, xp, NOW() "
+            "FROM users WHERE xp > 0 AND is_active "
+            "ON CONFLICT ON CONSTRAINT uq_leaderboards_board_user DO NOTHING"
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_leaderboards_board_updated", table_name="leaderboards")
+    op.drop_constraint("uq_leaderboards_board_user", "leaderboards", type_="unique")
@@ -0,0 +1,38 @@
+"""Notification rule_key column for set-based engine deduplication.
+
+Revision ID: notif_rule_key
+Revises: assessment_session_state
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "notif_rule_key"
+down_revision: Union[str, None] = "assessment_session_state"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "notifications",
+        sa.Column("rule_key", sa.String(length=120), nullable=True),
+    )
+    op.execute(
+        sa.text(
+            "UPDATE notifications SET rule_key = LEFT(data->>'rule_key', 120) "
+            "WHERE rule_key IS NULL AND data IS NOT NULL AND data->>'rule_key' IS NOT NULL"
+        )
+    )
+    op.create_index(
+        "ix_notifications_user_rule_created",
+        "notifications",
+        ["user_id", "rule_key", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_user_rule_created", table_name="notifications")
+    op.drop_column("notifications", "rule_key")
@@ -0,0 +1,40 @@
+"""Shared phase prefetch buffer table (cross-worker claim).
+
+Revision ID: phase_prefetch_entries
+Revises: merge_password_resets_phases
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "phase_prefetch_entries"
+down_revision: Union[str, None] = "merge_password_resets_phases"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "phase_prefetch_entries",
+        sa.Column("entry_key", sa.String(length=80), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("level_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("started_at", sa.Float(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("entry_key"),
+    )
+    op.create_index(
+        "ix_phase_prefetch_entries_user_id",
+        "phase_prefetch_entries",
+        ["user_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_phase_prefetch_entries_user_id", table_name="phase_prefetch_entries")
+    op.drop_table("phase_prefetch_entries")
@@ -0,0 +1,43 @@
+"""Pre-generated challenge question pool (phase_question_pool).
+
+Revision ID: question_pool_table
+Revises: leaderboard_board_user
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "question_pool_table"
+down_revision: Union[str, None] = "leaderboard_board_user"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "phase_question_pool",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("phase_number", sa.Integer(), nullable=False),
+        sa.Column("subject", sa.String(40), nullable=False),
+        sa.Column("question_type", sa.String(30), nullable=False),
+        sa.Column("band", sa.String(12), nullable=False),
+        sa.Column("topic", sa.String(200), nullable=False, server_default=""),
+        sa.Column("text_key", sa.String(40), nullable=False),
+        sa.Column("format_version", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("served_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint("phase_number", "subject", "text_key", name="uq_question_pool_stem"),
+    )
+    op.create_index(
+        "ix_question_pool_draw",
+        "phase_question_pool",
+        ["phase_number", "subject", "band", "format_version", "served_count"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_question_pool_draw", table_name="phase_question_pool")
+    op.drop_table("phase_question_pool")
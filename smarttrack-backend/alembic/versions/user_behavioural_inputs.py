@@ -0,0 +1,35 @@
+"""Materialized behavioural-match inputs per learner (user_behavioural_inputs).
+
+Revision ID: user_behavioural_inputs
+Revises: challenge_response_signature
+
+One row per learner with the signals collect_behavioural_inputs needs
+(app.recommendations.behavioural_inputs). Writes to the source tables bump
+``generation`` and clear ``payload``; the next read rebuilds it, so the
+table starts empty.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "user_behavioural_inputs"
+down_revision: Union[str, None] = "challenge_response_signature"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_behavioural_inputs",
+        sa.Column("user_id", sa.UUID(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("format_version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("generation", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_behavioural_inputs")
@@ -3,10 +3,13 @@ AI Chat Router — endpoints for the learning assistant chatbot.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
+from app.database import get_db
+from app.llm.streaming import sse_response
 from app.users.models import User
-from app.ai_chat.service import get_ai_response
+from app.ai_chat.service import UNREACHABLE_MESSAGE, get_ai_response, stream_ai_response
 
 router = APIRouter(tags=["AI Chat"])
 
@@ -21,9 +24,7 @@ class ChatResponse(BaseModel):
     response: str
 
 
-@router.post("/ai/chat", response_model=ChatResponse)
-async def chat(body: ChatRequest, user: User = Depends(get_current_user)):
-    """Send a message to the AI learning assistant."""
+def _chat_message(body: ChatRequest) -> str:
     if not body.message.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -33,6 +34,31 @@ async def chat(body: ChatRequest, user: User = Depends(get_current_user)):
     message = body.message
     if body.lesson_context:
         message = f"[Context: I am studying {body.lesson_context}]\n\n{body.message}"
+    return message
+
+
+@router.post("/ai/chat", response_model=ChatResponse)
+async def chat(body: ChatRequest, user: User = Depends(get_current_user)):
+    """Send a message to the AI learning assistant."""
+    response = await get_ai_response(_chat_message(body), body.history)
+    return ChatResponse(response=response)
+
 
-    response = await get_ai_response(message, body.history)
-    return ChatResponse(response=response)
\ No newline at end of file
+@router.post("/ai/chat/stream")
+async def chat_stream(
+    body: ChatRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Streamed /ai/chat (SSE): ``token`` events as the model writes, then
+    ``done`` with ``time_to_first_token_ms`` — or ``error``.
+    """
+    message = _chat_message(body)
+    # Auth was the only DB work; give the connection back before streaming.
+    await db.close()
+    return sse_response(
+        stream_ai_response(message, body.history),
+        route="ai_chat",
+        failure_detail=UNREACHABLE_MESSAGE,
+    )
\ No newline at end of file
@@ -3,8 +3,11 @@ AI Chat Service — uses NVIDIA API (Llama) to power the learning assistant.
 """
 import httpx
 import logging
+from typing import AsyncIterator
 
 from app.config import settings
+from app.llm.http_pool import llm_post
+from app.llm.streaming import StreamUnavailable, stream_chat
 
 logger = logging.getLogger(__name__)
 
@@ -36,14 +39,15 @@ LEARNING_ASSISTANT_SYSTEM_PROMPT = (
 )
 
 
-async def get_ai_response(message: str, history: list[dict] | None = None):
-    """
-    Get a response from the AI tutor via NVIDIA API (Llama 3.1).
-    """
-    if not settings.NVIDIA_API_KEY:
-        logger.error("NVIDIA_API_KEY not configured")
-        return "The AI assistant is not configured yet. Please set your NVIDIA_API_KEY in the .env file."
+NOT_CONFIGURED_MESSAGE = (
+    "The AI assistant is not configured yet. Please set your NVIDIA_API_KEY in the .env file."
+)
+UNREACHABLE_MESSAGE = (
+    "I'm having trouble reaching my AI backend right now. Please try again in a moment."
+)
+
 
+def _chat_messages(message: str, history: list[dict] | None) -> list[dict]:
     # Build message list with system prompt + history + current message
     messages = [{"role": "system", "content": LEARNING_ASSISTANT_SYSTEM_PROMPT}]
 
@@ -55,10 +59,20 @@ async def get_ai_response(message: str, history: list[dict] | None = None):
 
     # Add the current user message
     messages.append({"role": "user", "content": message})
+    return messages
+
+
+async def get_ai_response(message: str, history: list[dict] | None = None):
+    """
+    Get a response from the AI tutor via NVIDIA API (Llama 3.1).
+    """
+    if not settings.NVIDIA_API_KEY:
+        logger.error("NVIDIA_API_KEY not configured")
+        return NOT_CONFIGURED_MESSAGE
 
     payload = {
         "model": settings.NVIDIA_MODEL,
-        "messages": messages,
+        "messages": _chat_messages(message, history),
         "temperature": 0.7,
         "top_p": 0.95,
         "max_tokens": 2048,
@@ -70,21 +84,55 @@ async def get_ai_response(message: str, history: list[dict] | None = None):
     }
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                NVIDIA_CHAT_URL,
-                headers=headers,
-                json=payload,
-            )
-            response.raise_for_status()
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
+        response = await llm_post(
+            NVIDIA_CHAT_URL,
+            headers=headers,
+            json=payload,
+            timeout=60.0,
+        )
+        response.raise_for_status()
+        result = response.json()
+        return result["choices"][0]["message"]["content"]
     except httpx.HTTPStatusError as e:
         logger.error(f"NVIDIA API HTTP error {e.response.status_code}: {e.response.text}")
-        return "I'm having trouble reaching my AI backend right now. Please try again in a moment."
+        return UNREACHABLE_MESSAGE
     except httpx.TimeoutException:
         logger.error("NVIDIA API request timed out")
         return "The AI is taking too long to respond. Please try again."
     except Exception as e:
         logger.error(f"NVIDIA API error: {e}")
-        return "I hit a technical snag. Could you try asking again?"
\ No newline at end of file
+        return "I hit a technical snag. Could you try asking again?"
+
+async def stream_ai_response(
+    message: str, history: list[dict] | None = None
+) -> AsyncIterator[str]:
+    """
+    Same conversation as get_ai_response, yielded token by token.
+
+    When nothing can be streamed the learner gets the same fallback text the
+    blocking endpoint returns.
+    """
+    if not settings.NVIDIA_API_KEY:
+        logger.error("NVIDIA_API_KEY not configured")
+        yield NOT_CONFIGURED_MESSAGE
+        return
+
+    provider = {
+        "name": "NVIDIA",
+        "url": NVIDIA_CHAT_URL,
+        "model": settings.NVIDIA_MODEL,
+        "api_key": settings.NVIDIA_API_KEY,
+    }
+    try:
+        async for text in stream_chat(
+            [provider],
+            _chat_messages(message, history),
+            temperature=0.7,
+            top_p=0.95,
+            max_tokens=2048,
+            timeout=60.0,
+        ):
+            yield text
+    except StreamUnavailable as e:
+        logger.error(f"NVIDIA API stream unavailable: {e.__cause__ or e}")
+        yield UNREACHABLE_MESSAGE
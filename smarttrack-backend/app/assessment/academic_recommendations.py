@@ -3,8 +3,11 @@ academic_recommendations.py
 ───────────────────────────
 Academic results upload + grade extraction.
 
-PDFs are parsed with pypdf (text extraction + WASSCE grade regex).
-Images still use best-effort LLM vision when available.
+PDFs are parsed with pypdf (text extraction + WASSCE grade regex) in the
+document parse pool (app.assessment.document_parsing), off the event loop.
+Images still use best-effort LLM vision when available. Finished analyses are
+cached by content hash, so the same slip is never parsed or sent to the
+vision model twice.
 """
 from __future__ import annotations
 
@@ -21,7 +24,9 @@ from typing import Any
 
 from pypdf import PdfReader
 
+from app.assessment.document_parsing import ParseTimeout, content_hash, document_cache, parse_pool
 from app.assessment.starter_arena import get_ai_response
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -198,12 +203,16 @@ def save_academic_file(user_id: str, filename: str, data: bytes) -> tuple[str, P
     return stored_name, dest
 
 
-def extract_text_from_pdf(data: bytes) -> str:
-    """Extract plain text from a PDF using pypdf."""
+def extract_text_from_pdf(data: bytes, max_pages: int | None = None) -> str:
+    """Extract plain text from the first ``max_pages`` pages (ACADEMIC_PDF_MAX_PAGES) of a PDF."""
+    if max_pages is None:
+        max_pages = int(getattr(settings, "ACADEMIC_PDF_MAX_PAGES", 4))
     try:
         reader = PdfReader(io.BytesIO(data))
         parts: list[str] = []
-        for page in reader.pages:
+        for index, page in enumerate(reader.pages):
+            if max_pages and index >= max_pages:
+                break
             text = page.extract_text() or ""
             if text.strip():
                 parts.append(text)
@@ -711,107 +720,163 @@ async def extract_grades_with_ai(
     return list(result.get("grades") or [])
 
 
-async def analyze_academic_document(
-    *,
-    filename: str,
-    content_type: str | None,
-    data: bytes,
-    profile_name: str | None = None,
-) -> dict[str, Any]:
+def parse_document_bytes(data: bytes, *, pdf: bool) -> dict[str, Any]:
     """
-    Extract grades and decide whether the file looks like WAEC/WASSCE results.
-
-    Returns:
-      grades, waec, candidate_name, name_match, method
+    CPU-bound half of the analysis (runs in the parse pool): text, grades,
+    candidate name and the WAEC gate. ``pdf`` is False for unknown file types,
+    which fall back to their leading bytes as plain text.
     """
+    text = extract_text_from_pdf(data)
+    method = "pdf_text" if pdf else "binary_pdf"
+    if not text and pdf:
+        return {"text": "", "method": "pdf_empty"}
+    if not text:
+        text = data[:12000].decode("utf-8", errors="ignore")
+        method = "plain_text"
+        if not text.strip():
+            return {"text": "", "method": "none"}
+    grades = parse_grades_from_text(text)
+    return {
+        "text": text,
+        "method": method,
+        "grades": grades,
+        "candidate_name": extract_candidate_name_from_text(text),
+        "waec": assess_waec_document(text, grades=grades),
+    }
+
+
+def _cacheable(analysis: dict[str, Any]) -> bool:
+    """Keep answers that will not change on a retry; provider failures may."""
+    waec = analysis.get("waec") or {}
+    if analysis.get("method") in {"pdf_empty", "none"}:
+        return True
+    if analysis.get("method") == "image_vision":
+        return "vision_model" in (waec.get("reasons") or [])
+    return bool(
+        waec.get("is_waec")
+        and analysis.get("candidate_name")
+        and len(analysis.get("grades") or []) >= MIN_GRADES_FOR_CONFIRM
+    )
+
+
+def _document_kind(filename: str, content_type: str | None) -> str:
     ext = Path(filename).suffix.lower()
-    is_pdf = ext == ".pdf" or (content_type or "").lower() == "application/pdf"
-    is_image = (content_type or "").startswith("image/") or ext in {
+    if ext == ".pdf" or (content_type or "").lower() == "application/pdf":
+        return "pdf"
+    if (content_type or "").startswith("image/") or ext in {
         ".png",
         ".jpg",
         ".jpeg",
         ".webp",
-    }
+    }:
+        return "image"
+    return "other"
 
-    async def _from_text(text: str, method: str) -> dict[str, Any]:
-        grades = parse_grades_from_text(text)
-        candidate_name = extract_candidate_name_from_text(text)
-        waec = assess_waec_document(text, grades=grades)
-        # Only ask the LLM when the document already looks like WAEC,
-        # or when markers are present but regex missed the table / name.
-        if (not grades or not candidate_name) and (
-            waec["is_waec"] or waec["confidence"] >= 0.55
-        ):
-            ai = await _extract_grades_with_ai_from_text(text, filename)
-            if not grades:
-                grades = list(ai.get("grades") or [])
-            if not candidate_name:
-                candidate_name = ai.get("candidate_name")
-            waec = assess_waec_document(text, grades=grades)
-        elif grades and not waec["is_waec"]:
-            waec = assess_waec_document(text, grades=grades)
-        name_match = compare_candidate_to_profile(profile_name, candidate_name)
-        return {
-            "grades": grades,
-            "waec": waec,
-            "candidate_name": candidate_name,
-            "name_match": name_match,
-            "method": method,
-        }
 
-    if is_pdf:
-        pdf_text = extract_text_from_pdf(data)
-        if not pdf_text:
-            logger.warning(
-                "pypdf extracted no text from %s (may be a scanned/image-only PDF)",
-                filename,
-            )
-            return {
-                "grades": [],
-                "candidate_name": None,
-                "name_match": compare_candidate_to_profile(profile_name, None),
-                "waec": {
-                    "is_waec": False,
-                    "confidence": 0.0,
-                    "reasons": ["no_readable_text"],
-                },
-                "method": "pdf_empty",
-            }
-        return await _from_text(pdf_text, "pdf_text")
-
-    if is_image:
+async def _analyze_document_facts(
+    *,
+    filename: str,
+    content_type: str | None,
+    data: bytes,
+    kind: str,
+) -> dict[str, Any]:
+    """grades, waec, candidate_name, method — everything that depends on the file alone."""
+    if kind == "image":
         vision = await _analyze_image_document(
             filename=filename,
             content_type=content_type,
             data=data,
         )
-        candidate_name = vision.get("candidate_name")
         return {
             "grades": vision["grades"],
             "waec": vision["waec"],
-            "candidate_name": candidate_name,
-            "name_match": compare_candidate_to_profile(profile_name, candidate_name),
+            "candidate_name": vision.get("candidate_name"),
             "method": "image_vision",
         }
 
-    pdf_text = extract_text_from_pdf(data)
-    if pdf_text:
-        return await _from_text(pdf_text, "binary_pdf")
+    try:
+        parsed = await parse_pool.run(parse_document_bytes, data, pdf=kind == "pdf")
+    except ParseTimeout:
+        logger.warning("Parsing %s timed out", filename)
+        parsed = {"text": "", "method": "timeout"}
+    except Exception:
+        logger.exception("Parsing %s failed", filename)
+        parsed = {"text": "", "method": "error"}
+
+    text = parsed["text"]
+    method = parsed["method"]
+    if not text:
+        if method == "pdf_empty":
+            logger.warning(
+                "pypdf extracted no text from %s (may be a scanned/image-only PDF)",
+                filename,
+            )
+        return {
+            "grades": [],
+            "candidate_name": None,
+            "waec": {
+                "is_waec": False,
+                "confidence": 0.0,
+                "reasons": ["no_readable_text" if method == "pdf_empty" else "unreadable"],
+            },
+            "method": method,
+        }
 
-    sample = data[:12000].decode("utf-8", errors="ignore")
-    if sample.strip():
-        return await _from_text(sample, "plain_text")
+    grades = parsed["grades"]
+    candidate_name = parsed["candidate_name"]
+    waec = parsed["waec"]
+    # Only ask the LLM when the document already looks like WAEC,
+    # or when markers are present but regex missed the table / name.
+    if (not grades or not candidate_name) and (
+        waec["is_waec"] or waec["confidence"] >= 0.55
+    ):
+        ai = await _extract_grades_with_ai_from_text(text, filename)
+        if not grades:
+            grades = list(ai.get("grades") or [])
+        if not candidate_name:
+            candidate_name = ai.get("candidate_name")
+        waec = assess_waec_document(text, grades=grades)
+    return {
+        "grades": grades,
+        "waec": waec,
+        "candidate_name": candidate_name,
+        "method": method,
+    }
 
+
+async def analyze_academic_document(
+    *,
+    filename: str,
+    content_type: str | None,
+    data: bytes,
+    profile_name: str | None = None,
+    data_hash: str | None = None,
+) -> dict[str, Any]:
+    """
+    Extract grades and decide whether the file looks like WAEC/WASSCE results.
+
+    Served from ``document_cache`` when the same bytes were analysed before
+    (pass ``data_hash`` if the caller already hashed them).
+
+    Returns:
+      grades, waec, candidate_name, name_match, method
+    """
+    kind = _document_kind(filename, content_type)
+    # The same bytes take a different path as a PDF than as an image.
+    key = f"{kind}:{data_hash or content_hash(data)}"
+    facts = await document_cache.get(key)
+    if facts is None:
+        facts = await _analyze_document_facts(
+            filename=filename,
+            content_type=content_type,
+            data=data,
+            kind=kind,
+        )
+        if _cacheable(facts):
+            await document_cache.put(key, facts)
     return {
-        "grades": [],
-        "candidate_name": None,
-        "name_match": compare_candidate_to_profile(profile_name, None),
-        "waec": {
-            "is_waec": False,
-            "confidence": 0.0,
-            "reasons": ["unreadable"],
-        },
-        "method": "none",
+        **facts,
+        "name_match": compare_candidate_to_profile(profile_name, facts.get("candidate_name")),
     }
 
 
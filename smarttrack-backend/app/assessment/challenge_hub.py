@@ -25,13 +25,22 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.assessment.models import ChallengeSession, ChallengeResponse
+from app.assessment.session_store import session_store
 from app.assessment.starter_arena import get_ai_response
-from app.users.models import User
+from app.auth.user_cache import lock_user_for_update
 
 logger = logging.getLogger(__name__)
 
-# ── In-memory session store for active challenges ─────────────────────────
-_challenge_sessions: dict = {}
+# ── Active challenge state lives in the shared session store ──────────────
+_SESSION_NAMESPACE = "challenge_hub"
+
+
+async def _load_session(session_id: str) -> dict | None:
+    return await session_store.get(_SESSION_NAMESPACE, session_id)
+
+
+async def _save_session(session: dict) -> None:
+    await session_store.put(_SESSION_NAMESPACE, session["session_id"], session)
 
 # ── Core Subjects (exactly 4, in order) ────────────────────────────────────
 CORE_SUBJECTS = [
@@ -620,7 +629,7 @@ async def start_challenge_session(
             formatted.append(_format_question(q, subject, i))
         all_questions[subject] = formatted
 
-    _challenge_sessions[session_id] = {
+    await _save_session({
         "session_id": session_id,
         "db_session_id": db_session.id,
         "user_id": user_id,
@@ -638,7 +647,7 @@ async def start_challenge_session(
         "correct_count": 0,
         "wrong_count": 0,
         "started_at": datetime.now(timezone.utc).isoformat(),
-    }
+    })
 
     first_subject = CORE_SUBJECTS[0]
     first_questions = all_questions.get(first_subject, [])
@@ -736,22 +745,22 @@ def _format_question(q: dict, subject: str, index: int) -> dict:
     return formatted
 
 
-def get_current_subject_index(session_id: str) -> int | None:
+async def get_current_subject_index(session_id: str) -> int | None:
     """Get the current subject index for a session."""
-    session = _challenge_sessions.get(session_id)
+    session = await _load_session(session_id)
     if not session:
         return None
     return session.get("current_subject_index", 0)
 
 
-def get_session_data(session_id: str) -> dict | None:
-    """Get the in-memory session data for a session."""
-    return _challenge_sessions.get(session_id)
+async def get_session_data(session_id: str) -> dict | None:
+    """Get the stored state for a session (a copy; save changes explicitly)."""
+    return await _load_session(session_id)
 
 
-def get_current_questions(session_id: str, subject_index: int) -> dict | None:
+async def get_current_questions(session_id: str, subject_index: int) -> dict | None:
     """Get the questions for a specific subject within a session."""
-    session = _challenge_sessions.get(session_id)
+    session = await _load_session(session_id)
     if not session:
         return None
     if subject_index >= len(CORE_SUBJECTS):
@@ -761,6 +770,7 @@ def get_current_questions(session_id: str, subject_index: int) -> dict | None:
     questions = session["questions"].get(subject, [])
     session["current_subject_index"] = subject_index
     session["current_question_index"] = 0
+    await _save_session(session)
 
     return {
         "session_id": session_id,
@@ -771,7 +781,7 @@ def get_current_questions(session_id: str, subject_index: int) -> dict | None:
     }
 
 
-def submit_answer(
+async def submit_answer(
     session_id: str,
     subject: str,
     question_index: int,
@@ -780,7 +790,7 @@ def submit_answer(
 ) -> dict | None:
     """Submit an answer, calculate XP, return feedback.
     Handles all question types for comparison."""
-    session = _challenge_sessions.get(session_id)
+    session = await _load_session(session_id)
     if not session:
         return None
 
@@ -894,6 +904,8 @@ def submit_answer(
             session["current_subject_index"] = next_idx
             session["current_question_index"] = 0
 
+    await _save_session(session)
+
     return {
         "is_correct": is_correct,
         "correct_answer": correct_answer,
@@ -914,7 +926,7 @@ async def continue_challenge_level(
     session_id: str,
 ) -> dict:
     """Generate the next challenge level's 24 questions when the student chooses to continue."""
-    session = _challenge_sessions.get(session_id)
+    session = await _load_session(session_id)
     if not session:
         return {"error": "Session not found"}
 
@@ -986,6 +998,7 @@ async def continue_challenge_level(
         all_questions[subject] = formatted
 
     session["questions"] = all_questions
+    await _save_session(session)
 
     first_subject = CORE_SUBJECTS[0]
     first_questions = all_questions.get(first_subject, [])
@@ -1053,7 +1066,7 @@ async def credit_pending_xp(
     Called when a challenge level completes (L1/L2) and again on /complete
     so exiting before L3 still keeps earned XP.
     """
-    session = _challenge_sessions.get(session_id)
+    session = await _load_session(session_id)
     if not session:
         return {"error": "Session not found"}
 
@@ -1070,18 +1083,20 @@ async def credit_pending_xp(
         db_session.correct_count = session.get("correct_count", 0)
         db_session.wrong_count = session.get("wrong_count", 0)
 
-    user = await db.get(User, user_id)
-    user_xp = None
-    if user:
-        if delta != 0:
-            user.xp = max(0, (user.xp or 0) + delta)
-        from app.users.gamification import rank_for_xp
+    # db.get would return the cached snapshot get_current_user attached.
+    user = await lock_user_for_update(db, user_id)
+    from app.users.gamification import apply_xp
 
-        user.rank = rank_for_xp(user.xp or 0)
-        user_xp = user.xp or 0
+    if delta < 0:
+        # Boards only count XP earned; a net loss lowers the profile total alone.
+        user.xp = max(0, (user.xp or 0) + delta)
+    # Gains go through apply_xp so the Overall and weekly boards are credited
+    # (Challenge Hub mixes subjects, so there is no per-subject board here).
+    _earned, _rank, user_xp = apply_xp(user, delta)
 
     session["xp_credited"] = total_xp
     await db.commit()
+    await _save_session(session)
 
     return {
         "xp_credited_delta": delta,
@@ -1094,7 +1109,7 @@ async def complete_session(
     db: AsyncSession, user_id, session_id: str
 ) -> dict:
     """Finalise a challenge session: save to DB, update XP, return summary."""
-    session = _challenge_sessions.get(session_id)
+    session = await _load_session(session_id)
     if not session:
         return {"error": "Session not found"}
 
@@ -1175,9 +1190,9 @@ async def complete_session(
     return summary
 
 
-def get_session_summary(session_id: str) -> dict | None:
-    """Get session summary from in-memory data (before persisting)."""
-    session = _challenge_sessions.get(session_id)
+async def get_session_summary(session_id: str) -> dict | None:
+    """Get session summary from stored session state (before persisting)."""
+    session = await _load_session(session_id)
     if not session:
         return None
 
@@ -19,6 +19,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.assessment.models import DailyStreakProgress
 from app.auth.dependencies import get_current_user
+from app.auth.user_cache import lock_user_for_update
 from app.database import get_db
 from app.users.models import User
 
@@ -264,7 +265,10 @@ async def update_daily_streak_progress(
 
         level_xp_map = {1: 100, 2: 150, 3: 200}
         xp_reward = level_xp_map.get(body.level_id, 100)
-        xp_earned, _rank, _user_xp = apply_xp(current_user, xp_reward)
+        current_user = await lock_user_for_update(db, current_user.id)
+        xp_earned, _rank, _user_xp = apply_xp(
+            current_user, xp_reward, category=body.subject_id
+        )
         streak_info = record_daily_challenge_streak(current_user)
         streak_updated = bool(streak_info.get("incremented"))
         await db.flush()
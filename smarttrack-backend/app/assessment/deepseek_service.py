@@ -12,6 +12,7 @@ from typing import Optional, Dict, Any
 import httpx
 
 from app.config import settings
+from app.llm.http_pool import llm_post
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -218,16 +219,16 @@ Important:
                     "top_p": 1.0,
                     "max_tokens": 2048
                 }
-                async with httpx.AsyncClient(timeout=120.0) as client:
-                    response = await client.post(
-                        "https://integrate.api.nvidia.com/v1/chat/completions",
-                        headers=headers,
-                        json=payload
-                    )
-                    response.raise_for_status()
-                    result_data = response.json()
-                    response_text = result_data["choices"][0]["message"]["content"]
-                    logger.info("Successfully received response from NVIDIA API.")
+                response = await llm_post(
+                    "https://integrate.api.nvidia.com/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=120.0,
+                )
+                response.raise_for_status()
+                result_data = response.json()
+                response_text = result_data["choices"][0]["message"]["content"]
+                logger.info("Successfully received response from NVIDIA API.")
             except httpx.ReadTimeout:
                 err_msg = "NVIDIA API request timed out after 120s. The model may be overloaded — please retry."
                 logger.error(err_msg)
@@ -267,16 +268,16 @@ Important:
                     "max_tokens": 2048,
                     "stream": False,
                 }
-                async with httpx.AsyncClient(timeout=120.0) as client:
-                    response = await client.post(
-                        DEEPSEEK_CHAT_URL,
-                        headers=headers,
-                        json=payload
-                    )
-                    response.raise_for_status()
-                    result_data = response.json()
-                    response_text = result_data["choices"][0]["message"]["content"]
-                    logger.info("Successfully received response from DeepSeek API.")
+                response = await llm_post(
+                    DEEPSEEK_CHAT_URL,
+                    headers=headers,
+                    json=payload,
+                    timeout=120.0,
+                )
+                response.raise_for_status()
+                result_data = response.json()
+                response_text = result_data["choices"][0]["message"]["content"]
+                logger.info("Successfully received response from DeepSeek API.")
 
             except httpx.HTTPStatusError as e:
                 err_msg = f"DeepSeek API HTTP error {e.response.status_code}: {e.response.text}"
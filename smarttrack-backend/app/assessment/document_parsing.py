@@ -0,0 +1,241 @@
+"""
+Off-loop parsing for academic results uploads.
+
+pypdf text extraction and the WASSCE grade / candidate-name regexes are
+CPU-bound; run on the event loop they stalled every other request on the
+worker for the length of a parse. ``parse_pool.run(fn, ...)`` sends them to a
+small process pool instead:
+
+  • ACADEMIC_PARSE_WORKERS processes (0 = a thread in this process), forked
+    lazily from a forkserver that has the parser module preloaded
+  • ACADEMIC_PARSE_TIMEOUT_SECONDS per job; a job that overruns raises
+    ``ParseTimeout`` and the pool is replaced, so a pathological PDF cannot
+    pin a worker (ACADEMIC_PDF_MAX_PAGES caps the pages read in the first place)
+  • workers are recycled every MAX_TASKS_PER_CHILD jobs to bound pypdf's memory
+
+``document_cache`` keeps finished analyses by the sha256 of the uploaded
+bytes (same SQLite file across workers), so re-uploading the same slip skips
+extraction and the vision-model call. Entries hold document facts only — the
+profile name match is recomputed per request.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from app.config import settings
+from app.media.media_cache import MediaCache, resolve_data_path
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Imported once in the forkserver so each worker starts warm.
+PRELOAD_MODULE = "app.assessment.academic_recommendations"
+MAX_TASKS_PER_CHILD = 100
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+PARSE_JOBS = registry.counter(
+    "smarttrack_academic_parse_jobs_total",
+    "Academic document parse jobs by outcome (ok, timeout, error).",
+    ("outcome",),
+)
+PARSE_SECONDS = registry.histogram(
+    "smarttrack_academic_parse_seconds",
+    "Wall time of academic document parse jobs, including pool queueing.",
+)
+DOCUMENT_CACHE_LOOKUPS = registry.counter(
+    "smarttrack_academic_document_cache_total",
+    "Academic document cache lookups by result (hit, miss).",
+    ("result",),
+)
+
+
+class ParseTimeout(RuntimeError):
+    """A parse job ran past ACADEMIC_PARSE_TIMEOUT_SECONDS."""
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _context() -> Any:
+    try:
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([PRELOAD_MODULE])
+        return ctx
+    except ValueError:  # no forkserver on this platform (Windows)
+        return multiprocessing.get_context("spawn")
+
+
+class ParsePool:
+    def __init__(self) -> None:
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def workers() -> int:
+        return max(0, int(getattr(settings, "ACADEMIC_PARSE_WORKERS", 2)))
+
+    @staticmethod
+    def timeout() -> float:
+        return float(getattr(settings, "ACADEMIC_PARSE_TIMEOUT_SECONDS", 20.0))
+
+    def _get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers(),
+                    mp_context=_context(),
+                    max_tasks_per_child=MAX_TASKS_PER_CHILD,
+                )
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Drop ``executor`` and kill its workers (a stuck job never returns on its own)."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _in_process(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        return await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), self.timeout())
+
+    async def _in_pool(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        # One retry: a timeout elsewhere may have replaced the pool under this job.
+        for attempt in range(2):
+            executor = self._get()
+            try:
+                future = asyncio.wrap_future(executor.submit(fn, *args, **kwargs))
+                return await asyncio.wait_for(future, self.timeout())
+            except BrokenProcessPool:
+                self._discard(executor)
+                if attempt:
+                    raise
+            except asyncio.TimeoutError:
+                self._discard(executor)
+                raise
+        raise BrokenProcessPool("parse pool unavailable")  # pragma: no cover
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn(*args, **kwargs)`` off the event loop; ``fn`` must be a module-level function."""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            if self.workers() == 0:
+                result = await self._in_process(fn, args, kwargs)
+            else:
+                result = await self._in_pool(fn, args, kwargs)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise ParseTimeout(f"{fn.__name__} exceeded {self.timeout():.0f}s") from None
+        finally:
+            PARSE_JOBS.inc(outcome)
+            PARSE_SECONDS.observe(time.perf_counter() - started)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class DocumentCache:
+    def __init__(self) -> None:
+        self._store: MediaCache | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def ttl() -> float:
+        return float(getattr(settings, "ACADEMIC_DOCUMENT_CACHE_TTL_SECONDS", 604_800) or 0.0)
+
+    def _persistent(self) -> MediaCache | None:
+        if self.ttl() <= 0:
+            return None
+        with self._lock:
+            if self._store is None:
+                raw = getattr(settings, "ACADEMIC_DOCUMENT_CACHE_DB_PATH", "") or ""
+                if not raw:
+                    return None
+                try:
+                    self._store = MediaCache(
+                        resolve_data_path(raw),
+                        namespace="academic_document",
+                        default_ttl=self.ttl(),
+                        max_entries=int(getattr(settings, "ACADEMIC_DOCUMENT_CACHE_MAX_ENTRIES", 5000)),
+                    )
+                except Exception as exc:
+                    logger.warning("Academic document cache unavailable (%s)", exc)
+                    return None
+            return self._store
+
+    def _read(self, key: str) -> dict[str, Any] | None:
+        store = self._persistent()
+        if store is None:
+            return None
+        try:
+            found = store.get(key)
+        except Exception as exc:
+            logger.warning("Academic document cache read failed: %s", exc)
+            found = None
+        DOCUMENT_CACHE_LOOKUPS.inc("hit" if found else "miss")
+        return found
+
+    def _write(self, key: str, analysis: dict[str, Any]) -> None:
+        store = self._persistent()
+        if store is None:
+            return
+        try:
+            store.put(key, analysis)
+        except Exception as exc:
+            logger.warning("Academic document cache write failed: %s", exc)
+
+    # SQLite (open, busy timeout, eviction) stays off the event loop.
+    async def get(self, key: str) -> dict[str, Any] | None:
+        return await asyncio.to_thread(self._read, key)
+
+    async def put(self, key: str, analysis: dict[str, Any]) -> None:
+        await asyncio.to_thread(self._write, key, analysis)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+
+async def read_upload(upload: Any, limit: int) -> tuple[bytes, str, bool]:
+    """
+    Read an ``UploadFile`` in chunks: (bytes, sha256, too_large).
+
+    Starlette has already spooled the multipart body to a temp file; reading
+    it in bounded chunks stops at ``limit`` instead of pulling an oversized
+    upload into memory, and hashes it on the way.
+    """
+    digest = hashlib.sha256()
+    chunks: list[bytes] = []
+    size = 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            return b"", "", True
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest(), False
+
+
+parse_pool = ParsePool()
+document_cache = DocumentCache()
@@ -7,7 +7,9 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
@@ -16,6 +18,7 @@ from sqlalchemy import (
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.assessment.near_duplicates import signature_bytes
 from app.database import Base
 
 
@@ -152,8 +155,17 @@ class BehavioralProfile(Base):
 
 
 class Leaderboard(Base):
-    """Precomputed leaderboard scores for fast retrieval."""
+    """Precomputed leaderboard scores for fast retrieval.
+
+    Snapshot behind ``app.leaderboards``: one row per (board, learner), ranked
+    in memory. Weekly XP boards use domain="weekly_xp", category="<ISO week>".
+    """
     __tablename__ = "leaderboards"
+    __table_args__ = (
+        UniqueConstraint("domain", "category", "user_id", name="uq_leaderboards_board_user"),
+        # Incremental refresh: rows of one board changed since the last sync.
+        Index("ix_leaderboards_board_updated", "domain", "category", "last_updated"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     domain: Mapped[str] = mapped_column(String(50), nullable=False, index=True)  # "Overall", "Math", "Logic", etc.
@@ -402,6 +414,31 @@ class ChallengeSession(Base):
         return f"<ChallengeSession id={self.id} user_id={self.user_id} level={self.challenge_level}>"
 
 
+class AssessmentSessionState(Base):
+    """Live session state shared across workers (ASSESSMENT_SESSION_BACKEND=sql).
+
+    ``payload`` is the zlib-compressed JSON state dict; ``expires_at`` is a
+    Unix timestamp refreshed on every write and used for TTL purges.
+    """
+
+    __tablename__ = "assessment_session_state"
+
+    state_key: Mapped[str] = mapped_column(String(120), primary_key=True)  # "{namespace}:{key}"
+    namespace: Mapped[str] = mapped_column(String(40), nullable=False)
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+def _question_signature(context) -> bytes | None:
+    return signature_bytes(str(context.get_current_parameters().get("question_text") or ""))
+
+
 class ChallengeResponse(Base):
     """
     Individual answer within a challenge session (ChallengeQuestion shape).
@@ -423,6 +460,10 @@ class ChallengeResponse(Base):
     subject: Mapped[str] = mapped_column(String(50), nullable=False)
     question_index: Mapped[int] = mapped_column(Integer, nullable=False)
     question_text: Mapped[str] = mapped_column(Text, nullable=False)
+    # MinHash of question_text for the learner's near-duplicate index (filled on insert)
+    question_signature: Mapped[bytes | None] = mapped_column(
+        LargeBinary, nullable=True, default=_question_signature
+    )
     question_type: Mapped[str] = mapped_column(String(30), nullable=False, default="mcq")
     options: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     # Text: ordering/matching JSON answers can exceed 500 chars
@@ -0,0 +1,166 @@
+"""
+Near-duplicate question index: shingled MinHash signatures with LSH banding.
+
+Starter Arena used to compare every candidate stem against every accepted one
+(difflib + word Jaccard, O(n²) per session), and phase challenges only caught
+exact repeats of the last CHALLENGE_EXCLUDE_HISTORY normalized stems. This
+index catches paraphrases in roughly constant time per lookup:
+
+  • ``signature(text)`` — MinHash over character 3-gram shingles of the
+    normalized stem (NUM_PERM 31-bit minima, 512 bytes as ``to_bytes``).
+    Agreeing positions estimate the Jaccard similarity of the shingle sets.
+  • ``NearDuplicateIndex`` — signatures split into bands; two stems become
+    candidates when any band matches exactly, and a candidate counts as a
+    duplicate when its estimated similarity reaches the threshold
+    (QUESTION_NEAR_DUP_THRESHOLD, default 0.6). Bands are sized so the LSH
+    curve sits below the threshold: recall over speed.
+  • Numbers gate the match: two stems are only compared when they carry the
+    same numbers in the same order. "Solve 3x = 12" and "Solve 5x = 20"
+    share most shingles but are different items — numeric variants of one
+    template are valid questions, so they never count as duplicates.
+
+Signatures are stable across processes (crc32 + fixed permutations), so phase
+challenges persist them on ``ChallengeResponse.question_signature`` and build
+a learner's index from stored bytes. ``scripts/bench_near_duplicates``
+compares this with the old pairwise check.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Iterable
+
+import numpy as np
+
+from app.config import settings
+
+NUM_PERM = 128
+SHINGLE = 3
+DEFAULT_THRESHOLD = 0.6
+
+_MERSENNE = np.uint64((1 << 31) - 1)
+_perm_rng = np.random.default_rng(20240611)
+# Fixed seed: signatures written by one worker must match every other.
+_A = _perm_rng.integers(1, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _perm_rng.integers(0, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalise(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).strip()
+
+
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def numbers(text: str) -> tuple[str, ...]:
+    """The stem's numbers in order (``200 g`` and ``200g`` agree)."""
+    return tuple(_NUMBER_RE.findall(text or ""))
+
+
+def shingles(text: str) -> set[str]:
+    value = normalise(text)
+    if len(value) <= SHINGLE:
+        return {value} if value else set()
+    return {value[i : i + SHINGLE] for i in range(len(value) - SHINGLE + 1)}
+
+
+def signature(text: str) -> np.ndarray | None:
+    """MinHash signature of a stem, or None when nothing is left after normalising."""
+    grams = shingles(text)
+    if not grams:
+        return None
+    hashes = np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)
+    ) % _MERSENNE
+    # (a·x + b) mod p per permutation; a, x < 2³¹ so nothing overflows uint64.
+    permuted = (np.outer(hashes, _A) + _B) % _MERSENNE
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(raw: bytes | None) -> np.ndarray | None:
+    if not raw or len(raw) != NUM_PERM * 4:
+        return None  # missing, or written with another NUM_PERM: recompute
+    return np.frombuffer(raw, dtype="<u4").astype(np.uint32)
+
+
+def signature_bytes(text: str) -> bytes | None:
+    sig = signature(text)
+    return to_bytes(sig) if sig is not None else None
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two stems' shingle sets."""
+    return float(np.count_nonzero(first == second)) / NUM_PERM
+
+
+def threshold() -> float:
+    return float(getattr(settings, "QUESTION_NEAR_DUP_THRESHOLD", DEFAULT_THRESHOLD))
+
+
+def band_layout(value: float) -> tuple[int, int]:
+    """(bands, rows) whose LSH threshold (1/b)^(1/r) is the tightest one still below ``value``."""
+    best = (NUM_PERM, 1)
+    for rows in range(1, NUM_PERM + 1):
+        if NUM_PERM % rows:
+            continue
+        bands = NUM_PERM // rows
+        if (1.0 / bands) ** (1.0 / rows) <= value * 0.8:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """LSH buckets over MinHash signatures; ``add`` and ``match`` are O(bands)."""
+
+    def __init__(self, threshold_value: float | None = None) -> None:
+        self.threshold = threshold() if threshold_value is None else float(threshold_value)
+        self.bands, self.rows = band_layout(self.threshold)
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: list[np.ndarray] = []
+        self._numbers: list[tuple[str, ...]] = []
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _keys(self, sig: np.ndarray) -> list[bytes]:
+        raw = sig.tobytes()
+        width = self.rows * 4
+        return [raw[start : start + width] for start in range(0, len(raw), width)]
+
+    def add(self, text: str, sig: np.ndarray | None = None) -> None:
+        """Index a stem; pass ``sig`` (e.g. from stored bytes) to skip hashing it again."""
+        sig = signature(text) if sig is None else sig
+        if sig is None:
+            return
+        slot = len(self._signatures)
+        self._signatures.append(sig)
+        self._numbers.append(numbers(text))
+        for bucket, key in zip(self._buckets, self._keys(sig)):
+            bucket.setdefault(key, []).append(slot)
+
+    def update(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            self.add(text)
+
+    def match(self, text: str, sig: np.ndarray | None = None) -> float:
+        """Best estimated similarity among indexed stems with the same numbers."""
+        sig = signature(text) if sig is None else sig
+        if sig is None or not self._signatures:
+            return 0.0
+        values = numbers(text)
+        seen: set[int] = set()
+        best = 0.0
+        for bucket, key in zip(self._buckets, self._keys(sig)):
+            for slot in bucket.get(key, ()):
+                if slot not in seen:
+                    seen.add(slot)
+                    if self._numbers[slot] == values:
+                        best = max(best, similarity(sig, self._signatures[slot]))
+        return best
+
+    def is_near_duplicate(self, text: str, sig: np.ndarray | None = None) -> bool:
+        return self.match(text, sig) >= self.threshold
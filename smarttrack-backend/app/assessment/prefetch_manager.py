@@ -6,8 +6,10 @@ Background prefetch of AI-generated questions via NVIDIA API.
 Implements a stale-while-revalidate pattern:
 1. Static DB questions are served immediately while AI questions generate.
 2. AI questions are prefetched in the background on calibration start.
-3. Once ready, they are injected into the next_questions piggyback so
-   the frontend sees them seamlessly.
+3. Each question is queued as soon as it validates, so the next_questions
+   piggyback can use the first ones while the rest are still generating.
+4. When the queue drops to ASSESSMENT_PREFETCH_LOW_WATERMARK while the learner
+   is answering, another batch is generated (up to ASSESSMENT_PREFETCH_MAX_QUESTIONS).
 """
 
 from __future__ import annotations
@@ -19,6 +21,7 @@ from typing import Any, Dict, List, Optional
 from dataclasses import dataclass, field
 
 from app.assessment.deepseek_service import generate_challenge_question
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +82,39 @@ class PrefetchEntry:
     status: str = "idle"  # idle | fetching | ready | error
     error: Optional[str] = None
     started_at: Optional[float] = None
+    programme: str = "General Science"
+    batch_size: int = 5
+    issued: int = 0  # generation slots handed out; drives rotation and IDs
+    in_flight: int = 0
+    task: Optional["asyncio.Task[None]"] = None
+
+
+def _concurrency() -> int:
+    return max(1, int(getattr(settings, "ASSESSMENT_PREFETCH_CONCURRENCY", 3)))
+
+
+def _low_watermark() -> int:
+    return max(0, int(getattr(settings, "ASSESSMENT_PREFETCH_LOW_WATERMARK", 2)))
+
+
+def _max_questions() -> int:
+    return max(0, int(getattr(settings, "ASSESSMENT_PREFETCH_MAX_QUESTIONS", 25)))
+
+
+def _slot(seq: int) -> tuple[str, str, Optional[str]]:
+    """Category / difficulty / science concept for generation slot ``seq``.
+
+    For Scientific Thinking, rotates through different branches of science
+    (physics, chemistry, biology, earth science, astronomy, environmental, health)
+    with specific real-world concepts — so every science question is unique.
+    """
+    category = CATEGORY_CYCLE[seq % len(CATEGORY_CYCLE)]
+    difficulty = ["Beginner", "Intermediate", "Advanced"][seq % 3]
+    concept = None
+    if category == "Scientific Thinking" and SCIENCE_CONCEPTS:
+        sci = SCIENCE_CONCEPTS[(seq // len(CATEGORY_CYCLE)) % len(SCIENCE_CONCEPTS)]
+        concept = sci["concept"]
+    return category, difficulty, concept
 
 
 class PrefetchManager:
@@ -95,117 +131,163 @@ class PrefetchManager:
             logger.info(f"Prefetch already in progress for user {user_id}")
             return
 
-        entry = PrefetchEntry(status="fetching", started_at=time.time())
+        entry = PrefetchEntry(
+            programme=programme or "General Science",
+            batch_size=max(1, count),
+            started_at=time.time(),
+        )
         self._cache[user_id] = entry
-        asyncio.create_task(self._do_prefetch(user_id, programme, count))
+        self._launch(user_id, entry, min(entry.batch_size, _max_questions()))
         logger.info(f"[Prefetch] Started for user={user_id} programme={programme} count={count}")
 
     def get_questions(self, user_id: str, limit: int = 3) -> List[Dict[str, Any]]:
-        """Pull up to `limit` prefetched questions (consumes them)."""
+        """Pull up to `limit` prefetched questions (consumes them).
+
+        Returns whatever has arrived so far, even mid-refill, and tops the
+        queue up when it falls to the low watermark.
+        """
         entry = self._cache.get(user_id)
-        if not entry or entry.status != "ready" or not entry.questions:
+        if not entry:
             return []
         batch = entry.questions[:limit]
         entry.questions = entry.questions[limit:]
-        if entry.questions:
-            entry.status = "ready"
-        else:
+        if entry.status == "ready" and not entry.questions:
             entry.status = "idle"
+        self._maybe_top_up(user_id, entry)
         return batch
 
     def has_questions(self, user_id: str) -> bool:
         entry = self._cache.get(user_id)
-        return entry is not None and entry.status == "ready" and bool(entry.questions)
+        return entry is not None and bool(entry.questions)
 
     def status(self, user_id: str) -> str:
         entry = self._cache.get(user_id)
         return entry.status if entry else "idle"
 
     def clear(self, user_id: str) -> None:
-        self._cache.pop(user_id, None)
+        entry = self._cache.pop(user_id, None)
+        if entry and entry.task and not entry.task.done():
+            entry.task.cancel()
 
-    # ── Background worker ───────────────────────────────────────────────────
+    # ── Refill ──────────────────────────────────────────────────────────────
 
-    async def _do_prefetch(self, user_id: str, programme: str, count: int) -> None:
-        """Fetch `count` questions from NVIDIA API, cycling categories/difficulties.
-        
-        For Scientific Thinking, rotates through different branches of science
-        (physics, chemistry, biology, earth science, astronomy, environmental, health)
-        with specific real-world concepts — so every science question is unique.
-        """
-        generated: List[Dict[str, Any]] = []
-        science_idx = 0
+    def _maybe_top_up(self, user_id: str, entry: PrefetchEntry) -> None:
+        if entry.status in ("fetching", "error"):
+            return
+        if len(entry.questions) > _low_watermark():
+            return
+        remaining = _max_questions() - entry.issued
+        if remaining <= 0:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        logger.info(f"[Prefetch] Low watermark for user={user_id} — topping up")
+        self._launch(user_id, entry, min(entry.batch_size, remaining))
 
-        for i in range(count):
-            category = CATEGORY_CYCLE[i % len(CATEGORY_CYCLE)]
-            difficulty = ["Beginner", "Intermediate", "Advanced"][i % 3]
+    def _launch(self, user_id: str, entry: PrefetchEntry, count: int) -> None:
+        if count <= 0:
+            entry.status = "ready" if entry.questions else "idle"
+            return
+        entry.status = "fetching"
+        first_seq = entry.issued
+        entry.issued += count
+        entry.in_flight += count
+        entry.task = asyncio.create_task(self._do_prefetch(user_id, entry, first_seq, count))
+
+    # ── Background worker ───────────────────────────────────────────────────
 
-            concept = None
-            if category == "Scientific Thinking" and SCIENCE_CONCEPTS:
-                sci = SCIENCE_CONCEPTS[science_idx % len(SCIENCE_CONCEPTS)]
-                concept = sci["concept"]
-                science_idx += 1
+    async def _do_prefetch(
+        self, user_id: str, entry: PrefetchEntry, first_seq: int, count: int
+    ) -> None:
+        """Generate `count` questions with bounded concurrency.
 
+        Each validated question is queued on the entry as soon as it arrives.
+        """
+        sem = asyncio.Semaphore(_concurrency())
+        started = time.time()
+        produced = 0
+
+        async def _one(seq: int) -> None:
+            nonlocal produced
+            question = None
             try:
-                result = await generate_challenge_question(
-                    category=category,
-                    difficulty=difficulty,
-                    programme=programme or "General Science",
-                    concept=concept,
-                )
+                async with sem:
+                    question = await self._generate_one(seq, entry.programme)
             except Exception as exc:
-                logger.warning(f"[Prefetch] NVIDIA call failed ({exc}) — continuing")
-                continue
-
-            if not result.get("success"):
-                logger.warning(f"[Prefetch] Generation failed: {result.get('error')}")
-                continue
-
-            ai_q = result["data"]
-            letters = ["A", "B", "C", "D"]
-
-            # Convert options list → dict {A: ..., B: ..., ...}
-            options_dict: Dict[str, str] = {}
-            for idx, opt in enumerate(ai_q["options"]):
-                if idx < len(letters):
-                    options_dict[letters[idx]] = str(opt)
-
-            # Normalise correct_answer to a letter
-            answer = ai_q["correct_answer"]
-            if answer in letters:
-                correct_letter = answer
-            elif answer in ai_q["options"]:
-                correct_letter = letters[ai_q["options"].index(answer)]
-            else:
-                correct_letter = "A"
-
-            generated.append({
-                "id": -(i + 1),  # Negative IDs = AI-generated (no DB clash)
-                "domain": ai_q.get("category", category),
-                "question": ai_q["question"],
-                "options": options_dict,
-                "correct_answer": correct_letter,
-                "difficulty_a": 1.2,
-                "difficulty_b": DIFFICULTY_MAP.get(ai_q.get("difficulty", "Intermediate"), 0.0),
-                "difficulty_c": 0.25,
-                "explanation": ai_q.get("explanation", ""),
-                "is_ai_generated": True,
-            })
+                logger.warning(f"[Prefetch] Unusable AI question ({exc!r}) — skipping")
+            finally:
+                entry.in_flight -= 1
+            # Dropped if the session was cleared / restarted meanwhile.
+            if question is not None and self._cache.get(user_id) is entry:
+                entry.questions.append(question)
+                produced += 1
 
-        entry = self._cache.get(user_id)
-        if not entry:
-            return
+        await asyncio.gather(*(_one(first_seq + i) for i in range(count)))
 
-        if generated:
-            entry.questions = generated
-            entry.status = "ready"
-            elapsed = time.time() - (entry.started_at or time.time())
-            logger.info(f"[Prefetch] Done for user={user_id} — {len(generated)} qs in {elapsed:.1f}s")
+        if self._cache.get(user_id) is not entry:
+            return
+        if produced:
+            entry.status = "ready" if entry.questions else "idle"
+            entry.error = None
+            logger.info(
+                f"[Prefetch] Done for user={user_id} — {produced} qs in {time.time() - started:.1f}s"
+            )
         else:
             entry.status = "error"
             entry.error = "All AI generation attempts failed"
             logger.warning(f"[Prefetch] All {count} attempts failed for user={user_id}")
 
+    async def _generate_one(self, seq: int, programme: str) -> Optional[Dict[str, Any]]:
+        """One NVIDIA/DeepSeek call → calibration question dict, or None."""
+        category, difficulty, concept = _slot(seq)
+        try:
+            result = await generate_challenge_question(
+                category=category,
+                difficulty=difficulty,
+                programme=programme or "General Science",
+                concept=concept,
+            )
+        except Exception as exc:
+            logger.warning(f"[Prefetch] NVIDIA call failed ({exc}) — continuing")
+            return None
+
+        if not result.get("success"):
+            logger.warning(f"[Prefetch] Generation failed: {result.get('error')}")
+            return None
+
+        ai_q = result["data"]
+        letters = ["A", "B", "C", "D"]
+
+        # Convert options list → dict {A: ..., B: ..., ...}
+        options_dict: Dict[str, str] = {}
+        for idx, opt in enumerate(ai_q["options"]):
+            if idx < len(letters):
+                options_dict[letters[idx]] = str(opt)
+
+        # Normalise correct_answer to a letter
+        answer = ai_q["correct_answer"]
+        if answer in letters:
+            correct_letter = answer
+        elif answer in ai_q["options"]:
+            correct_letter = letters[ai_q["options"].index(answer)]
+        else:
+            correct_letter = "A"
+
+        return {
+            "id": -(seq + 1),  # Negative IDs = AI-generated (no DB clash)
+            "domain": ai_q.get("category", category),
+            "question": ai_q["question"],
+            "options": options_dict,
+            "correct_answer": correct_letter,
+            "difficulty_a": 1.2,
+            "difficulty_b": DIFFICULTY_MAP.get(ai_q.get("difficulty", "Intermediate"), 0.0),
+            "difficulty_c": 0.25,
+            "explanation": ai_q.get("explanation", ""),
+            "is_ai_generated": True,
+        }
+
 
 # Singleton shared across the app
 prefetch_manager = PrefetchManager()
@@ -7,7 +7,7 @@ from datetime import datetime, timezone
 import uuid
 
 from app.assessment.models import (
-    Question, UserSkillEstimate, Response, BehavioralProfile, Leaderboard,
+    Question, UserSkillEstimate, Response, BehavioralProfile,
     LearningModule, PsychometricCard, PsychometricResponse
 )
 from app.assessment.schemas import (
@@ -37,8 +37,10 @@ from app.assessment.academic_recommendations import (
     delete_stored_academic_file,
     has_academic_upload,
     programme_fallback_skills,
+    MAX_FILE_BYTES,
     MIN_GRADES_FOR_CONFIRM,
 )
+from app.assessment.document_parsing import read_upload
 from app.recommendations.ml_career import generate_ml_knust_alternate
 from app.recommendations.eligibility import evaluate_recommendation_eligibility
 from app.recommendations.messages import (
@@ -51,11 +53,13 @@ from app.recommendations.messages import (
 )
 from app.database import get_db
 from app.auth.dependencies import get_current_user
+from app.auth.user_cache import lock_user_for_update
 from app.users.models import User, AcademicRecord
 import base64
 from app.assessment.ai_agent import get_ai_explanation
 from app.assessment.deepseek_service import generate_challenge_question
 from app.assessment.prefetch_manager import prefetch_manager
+from app.assessment.session_store import session_store
 import logging
 
 logger = logging.getLogger(__name__)
@@ -184,8 +188,7 @@ async def start_calibration(
     """
     # Clear any previous session pool for this user
     user_id_str = str(current_user.id)
-    _clear_session_pool(user_id_str)
-    pool = _get_session_pool(user_id_str)
+    pool = _new_session_pool()
     
     # Fetch ALL questions (or filtered by domain)
     if domain:
@@ -200,7 +203,7 @@ async def start_calibration(
     # Build a shuffled pool of all questions
     shuffled = list(questions)
     random.shuffle(shuffled)
-    pool["pool"] = shuffled
+    pool["pool"] = [q.id for q in shuffled]
     pool["pool_idx"] = 0
     
     # Return first batch (10 for calibration)
@@ -208,6 +211,7 @@ async def start_calibration(
     selected = shuffled[:batch_size]
     pool["pool_idx"] = batch_size
     pool["used_ids"].update(q.id for q in selected)
+    await _save_session_pool(user_id_str, pool)
     
     # ── Background prefetch AI questions while user plays ────
     programme = current_user.programme or current_user.category or "General Science"
@@ -223,24 +227,26 @@ async def start_calibration(
     }
 
 
-# ── In-memory session question pool ──────────────────────────────────────
+# ── Session question pool (shared session store) ─────────────────────────
 # Tracks which question IDs have been served to each user session
-_session_pools: Dict[str, Dict] = {}
-
-def _get_session_pool(user_id: str) -> Dict:
-    """Get or create a session pool for the user."""
-    if user_id not in _session_pools:
-        _session_pools[user_id] = {
-            "used_ids": set(),         # question IDs already served
-            "psychometric_shown": [],
+_POOL_NAMESPACE = "calibration_pool"
+
+def _new_session_pool() -> Dict:
+    return {
+        "used_ids": set(),             # question IDs already served
+        "psychometric_shown": [],
         "psychometric_responses": [],  # psychometric answer history
-            "pool": [],                # pre-shuffled question pool
-            "pool_idx": 0,             # current index in the pool
-        }
-    return _session_pools[user_id]
+        "pool": [],                    # pre-shuffled question IDs
+        "pool_idx": 0,                 # current index in the pool
+    }
+
+async def _get_session_pool(user_id: str) -> Dict:
+    """Load the user's session pool (a fresh one if none is stored)."""
+    pool = await session_store.get(_POOL_NAMESPACE, user_id)
+    return pool if pool is not None else _new_session_pool()
 
-def _clear_session_pool(user_id: str) -> None:
-    _session_pools.pop(user_id, None)
+async def _save_session_pool(user_id: str, pool: Dict) -> None:
+    await session_store.put(_POOL_NAMESPACE, user_id, pool)
 
 
 async def _get_next_adaptive_questions(
@@ -273,12 +279,18 @@ async def _get_next_adaptive_questions(
         return prefetched[:limit]
     
     # 2. Try session pool first (pre-shuffled, deduped)
-    pool = _get_session_pool(user_id_str)
+    pool = await _get_session_pool(user_id_str)
     pool_questions = []
     if pool["pool"] and pool["pool_idx"] < len(pool["pool"]):
-        remaining = pool["pool"][pool["pool_idx"]:pool["pool_idx"] + needed]
-        pool_questions = remaining
-        pool["pool_idx"] += len(remaining)
+        remaining_ids = pool["pool"][pool["pool_idx"]:pool["pool_idx"] + needed]
+        pool["pool_idx"] += len(remaining_ids)
+        by_id = {
+            q.id: q
+            for q in (
+                await db.execute(select(Question).where(Question.id.in_(remaining_ids)))
+            ).scalars()
+        }
+        pool_questions = [by_id[qid] for qid in remaining_ids if qid in by_id]
         needed -= len(pool_questions)
     
     # 3. Fill remaining from DB with proper dedup
@@ -321,6 +333,8 @@ async def _get_next_adaptive_questions(
             pool["used_ids"].update(q.id for q in fresh)
             pool_questions.extend(fresh)
     
+    await _save_session_pool(user_id_str, pool)
+
     # Merge: prefetched AI first, then DB questions
     result = list(prefetched)
     result.extend(pool_questions)
@@ -340,11 +354,8 @@ async def get_next_question(
     when its local queue runs low to avoid showing an empty state.
     Uses the session pool to avoid returning duplicates.
     """
-    session_pool = _get_session_pool(str(current_user.id))
-    selected = await _get_next_adaptive_questions(
-        current_user, db, domain, limit=5,
-        exclude_ids=session_pool["used_ids"],
-    )
+    # Already-served IDs come from the session pool inside the helper.
+    selected = await _get_next_adaptive_questions(current_user, db, domain, limit=5)
     serialized = []
     for q in selected:
         if isinstance(q, dict):
@@ -393,7 +404,7 @@ async def get_psychometric_card(
         }
     
     # Filter cards not yet shown this session
-    pool = _get_session_pool(str(current_user.id))
+    pool = await _get_session_pool(str(current_user.id))
     shown_ids = set(pool.get("psychometric_shown", []))
     available = [c for c in all_cards if c.card_id not in shown_ids]
     
@@ -404,6 +415,7 @@ async def get_psychometric_card(
     
     chosen = random.choice(available)
     pool["psychometric_shown"].append(chosen.card_id)
+    await _save_session_pool(str(current_user.id), pool)
     
     return {
         "id": chosen.card_id,
@@ -608,16 +620,13 @@ async def submit_response(
         # Arena / legacy challenge answers also count toward daily streak.
         from app.users.gamification import record_daily_challenge_streak
 
+        current_user = await lock_user_for_update(db, current_user.id)
         streak_info = record_daily_challenge_streak(current_user)
 
         await db.commit()
 
         # 5. Get Next Batch from session pool (no repeats)
-        session_pool = _get_session_pool(str(current_user.id))
-        next_qs = await _get_next_adaptive_questions(
-            current_user, db, domain, limit=3,
-            exclude_ids=session_pool["used_ids"],
-        )
+        next_qs = await _get_next_adaptive_questions(current_user, db, domain, limit=3)
         next_qs_resp = []
         for q in next_qs:
             if isinstance(q, dict):
@@ -700,29 +709,14 @@ async def get_leaderboard(
     category: str,
     db: AsyncSession = Depends(get_db)
 ):
-    """Segmented leaderboards."""
-    # Simplified: fetch top users from Leaderboard table
-    query = select(Leaderboard, User).join(User, Leaderboard.user_id == User.id).where(Leaderboard.domain == domain)
-    if category != "Global":
-        query = query.where(Leaderboard.category == category)
-        
-    query = query.order_by(desc(Leaderboard.score)).limit(10)
-    
-    result = await db.execute(query)
-    rows = result.all()
-    
-    entries = []
-    for rank, (lb, user) in enumerate(rows, 1):
-        entries.append({
-            "user_name": user.full_name,
-            "score": lb.score,
-            "rank": rank
-        })
+    """Segmented leaderboards (top 10). Served from app.leaderboards."""
+    from app.leaderboards.service import board_label, get_top
 
+    payload, _etag = await get_top(db, board_label(domain), board_label(category), limit=10)
     return {
         "domain": domain,
         "category": category,
-        "entries": entries
+        "entries": payload["entries"],
     }
 
 
@@ -741,6 +735,7 @@ async def generate_recommendations(
     Requires all levels completed in at least one phase. WASSCE is never mandatory.
     """
     from app.config import settings as app_settings
+    from app.recommendations.behavioural_inputs import load_behavioural_signals
     from app.recommendations.service import generate_behavioural_recommendations
 
     debug_mode = bool(getattr(app_settings, "RECOMMENDATION_DEBUG", False))
@@ -754,17 +749,10 @@ async def generate_recommendations(
         detail["eligibility"] = eligibility
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
 
-    skills_res = await db.execute(
-        select(UserSkillEstimate).where(UserSkillEstimate.user_id == current_user.id)
-    )
-    skills = skills_res.scalars().all()
-    skill_estimates = {skill.domain: skill.theta for skill in skills}
-
-    traits_res = await db.execute(
-        select(BehavioralProfile).where(BehavioralProfile.user_id == current_user.id)
-    )
-    traits = traits_res.scalars().all()
-    behavioral_traits = {trait.trait: trait.value for trait in traits}
+    # Same materialized row the behavioural path reads (no extra round trips).
+    signals = await load_behavioural_signals(db, current_user.id)
+    skill_estimates = dict(signals["skill_estimates"])
+    behavioral_traits = dict(signals["profile_traits"])
 
     grades_res = await db.execute(
         select(AcademicRecord).where(AcademicRecord.user_id == current_user.id)
@@ -1088,17 +1076,20 @@ async def upload_academic_results(
     Does NOT save grades until the learner confirms via /academic/confirm.
     Rejects files that do not look like WAEC/WASSCE results.
     """
-    data = await file.read()
+    data, data_hash, too_large = await read_upload(file, MAX_FILE_BYTES)
     filename = file.filename or "academic_results.pdf"
-    error = validate_academic_file(filename, file.content_type, len(data))
+    size = MAX_FILE_BYTES + 1 if too_large else len(data)
+    error = validate_academic_file(filename, file.content_type, size)
     if error:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
 
+    # Parsing runs in the document parse pool; a repeat upload is a cache hit.
     analysis = await analyze_academic_document(
         filename=filename,
         content_type=file.content_type,
         data=data,
         profile_name=getattr(current_user, "full_name", None),
+        data_hash=data_hash,
     )
     grades = list(analysis.get("grades") or [])
     waec = analysis.get("waec") or {}
@@ -1163,6 +1154,7 @@ async def upload_academic_results(
         )
 
     stored_name, _path = save_academic_file(str(current_user.id), filename, data)
+    current_user = await lock_user_for_update(db, current_user.id)
     profile = (
         current_user.learner_profile
         if isinstance(current_user.learner_profile, dict)
@@ -1220,6 +1212,7 @@ async def confirm_academic_upload(
             "Confirm at least one subject grade, or cancel and upload again.",
         )
 
+    current_user = await lock_user_for_update(db, current_user.id)
     profile = (
         current_user.learner_profile
         if isinstance(current_user.learner_profile, dict)
@@ -1304,6 +1297,7 @@ async def discard_academic_pending(
     db: AsyncSession = Depends(get_db),
 ):
     """Cancel an unconfirmed upload preview without removing saved results."""
+    current_user = await lock_user_for_update(db, current_user.id)
     profile = (
         current_user.learner_profile
         if isinstance(current_user.learner_profile, dict)
@@ -1323,6 +1317,7 @@ async def remove_academic_results(
     db: AsyncSession = Depends(get_db),
 ):
     """Remove confirmed WASSCE grades and any pending upload."""
+    current_user = await lock_user_for_update(db, current_user.id)
     profile = (
         current_user.learner_profile
         if isinstance(current_user.learner_profile, dict)
@@ -1390,6 +1385,7 @@ async def save_academic_records(
         )
 
     # Mark upload unlocked even for manual grade entry
+    current_user = await lock_user_for_update(db, current_user.id)
     grade_list = [{"subject": r["subject"], "grade": r["grade"]} for r in records]
     current_user.learner_profile = merge_academic_upload_into_profile(
         current_user.learner_profile if isinstance(current_user.learner_profile, dict) else {},
@@ -0,0 +1,293 @@
+"""Storage for live assessment session state (Challenge Hub, calibration pools).
+
+Replaces the module-level dicts that grew for the life of the process and
+were invisible to other uvicorn workers. State is a plain dict per
+``(namespace, key)``, stored as zlib-compressed JSON and expired after
+ASSESSMENT_SESSION_TTL_SECONDS of inactivity (every ``put`` refreshes it).
+
+Backends (ASSESSMENT_SESSION_BACKEND):
+
+  - memory — per-process LRU, bounded by ASSESSMENT_SESSION_MAX_ENTRIES
+  - sql    — ``assessment_session_state`` table, shared by every worker
+  - redis  — any Redis-protocol server; expiry is native (PX)
+
+Callers load, mutate and ``put`` back; sets and UUIDs round-trip intact.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SQL_PURGE_INTERVAL_SECONDS = 60.0
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": list(value)}
+    if isinstance(value, uuid.UUID):
+        return {"__uuid__": str(value)}
+    raise TypeError(f"{type(value).__name__} is not session-serializable")
+
+
+def _object_hook(data: dict[str, Any]) -> Any:
+    if len(data) == 1:
+        if "__set__" in data:
+            return set(data["__set__"])
+        if "__uuid__" in data:
+            return uuid.UUID(data["__uuid__"])
+    return data
+
+
+def encode_state(state: dict[str, Any]) -> bytes:
+    raw = json.dumps(state, separators=(",", ":"), ensure_ascii=False, default=_default)
+    # Level 1: written on every answer submit; ratio is close to level 6 for JSON.
+    return zlib.compress(raw.encode("utf-8"), 1)
+
+
+def decode_state(blob: bytes | None) -> dict[str, Any] | None:
+    if not blob:
+        return None
+    try:
+        return json.loads(zlib.decompress(blob).decode("utf-8"), object_hook=_object_hook)
+    except (zlib.error, ValueError):
+        logger.warning("[SessionStore] dropping undecodable session state")
+        return None
+
+
+def _ttl_seconds() -> float:
+    return max(1.0, float(getattr(settings, "ASSESSMENT_SESSION_TTL_SECONDS", 21600)))
+
+
+class SessionStore:
+    """Async key/value contract for per-session state dicts."""
+
+    name = "base"
+
+    async def get(self, namespace: str, key: str) -> dict[str, Any] | None:
+        raise NotImplementedError
+
+    async def put(
+        self, namespace: str, key: str, state: dict[str, Any], *, ttl: float | None = None
+    ) -> None:
+        raise NotImplementedError
+
+    async def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    async def purge_expired(self) -> int:
+        """Drop expired entries now; returns how many were removed."""
+        return 0
+
+    async def close(self) -> None:
+        return None
+
+
+# ── Memory ───────────────────────────────────────────────────────────────────
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process LRU of encoded states (single worker / tests)."""
+
+    name = "memory"
+
+    def __init__(self, *, max_entries: int | None = None) -> None:
+        # key = (namespace, key) -> (expires_at, blob); ordered by last write
+        self._entries: OrderedDict[tuple[str, str], tuple[float, bytes]] = OrderedDict()
+        self._max_entries = max_entries
+        self.evicted = 0
+
+    def _limit(self) -> int:
+        if self._max_entries is not None:
+            return max(1, self._max_entries)
+        return max(1, int(getattr(settings, "ASSESSMENT_SESSION_MAX_ENTRIES", 5000)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def nbytes(self) -> int:
+        return sum(len(blob) for _, blob in self._entries.values())
+
+    async def get(self, namespace: str, key: str) -> dict[str, Any] | None:
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[(namespace, key)]
+            return None
+        return decode_state(entry[1])
+
+    async def put(
+        self, namespace: str, key: str, state: dict[str, Any], *, ttl: float | None = None
+    ) -> None:
+        now = time.monotonic()
+        self._entries[(namespace, key)] = (now + (ttl or _ttl_seconds()), encode_state(state))
+        self._entries.move_to_end((namespace, key))
+        # Oldest writes sit at the front: drop expired ones, then enforce the cap.
+        while self._entries:
+            oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self._limit():
+                break
+            del self._entries[oldest_key]
+            self.evicted += 1
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self._entries.pop((namespace, key), None)
+
+    async def purge_expired(self) -> int:
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+        return len(expired)
+
+
+# ── SQL (SQLite / Postgres) ──────────────────────────────────────────────────
+
+
+class SqlSessionStore(SessionStore):
+    """Rows in ``assessment_session_state``; expired rows are purged on write."""
+
+    name = "sql"
+
+    def __init__(self, session_factory: Any | None = None) -> None:
+        self._session_factory = session_factory
+        self._next_purge = 0.0
+
+    def _sessions(self) -> Any:
+        if self._session_factory is None:
+            from app.database import AsyncSessionLocal
+
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    async def get(self, namespace: str, key: str) -> dict[str, Any] | None:
+        from sqlalchemy import select
+
+        from app.assessment.models import AssessmentSessionState
+
+        async with self._sessions()() as db:
+            blob = (
+                await db.execute(
+                    select(AssessmentSessionState.payload).where(
+                        AssessmentSessionState.state_key == self._key(namespace, key),
+                        AssessmentSessionState.expires_at > time.time(),
+                    )
+                )
+            ).scalar_one_or_none()
+        return decode_state(blob)
+
+    async def put(
+        self, namespace: str, key: str, state: dict[str, Any], *, ttl: float | None = None
+    ) -> None:
+        from app.assessment.models import AssessmentSessionState
+
+        now = time.time()
+        async with self._sessions()() as db:
+            await db.merge(
+                AssessmentSessionState(
+                    state_key=self._key(namespace, key),
+                    namespace=namespace,
+                    expires_at=now + (ttl or _ttl_seconds()),
+                    payload=encode_state(state),
+                )
+            )
+            await db.commit()
+        if now >= self._next_purge:
+            self._next_purge = now + _SQL_PURGE_INTERVAL_SECONDS
+            await self.purge_expired()
+
+    async def delete(self, namespace: str, key: str) -> None:
+        from sqlalchemy import delete
+
+        from app.assessment.models import AssessmentSessionState
+
+        async with self._sessions()() as db:
+            await db.execute(
+                delete(AssessmentSessionState).where(
+                    AssessmentSessionState.state_key == self._key(namespace, key)
+                )
+            )
+            await db.commit()
+
+    async def purge_expired(self) -> int:
+        from sqlalchemy import delete
+
+        from app.assessment.models import AssessmentSessionState
+
+        async with self._sessions()() as db:
+            result = await db.execute(
+                delete(AssessmentSessionState).where(
+                    AssessmentSessionState.expires_at <= time.time()
+                )
+            )
+            await db.commit()
+        return int(result.rowcount or 0)
+
+
+# ── Redis protocol ───────────────────────────────────────────────────────────
+
+
+class RedisSessionStore(SessionStore):
+    """``{prefix}:{namespace}:{key}`` strings with a PX expiry."""
+
+    name = "redis"
+
+    def __init__(self, url: str, *, prefix: str = "atlas:session") -> None:
+        from app.phases.prefetch_store import RespConnection
+
+        self._conn = RespConnection(url)
+        self._prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self._prefix}:{namespace}:{key}"
+
+    async def get(self, namespace: str, key: str) -> dict[str, Any] | None:
+        return decode_state(await self._conn.execute("GET", self._key(namespace, key)))
+
+    async def put(
+        self, namespace: str, key: str, state: dict[str, Any], *, ttl: float | None = None
+    ) -> None:
+        await self._conn.execute(
+            "SET",
+            self._key(namespace, key),
+            encode_state(state),
+            "PX",
+            int((ttl or _ttl_seconds()) * 1000),
+        )
+
+    async def delete(self, namespace: str, key: str) -> None:
+        await self._conn.execute("DEL", self._key(namespace, key))
+
+    async def close(self) -> None:
+        await self._conn.close()
+
+
+def build_session_store(backend: str | None = None) -> SessionStore:
+    """Store selected by ``ASSESSMENT_SESSION_BACKEND`` (memory | sql | redis)."""
+    name = (backend or getattr(settings, "ASSESSMENT_SESSION_BACKEND", "memory") or "memory")
+    name = name.strip().lower()
+    if name == "sql":
+        return SqlSessionStore()
+    if name == "redis":
+        return RedisSessionStore(
+            getattr(settings, "ASSESSMENT_SESSION_REDIS_URL", "redis://127.0.0.1:6379/0")
+        )
+    if name != "memory":
+        logger.warning("[SessionStore] unknown backend %r; using memory", name)
+    return MemorySessionStore()
+
+
+session_store: SessionStore = build_session_store()
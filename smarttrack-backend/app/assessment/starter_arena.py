@@ -13,12 +13,13 @@ import re
 from difflib import SequenceMatcher
 from typing import Optional
 
-import httpx
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.llm.http_pool import llm_post
 from app.assessment.models import PsychometricCard, PsychometricResponse
+from app.assessment.near_duplicates import NearDuplicateIndex
 from app.assessment.psychometric_cards import PSYCHOMETRIC_CARDS
 
 logger = logging.getLogger(__name__)
@@ -242,11 +243,12 @@ async def get_ai_response(messages: list, model: str = "") -> str:
                 "max_tokens": 4096,
             }
             # Keep start latency bounded so Starter Arena never blocks ~2 minutes on deploy.
-            async with httpx.AsyncClient(timeout=12.0) as client:
-                response = await client.post(provider["url"], headers=headers, json=payload)
-                response.raise_for_status()
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
+            response = await llm_post(
+                provider["url"], headers=headers, json=payload, timeout=12.0
+            )
+            response.raise_for_status()
+            result = response.json()
+            return result["choices"][0]["message"]["content"]
         except Exception as e:
             logger.warning(f"{provider['name']} failed: {e}")
             continue
@@ -468,7 +470,11 @@ def _normalise_question_text(value: str) -> str:
 
 
 def _questions_are_similar(first: str, second: str) -> bool:
-    """Detect exact, near-copy, and strongly overlapping questions."""
+    """Detect exact, near-copy, and strongly overlapping questions.
+
+    Pairwise reference check; selection goes through NearDuplicateIndex
+    (scripts/bench_near_duplicates compares the two).
+    """
     left = _normalise_question_text(first)
     right = _normalise_question_text(second)
     if not left or not right:
@@ -482,10 +488,14 @@ def _questions_are_similar(first: str, second: str) -> bool:
     return bool(union) and len(left_words & right_words) / len(union) >= 0.68
 
 
-def _is_unique_question(question: str, existing_questions: list[str]) -> bool:
-    return not any(
-        _questions_are_similar(question, existing) for existing in existing_questions
-    )
+def _is_unique_question(
+    question: str, existing_questions: NearDuplicateIndex | list[str]
+) -> bool:
+    if not isinstance(existing_questions, NearDuplicateIndex):
+        index = NearDuplicateIndex()
+        index.update(existing_questions)
+        existing_questions = index
+    return not existing_questions.is_near_duplicate(question)
 
 
 def _balanced_psychometric_questions(
@@ -545,7 +555,7 @@ def _balanced_psychometric_questions(
     random.shuffle(candidates)
 
     selected: list[dict] = []
-    selected_texts: list[str] = []
+    selected_texts = NearDuplicateIndex()
     covered_categories: set[str] = set()
 
     # Shuffle categories so sessions stay balanced across topics, not locked
@@ -568,7 +578,7 @@ def _balanced_psychometric_questions(
         )
         if match:
             selected.append(match)
-            selected_texts.append(match["question"])
+            selected_texts.add(match["question"])
             covered_categories.add(match["category"])
             candidates.remove(match)
 
@@ -580,7 +590,7 @@ def _balanced_psychometric_questions(
             continue
         if _is_unique_question(question["question"], selected_texts):
             selected.append(question)
-            selected_texts.append(question["question"])
+            selected_texts.add(question["question"])
             covered_categories.add(question["category"])
 
     # Last resort: allow any unique remaining question.
@@ -591,7 +601,7 @@ def _balanced_psychometric_questions(
             continue
         if _is_unique_question(question["question"], selected_texts):
             selected.append(question)
-            selected_texts.append(question["question"])
+            selected_texts.add(question["question"])
             covered_categories.add(question["category"])
     return selected
 
@@ -848,7 +858,8 @@ async def _generate_adaptive_cognitive_questions(
         return []
 
     accepted: list[dict] = []
-    comparison_texts = list(existing_questions)
+    comparison_texts = NearDuplicateIndex()
+    comparison_texts.update(existing_questions)
     allowed_formats = set(COGNITIVE_FORMAT_PLAN)
     for index, item in enumerate(generated):
         if not isinstance(item, dict):
@@ -882,7 +893,7 @@ async def _generate_adaptive_cognitive_questions(
             ),
         }
         accepted.append(accepted_item)
-        comparison_texts.append(question)
+        comparison_texts.add(question)
         if len(accepted) >= count:
             break
     return accepted
@@ -964,15 +975,15 @@ async def generate_starter_session(
         candidate_fallbacks = _get_fallback_cognitive_questions(
             academic_count, shs_level
         )
-        comparison = existing_questions + [
-            question["question"] for question in cognitive_questions
-        ]
+        comparison = NearDuplicateIndex()
+        comparison.update(existing_questions)
+        comparison.update(question["question"] for question in cognitive_questions)
         for fallback in candidate_fallbacks:
             if len(cognitive_questions) >= academic_count:
                 break
             if _is_unique_question(fallback["question"], comparison):
                 cognitive_questions.append(fallback)
-                comparison.append(fallback["question"])
+                comparison.add(fallback["question"])
 
     # ── 3. Two thinking → two Get-to-Know-You → repeat ─────────────────────
     questions = _interleave_starter_blocks(psych_questions, cognitive_questions)
@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
+from app.auth.user_cache import lock_user_for_update
 from app.database import get_db
 from app.users.models import User
 from app.assessment.models import PsychometricResponse, StarterArenaResponse
@@ -209,6 +210,7 @@ async def complete_session(
             academic_responses=cognitive_responses,
         )
 
+        current_user = await lock_user_for_update(db, current_user.id)
         current_user.starter_arena_completed = True
         current_user.onboarding_completed = True
         current_user.learner_profile = profile
@@ -10,7 +10,9 @@ from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.service import decode_access_token, get_user_by_id
+from app.auth.user_cache import attach_cached_user, user_cache
 from app.database import get_db
+from app.request_metrics import stage
 from app.users.models import User
 
 bearer_scheme = HTTPBearer(auto_error=False)
@@ -43,7 +45,14 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = await get_user_by_id(user_id, db)
+    with stage("auth"):
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            user = await attach_cached_user(cached, db)
+        else:
+            user = await get_user_by_id(user_id, db)
+            if user is not None:
+                user_cache.put(user)
     if user is None:
         raise credentials_exception
     if not user.is_active:
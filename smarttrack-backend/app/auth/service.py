@@ -19,6 +19,7 @@ from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.user_cache import user_cache
 from app.config import settings
 from app.users.models import RefreshToken, User
 
@@ -115,6 +116,7 @@ async def revoke_all_refresh_tokens(user_id: uuid.UUID, db: AsyncSession) -> Non
     )
     for token in result.scalars().all():
         token.revoked = True
+    user_cache.invalidate(user_id)
 
 
 # ── User Lookup Helpers ───────────────────────────────────────────────────────
@@ -0,0 +1,169 @@
+"""
+Short-TTL user identity cache for ``get_current_user``.
+
+Every authenticated request used to SELECT the user row after decoding the
+JWT. This keeps a bounded LRU of column snapshots keyed by user id; a hit is
+re-attached to the request's session with ``merge(load=False)`` (no SQL).
+
+The snapshot is for authentication only: it may be a few seconds old, or
+older than a write made by another worker. Handlers that change XP, rank,
+streak or learner_profile must first call ``lock_user_for_update``, which
+re-reads the row ``FOR UPDATE`` into the same instance, so concurrent
+writers serialize. A ``before_flush`` guard enforces it: flushing a change
+to one of those columns on a cached instance that was never re-read raises
+``StaleUserWrite`` instead of committing stale values back.
+
+Invalidation (this process):
+  • any flush that updates or deletes a ``User`` (profile edits, XP, streaks,
+    deactivation) — via a Session ``after_flush`` / ``after_commit`` hook
+  • ``revoke_all_refresh_tokens`` (password change / sign out everywhere)
+
+Other workers drop their copy when AUTH_USER_CACHE_TTL_SECONDS expires, so
+keep the TTL short. 0 disables the cache.
+"""
+from __future__ import annotations
+
+import copy
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes, make_transient_to_detached
+
+from app.config import settings
+from app.users.models import User
+
+_COLUMNS = tuple(attr.key for attr in User.__mapper__.column_attrs)
+# Read-modify-write columns: a stale base silently drops other workers' writes.
+_GUARDED = ("xp", "rank", "streak", "learner_profile")
+_FROM_CACHE = "auth_user_cache_snapshot"
+
+
+class StaleUserWrite(RuntimeError):
+    """A cached ``User`` snapshot was about to overwrite read-modify-write columns."""
+
+
+class UserIdentityCache:
+    def __init__(self) -> None:
+        self._entries: OrderedDict[uuid.UUID, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def ttl() -> float:
+        return float(getattr(settings, "AUTH_USER_CACHE_TTL_SECONDS", 5.0) or 0.0)
+
+    def get(self, user_id: uuid.UUID) -> dict[str, Any] | None:
+        if self.ttl() <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, user: User) -> None:
+        ttl = self.ttl()
+        if ttl <= 0:
+            return
+        values = copy.deepcopy({key: getattr(user, key) for key in _COLUMNS})
+        limit = max(1, int(getattr(settings, "AUTH_USER_CACHE_MAX_ENTRIES", 10_000)))
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + ttl, values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl(),
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+user_cache = UserIdentityCache()
+
+
+async def attach_cached_user(values: dict[str, Any], db: AsyncSession) -> User:
+    """Turn a cached snapshot into a persistent ``User`` on ``db`` without a SELECT."""
+    user = User(**values)
+    make_transient_to_detached(user)
+    merged = await db.merge(user, load=False)
+    inspect(merged).info[_FROM_CACHE] = True
+    return merged
+
+
+async def lock_user_for_update(db: AsyncSession, user_id: uuid.UUID) -> User:
+    """The current ``User`` row, locked until commit; refreshes any attached (cached) instance."""
+    user = (
+        await db.execute(
+            select(User)
+            .where(User.id == user_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+    inspect(user).info.pop(_FROM_CACHE, None)
+    return user
+
+
+@event.listens_for(Session, "before_flush")
+def _refuse_stale_user_writes(session: Session, _flush_context: Any, _instances: Any) -> None:
+    for obj in session.dirty:
+        if not isinstance(obj, User) or not inspect(obj).info.get(_FROM_CACHE):
+            continue
+        changed = [key for key in _GUARDED if attributes.get_history(obj, key).has_changes()]
+        if changed:
+            raise StaleUserWrite(
+                f"{', '.join(changed)} changed on a cached User snapshot; "
+                "call lock_user_for_update first"
+            )
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_users(session: Session, _flush_context: Any) -> None:
+    written = session.info.setdefault("auth_user_cache_ids", set())
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            user_cache.invalidate(obj.id)
+            written.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    # A concurrent miss may have re-cached the pre-commit row; drop it again.
+    for user_id in session.info.pop("auth_user_cache_ids", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop("auth_user_cache_ids", None)
@@ -46,6 +46,13 @@ class Settings(BaseSettings):
     # ── DeepSeek AI ────────────────────────────────────────────────────────────
     DEEPSEEK_API_KEY: str = ""
     DEEPSEEK_MODEL: str = "deepseek-chat"
+    # Response cache for opted-in, low-temperature calls (visual analysis, image
+    # planner). Memory LRU + SQLite file; TTL 0 disables it.
+    LLM_RESPONSE_CACHE_TTL_SECONDS: float = 604_800
+    LLM_RESPONSE_CACHE_MAX_TEMPERATURE: float = 0.3
+    LLM_RESPONSE_CACHE_DB_PATH: str = "data/llm_response_cache.sqlite3"
+    LLM_RESPONSE_CACHE_MAX_ENTRIES: int = 20_000
+    LLM_RESPONSE_CACHE_MEMORY_ENTRIES: int = 512
 
     # ── NVIDIA AI ────────────────────────────────────────────────────────────
     NVIDIA_API_KEY: str = ""
@@ -84,6 +91,20 @@ class Settings(BaseSettings):
     LEARNING_NUDGE_LEVELS: int = 2
     # How many recent answered texts to exclude to reduce cross-level repeats.
     CHALLENGE_EXCLUDE_HISTORY: int = 80
+    # Answered stems loaded into the learner's near-duplicate (MinHash/LSH) index.
+    CHALLENGE_NEAR_DUP_HISTORY: int = 500
+    # Estimated shingle Jaccard at which two stems count as the same question
+    # (phase challenges and Starter Arena).
+    QUESTION_NEAR_DUP_THRESHOLD: float = 0.6
+    # Academic results uploads (app.assessment.document_parsing): PDF parsing runs
+    # in this many worker processes (0 = a thread in the API process), each job
+    # capped in time and pages. Analyses are cached by file hash (TTL 0 = off).
+    ACADEMIC_PARSE_WORKERS: int = 2
+    ACADEMIC_PARSE_TIMEOUT_SECONDS: float = 20.0
+    ACADEMIC_PDF_MAX_PAGES: int = 4
+    ACADEMIC_DOCUMENT_CACHE_DB_PATH: str = "data/academic_document_cache.sqlite3"
+    ACADEMIC_DOCUMENT_CACHE_TTL_SECONDS: float = 604_800
+    ACADEMIC_DOCUMENT_CACHE_MAX_ENTRIES: int = 5000
     PSYCHO_CHECKPOINT_COUNT: int = 8  # one question from each of 8 varied categories
 
     # ── ML programme recommendations (Decision Tree is primary) ───────────
@@ -92,28 +113,78 @@ class Settings(BaseSettings):
     # Legacy aliases (still accepted via env for older .env files)
     ML_ALTERNATE_ENABLED: bool = True
     ML_ALTERNATE_TOP_N: int = 5
+    # Max grade profiles per POST /recommendations/batch-score request.
+    ML_BATCH_MAX_PROFILES: int = 5000
+    # Batch-score requests allowed per account per minute.
+    ML_BATCH_RATE_LIMIT: int = 3
+    # Behavioural match results cached per input fingerprint (0 = no cache).
+    BEHAVIOURAL_MATCH_CACHE_SIZE: int = 2048
     # When true (or ENVIRONMENT=development), attach recommendation debug payload.
     RECOMMENDATION_DEBUG: bool = False
 
     PIXABAY_API_KEY: str = ""
     EDUCATIONAL_IMAGES_ENABLED: bool = True
+    # Image / video retrieval cache (SQLite, app.media.media_cache). The *_CACHE_PATH
+    # JSON files are the legacy format, imported once on first open.
+    EDUCATIONAL_MEDIA_CACHE_DB_PATH: str = "data/educational_media_cache.sqlite3"
     EDUCATIONAL_IMAGE_CACHE_PATH: str = "data/educational_image_cache.json"
+    # 0 = image entries never expire (re-scored on every hit anyway).
+    EDUCATIONAL_IMAGE_CACHE_TTL_SECONDS: float = 0
+    EDUCATIONAL_IMAGE_CACHE_MAX_ENTRIES: int = 5000
     # YouTube Data API v3 (optional). Without it, Atlas uses a public search fallback.
     YOUTUBE_API_KEY: str = ""
     EDUCATIONAL_VIDEOS_ENABLED: bool = True
     EDUCATIONAL_VIDEO_CACHE_PATH: str = "data/educational_video_cache.json"
     EDUCATIONAL_VIDEO_CACHE_TTL_SECONDS: float = 86_400
+    EDUCATIONAL_VIDEO_CACHE_MAX_ENTRIES: int = 2000
     EDUCATIONAL_VIDEO_LIMIT: int = 3
+    # get_current_user identity cache (app.auth.user_cache). Entries are dropped on
+    # any user write in this process; other workers see changes after the TTL.
+    # 0 = always SELECT the user.
+    AUTH_USER_CACHE_TTL_SECONDS: float = 5.0
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10_000
+    # Per-request "SELECT 1" in get_db. False relies on pool_pre_ping alone
+    # (one fewer round trip; connection errors mid-handler are not retried).
+    DB_SESSION_PING: bool = True
+    # Learning Center search index: how often to check curriculum_lessons for edits.
+    CURRICULUM_SEARCH_REFRESH_SECONDS: float = 30.0
+    # Phase/level catalogue (app.phases.snapshot) is cached in-process this long.
+    # Re-seeding from another process shows up after the TTL. 0 = load per request.
+    PHASE_CATALOGUE_TTL_SECONDS: float = 300.0
     # Bump when challenge question payload / UI contract changes (invalidates old clients).
     CHALLENGE_FORMAT_VERSION: int = 12
     # Parallel LLM question generation concurrency for a single level start.
     CHALLENGE_GEN_CONCURRENCY: int = 6
+    # Shared LLM HTTP pools (app.llm.http_pool). 0 = derive from CHALLENGE_GEN_CONCURRENCY.
+    LLM_POOL_MAX_CONNECTIONS: int = 0
+    # Negotiate HTTP/2 with LLM providers when the h2 package is installed.
+    LLM_HTTP2: bool = True
     # How long a prefetched question set stays valid (seconds).
     CHALLENGE_PREFETCH_TTL_SECONDS: int = 900
     # Rolling buffer: how many upcoming levels to keep prepared per learner.
     CHALLENGE_PREFETCH_BUFFER_LEVELS: int = 3
+    # Where ready prefetch sets live: memory (per-process) | sql (shared table on
+    # DATABASE_URL) | redis. Use sql/redis when running several uvicorn workers.
+    CHALLENGE_PREFETCH_BACKEND: str = "memory"
+    CHALLENGE_PREFETCH_REDIS_URL: str = "redis://127.0.0.1:6379/0"
+    # Live Challenge Hub / calibration session state: memory | sql | redis.
+    # Use sql or redis with several workers so any worker can serve a session.
+    ASSESSMENT_SESSION_BACKEND: str = "memory"
+    ASSESSMENT_SESSION_REDIS_URL: str = "redis://127.0.0.1:6379/0"
+    # Idle sessions expire after this long; memory backend also caps entry count.
+    ASSESSMENT_SESSION_TTL_SECONDS: int = 21600
+    ASSESSMENT_SESSION_MAX_ENTRIES: int = 5000
+    # Calibration AI-question prefetch (app.assessment.prefetch_manager): parallel
+    # generation calls per refill, queue size that triggers a top-up while the
+    # learner is answering, and the most AI questions generated per session.
+    ASSESSMENT_PREFETCH_CONCURRENCY: int = 3
+    ASSESSMENT_PREFETCH_LOW_WATERMARK: int = 2
+    ASSESSMENT_PREFETCH_MAX_QUESTIONS: int = 25
     # Max seconds start_level waits for an in-flight prefetch before regenerating.
     CHALLENGE_PREFETCH_WAIT_SECONDS: float = 75.0
+    # Streamed start (/phases/levels/{id}/start/stream) waits less for an in-flight
+    # prefetch: live generation shows its first question within seconds anyway.
+    CHALLENGE_STREAM_PREFETCH_WAIT_SECONDS: float = 5.0
     # When Dashboard/Challenges call /prefetch/warm, wait this long for the
     # *current* playable level to become ready (fire-and-forget from FE).
     CHALLENGE_PREFETCH_WARM_WAIT_SECONDS: float = 55.0
@@ -121,6 +192,20 @@ class Settings(BaseSettings):
     CHALLENGE_BANK_FIRST: bool = False
     # LLM attempts per question before bank/fallback (image/format misses retry first).
     CHALLENGE_LLM_ATTEMPTS: int = 3
+    # Level builds: ask DeepSeek for several items of one subject per call instead of
+    # one call per slot. Items that fail the quality gates are regenerated singly.
+    CHALLENGE_BATCH_GENERATION: bool = False
+    CHALLENGE_BATCH_MAX_ITEMS: int = 5
+    # Pre-generated question pool (scripts/build_question_pool.py): level builds draw
+    # gated items from phase_question_pool first and only call the LLM for gaps.
+    CHALLENGE_POOL_ENABLED: bool = True
+    # Retire an item after this many serves (across all learners).
+    CHALLENGE_POOL_MAX_SERVES: int = 200
+    # A draw leaving fewer spare items than this in a cell schedules a refill.
+    CHALLENGE_POOL_LOW_WATERMARK: int = 2
+    # Items generated per background refill, and the per-cell refill cooldown.
+    CHALLENGE_POOL_REFILL_BATCH: int = 6
+    CHALLENGE_POOL_REFILL_COOLDOWN_SECONDS: float = 300.0
     # DeepSeek read timeout per question call (seconds).
     CHALLENGE_LLM_TIMEOUT_SECONDS: float = 20.0
     # Fail DNS/connect quickly so offline DeepSeek cannot hang Start Level.
@@ -137,6 +222,12 @@ class Settings(BaseSettings):
     # Generation always persists in-app. Push channels stay dormant until
     # PUSH_NOTIFICATIONS_ENABLED=true AND credentials are configured.
     PUSH_NOTIFICATIONS_ENABLED: bool = False
+    # Stage 7 rules: scheduled sweep over active learners (app.notifications.scheduler).
+    # 0 = no sweep; list / unread-count endpoints evaluate rules inline instead.
+    NOTIFICATION_ENGINE_INTERVAL_SECONDS: float = 600
+    NOTIFICATION_ENGINE_BATCH_SIZE: int = 1000
+    # Learners who logged in (or signed up) within this many days; 0 = everyone active.
+    NOTIFICATION_ENGINE_ACTIVE_DAYS: float = 30
     # Firebase Admin credentials (JSON string OR path). Unused until FCM is wired.
     FCM_CREDENTIALS_JSON: str = ""
     FCM_CREDENTIALS_PATH: str = ""
@@ -146,10 +237,16 @@ class Settings(BaseSettings):
     WEB_PUSH_VAPID_SUBJECT: str = "mailto:support@atlas.local"
 
     # ── Personal Progress / future leaderboard module (Stage 5) ───────────
-    # Keep false for MVP (personal growth only). Flip to true + implement
-    # progress.future_modules.build_leaderboard_module_payload to mount rankings.
+    # Keep false for MVP (personal growth only). Flip to true to mount the
+    # weekly XP board (app.leaderboards) into the Personal Progress Dashboard.
     PROGRESS_LEADERBOARD_MODULE_ENABLED: bool = False
 
+    # ── Leaderboards (app.leaderboards) ───────────────────────────────────
+    # In-memory boards re-read rows changed by other workers at most this often.
+    LEADERBOARD_REFRESH_SECONDS: float = 30
+    # Boards kept in memory per worker (LRU); evicted boards reload on demand.
+    LEADERBOARD_MAX_BOARDS: int = 64
+
     @property
     def cors_origins_list(self) -> List[str]:
         return [o.strip() for o in self.CORS_ORIGINS.split(",")]
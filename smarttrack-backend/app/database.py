@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import time
 
 from sqlalchemy import text
 from sqlalchemy.exc import DBAPIError, OperationalError
@@ -7,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
+from app.metrics import registry
+from app.request_metrics import stage
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +36,30 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+DB_POOL_WAIT_SECONDS = registry.histogram(
+    "smarttrack_db_pool_wait_seconds",
+    "Time a request waits to check a connection out of the pool (incl. pre-ping).",
+)
+
+
+def _pool_state() -> list[tuple[tuple[str, ...], float]]:
+    pool = engine.sync_engine.pool
+    state = []
+    for field in ("size", "checkedout", "overflow", "checkedin"):
+        reader = getattr(pool, field, None)
+        if callable(reader):
+            state.append(((field,), float(reader())))
+    return state
+
+
+registry.gauge(
+    "smarttrack_db_pool",
+    "Connection pool state: size, checkedout, overflow, checkedin.",
+    ("field",),
+    callback=_pool_state,
+)
+
+
 class Base(DeclarativeBase):
     """Base class for all ORM models."""
     pass
@@ -47,8 +74,16 @@ async def get_db() -> AsyncSession:
     for attempt in range(1, MAX_DB_RETRIES + 1):
         try:
             async with AsyncSessionLocal() as session:
-                # Verify the connection is alive with a lightweight query
-                await session.execute(text("SELECT 1"))
+                waited = time.perf_counter()
+                with stage("db_pool_wait"):
+                    await session.connection()
+                DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - waited)
+                # Verify the connection is alive with a lightweight query. With
+                # DB_SESSION_PING off, pool_pre_ping still swaps dead pooled
+                # connections, but a failure in the handler is no longer retried.
+                if getattr(settings, "DB_SESSION_PING", True):
+                    with stage("db_ping"):
+                        await session.execute(text("SELECT 1"))
                 try:
                     yield session
                     await session.commit()
@@ -0,0 +1,30 @@
+"""Leaderboards — materialized, incrementally updated learner rankings.
+
+Ranking : ranking.RankIndex (order-statistics skip list, O(log n) rank/window)
+Updates : service.credit_xp (called by users.gamification.apply_xp) → upsert
+          into the ``leaderboards`` snapshot at commit → in-memory boards
+Reads   : service.get_top (ETag) / service.get_position (rank + neighbours)
+"""
+from __future__ import annotations
+
+from .ranking import RankIndex
+from .service import (
+    OVERALL_CATEGORY,
+    WEEKLY_DOMAIN,
+    credit_xp,
+    get_position,
+    get_top,
+    leaderboards,
+    week_category,
+)
+
+__all__ = [
+    "OVERALL_CATEGORY",
+    "RankIndex",
+    "WEEKLY_DOMAIN",
+    "credit_xp",
+    "get_position",
+    "get_top",
+    "leaderboards",
+    "week_category",
+]
@@ -0,0 +1,200 @@
+"""
+Order-statistics index for one leaderboard.
+
+``RankIndex`` is an indexable skip list (each forward link stores how many
+positions it skips), so insert, remove, "rank of member" and "member at
+position" are all O(log n) expected, and a top-N or neighbour window is one
+O(log n) seek plus a walk along the bottom level.
+
+Ordering: higher score first; ties go to whoever reached the score first
+(smaller ``updated`` timestamp), then member id so the order is total.
+"""
+from __future__ import annotations
+
+import math
+import random
+from typing import Any, Hashable, Iterable
+
+_MAX_LEVELS = 24  # comfortably above log2 of any realistic board size
+
+
+class _Node:
+    __slots__ = ("key", "member", "score", "next", "width")
+
+    def __init__(self, key: tuple, member: Any, score: float, levels: int) -> None:
+        self.key = key
+        self.member = member
+        self.score = score
+        self.next: list[_Node] = [None] * levels  # type: ignore[list-item]
+        self.width: list[int] = [0] * levels
+
+
+_NIL = _Node((math.inf,), None, 0.0, 0)
+
+
+class RankIndex:
+    """Members ranked by score; 1-based ranks."""
+
+    def __init__(self, *, seed: int | None = None) -> None:
+        self._head = _Node((), None, 0.0, _MAX_LEVELS)
+        self._head.next = [_NIL] * _MAX_LEVELS
+        self._head.width = [1] * _MAX_LEVELS
+        self._keys: dict[Hashable, tuple] = {}
+        self._random = random.Random(seed)
+        self._levels = 1  # levels in use; head links above this point at _NIL
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, member: Hashable) -> bool:
+        return member in self._keys
+
+    @staticmethod
+    def _key(member: Hashable, score: float, updated: float) -> tuple:
+        return (-float(score), float(updated), str(member))
+
+    def score(self, member: Hashable) -> float | None:
+        key = self._keys.get(member)
+        return None if key is None else -key[0]
+
+    def updated(self, member: Hashable) -> float | None:
+        key = self._keys.get(member)
+        return None if key is None else key[1]
+
+    def set(self, member: Hashable, score: float, updated: float = 0.0) -> bool:
+        """Insert or move ``member``. Returns False when nothing changed."""
+        key = self._key(member, score, updated)
+        old = self._keys.get(member)
+        if old == key:
+            return False
+        if old is not None:
+            self._unlink(old)
+            del self._keys[member]
+        self._link(key, member, float(score))
+        self._keys[member] = key
+        return True
+
+    def remove(self, member: Hashable) -> bool:
+        key = self._keys.pop(member, None)
+        if key is None:
+            return False
+        self._unlink(key)
+        return True
+
+    def rebuild(self, entries: Iterable[tuple[Hashable, float, float]]) -> None:
+        """Replace the contents with (member, score, updated) entries in one pass."""
+        keys = {member: self._key(member, score, updated) for member, score, updated in entries}
+        ordered = sorted((key, member) for member, key in keys.items())
+        self._head.next = [_NIL] * _MAX_LEVELS
+        last: list[_Node] = [self._head] * _MAX_LEVELS
+        last_position = [0] * _MAX_LEVELS
+        self._levels = 1
+        for position, (key, member) in enumerate(ordered, 1):
+            # Perfectly balanced tower heights; later inserts stay randomized.
+            levels = min((position & -position).bit_length(), _MAX_LEVELS)
+            self._levels = max(self._levels, levels)
+            node = _Node(key, member, -key[0], levels)
+            for level in range(levels):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        for level in range(_MAX_LEVELS):
+            last[level].next[level] = _NIL
+            last[level].width[level] = len(ordered) + 1 - last_position[level]
+        self._keys = keys
+
+    def rank(self, member: Hashable) -> int | None:
+        key = self._keys.get(member)
+        if key is None:
+            return None
+        node = self._head
+        position = 0
+        for level in reversed(range(self._levels)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position + 1
+
+    def window(self, start: int, count: int) -> list[tuple[int, Any, float]]:
+        """``count`` entries from 1-based rank ``start`` as (rank, member, score)."""
+        start = max(1, int(start))
+        if count <= 0 or start > len(self):
+            return []
+        node = self._head
+        remaining = start
+        for level in reversed(range(self._levels)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        out: list[tuple[int, Any, float]] = []
+        rank = start
+        while node is not _NIL and len(out) < count:
+            out.append((rank, node.member, node.score))
+            node = node.next[0]
+            rank += 1
+        return out
+
+    def top(self, count: int) -> list[tuple[int, Any, float]]:
+        return self.window(1, count)
+
+    def around(self, member: Hashable, radius: int) -> list[tuple[int, Any, float]]:
+        """Up to ``radius`` members either side of ``member`` (inclusive of it)."""
+        rank = self.rank(member)
+        if rank is None:
+            return []
+        radius = max(0, int(radius))
+        first = max(1, rank - radius)
+        return self.window(first, rank - first + radius + 1)
+
+    # ── skip list internals ──────────────────────────────────────────────
+
+    def _random_level(self) -> int:
+        # 1 + trailing zero bits: level k with probability 2**-k.
+        bits = self._random.getrandbits(_MAX_LEVELS - 1)
+        return (bits & -bits).bit_length() if bits else _MAX_LEVELS
+
+    def _link(self, key: tuple, member: Any, score: float) -> None:
+        levels = self._random_level()
+        if levels > self._levels:
+            for level in range(self._levels, levels):
+                self._head.next[level] = _NIL
+                self._head.width[level] = len(self._keys) + 1
+            self._levels = levels
+        chain: list[_Node] = [self._head] * self._levels
+        steps_at_level = [0] * self._levels
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        new = _Node(key, member, score, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self._levels):
+            chain[level].width[level] += 1
+
+    def _unlink(self, key: tuple) -> None:
+        chain: list[_Node] = [self._head] * self._levels
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self._levels):
+            chain[level].width[level] -= 1
@@ -0,0 +1,94 @@
+"""Authenticated leaderboards API (domain/category and weekly XP boards)."""
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import get_current_user
+from app.database import get_db
+from app.leaderboards.schemas import LeaderboardPositionResponse, LeaderboardTopResponse
+from app.leaderboards.service import (
+    WEEKLY_DOMAIN,
+    board_label,
+    get_position,
+    get_top,
+    week_category,
+)
+from app.users.models import User
+
+router = APIRouter(prefix="/leaderboards", tags=["Leaderboards"])
+
+# Same top-N for everyone; the client revalidates with If-None-Match each time.
+_CACHE_CONTROL = "private, no-cache"
+
+
+async def _top_response(
+    db: AsyncSession,
+    domain: str,
+    category: str,
+    limit: int,
+    if_none_match: str | None,
+    response: Response,
+):
+    payload, etag = await get_top(db, domain, category, limit=limit, if_none_match=if_none_match)
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if payload is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return payload
+
+
+@router.get("/weekly", response_model=LeaderboardTopResponse)
+async def weekly_top(
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=100),
+    week: str | None = Query(default=None, pattern=r"^\d{4}-W\d{2}$"),
+    if_none_match: str | None = Header(default=None),
+    _user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Most XP earned this ISO week (or ``week``, e.g. 2026-W14)."""
+    return await _top_response(
+        db, WEEKLY_DOMAIN, week or week_category(), limit, if_none_match, response
+    )
+
+
+@router.get("/weekly/me", response_model=LeaderboardPositionResponse)
+async def weekly_position(
+    radius: int = Query(default=3, ge=0, le=25),
+    week: str | None = Query(default=None, pattern=r"^\d{4}-W\d{2}$"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await get_position(
+        db, WEEKLY_DOMAIN, week or week_category(), current_user.id, radius=radius
+    )
+
+
+@router.get("/{domain}/{category}", response_model=LeaderboardTopResponse)
+async def board_top(
+    domain: str,
+    category: str,
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=100),
+    if_none_match: str | None = Header(default=None),
+    _user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Top learners by XP in a programme (``domain``) and subject (``category``, or Overall)."""
+    return await _top_response(
+        db, board_label(domain), board_label(category), limit, if_none_match, response
+    )
+
+
+@router.get("/{domain}/{category}/me", response_model=LeaderboardPositionResponse)
+async def board_position(
+    domain: str,
+    category: str,
+    radius: int = Query(default=3, ge=0, le=25),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await get_position(
+        db, board_label(domain), board_label(category), current_user.id, radius=radius
+    )
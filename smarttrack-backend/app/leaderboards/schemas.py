@@ -0,0 +1,33 @@
+"""Pydantic schemas for the leaderboards API."""
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class LeaderboardRow(BaseModel):
+    rank: int
+    user_name: str
+    school: str = ""
+    score: float
+    is_me: bool = False
+
+
+class LeaderboardTopResponse(BaseModel):
+    """Top-N of one board; identical for every viewer so it carries an ETag."""
+
+    scope: str  # "domain" | "weekly"
+    domain: str
+    category: str
+    entries: list[LeaderboardRow]
+
+
+class LeaderboardPositionResponse(BaseModel):
+    """The viewer's rank on one board plus the learners just above and below."""
+
+    scope: str
+    domain: str
+    category: str
+    total: int
+    rank: int | None = None
+    score: float = 0.0
+    entries: list[LeaderboardRow]
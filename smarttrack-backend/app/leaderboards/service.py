@@ -0,0 +1,359 @@
+"""
+Materialized leaderboards: in-memory ranks over the ``leaderboards`` snapshot.
+
+Boards
+──────
+• Domain/category : (programme, "Overall") and (programme, <subject>) — XP
+  earned in that segment. Learners without a programme rank under "General".
+• Weekly XP       : ("weekly_xp", "<ISO year>-W<week>") — XP earned this week.
+
+Writes
+──────
+``apply_xp`` calls ``credit_xp``, which stages the XP on the learner's
+session. At commit the staged credits are upserted into ``leaderboards`` in
+the same transaction as the XP itself (one statement per board touched), and
+after the commit succeeds the new absolute scores are pushed into the
+in-memory boards. A rollback drops them.
+
+Reads
+─────
+Each board is a ``RankIndex`` loaded once from the snapshot, then refreshed
+incrementally (rows with a newer ``last_updated``) at most every
+LEADERBOARD_REFRESH_SECONDS so other workers' commits show up. Top-N, "my
+rank" and neighbour windows are O(log n) in memory; only display names are
+read from ``users``.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.assessment.models import Leaderboard
+from app.config import settings
+from app.leaderboards.ranking import RankIndex
+from app.users.models import User
+
+logger = logging.getLogger(__name__)
+
+WEEKLY_DOMAIN = "weekly_xp"
+OVERALL_CATEGORY = "Overall"
+DEFAULT_DOMAIN = "General"
+
+_CREDITS_KEY = "leaderboard_credits"
+_COMMITTED_KEY = "leaderboard_committed"
+# Re-read rows a little older than the newest one seen: a transaction stamps
+# last_updated just before it commits, so it can land slightly out of order.
+_REFRESH_OVERLAP = timedelta(seconds=60)
+
+_table = Leaderboard.__table__
+
+
+def board_label(value: Any) -> str:
+    """Canonical board label: "core-mathematics" → "Core Mathematics"."""
+    text = " ".join(str(value or "").replace("_", " ").replace("-", " ").split())
+    if not text:
+        return ""
+    if text.lower() in ("overall", "global"):
+        return OVERALL_CATEGORY
+    return text[:50] if not text.islower() else text.title()[:50]
+
+
+def programme_domain(programme: Any) -> str:
+    return board_label(programme) or DEFAULT_DOMAIN
+
+
+def week_category(at: date | datetime | None = None) -> str:
+    day = at or datetime.now(timezone.utc)
+    if isinstance(day, datetime):
+        day = day.astimezone(timezone.utc).date() if day.tzinfo else day.date()
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _timestamp(at: datetime | None) -> float:
+    if at is None:
+        return 0.0
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at.timestamp()
+
+
+def _member(user_id: Any) -> uuid.UUID:
+    return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+
+
+# ── Write path: stage on the session, persist at commit ───────────────────
+
+
+def credit_xp(user: Any, earned: int, *, category: str | None = None, at: datetime | None = None) -> None:
+    """Stage ``earned`` XP for every board the learner competes on."""
+    earned = int(earned or 0)
+    session = object_session(user)
+    if earned <= 0 or session is None or getattr(user, "id", None) is None:
+        return
+    domain = programme_domain(getattr(user, "programme", None))
+    boards = {(domain, OVERALL_CATEGORY), (WEEKLY_DOMAIN, week_category(at))}
+    label = board_label(category)
+    if label:
+        boards.add((domain, label))
+    credits: Counter = session.info.setdefault(_CREDITS_KEY, Counter())
+    for domain_, category_ in boards:
+        credits[(domain_, category_, user.id)] += earned
+
+
+def _upsert_score(session: Session, domain: str, category: str, user_id: Any, delta: int, now: datetime) -> float:
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(_table).values(
+            domain=domain, category=category, user_id=user_id, score=float(delta), last_updated=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["domain", "category", "user_id"],
+            set_={"score": _table.c.score + stmt.excluded.score, "last_updated": now},
+        ).returning(_table.c.score)
+        return float(session.execute(stmt).scalar_one())
+
+    where = (
+        (_table.c.domain == domain) & (_table.c.category == category) & (_table.c.user_id == user_id)
+    )
+    result = session.execute(
+        update(_table).where(where).values(score=_table.c.score + delta, last_updated=now)
+    )
+    if not result.rowcount:
+        session.execute(
+            _table.insert().values(
+                domain=domain, category=category, user_id=user_id, score=float(delta), last_updated=now
+            )
+        )
+    return float(session.execute(select(_table.c.score).where(where)).scalar_one())
+
+
+@event.listens_for(Session, "before_commit")
+def _persist_credits(session: Session) -> None:
+    credits = session.info.pop(_CREDITS_KEY, None)
+    if not credits:
+        return
+    now = datetime.now(timezone.utc)
+    committed = session.info.setdefault(_COMMITTED_KEY, [])
+    for (domain, category, user_id), delta in sorted(credits.items(), key=lambda kv: str(kv[0])):
+        score = _upsert_score(session, domain, category, user_id, delta, now)
+        committed.append((domain, category, user_id, score, now))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    committed = session.info.pop(_COMMITTED_KEY, None)
+    if committed:
+        leaderboards.apply(committed)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_staged(session: Session, previous_transaction: Any) -> None:
+    if previous_transaction.nested:
+        return
+    session.info.pop(_CREDITS_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
+
+
+# ── Read path: in-memory boards ───────────────────────────────────────────
+
+
+class _Board:
+    __slots__ = ("domain", "category", "index", "loaded", "synced_through", "checked_at", "lock")
+
+    def __init__(self, domain: str, category: str) -> None:
+        self.domain = domain
+        self.category = category
+        self.index = RankIndex()
+        self.loaded = False
+        self.synced_through: datetime | None = None
+        self.checked_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def merge(self, user_id: Any, score: float, at: datetime | None) -> None:
+        member = _member(user_id)
+        stamp = _timestamp(at)
+        current = self.index.updated(member)
+        if current is None or stamp >= current:
+            self.index.set(member, float(score or 0.0), stamp)
+
+
+def refresh_seconds() -> float:
+    return float(getattr(settings, "LEADERBOARD_REFRESH_SECONDS", 30) or 0)
+
+
+class LeaderboardRegistry:
+    """Process-local boards keyed by (domain, category), LRU-bounded."""
+
+    def __init__(self) -> None:
+        self._boards: OrderedDict[tuple[str, str], _Board] = OrderedDict()
+
+    def clear(self) -> None:
+        self._boards.clear()
+
+    def _board(self, domain: str, category: str) -> _Board:
+        key = (domain, category)
+        board = self._boards.get(key)
+        if board is None:
+            board = self._boards[key] = _Board(domain, category)
+            limit = max(1, int(getattr(settings, "LEADERBOARD_MAX_BOARDS", 64) or 64))
+            while len(self._boards) > limit:
+                self._boards.popitem(last=False)
+        else:
+            self._boards.move_to_end(key)
+        return board
+
+    def apply(self, rows: Iterable[tuple[str, str, Any, float, datetime]]) -> None:
+        """Push committed absolute scores into boards already in memory."""
+        for domain, category, user_id, score, at in rows:
+            board = self._boards.get((domain, category))
+            if board is not None:
+                board.merge(user_id, score, at)
+
+    async def board(self, db: AsyncSession, domain: str, category: str) -> _Board:
+        board = self._board(domain, category)
+        if board.loaded and time.monotonic() - board.checked_at < refresh_seconds():
+            return board
+        async with board.lock:
+            if not board.loaded or time.monotonic() - board.checked_at >= refresh_seconds():
+                await self._sync(db, board)
+        return board
+
+    async def _sync(self, db: AsyncSession, board: _Board) -> None:
+        checked_at = time.monotonic()
+        stmt = select(Leaderboard.user_id, Leaderboard.score, Leaderboard.last_updated).where(
+            Leaderboard.domain == board.domain, Leaderboard.category == board.category
+        )
+        if board.synced_through is not None:
+            stmt = stmt.where(Leaderboard.last_updated >= board.synced_through - _REFRESH_OVERLAP)
+        rows = [
+            (user_id, score, at if at is None or at.tzinfo else at.replace(tzinfo=timezone.utc))
+            for user_id, score, at in (await db.execute(stmt)).all()
+        ]
+        if board.loaded:
+            for user_id, score, at in rows:
+                board.merge(user_id, score, at)
+        else:
+            # Cold load: build the index in one pass, keeping any newer scores
+            # committed by this worker while the query was in flight.
+            entries = {
+                _member(user_id): (float(score or 0.0), _timestamp(at)) for user_id, score, at in rows
+            }
+            for _rank, member, score in board.index.top(len(board.index)):
+                stamp = board.index.updated(member) or 0.0
+                if member not in entries or stamp >= entries[member][1]:
+                    entries[member] = (score, stamp)
+            board.index.rebuild((member, score, stamp) for member, (score, stamp) in entries.items())
+        stamps = [at for _user_id, _score, at in rows if at is not None]
+        if board.synced_through is not None:
+            stamps.append(board.synced_through)
+        board.synced_through = max(stamps) if stamps else None
+        board.loaded = True
+        board.checked_at = checked_at
+
+
+leaderboards = LeaderboardRegistry()
+
+
+def scope_of(domain: str) -> str:
+    return "weekly" if domain == WEEKLY_DOMAIN else "domain"
+
+
+def top_etag(domain: str, category: str, window: list[tuple[int, Any, float]]) -> str:
+    digest = hashlib.sha1(repr((domain, category, window)).encode()).hexdigest()[:20]
+    return f'W/"lb-{digest}"'
+
+
+async def _rows(
+    db: AsyncSession,
+    board: _Board,
+    window: list[tuple[int, Any, float]],
+    *,
+    viewer_id: Any = None,
+) -> list[dict[str, Any]]:
+    if not window:
+        return []
+    ids = [member for _rank, member, _score in window]
+    people = {
+        uid: (name, school)
+        for uid, name, school in (
+            await db.execute(select(User.id, User.full_name, User.school).where(User.id.in_(ids)))
+        ).all()
+    }
+    out = []
+    for rank, member, score in window:
+        person = people.get(member)
+        if person is None:
+            # Account deleted since the board loaded; drop it for good.
+            board.index.remove(member)
+            continue
+        out.append(
+            {
+                "rank": rank,
+                "user_name": person[0],
+                "school": person[1] or "",
+                "score": score,
+                "is_me": viewer_id is not None and member == viewer_id,
+            }
+        )
+    return out
+
+
+async def get_top(
+    db: AsyncSession,
+    domain: str,
+    category: str,
+    *,
+    limit: int = 10,
+    if_none_match: str | None = None,
+) -> tuple[dict[str, Any] | None, str]:
+    """Top ``limit`` rows and their ETag; payload is None when the ETag still matches."""
+    board = await leaderboards.board(db, domain, category)
+    window = board.index.top(limit)
+    etag = top_etag(domain, category, window)
+    if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return None, etag
+    return (
+        {
+            "scope": scope_of(domain),
+            "domain": domain,
+            "category": category,
+            "entries": await _rows(db, board, window),
+        },
+        etag,
+    )
+
+
+async def get_position(
+    db: AsyncSession,
+    domain: str,
+    category: str,
+    user_id: Any,
+    *,
+    radius: int = 3,
+) -> dict[str, Any]:
+    """The viewer's rank, score and up to ``radius`` neighbours either side."""
+    board = await leaderboards.board(db, domain, category)
+    member = _member(user_id)
+    return {
+        "scope": scope_of(domain),
+        "domain": domain,
+        "category": category,
+        "total": len(board.index),
+        "rank": board.index.rank(member),
+        "score": board.index.score(member) or 0.0,
+        "entries": await _rows(db, board, board.index.around(member, radius), viewer_id=member),
+    }
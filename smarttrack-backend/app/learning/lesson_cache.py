@@ -0,0 +1,259 @@
+"""
+AI-taught lesson cache: single-flight generation and bulk pre-warming.
+
+``generate_ai_lesson`` is a multi-stage pipeline (visual analysis, image plan,
+retrieval, lesson LLM). When a class opens the same new lesson together, every
+request used to run it and then overwrite ``ai_content_by_level`` with its own
+copy of the column. Here:
+
+  • one generation runs per (curriculum_id, shs_level, AI_CONTENT_VERSION) per
+    process; concurrent requests await the same task (a disconnecting first
+    request does not cancel it for the others)
+  • the generating task re-reads the row first (another worker may have
+    written it) and stores the lesson in its own short transaction, merging
+    into the row as it is now — lessons for other levels are kept, entries
+    from an older AI_CONTENT_VERSION are dropped
+  • ``warm_lessons`` pre-generates a subject / level with bounded concurrency
+    and a resumable progress file, so a version bump doesn't hit learners cold
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import weakref
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import select
+
+from app.assessment.models import CurriculumLesson
+from app.learning.service import AI_CONTENT_VERSION, generate_ai_lesson
+
+logger = logging.getLogger(__name__)
+
+ALL_LEVELS = ("SHS 1", "SHS 2", "SHS 3")
+
+# (curriculum_id, shs_level, AI_CONTENT_VERSION) -> generating task
+_inflight: dict[tuple[str, str, str], asyncio.Task[dict[str, Any]]] = {}
+# Serialises read-merge-write of one row in this process (SQLite has no
+# SELECT ... FOR UPDATE; on Postgres the row lock covers other workers).
+_store_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+
+def _default_sessions() -> Any:
+    from app.database import AsyncSessionLocal
+
+    return AsyncSessionLocal
+
+
+def cached_lesson(lesson: CurriculumLesson, shs_level: str) -> dict[str, Any] | None:
+    """The stored lesson for ``shs_level`` if it was built by this AI_CONTENT_VERSION."""
+    if lesson.ai_content_version != AI_CONTENT_VERSION:
+        return None
+    taught = (lesson.ai_content_by_level or {}).get(shs_level)
+    return taught or None
+
+
+async def _load_row(db: Any, curriculum_id: str, *, for_update: bool = False) -> CurriculumLesson | None:
+    stmt = select(CurriculumLesson).where(CurriculumLesson.curriculum_id == curriculum_id)
+    if for_update:
+        stmt = stmt.with_for_update()
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+async def _store(sessions: Any, curriculum_id: str, shs_level: str, taught: dict[str, Any]) -> None:
+    lock = _store_locks.get(curriculum_id)
+    if lock is None:
+        lock = _store_locks[curriculum_id] = asyncio.Lock()
+    async with lock, sessions() as db:
+        row = await _load_row(db, curriculum_id, for_update=True)
+        if row is None:
+            return
+        current = (
+            dict(row.ai_content_by_level or {})
+            if row.ai_content_version == AI_CONTENT_VERSION
+            else {}
+        )
+        current[shs_level] = taught
+        row.ai_content_by_level = current
+        row.ai_content_version = AI_CONTENT_VERSION
+        await db.commit()
+
+
+async def _generate_and_store(
+    sessions: Any,
+    curriculum_id: str,
+    shs_level: str,
+    *,
+    title: str,
+    subject: str,
+    source_content: dict[str, Any],
+) -> dict[str, Any]:
+    async with sessions() as db:
+        row = await _load_row(db, curriculum_id)
+        stored = cached_lesson(row, shs_level) if row is not None else None
+    if stored:
+        return stored
+
+    started = time.perf_counter()
+    taught = await generate_ai_lesson(
+        title=title,
+        subject=subject,
+        shs_level=shs_level,
+        source_content=source_content,
+    )
+    logger.info(
+        "[LessonCache] generated %s %s in %.1fs",
+        curriculum_id,
+        shs_level,
+        time.perf_counter() - started,
+    )
+    try:
+        await _store(sessions, curriculum_id, shs_level, taught)
+    except Exception:
+        # Learners still get the lesson; the next request regenerates it.
+        logger.exception("[LessonCache] could not store %s %s", curriculum_id, shs_level)
+    return taught
+
+
+async def get_or_generate_lesson(
+    lesson: CurriculumLesson,
+    shs_level: str,
+    *,
+    sessions: Any | None = None,
+) -> dict[str, Any]:
+    """
+    Cached AI lesson for ``shs_level``, generating it at most once at a time.
+
+    Raises ``TutorUnavailable`` (for every waiter) when generation fails.
+    """
+    taught = cached_lesson(lesson, shs_level)
+    if taught:
+        return taught
+
+    key = (lesson.curriculum_id, shs_level, AI_CONTENT_VERSION)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _generate_and_store(
+                sessions or _default_sessions(),
+                lesson.curriculum_id,
+                shs_level,
+                title=lesson.title,
+                subject=lesson.subject,
+                source_content=lesson.source_content,
+            )
+        )
+        _inflight[key] = task
+        task.add_done_callback(lambda _t, k=key: _inflight.pop(k, None))
+    else:
+        logger.debug("[LessonCache] joining in-flight generation for %s", key)
+    return await asyncio.shield(task)
+
+
+def inflight_count() -> int:
+    return len(_inflight)
+
+
+# ── Bulk warm-up ─────────────────────────────────────────────────────────────
+
+
+def _progress_key(curriculum_id: str, shs_level: str) -> str:
+    return f"{curriculum_id}|{shs_level}"
+
+
+def _read_progress(path: Path | None) -> dict[str, Any]:
+    fresh = {"version": AI_CONTENT_VERSION, "done": [], "failed": {}}
+    if path is None or not path.exists():
+        return fresh
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning("[LessonCache] unreadable progress file %s; starting over", path)
+        return fresh
+    if data.get("version") != AI_CONTENT_VERSION:
+        return fresh
+    data.setdefault("done", [])
+    data.setdefault("failed", {})
+    return data
+
+
+def _write_progress(path: Path | None, progress: dict[str, Any]) -> None:
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(progress, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def lesson_levels(lesson: CurriculumLesson) -> list[str]:
+    """Levels a learner can be taught this lesson at (see router._soft_level)."""
+    return list(lesson.shs_levels or ALL_LEVELS)
+
+
+async def warm_lessons(
+    *,
+    subject: str | None = None,
+    shs_level: str | None = None,
+    curriculum_ids: list[str] | None = None,
+    concurrency: int = 3,
+    progress_path: Path | None = None,
+    sessions: Any | None = None,
+) -> dict[str, int]:
+    """
+    Pre-generate AI lessons for the current AI_CONTENT_VERSION.
+
+    Lessons already stored at this version, or recorded as done in
+    ``progress_path`` by an earlier run, are skipped; failures are recorded
+    and retried on the next run.
+    """
+    sessions = sessions or _default_sessions()
+    progress = _read_progress(progress_path)
+    done = set(progress["done"])
+
+    async with sessions() as db:
+        stmt = select(CurriculumLesson).order_by(CurriculumLesson.curriculum_id)
+        if subject:
+            stmt = stmt.where(CurriculumLesson.subject == subject)
+        if curriculum_ids:
+            stmt = stmt.where(CurriculumLesson.curriculum_id.in_(curriculum_ids))
+        lessons = (await db.execute(stmt)).scalars().all()
+
+    jobs: list[tuple[CurriculumLesson, str]] = []
+    skipped = 0
+    for lesson in lessons:
+        for level in lesson_levels(lesson):
+            if shs_level and level != shs_level:
+                continue
+            if _progress_key(lesson.curriculum_id, level) in done or cached_lesson(lesson, level):
+                skipped += 1
+                continue
+            jobs.append((lesson, level))
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+    counts = {"generated": 0, "skipped": skipped, "failed": 0}
+
+    async def _one(lesson: CurriculumLesson, level: str) -> None:
+        key = _progress_key(lesson.curriculum_id, level)
+        async with sem:
+            try:
+                await get_or_generate_lesson(lesson, level, sessions=sessions)
+            except Exception as exc:
+                counts["failed"] += 1
+                progress["failed"][key] = str(exc) or type(exc).__name__
+                logger.warning("[LessonCache] warm-up failed for %s: %s", key, exc)
+            else:
+                counts["generated"] += 1
+                progress["done"].append(key)
+                progress["failed"].pop(key, None)
+            _write_progress(progress_path, progress)
+
+    logger.info(
+        "[LessonCache] warming %d lesson levels (%d already current)", len(jobs), skipped
+    )
+    await asyncio.gather(*(_one(lesson, level) for lesson, level in jobs))
+    return counts
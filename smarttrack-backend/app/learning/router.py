@@ -3,7 +3,6 @@ from __future__ import annotations
 
 import re
 from datetime import datetime, timezone
-from difflib import SequenceMatcher
 from typing import Any, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -14,17 +13,20 @@ from sqlalchemy.orm.attributes import flag_modified
 
 from app.assessment.models import CurriculumLesson
 from app.auth.dependencies import get_current_user
+from app.auth.user_cache import lock_user_for_update
 from app.database import get_db
+from app.learning.lesson_cache import get_or_generate_lesson
+from app.learning.search_index import SearchDoc, curriculum_index, search_score
 from app.learning.service import (
-    AI_CONTENT_VERSION,
     CHALLENGE_SUBJECT_TO_CURRICULUM,
     TutorUnavailable,
     answer_lesson_question,
-    generate_ai_lesson,
     generate_explore_source,
     resolve_explore_subject,
+    stream_lesson_answer,
     _slugify_topic,
 )
+from app.llm.streaming import sse_response
 from app.phases.models import UserSubjectPerformance
 from app.users.gamification import apply_xp
 from app.users.models import User
@@ -160,37 +162,11 @@ def _soft_level(user: User, lesson: CurriculumLesson | None = None) -> str:
 
 
 def _search_score(query: str, lesson: CurriculumLesson) -> float:
-    if not query:
-        return 1.0
-    title = _normalise(lesson.title)
-    searchable = _normalise(lesson.search_text)
-    if query == title:
-        return 1.0
-    if query in title:
-        return 0.96
-    if query in searchable:
-        return 0.82
-
-    title_ratio = SequenceMatcher(None, query, title).ratio()
-    query_words = query.split()
-    searchable_words = set(searchable.split())
-    keyword_coverage = (
-        sum(word in searchable_words for word in query_words) / max(1, len(query_words))
-    )
-    candidate_words = title.split()
-    word_scores = [
-        max(
-            (SequenceMatcher(None, word, candidate).ratio() for candidate in candidate_words),
-            default=0.0,
-        )
-        for word in query_words
-    ]
-    word_score = sum(word_scores) / max(1, len(word_scores))
-    return max(title_ratio, word_score * 0.9, keyword_coverage * 0.8)
+    return search_score(query, _normalise(lesson.title), _normalise(lesson.search_text))
 
 
 def _topic_from_lesson(
-    lesson: CurriculumLesson, *, reason: str | None = None, shs_level: str = ""
+    lesson: CurriculumLesson | SearchDoc, *, reason: str | None = None, shs_level: str = ""
 ) -> TopicResponse:
     return TopicResponse(
         curriculum_id=lesson.curriculum_id,
@@ -383,18 +359,9 @@ async def unified_search(
     """Search the full curriculum — not filtered by phase or SHS level."""
     _ = user
     search_text = (q or query or "").strip()
-    result = await db.execute(select(CurriculumLesson))
-    lessons = list(result.scalars().all())
-    if subject:
-        lessons = [L for L in lessons if L.subject.lower() == subject.lower()]
-
-    normalised_query = _normalise(search_text)
-    ranked = [(_search_score(normalised_query, lesson), lesson) for lesson in lessons]
-    if normalised_query:
-        ranked = [item for item in ranked if item[0] >= 0.40]
-    ranked.sort(key=lambda item: (-item[0], item[1].subject, item[1].title))
-
-    return [_topic_from_lesson(lesson) for _, lesson in ranked[:limit]]
+    await curriculum_index.ensure_fresh(db)
+    ranked = curriculum_index.search(search_text, subject=subject, limit=limit)
+    return [_topic_from_lesson(doc) for _, doc in ranked]
 
 
 @router.get("/topics", response_model=list[TopicResponse])
@@ -506,6 +473,7 @@ async def explore_topic(
     db.add(lesson)
     await db.commit()
     await db.refresh(lesson)
+    curriculum_index.upsert(lesson)
     return _topic_from_lesson(lesson, reason="Prepared by Atlas AI")
 
 
@@ -556,6 +524,7 @@ async def mark_opened(
     db: AsyncSession = Depends(get_db),
 ):
     lesson = await _get_lesson(curriculum_id, db)
+    user = await lock_user_for_update(db, user.id)
     profile = _profile_dict(user)
     _touch_recent(profile, lesson)
     user.learner_profile = profile
@@ -571,6 +540,7 @@ async def toggle_bookmark(
     db: AsyncSession = Depends(get_db),
 ):
     lesson = await _get_lesson(curriculum_id, db)
+    user = await lock_user_for_update(db, user.id)
     profile = _profile_dict(user)
     bookmarks = list(profile.get("learning_bookmarks") or [])
     existing = next(
@@ -693,34 +663,22 @@ async def teach_lesson(
     curriculum = await _get_lesson(curriculum_id, db)
     shs_level = _soft_level(user, curriculum)
 
+    # Concurrent requests for the same lesson/level share one generation,
+    # which stores its result itself (lesson_cache).
+    try:
+        taught_lesson = await get_or_generate_lesson(curriculum, shs_level)
+    except TutorUnavailable as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Atlas AI could not prepare this lesson. Please try again.",
+        ) from exc
+
+    # Lock only after generation so the row is not held for the model call.
+    user = await lock_user_for_update(db, user.id)
     profile = _profile_dict(user)
     _touch_recent(profile, curriculum)
     user.learner_profile = profile
     flag_modified(user, "learner_profile")
-
-    cache: dict[str, Any] = curriculum.ai_content_by_level or {}
-    taught_lesson = (
-        cache.get(shs_level)
-        if curriculum.ai_content_version == AI_CONTENT_VERSION
-        else None
-    )
-
-    if not taught_lesson:
-        try:
-            taught_lesson = await generate_ai_lesson(
-                title=curriculum.title,
-                subject=curriculum.subject,
-                shs_level=shs_level,
-                source_content=curriculum.source_content,
-            )
-        except TutorUnavailable as exc:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Atlas AI could not prepare this lesson. Please try again.",
-            ) from exc
-        curriculum.ai_content_by_level = {**cache, shs_level: taught_lesson}
-        curriculum.ai_content_version = AI_CONTENT_VERSION
-
     await db.commit()
 
     from app.media.learner_media import scrub_lesson_for_learner
@@ -755,6 +713,8 @@ async def complete_lesson(
 ):
     """Award lesson XP once per curriculum id (tracked on learner_profile)."""
     curriculum = await _get_lesson(curriculum_id, db)
+    # Fresh, locked row: a concurrent completion (any worker) waits, then sees ours.
+    user = await lock_user_for_update(db, user.id)
     profile = _profile_dict(user)
     completed = list(profile.get("completed_lessons") or [])
     if curriculum_id in completed:
@@ -768,7 +728,9 @@ async def complete_lesson(
 
     prev_rank = user.rank or "Beginner"
     prev_rank = user.rank or "Beginner"
-    xp_earned, rank, user_xp = apply_xp(user, curriculum.xp_reward or 10)
+    xp_earned, rank, user_xp = apply_xp(
+        user, curriculum.xp_reward or 10, category=curriculum.subject
+    )
     if rank != prev_rank and rank != "Beginner":
         try:
             from app.notifications.events import notify_badge_unlocked
@@ -848,3 +810,32 @@ async def ask_atlas(
             detail="Atlas AI is temporarily unavailable. Please try again.",
         ) from exc
     return TutorResponse(response=response)
+
+
+@router.post("/lessons/{curriculum_id}/ask/stream")
+async def ask_atlas_stream(
+    curriculum_id: str,
+    body: TutorRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Streamed follow-up (SSE): ``token`` events as Atlas writes, then ``done``
+    with ``time_to_first_token_ms`` — or ``error``.
+    """
+    curriculum = await _get_lesson(curriculum_id, db)
+    tokens = stream_lesson_answer(
+        question=body.message.strip(),
+        history=[message.model_dump() for message in body.history],
+        title=curriculum.title,
+        subject=curriculum.subject,
+        shs_level=_soft_level(user, curriculum),
+        source_content=curriculum.source_content,
+    )
+    # Everything the answer needs is read; give the connection back before streaming.
+    await db.close()
+    return sse_response(
+        tokens,
+        route="lesson_tutor",
+        failure_detail="Atlas AI is temporarily unavailable. Please try again.",
+    )
@@ -0,0 +1,400 @@
+"""
+In-process curriculum search index for the Learning Center.
+
+``/learning/search`` used to load every ``CurriculumLesson`` (including
+``source_content`` and ``ai_content_by_level``) and run difflib against each
+title on every request. This index keeps only the light columns in memory and
+bounds every lesson's score before running difflib on any of them:
+
+  • token inverted index over title + search_text words (keyword coverage and
+    exact substring matches via a prefix/suffix vocabulary walk)
+  • word-level fuzzy matches from a cached query-word × title-vocabulary ratio
+  • whole-title fuzzy matches bounded by character-multiset overlap (the same
+    bound difflib's ``quick_ratio`` uses), vectorised over all titles
+
+Each bound is >= the matching term of the old score. Lessons are scored with
+the unchanged formula (``search_score``) in descending bound order, stopping
+once no remaining bound can reach the 0.40 cut-off or the current top-k — so
+results are identical to the old full scan.
+
+Freshness: ``ensure_fresh(db)`` compares (row count, max updated_at) at most
+every CURRICULUM_SEARCH_REFRESH_SECONDS and pulls only rows edited since the
+last sync; a shrinking table triggers a full rebuild. Lessons created in this
+process (Atlas explore) are upserted directly.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Iterable
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.assessment.models import CurriculumLesson
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIN_SCORE = 0.40
+# word_score * 0.9 >= MIN_SCORE needs a mean best word ratio of at least this.
+_WORD_RATIO_FLOOR = MIN_SCORE / 0.9
+# Query-word × title-word ratios below this are not computed (bounded instead).
+_WORD_FLOOR = 0.3
+# Bounds are summed in a different order than the score; absorb float rounding.
+_BOUND_EPS = 1e-9
+
+
+def normalise(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", value.lower()).strip()
+
+
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 "
+_ALPHA_INDEX = {ch: i for i, ch in enumerate(_ALPHABET)}
+
+
+def _char_counts(text: str) -> list[int]:
+    counts = [0] * len(_ALPHABET)
+    for ch in text:
+        counts[_ALPHA_INDEX[ch]] += 1
+    return counts
+
+
+@lru_cache(maxsize=200_000)
+def _word_ratio(word: str, candidate: str) -> float:
+    return SequenceMatcher(None, word, candidate).ratio()
+
+
+def search_score(
+    query: str,
+    title: str,
+    searchable: str,
+    searchable_words: set[str] | frozenset[str] | None = None,
+) -> float:
+    """Relevance of a lesson (normalised title / search text) to a normalised query."""
+    if not query:
+        return 1.0
+    if query == title:
+        return 1.0
+    if query in title:
+        return 0.96
+    if query in searchable:
+        return 0.82
+
+    title_ratio = SequenceMatcher(None, query, title).ratio()
+    query_words = query.split()
+    if searchable_words is None:
+        searchable_words = set(searchable.split())
+    keyword_coverage = (
+        sum(word in searchable_words for word in query_words) / max(1, len(query_words))
+    )
+    candidate_words = title.split()
+    word_scores = [
+        max((_word_ratio(word, candidate) for candidate in candidate_words), default=0.0)
+        for word in query_words
+    ]
+    word_score = sum(word_scores) / max(1, len(word_scores))
+    return max(title_ratio, word_score * 0.9, keyword_coverage * 0.8)
+
+
+@dataclass
+class SearchDoc:
+    """Light view of a curriculum lesson (what search results need)."""
+
+    curriculum_id: str
+    title: str
+    subject: str
+    estimated_minutes: int
+    difficulty: int
+    xp_reward: int
+    norm_title: str
+    norm_search: str
+    search_words: frozenset[str]
+
+    @classmethod
+    def from_row(cls, row: Any) -> "SearchDoc":
+        norm_title = normalise(str(row.title or ""))
+        norm_search = normalise(str(row.search_text or ""))
+        return cls(
+            curriculum_id=str(row.curriculum_id),
+            title=str(row.title or ""),
+            subject=str(row.subject or ""),
+            estimated_minutes=int(row.estimated_minutes or 10),
+            difficulty=int(row.difficulty or 1),
+            xp_reward=int(row.xp_reward or 10),
+            norm_title=norm_title,
+            norm_search=norm_search,
+            search_words=frozenset(norm_search.split()),
+        )
+
+    @property
+    def tokens(self) -> frozenset[str]:
+        return self.search_words | frozenset(self.norm_title.split())
+
+
+_INDEX_COLUMNS = (
+    CurriculumLesson.curriculum_id,
+    CurriculumLesson.title,
+    CurriculumLesson.subject,
+    CurriculumLesson.estimated_minutes,
+    CurriculumLesson.difficulty,
+    CurriculumLesson.xp_reward,
+    CurriculumLesson.search_text,
+)
+
+
+class CurriculumSearchIndex:
+    def __init__(self) -> None:
+        self._docs: dict[str, SearchDoc] = {}
+        self._tokens: dict[str, set[str]] = {}  # title + search token → curriculum ids
+        self._search_tokens: dict[str, set[str]] = {}  # search_text token → curriculum ids
+        self._title_words: dict[str, set[str]] = {}  # title word → curriculum ids
+        self._matrix: tuple[list[str], dict[str, int], np.ndarray, np.ndarray] | None = None
+        self._synced_at: datetime | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def get(self, curriculum_id: str) -> SearchDoc | None:
+        return self._docs.get(curriculum_id)
+
+    # ── maintenance ───────────────────────────────────────────────────────
+
+    def upsert(self, row: Any) -> SearchDoc:
+        doc = row if isinstance(row, SearchDoc) else SearchDoc.from_row(row)
+        self.remove(doc.curriculum_id)
+        cid = doc.curriculum_id
+        self._docs[cid] = doc
+        for token in doc.tokens:
+            self._tokens.setdefault(token, set()).add(cid)
+        for token in doc.search_words:
+            self._search_tokens.setdefault(token, set()).add(cid)
+        for word in set(doc.norm_title.split()):
+            self._title_words.setdefault(word, set()).add(cid)
+        self._matrix = None
+        return doc
+
+    def remove(self, curriculum_id: str) -> None:
+        doc = self._docs.pop(curriculum_id, None)
+        if doc is None:
+            return
+        self._matrix = None
+        for postings, keys in (
+            (self._tokens, doc.tokens),
+            (self._search_tokens, doc.search_words),
+            (self._title_words, set(doc.norm_title.split())),
+        ):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(curriculum_id)
+                    if not ids:
+                        del postings[key]
+
+    def rebuild(self, rows: Iterable[Any]) -> None:
+        self._docs.clear()
+        self._tokens.clear()
+        self._search_tokens.clear()
+        self._title_words.clear()
+        self._matrix = None
+        for row in rows:
+            self.upsert(row)
+
+    async def ensure_fresh(self, db: AsyncSession, *, force: bool = False) -> None:
+        interval = float(getattr(settings, "CURRICULUM_SEARCH_REFRESH_SECONDS", 30.0))
+        if not force and self._docs and time.monotonic() - self._checked_at < interval:
+            return
+        async with self._lock:
+            if not force and self._docs and time.monotonic() - self._checked_at < interval:
+                return
+            count, latest = (
+                await db.execute(
+                    select(func.count(), func.max(CurriculumLesson.updated_at))
+                )
+            ).one()
+            self._checked_at = time.monotonic()
+            if int(count or 0) == len(self._docs) and latest == self._synced_at and not force:
+                return
+
+            stmt = select(*_INDEX_COLUMNS)
+            full = force or not self._docs or self._synced_at is None or count < len(self._docs)
+            if not full:
+                stmt = stmt.where(CurriculumLesson.updated_at >= self._synced_at)
+            rows = (await db.execute(stmt)).all()
+            if full:
+                self.rebuild(rows)
+            else:
+                for row in rows:
+                    self.upsert(row)
+                if len(self._docs) != int(count or 0):
+                    # Rows deleted and replaced since the last sync — start over.
+                    self.rebuild((await db.execute(select(*_INDEX_COLUMNS))).all())
+            self._synced_at = latest
+            logger.info(
+                "[CurriculumSearch] %s sync: %s rows (index=%s)",
+                "full" if full else "incremental",
+                len(rows),
+                len(self._docs),
+            )
+
+    # ── query ─────────────────────────────────────────────────────────────
+
+    def _substring_candidates(self, query: str) -> set[str]:
+        """Docs whose normalised title/search text may contain ``query`` verbatim."""
+        words = query.split()
+        if not words:
+            return set()
+        if len(words) == 1:
+            word = words[0]
+            out: set[str] = set()
+            for token, ids in self._tokens.items():
+                if word in token:
+                    out |= ids
+            return out
+        first, *inner, last = words
+        groups: list[set[str]] = [set(self._tokens.get(w, ())) for w in inner]
+        head: set[str] = set()
+        tail: set[str] = set()
+        for token, ids in self._tokens.items():
+            if token.endswith(first):
+                head |= ids
+            if token.startswith(last):
+                tail |= ids
+        groups.extend([head, tail])
+        groups.sort(key=len)
+        out = set(groups[0])
+        for group in groups[1:]:
+            out &= group
+            if not out:
+                break
+        return out
+
+    def _keyword_bounds(self, query_words: list[str]) -> dict[str, float]:
+        """Exact ``keyword_coverage * 0.8`` for every doc containing a query word."""
+        hits: Counter[str] = Counter()
+        for word in query_words:
+            hits.update(self._search_tokens.get(word, ()))
+        n = max(1, len(query_words))
+        return {cid: count / n * 0.8 for cid, count in hits.items()}
+
+    def _word_bounds(self, query_words: list[str]) -> dict[str, float]:
+        """Upper bound on ``word_score * 0.9``.
+
+        Query-word × title-word ratios below _WORD_FLOOR are not computed and
+        count as the floor, so the bound never undershoots the real score.
+        Docs absent from the result are bounded by ``_WORD_FLOOR * 0.9``.
+        """
+        gains: dict[str, float] = {}
+        for word in query_words:
+            per_doc: dict[str, float] = {}
+            for title_word, posting in self._title_words.items():
+                lw, lt = len(word), len(title_word)
+                if 2 * min(lw, lt) / (lw + lt) < _WORD_FLOOR:
+                    continue
+                ratio = _word_ratio(word, title_word)
+                if ratio <= _WORD_FLOOR:
+                    continue
+                for cid in posting:
+                    if ratio > per_doc.get(cid, 0.0):
+                        per_doc[cid] = ratio
+            for cid, ratio in per_doc.items():
+                gains[cid] = gains.get(cid, 0.0) + (ratio - _WORD_FLOOR)
+        n = max(1, len(query_words))
+        return {cid: (_WORD_FLOOR + gain / n) * 0.9 for cid, gain in gains.items()}
+
+    def _char_matrix(self) -> tuple[list[str], dict[str, int], np.ndarray, np.ndarray]:
+        if self._matrix is None:
+            ids = list(self._docs)
+            counts = np.array(
+                [_char_counts(self._docs[cid].norm_title) for cid in ids],
+                dtype=np.int32,
+            ).reshape(len(ids), len(_ALPHABET))
+            lengths = np.array(
+                [len(self._docs[cid].norm_title) for cid in ids], dtype=np.float64
+            )
+            self._matrix = (ids, {cid: i for i, cid in enumerate(ids)}, counts, lengths)
+        return self._matrix
+
+    def upper_bounds(self, query: str) -> tuple[list[str], np.ndarray]:
+        """Per-doc upper bound of ``search_score`` for a normalised query.
+
+        The title-ratio term uses character-multiset overlap (difflib's
+        ``quick_ratio`` bound), vectorised over all titles; the other terms
+        come from the token postings.
+        """
+        ids, position, counts, lengths = self._char_matrix()
+        if not ids:
+            return ids, np.zeros(0)
+        overlap = np.minimum(counts, _char_counts(query)).sum(axis=1)
+        bound = 2.0 * overlap / np.maximum(lengths + len(query), 1.0)
+        query_words = query.split()
+        for terms in (self._keyword_bounds(query_words), self._word_bounds(query_words)):
+            for cid, value in terms.items():
+                i = position[cid]
+                if value > bound[i]:
+                    bound[i] = value
+        for cid in self._substring_candidates(query):
+            bound[position[cid]] = 1.0
+        return ids, bound
+
+    def search(
+        self,
+        query: str,
+        *,
+        subject: str | None = None,
+        limit: int = 20,
+    ) -> list[tuple[float, SearchDoc]]:
+        """Top ``limit`` lessons, ranked exactly as the old full scan ranked them."""
+        normalised_query = normalise(query)
+        subject_l = subject.lower() if subject else None
+
+        def _key(item: tuple[float, SearchDoc]) -> tuple[float, str, str, str]:
+            score, doc = item
+            return (-score, doc.subject, doc.title, doc.curriculum_id)
+
+        if not normalised_query:
+            everything = [
+                (1.0, doc)
+                for doc in self._docs.values()
+                if not subject_l or doc.subject.lower() == subject_l
+            ]
+            return heapq.nsmallest(limit, everything, key=_key)
+
+        ids, bound = self.upper_bounds(normalised_query)
+        order = np.argsort(-bound, kind="stable")
+        ranked: list[tuple[float, SearchDoc]] = []
+        kth = -1.0
+        for i in order:
+            ub = float(bound[i]) + _BOUND_EPS
+            # Sorted by bound: nothing below can reach the cut-off or beat the
+            # current k-th score (ties still need checking for the name order).
+            if ub < MIN_SCORE or (len(ranked) >= limit and ub < kth):
+                break
+            doc = self._docs[ids[i]]
+            if subject_l and doc.subject.lower() != subject_l:
+                continue
+            score = search_score(
+                normalised_query, doc.norm_title, doc.norm_search, doc.search_words
+            )
+            if score < MIN_SCORE:
+                continue
+            ranked.append((score, doc))
+            if len(ranked) >= limit:
+                ranked = heapq.nsmallest(limit, ranked, key=_key)
+                kth = ranked[-1][0]
+        ranked.sort(key=_key)
+        return ranked[:limit]
+
+
+curriculum_index = CurriculumSearchIndex()
@@ -4,11 +4,13 @@ from __future__ import annotations
 import json
 import logging
 import re
-from typing import Any
+from typing import Any, AsyncIterator
 
 import httpx
 
 from app.config import settings
+from app.llm.http_pool import llm_post
+from app.llm.streaming import StreamUnavailable, stream_chat
 
 logger = logging.getLogger(__name__)
 
@@ -112,11 +114,10 @@ async def _call_model(
             "Content-Type": "application/json",
         }
         try:
-            async with httpx.AsyncClient(timeout=90.0) as client:
-                response = await client.post(
-                    provider["url"], headers=headers, json=payload
-                )
-                response.raise_for_status()
+            response = await llm_post(
+                provider["url"], headers=headers, json=payload, timeout=90.0
+            )
+            response.raise_for_status()
             content = response.json()["choices"][0]["message"]["content"]
             if not isinstance(content, str) or not content.strip():
                 raise TutorUnavailable("The tutor returned an empty response")
@@ -363,7 +364,7 @@ async def suggest_topic_for_subject(db: Any, challenge_subject: str) -> Any | No
     return lessons[0]
 
 
-async def answer_lesson_question(
+def _lesson_question_messages(
     *,
     question: str,
     history: list[dict[str, str]],
@@ -371,7 +372,7 @@ async def answer_lesson_question(
     subject: str,
     shs_level: str,
     source_content: dict[str, Any],
-) -> str:
+) -> list[dict[str, str]]:
     grounding = build_grounding_text(source_content)
     system_prompt = f"""
 You are Atlas AI, a friendly Ghanaian curriculum tutor for a {shs_level} student.
@@ -394,9 +395,59 @@ OFFICIAL DATABASE SOURCE:
         if content:
             messages.append({"role": role, "content": content[:4_000]})
     messages.append({"role": "user", "content": question})
+    return messages
+
+
+async def answer_lesson_question(
+    *,
+    question: str,
+    history: list[dict[str, str]],
+    title: str,
+    subject: str,
+    shs_level: str,
+    source_content: dict[str, Any],
+) -> str:
+    messages = _lesson_question_messages(
+        question=question,
+        history=history,
+        title=title,
+        subject=subject,
+        shs_level=shs_level,
+        source_content=source_content,
+    )
     return await _call_model(messages, max_tokens=1_800, temperature=0.55)
 
 
+async def stream_lesson_answer(
+    *,
+    question: str,
+    history: list[dict[str, str]],
+    title: str,
+    subject: str,
+    shs_level: str,
+    source_content: dict[str, Any],
+) -> AsyncIterator[str]:
+    """answer_lesson_question, yielded token by token. Raises TutorUnavailable."""
+    providers = _ai_providers()
+    if not providers:
+        raise TutorUnavailable("Atlas AI is not available right now.")
+    messages = _lesson_question_messages(
+        question=question,
+        history=history,
+        title=title,
+        subject=subject,
+        shs_level=shs_level,
+        source_content=source_content,
+    )
+    try:
+        async for text in stream_chat(
+            providers, messages, max_tokens=1_800, temperature=0.55, top_p=0.9, timeout=90.0
+        ):
+            yield text
+    except StreamUnavailable as exc:
+        raise TutorUnavailable("The tutor could not produce a response") from exc
+
+
 EXPLORE_SUBJECTS = {
     "english language",
     "core mathematics",
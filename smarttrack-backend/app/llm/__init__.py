@@ -1,12 +1,17 @@
-"""LLM helpers (DeepSeek client + circuit breaker)."""
+"""LLM helpers (DeepSeek client, circuit breaker, shared HTTP pools)."""
 from app.llm.deepseek_client import (
     deepseek_chat_completion,
     deepseek_message_content,
     llm_circuit_open,
 )
+from app.llm.http_pool import llm_pool, llm_pool_metrics, llm_post, llm_stream
 
 __all__ = [
     "deepseek_chat_completion",
     "deepseek_message_content",
     "llm_circuit_open",
+    "llm_pool",
+    "llm_pool_metrics",
+    "llm_post",
+    "llm_stream",
 ]
@@ -12,11 +12,12 @@ from __future__ import annotations
 
 import logging
 import time
-from typing import Any
+from typing import Any, Callable
 
 import httpx
 
 from app.config import settings
+from app.llm.http_pool import llm_post
 
 logger = logging.getLogger(__name__)
 
@@ -134,15 +135,15 @@ async def deepseek_chat_completion(
         payload["max_tokens"] = max_tokens
 
     try:
-        async with httpx.AsyncClient(timeout=deepseek_timeout(read=read_timeout)) as client:
-            res = await client.post(
-                DEEPSEEK_CHAT_URL,
-                headers={
-                    "Authorization": f"Bearer {settings.DEEPSEEK_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-            )
+        res = await llm_post(
+            DEEPSEEK_CHAT_URL,
+            headers={
+                "Authorization": f"Bearer {settings.DEEPSEEK_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            json=payload,
+            timeout=deepseek_timeout(read=read_timeout),
+        )
         if res.status_code != 200:
             logger.warning(
                 "DeepSeek %s HTTP %s: %s",
@@ -168,8 +169,33 @@ async def deepseek_message_content(
     max_tokens: int | None = None,
     read_timeout: float | None = None,
     purpose: str = "chat",
+    cache: bool = False,
+    validate: Callable[[str], bool] | None = None,
 ) -> str | None:
-    """Convenience: return assistant message content string, or None."""
+    """
+    Convenience: return assistant message content string, or None.
+
+    ``cache=True`` serves repeat prompts from ``app.llm.response_cache`` when
+    the call is deterministic enough (low temperature); leave it off for
+    creative generation. ``validate`` decides whether an answer is usable
+    (e.g. parses as the expected JSON): only usable answers are cached or
+    served from the cache.
+    """
+    key = None
+    if cache:
+        from app.llm.response_cache import cache_key, response_cache
+
+        if response_cache.cacheable(temperature):
+            key = cache_key(
+                messages,
+                model=settings.DEEPSEEK_MODEL,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+            cached = await response_cache.get(key, purpose=purpose, validate=validate)
+            if cached is not None:
+                return cached
+
     body = await deepseek_chat_completion(
         messages,
         temperature=temperature,
@@ -180,6 +206,9 @@ async def deepseek_message_content(
     if not body:
         return None
     try:
-        return str(body["choices"][0]["message"]["content"])
+        content = str(body["choices"][0]["message"]["content"])
     except (KeyError, IndexError, TypeError):
         return None
+    if key is not None:
+        await response_cache.put(key, content, purpose=purpose, validate=validate)
+    return content
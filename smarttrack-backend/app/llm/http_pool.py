@@ -0,0 +1,265 @@
+"""Shared, lifespan-managed HTTP connection pools for LLM providers.
+
+Every DeepSeek / NVIDIA call used to open its own ``httpx.AsyncClient`` — a
+fresh TCP + TLS handshake for each of the parallel question generations in a
+level build. This module keeps one keep-alive (HTTP/2 when ``h2`` is
+installed) client per provider for the life of the app:
+
+  • ``llm_pool.start()`` / ``llm_pool.aclose()`` run in ``app.main`` lifespan
+  • ``llm_post(url, ...)`` picks the provider pool from the URL
+  • ``llm_stream(url, ...)`` does the same for streamed (SSE) completions and
+    holds the connection slot until the caller leaves the block
+  • pool size follows CHALLENGE_GEN_CONCURRENCY (override: LLM_POOL_MAX_CONNECTIONS)
+  • time spent waiting for a free connection is recorded per provider
+
+Outside the lifespan (scripts, unit tests) calls fall back to a short-lived
+client so nothing is bound to a stale event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEEPSEEK_HOST = "api.deepseek.com"
+NVIDIA_HOST = "integrate.api.nvidia.com"
+
+_PROVIDER_HOSTS = {
+    DEEPSEEK_HOST: "deepseek",
+    NVIDIA_HOST: "nvidia",
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def provider_for_url(url: str) -> str:
+    """Pool name for an LLM endpoint URL (unknown hosts share ``default``)."""
+    host = httpx.URL(url).host
+    return _PROVIDER_HOSTS.get(host, "default")
+
+
+def pool_max_connections() -> int:
+    explicit = int(getattr(settings, "LLM_POOL_MAX_CONNECTIONS", 0) or 0)
+    if explicit > 0:
+        return explicit
+    # Level builds fan out CHALLENGE_GEN_CONCURRENCY question calls, each of which
+    # may chain analysis / planner calls; leave headroom for tutor / chat traffic.
+    concurrency = max(1, int(getattr(settings, "CHALLENGE_GEN_CONCURRENCY", 6)))
+    return concurrency * 2 + 4
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    waited: int = 0  # requests that had to queue for a connection slot
+    wait_total_s: float = 0.0
+    wait_max_s: float = 0.0
+    in_flight: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "waited": self.waited,
+            "wait_total_ms": round(self.wait_total_s * 1000, 2),
+            "wait_avg_ms": round(
+                (self.wait_total_s / self.requests * 1000) if self.requests else 0.0, 3
+            ),
+            "wait_max_ms": round(self.wait_max_s * 1000, 2),
+            "in_flight": self.in_flight,
+        }
+
+
+def default_timeout() -> httpx.Timeout:
+    """Configured LLM request timeout, shared by pooled and fallback clients."""
+    return httpx.Timeout(
+        float(getattr(settings, "CHALLENGE_LLM_TIMEOUT_SECONDS", 20.0)),
+        connect=float(getattr(settings, "CHALLENGE_LLM_CONNECT_TIMEOUT_SECONDS", 3.0)),
+    )
+
+
+class LLMClientPool:
+    """One persistent ``httpx.AsyncClient`` per provider."""
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        self._stats: dict[str, PoolStats] = {}
+        self._max_connections = pool_max_connections()
+        self._http2 = False
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self._max_connections,
+            max_keepalive_connections=self._max_connections,
+            keepalive_expiry=60.0,
+        )
+        return httpx.AsyncClient(
+            http2=self._http2,
+            limits=limits,
+            timeout=default_timeout(),
+        )
+
+    async def start(self) -> None:
+        if self._started:
+            return
+        self._max_connections = pool_max_connections()
+        self._http2 = bool(getattr(settings, "LLM_HTTP2", True)) and _http2_available()
+        self._started = True
+        logger.info(
+            "LLM HTTP pool ready (max_connections=%s, http2=%s)",
+            self._max_connections,
+            self._http2,
+        )
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._slots.clear()
+        self._started = False
+        for client in clients:
+            await client.aclose()
+
+    def _stats_for(self, provider: str) -> PoolStats:
+        stats = self._stats.get(provider)
+        if stats is None:
+            stats = PoolStats()
+            self._stats[provider] = stats
+        return stats
+
+    def _client_for(self, provider: str) -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        client = self._clients.get(provider)
+        if client is None:
+            client = self._build_client()
+            self._clients[provider] = client
+            self._slots[provider] = asyncio.Semaphore(self._max_connections)
+        return client, self._slots[provider]
+
+    @asynccontextmanager
+    async def _slot(self, provider: str) -> AsyncIterator[httpx.AsyncClient]:
+        stats = self._stats_for(provider)
+        client, slots = self._client_for(provider)
+        queued_at = time.perf_counter()
+        async with slots:
+            waited = time.perf_counter() - queued_at
+            stats.wait_total_s += waited
+            stats.wait_max_s = max(stats.wait_max_s, waited)
+            if waited > 0.001:
+                stats.waited += 1
+            stats.in_flight += 1
+            try:
+                yield client
+            finally:
+                stats.in_flight -= 1
+
+    async def post(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        json: Any = None,
+        timeout: float | httpx.Timeout | None = None,
+    ) -> httpx.Response:
+        provider = provider_for_url(url)
+        self._stats_for(provider).requests += 1
+        if not self._started:
+            async with httpx.AsyncClient(
+                timeout=timeout if timeout is not None else default_timeout()
+            ) as client:
+                return await client.post(url, headers=headers, json=json)
+
+        async with self._slot(provider) as client:
+            kwargs: dict[str, Any] = {"headers": headers, "json": json}
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+            return await client.post(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        json: Any = None,
+        timeout: float | httpx.Timeout | None = None,
+    ) -> AsyncIterator[httpx.Response]:
+        """POST and yield the response with its body unread.
+
+        Leaving the block early (client gone, task cancelled) closes the
+        upstream response and frees the slot.
+        """
+        provider = provider_for_url(url)
+        self._stats_for(provider).requests += 1
+        if not self._started:
+            async with httpx.AsyncClient(
+                timeout=timeout if timeout is not None else default_timeout()
+            ) as client:
+                async with client.stream("POST", url, headers=headers, json=json) as response:
+                    yield response
+            return
+
+        async with self._slot(provider) as client:
+            kwargs: dict[str, Any] = {"headers": headers, "json": json}
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+            async with client.stream("POST", url, **kwargs) as response:
+                yield response
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "started": self._started,
+            "http2": self._http2,
+            "max_connections": self._max_connections,
+            "providers": {name: s.as_dict() for name, s in sorted(self._stats.items())},
+        }
+
+    def reset_metrics(self) -> None:
+        self._stats.clear()
+
+
+llm_pool = LLMClientPool()
+
+
+async def llm_post(
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    json: Any = None,
+    timeout: float | httpx.Timeout | None = None,
+) -> httpx.Response:
+    """POST to an LLM endpoint through the shared provider pool."""
+    return await llm_pool.post(url, headers=headers, json=json, timeout=timeout)
+
+
+def llm_stream(
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    json: Any = None,
+    timeout: float | httpx.Timeout | None = None,
+):
+    """Streamed POST through the shared provider pool (``async with llm_stream(...) as res``)."""
+    return llm_pool.stream(url, headers=headers, json=json, timeout=timeout)
+
+
+def llm_pool_metrics() -> dict[str, Any]:
+    return llm_pool.metrics()
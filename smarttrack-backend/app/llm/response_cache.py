@@ -0,0 +1,218 @@
+"""
+Content-addressed cache for deterministic DeepSeek calls.
+
+The visual-need analysis and the image planner send the same prompt (subject,
+title, topic text, question type) for every learner that reaches a topic, at
+temperature 0.1–0.2. Their answers are reusable, so callers that opt in with
+``deepseek_message_content(..., cache=True)`` are served from here:
+
+  • key = sha256 of the normalised messages (role + whitespace-collapsed
+    content), model, temperature and max_tokens
+  • memory tier: bounded LRU per process, same TTL as the persistent tier
+  • persistent tier: one namespace in a local SQLite file (``MediaCache``), so
+    answers survive restarts and are shared by every uvicorn worker
+  • calls above LLM_RESPONSE_CACHE_MAX_TEMPERATURE are never cached — creative
+    question generation must stay varied and does not opt in anyway
+
+Only non-empty assistant content is stored, and only once the caller's
+``validate`` accepts it (e.g. it parses as the JSON the caller needs), so a
+malformed answer is retried next time instead of being served for a week.
+SQLite reads and writes run in a worker thread. LLM_RESPONSE_CACHE_TTL_SECONDS
+= 0 disables the cache.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+from typing import Any, Callable
+
+from app.config import settings
+from app.media.media_cache import MediaCache, resolve_data_path
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+
+
+def cache_key(
+    messages: list[dict[str, str]],
+    *,
+    model: str,
+    temperature: float,
+    max_tokens: int | None = None,
+) -> str:
+    """Stable hash of a chat request; insignificant whitespace does not matter."""
+    normalised = [
+        [str(m.get("role") or ""), _WS_RE.sub(" ", str(m.get("content") or "")).strip()]
+        for m in messages
+    ]
+    material = json.dumps(
+        {
+            "model": model,
+            "temperature": round(float(temperature), 3),
+            "max_tokens": max_tokens,
+            "messages": normalised,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _valid(content: str, validate: Callable[[str], bool] | None) -> bool:
+    if validate is None:
+        return True
+    try:
+        return bool(validate(content))
+    except Exception:
+        return False
+
+
+class LLMResponseCache:
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = Lock()
+        self._store: MediaCache | None = None
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.by_purpose: Counter[str] = Counter()
+
+    @staticmethod
+    def ttl() -> float:
+        return float(getattr(settings, "LLM_RESPONSE_CACHE_TTL_SECONDS", 604_800) or 0.0)
+
+    @staticmethod
+    def cacheable(temperature: float) -> bool:
+        limit = float(getattr(settings, "LLM_RESPONSE_CACHE_MAX_TEMPERATURE", 0.3))
+        return LLMResponseCache.ttl() > 0 and float(temperature) <= limit
+
+    def _persistent(self) -> MediaCache | None:
+        if self._store is None:
+            raw = getattr(settings, "LLM_RESPONSE_CACHE_DB_PATH", "") or ""
+            if not raw:
+                return None
+            try:
+                self._store = MediaCache(
+                    resolve_data_path(raw),
+                    namespace="llm_response",
+                    default_ttl=self.ttl(),
+                    max_entries=int(getattr(settings, "LLM_RESPONSE_CACHE_MAX_ENTRIES", 20_000)),
+                )
+            except Exception as exc:
+                logger.warning("LLM response cache: persistent tier unavailable (%s)", exc)
+                return None
+        return self._store
+
+    def _remember(self, key: str, content: str, expires_at: float) -> None:
+        limit = max(1, int(getattr(settings, "LLM_RESPONSE_CACHE_MEMORY_ENTRIES", 512)))
+        with self._lock:
+            self._entries[key] = (expires_at, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def _read(self, key: str) -> dict[str, Any] | None:
+        store = self._persistent()
+        if store is None:
+            return None
+        try:
+            return store.get(key)
+        except Exception as exc:
+            logger.warning("LLM response cache read failed: %s", exc)
+            return None
+
+    def _write(self, key: str, value: dict[str, Any]) -> None:
+        store = self._persistent()
+        if store is None:
+            return
+        try:
+            store.put(key, value)
+        except Exception as exc:
+            logger.warning("LLM response cache write failed: %s", exc)
+
+    async def get(
+        self,
+        key: str,
+        *,
+        purpose: str = "chat",
+        validate: Callable[[str], bool] | None = None,
+    ) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                self.by_purpose[f"{purpose}:hit"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+        # SQLite (busy timeout included) stays off the event loop.
+        stored = await asyncio.to_thread(self._read, key)
+        content = (stored or {}).get("content")
+        if not content or not _valid(content, validate):
+            with self._lock:
+                self.misses += 1
+                self.by_purpose[f"{purpose}:miss"] += 1
+            return None
+        expires_at = float(stored.get("cached_at") or now) + self.ttl()
+        self._remember(key, content, expires_at)
+        with self._lock:
+            self.hits += 1
+            self.by_purpose[f"{purpose}:hit"] += 1
+        return str(content)
+
+    async def put(
+        self,
+        key: str,
+        content: str,
+        *,
+        purpose: str = "chat",
+        validate: Callable[[str], bool] | None = None,
+    ) -> None:
+        """Store ``content`` unless it is empty or ``validate`` rejects it."""
+        if not content or not _valid(content, validate):
+            return
+        now = time.time()
+        self._remember(key, content, now + self.ttl())
+        await asyncio.to_thread(
+            self._write, key, {"content": content, "purpose": purpose, "cached_at": now}
+        )
+
+    def clear(self, *, persistent: bool = False) -> None:
+        """Drop the memory tier (and close the persistent handle when asked)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.memory_hits = self.misses = 0
+            self.by_purpose.clear()
+        if persistent and self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+            by_purpose = dict(self.by_purpose)
+        total = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl(),
+            "memory_size": size,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "by_purpose": by_purpose,
+        }
+
+
+response_cache = LLMResponseCache()
@@ -0,0 +1,180 @@
+"""
+Token streaming for the AI chat, lesson tutor and revision endpoints (SSE).
+
+``stream_chat(providers, messages, ...)`` POSTs ``"stream": true`` to an
+OpenAI-compatible provider and yields content deltas as they arrive. The
+next provider is tried only while nothing has been yielded; once tokens have
+reached the learner a provider failure ends the stream.
+
+``sse_response(tokens, route=..., failure_detail=...)`` relays those deltas
+as Server-Sent Events:
+
+    event: token  data: {"text": "..."}
+    event: done   data: {"time_to_first_token_ms": ..., "total_ms": ..., "chars": ...}
+    event: error  data: {"detail": "..."}
+
+A client disconnect cancels the relay (Starlette listens for it), which
+closes the upstream provider response and frees its pool slot. Routes finish
+their database reads and release the request session before returning the
+response, so no connection is held while tokens stream.
+
+Time to first token is on the ``done`` event and in
+``smarttrack_llm_stream_first_token_seconds``; stream outcomes (completed,
+cancelled, failed) are counted in ``smarttrack_llm_streams_total``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator
+
+import httpx
+from fastapi.responses import StreamingResponse
+
+from app.llm.http_pool import llm_stream
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+STREAM_FIRST_TOKEN_SECONDS = registry.histogram(
+    "smarttrack_llm_stream_first_token_seconds",
+    "Time from stream start to the first relayed token, per route.",
+    ("route",),
+)
+STREAM_SECONDS = registry.histogram(
+    "smarttrack_llm_stream_seconds",
+    "Full duration of relayed token streams, per route.",
+    ("route",),
+)
+STREAMS = registry.counter(
+    "smarttrack_llm_streams_total",
+    "Relayed token streams by outcome (completed, cancelled, failed).",
+    ("route", "outcome"),
+)
+
+SSE_HEADERS = {"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+
+
+class StreamUnavailable(RuntimeError):
+    """No provider produced a single token."""
+
+
+def _delta(line: str) -> str | None:
+    """Content of one ``data:`` line; None at ``[DONE]``."""
+    if not line.startswith("data:"):
+        return ""
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return None
+    if not data:
+        return ""
+    choices = json.loads(data).get("choices") or []
+    if not choices:
+        return ""
+    return str((choices[0].get("delta") or {}).get("content") or "")
+
+
+async def stream_chat(
+    providers: list[dict[str, str]],
+    messages: list[dict[str, str]],
+    *,
+    temperature: float,
+    max_tokens: int,
+    top_p: float | None = None,
+    timeout: float = 60.0,
+) -> AsyncIterator[str]:
+    """Yield completion text as the first working provider streams it."""
+    last_error: Exception | None = None
+    for provider in providers:
+        payload: dict[str, Any] = {
+            "model": provider["model"],
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        if top_p is not None:
+            payload["top_p"] = top_p
+        headers = {
+            "Authorization": f"Bearer {provider['api_key']}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+        }
+        yielded = False
+        try:
+            # timeout is per read, i.e. the longest gap between two chunks
+            async with llm_stream(provider["url"], headers=headers, json=payload, timeout=timeout) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", "replace")
+                    raise httpx.HTTPStatusError(
+                        f"HTTP {response.status_code}: {body[:180]}",
+                        request=response.request,
+                        response=response,
+                    )
+                async for line in response.aiter_lines():
+                    text = _delta(line)
+                    if text is None:
+                        break
+                    if text:
+                        yielded = True
+                        yield text
+        except (httpx.HTTPError, ValueError, AttributeError) as exc:
+            if yielded:
+                raise
+            last_error = exc
+            logger.warning("%s stream failed: %s", provider["name"], exc)
+            continue
+        if yielded:
+            return
+        last_error = StreamUnavailable(f"{provider['name']} streamed no content")
+    raise StreamUnavailable("No AI provider produced a response") from last_error
+
+
+def sse_event(event: str, data: dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def sse_response(
+    tokens: AsyncIterator[str], *, route: str, failure_detail: str
+) -> StreamingResponse:
+    """Relay ``tokens`` as ``token`` events, then ``done`` (or ``error``)."""
+
+    async def _events() -> AsyncIterator[bytes]:
+        started = time.perf_counter()
+        first: float | None = None
+        chars = 0
+        outcome = "failed"
+        try:
+            try:
+                async for text in tokens:
+                    if first is None:
+                        first = time.perf_counter() - started
+                        STREAM_FIRST_TOKEN_SECONDS.observe(first, route)
+                    chars += len(text)
+                    yield sse_event("token", {"text": text})
+            except Exception:
+                logger.exception("Token stream for %s failed after %s chars", route, chars)
+                yield sse_event("error", {"detail": failure_detail})
+                return
+            total = time.perf_counter() - started
+            outcome = "completed"
+            yield sse_event(
+                "done",
+                {
+                    "time_to_first_token_ms": round(first * 1000, 1) if first is not None else None,
+                    "total_ms": round(total * 1000, 1),
+                    "chars": chars,
+                },
+            )
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        finally:
+            STREAMS.inc(route, outcome)
+            STREAM_SECONDS.observe(time.perf_counter() - started, route)
+            # Closing the token generator closes the provider response with it.
+            await tokens.aclose()
+
+    return StreamingResponse(_events(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -3,7 +3,7 @@ main.py — Atlas API entry point
 """
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.ai_chat.router import router as ai_chat_router
@@ -12,7 +12,9 @@ from app.assessment.router import router as assessment_router
 from app.auth.router import router as auth_router
 from app.config import settings
 from app.database import engine, Base
+from app.leaderboards.router import router as leaderboards_router
 from app.learning.router import router as learning_router
+from app.request_metrics import RequestTimingMiddleware
 from app.revision.router import router as revision_router
 from app.assessment.starter_router import router as starter_router
 from app.assessment.challenge_hub_router import router as challenge_hub_router
@@ -42,6 +44,10 @@ async def lifespan(app: FastAPI):
 
     assert_mailer_ready_for_environment()
 
+    from app.llm.http_pool import llm_pool
+
+    await llm_pool.start()
+
     # Auto-create tables in development (Alembic handles production via migration scripts)
     if settings.ENVIRONMENT == "development":
         try:
@@ -50,8 +56,17 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             import logging
             logging.getLogger(__name__).warning(f"Table auto-creation skipped: {e}")
+
+    from app.notifications.scheduler import notification_scheduler
+
+    notification_scheduler.start()
     yield
-    # Cleanly close all DB connections on shutdown
+    await notification_scheduler.stop()
+    from app.assessment.document_parsing import parse_pool
+
+    parse_pool.shutdown()
+    # Cleanly close pooled LLM connections and all DB connections on shutdown
+    await llm_pool.aclose()
     await engine.dispose()
 
 
@@ -96,6 +111,7 @@ _cors_origins = list(
     )
 )
 
+app.add_middleware(RequestTimingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_cors_origins,
@@ -119,6 +135,7 @@ app.include_router(psychometrics_router, prefix="/api/v1")
 app.include_router(recommendations_router, prefix="/api/v1")
 app.include_router(notifications_router, prefix="/api/v1")
 app.include_router(progress_router, prefix="/api/v1")
+app.include_router(leaderboards_router, prefix="/api/v1")
 app.include_router(course_directory_router, prefix="/api/v1")
 
 
@@ -137,3 +154,37 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health():
     return {"status": "ok", "service": "atlas-api"}
+
+
+@app.get("/health/llm-pool", tags=["Health"])
+async def health_llm_pool():
+    """Shared LLM connection pool size, connection waits and response-cache hit rate."""
+    from app.llm.http_pool import llm_pool_metrics
+    from app.llm.response_cache import response_cache
+
+    return {**llm_pool_metrics(), "response_cache": response_cache.stats()}
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus scrape: request/stage latency, question pipeline, LLM circuit, DB pool."""
+    from app.metrics import CONTENT_TYPE, registry
+
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/health/question-pool", tags=["Health"])
+async def health_question_pool():
+    """Challenge question pool slot hit rate, depleted cells and background refills."""
+    from app.phases.question_pool import pool_stats
+
+    return pool_stats.snapshot()
+
+
+@app.get("/health/request-latency", tags=["Health"])
+async def health_request_latency():
+    """Per-route latency and per-stage (db_ping, auth) timings since startup."""
+    from app.auth.user_cache import user_cache
+    from app.request_metrics import request_metrics
+
+    return {**request_metrics.snapshot(), "user_cache": user_cache.stats()}
@@ -202,10 +202,9 @@ async def analyze_visual_need(
     if not use_llm or not (getattr(settings, "DEEPSEEK_API_KEY", "") or "").strip():
         return rules
 
-    from app.llm.deepseek_client import deepseek_message_content, llm_circuit_open
-
-    if llm_circuit_open():
-        return rules
+    # No circuit check here: a cached answer is still served while the
+    # circuit is open, and an uncached call returns None (-> rules) at once.
+    from app.llm.deepseek_client import deepseek_message_content
 
     prompt = (
         "You are Atlas Educational Content Analyst.\n"
@@ -238,6 +237,8 @@ async def analyze_visual_need(
             temperature=0.1,
             read_timeout=12.0,
             purpose="visual_need",
+            cache=True,
+            validate=_usable_visual_json,
         )
         if not content:
             return rules
@@ -256,6 +257,12 @@ async def analyze_visual_need(
         return rules
 
 
+def _usable_visual_json(content: str) -> bool:
+    """Cache gate: only answers ``analyze_visual_need`` can actually use."""
+    parsed = _parse_json(content)
+    return isinstance(parsed, dict) and "needed" in parsed
+
+
 def _parse_json(content: str) -> dict[str, Any] | None:
     content = (content or "").strip()
     try:
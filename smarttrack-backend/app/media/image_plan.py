@@ -479,10 +479,8 @@ class ImagePlanner:
             f"Content:\n{(context_text or '')[:2000]}\n"
         )
         try:
-            from app.llm.deepseek_client import deepseek_message_content, llm_circuit_open
-
-            if llm_circuit_open():
-                return fallback
+            # Cached plans are served even while the DeepSeek circuit is open.
+            from app.llm.deepseek_client import deepseek_message_content
 
             content = await deepseek_message_content(
                 [
@@ -498,6 +496,8 @@ class ImagePlanner:
                 temperature=0.2,
                 read_timeout=15.0,
                 purpose="image_plan",
+                cache=True,
+                validate=_usable_plan_json,
             )
             if not content:
                 raise RuntimeError("no content")
@@ -588,6 +588,15 @@ class ImagePlanner:
         return plan
 
 
+def _usable_plan_json(content: str) -> bool:
+    """Cache gate: a JSON plan whose keywords carry no URLs."""
+    parsed = _parse_json(content)
+    if not isinstance(parsed, dict) or not parsed:
+        return False
+    raw_keywords = parsed.get("search_keywords") or parsed.get("search_phrases") or []
+    return not any(_looks_like_url(str(x)) for x in raw_keywords)
+
+
 def _parse_json(content: str) -> dict[str, Any] | None:
     content = (content or "").strip()
     try:
@@ -20,11 +20,9 @@ If none pass the quality floor → None (caller generates text-only content).
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import re
 import time
-from pathlib import Path
 from typing import Any
 
 import httpx
@@ -32,6 +30,7 @@ import httpx
 from app.config import settings
 from app.media.image_plan import ImagePlan
 from app.media.labelled_diagrams import pick_labelled_diagram
+from app.media.media_cache import MediaCache, resolve_data_path
 
 logger = logging.getLogger(__name__)
 
@@ -100,30 +99,26 @@ def sanitize_attribution(raw: str | None, *, max_len: int = 160) -> str:
     return text
 
 
-def _cache_path() -> Path:
-    raw = settings.EDUCATIONAL_IMAGE_CACHE_PATH or "data/educational_image_cache.json"
-    path = Path(raw)
-    if not path.is_absolute():
-        path = Path(__file__).resolve().parents[2] / path
-    path.parent.mkdir(parents=True, exist_ok=True)
-    return path
+_cache: MediaCache | None = None
 
 
-def _load_cache() -> dict[str, Any]:
-    path = _cache_path()
-    if not path.exists():
-        return {}
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
-
-
-def _save_cache(cache: dict[str, Any]) -> None:
-    try:
-        _cache_path().write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
-    except Exception as exc:
-        logger.warning("Image cache save failed: %s", exc)
+def _image_cache() -> MediaCache:
+    """Shared image cache (SQLite); imports the legacy JSON file on first use."""
+    global _cache
+    if _cache is None:
+        _cache = MediaCache(
+            resolve_data_path(
+                getattr(settings, "EDUCATIONAL_MEDIA_CACHE_DB_PATH", "")
+                or "data/educational_media_cache.sqlite3"
+            ),
+            namespace="image",
+            default_ttl=float(getattr(settings, "EDUCATIONAL_IMAGE_CACHE_TTL_SECONDS", 0) or 0),
+            max_entries=int(getattr(settings, "EDUCATIONAL_IMAGE_CACHE_MAX_ENTRIES", 5000)),
+            legacy_json=resolve_data_path(
+                settings.EDUCATIONAL_IMAGE_CACHE_PATH or "data/educational_image_cache.json"
+            ),
+        )
+    return _cache
 
 
 def _is_rejected(title: str, url: str = "") -> bool:
@@ -345,13 +340,13 @@ class ImageRetrievalService:
         if not plan or not plan.needed:
             return None
 
-        cache = _load_cache()
+        cache = await asyncio.to_thread(_image_cache)
         cache_key = f"v6|{plan.cache_key()}"
-        hit = cache.get(cache_key)
+        hit = await asyncio.to_thread(cache.get, cache_key)
         if isinstance(hit, dict) and hit.get("url"):
             if _score_candidate(plan, hit) >= SCORE_FLOOR:
                 return hit
-            cache.pop(cache_key, None)
+            await asyncio.to_thread(cache.delete, cache_key)
 
         candidates: list[dict[str, Any]] = []
         queries = list(plan.query_variants())[:3] or [plan.primary_query()]
@@ -373,7 +368,7 @@ class ImageRetrievalService:
                     plan.concept,
                     atlas_score,
                 )
-                return self._finalize(plan, cache, cache_key, candidates)
+                return await self._finalize(plan, cache, cache_key, candidates)
 
         # 2–5) External providers in cascade order
         provider_steps = (
@@ -417,9 +412,9 @@ class ImageRetrievalService:
                         plan.concept,
                         best_so_far[0],
                     )
-                    return self._finalize(plan, cache, cache_key, candidates)
+                    return await self._finalize(plan, cache, cache_key, candidates)
 
-        return self._finalize(plan, cache, cache_key, candidates)
+        return await self._finalize(plan, cache, cache_key, candidates)
 
     async def retrieve_local_only(self, plan: ImagePlan) -> dict[str, Any] | None:
         """
@@ -448,9 +443,9 @@ class ImageRetrievalService:
             return atlas
 
         # 2) Existing cache only (no write / no fetch)
-        cache = _load_cache()
+        cache = await asyncio.to_thread(_image_cache)
         cache_key = f"v6|{plan.cache_key()}"
-        hit = cache.get(cache_key)
+        hit = await asyncio.to_thread(cache.get, cache_key)
         if isinstance(hit, dict) and hit.get("url"):
             # Prefer educational-looking cached diagrams; skip weak matches.
             if _score_candidate(plan, hit) >= SCORE_FLOOR:
@@ -463,7 +458,11 @@ class ImageRetrievalService:
 
         # Also try a few query strings as cache keys (older cache format).
         for q in list(plan.query_variants())[:4]:
-            raw = cache.get(q) or cache.get((q or "").lower())
+            if not q:
+                continue
+            raw = await asyncio.to_thread(cache.get, q) or await asyncio.to_thread(
+                cache.get, q.lower()
+            )
             if isinstance(raw, dict) and raw.get("url"):
                 if _score_candidate(plan, raw) >= SCORE_FLOOR:
                     logger.info(
@@ -487,10 +486,10 @@ class ImageRetrievalService:
                 best = (total, cand, factors)
         return best
 
-    def _finalize(
+    async def _finalize(
         self,
         plan: ImagePlan,
-        cache: dict[str, Any],
+        cache: MediaCache,
         cache_key: str,
         candidates: list[dict[str, Any]],
     ) -> dict[str, Any] | None:
@@ -526,8 +525,10 @@ class ImageRetrievalService:
             "cached_at": int(time.time()),
             "size": int(winner.get("size") or 0),
         }
-        cache[cache_key] = payload
-        _save_cache(cache)
+        try:
+            await asyncio.to_thread(cache.put, cache_key, payload)
+        except Exception as exc:
+            logger.warning("Image cache save failed: %s", exc)
         logger.info(
             "Image retrieval selected source=%s concept=%r score=%.1f factors=%s",
             payload["source"],
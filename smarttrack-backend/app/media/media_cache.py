@@ -0,0 +1,234 @@
+"""
+Keyed local cache for retrieved educational media (images, videos).
+
+Replaces the whole-file JSON caches (``educational_image_cache.json`` /
+``educational_video_cache.json``), which were parsed on every lookup and
+rewritten in full on every save — O(cache size) per call and last-writer-wins
+when several level builds or workers saved at once.
+
+One SQLite file (WAL mode) holds every namespace:
+
+  • point lookups by (namespace, key)
+  • per-entry TTL (``expires_at``; NULL = never expires)
+  • LRU eviction by ``last_access`` once a namespace exceeds ``max_entries``
+  • upserts are single statements, so concurrent asyncio tasks and other
+    uvicorn workers never clobber each other's entries
+
+The first open of a namespace imports its legacy JSON file once (guarded by a
+meta row inside an IMMEDIATE transaction, so only one worker migrates).
+Calls are synchronous and may wait up to the 5 s busy timeout behind another
+worker's write, so async callers run them with ``asyncio.to_thread``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS media_cache (
+        ns TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        cached_at REAL NOT NULL,
+        expires_at REAL,
+        last_access REAL NOT NULL,
+        PRIMARY KEY (ns, key)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_media_cache_lru ON media_cache (ns, last_access)",
+    "CREATE TABLE IF NOT EXISTS media_cache_meta (name TEXT PRIMARY KEY, value TEXT)",
+)
+
+# Don't turn every read into a write: refresh last_access at most this often.
+_TOUCH_INTERVAL_S = 60.0
+# Run LRU / expiry eviction every N puts rather than on each one.
+_EVICT_EVERY = 16
+
+
+def resolve_data_path(raw: str) -> Path:
+    """Relative paths are resolved against the backend root (like the JSON caches)."""
+    path = Path(raw)
+    if not path.is_absolute():
+        path = Path(__file__).resolve().parents[2] / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class MediaCache:
+    """One namespace of the shared media cache database."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        namespace: str,
+        default_ttl: float = 0.0,
+        max_entries: int = 0,
+        legacy_json: Path | None = None,
+    ) -> None:
+        self.path = path
+        self.namespace = namespace
+        self.default_ttl = float(default_ttl or 0.0)
+        self.max_entries = int(max_entries or 0)
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._conn = sqlite3.connect(
+            str(path),
+            timeout=5.0,
+            isolation_level=None,  # autocommit; explicit BEGIN for migration
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        if legacy_json is not None:
+            self._migrate_json(legacy_json)
+
+    def _expires_at(self, cached_at: float, ttl: float | None) -> float | None:
+        ttl = self.default_ttl if ttl is None else float(ttl)
+        return cached_at + ttl if ttl > 0 else None
+
+    def _migrate_json(self, legacy: Path) -> None:
+        marker = f"migrated:{self.namespace}"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                done = self._conn.execute(
+                    "SELECT 1 FROM media_cache_meta WHERE name = ?", (marker,)
+                ).fetchone()
+                if done:
+                    self._conn.execute("COMMIT")
+                    return
+                rows = []
+                if legacy.exists():
+                    try:
+                        raw = json.loads(legacy.read_text(encoding="utf-8"))
+                    except Exception as exc:
+                        logger.warning("Media cache: unreadable %s (%s)", legacy, exc)
+                        raw = {}
+                    now = time.time()
+                    for key, value in (raw if isinstance(raw, dict) else {}).items():
+                        if not isinstance(value, dict):
+                            continue
+                        cached_at = float(value.get("cached_at") or now)
+                        rows.append(
+                            (
+                                self.namespace,
+                                str(key),
+                                json.dumps(value, ensure_ascii=False, separators=(",", ":")),
+                                cached_at,
+                                self._expires_at(cached_at, None),
+                                cached_at,
+                            )
+                        )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO media_cache "
+                    "(ns, key, value, cached_at, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT INTO media_cache_meta (name, value) VALUES (?, ?)",
+                    (marker, str(int(time.time()))),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if rows:
+            logger.info(
+                "Media cache: imported %s %s entries from %s",
+                len(rows),
+                self.namespace,
+                legacy,
+            )
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, last_access FROM media_cache "
+                "WHERE ns = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at, last_access = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute(
+                    "DELETE FROM media_cache WHERE ns = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                return None
+            if now - float(last_access) >= _TOUCH_INTERVAL_S:
+                self._conn.execute(
+                    "UPDATE media_cache SET last_access = ? WHERE ns = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+        try:
+            parsed = json.loads(value)
+        except json.JSONDecodeError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+    def put(self, key: str, value: dict[str, Any], *, ttl: float | None = None) -> None:
+        now = time.time()
+        blob = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO media_cache (ns, key, value, cached_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value, "
+                "cached_at = excluded.cached_at, expires_at = excluded.expires_at, "
+                "last_access = excluded.last_access",
+                (self.namespace, key, blob, now, self._expires_at(now, ttl), now),
+            )
+            self._puts += 1
+            if self._puts % _EVICT_EVERY == 1:
+                self._evict_locked(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM media_cache WHERE ns = ? AND key = ?",
+                (self.namespace, key),
+            )
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict_locked(time.time())
+
+    def _evict_locked(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM media_cache WHERE ns = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (self.namespace, now),
+        )
+        if self.max_entries <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM media_cache WHERE ns = ? AND key IN ("
+            "  SELECT key FROM media_cache WHERE ns = ? "
+            "  ORDER BY last_access DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.namespace, self.namespace, self.max_entries),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM media_cache WHERE ns = ?", (self.namespace,)
+            ).fetchone()
+        return int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
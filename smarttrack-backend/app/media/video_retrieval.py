@@ -6,11 +6,10 @@ scores for educational quality, and caches results.
 """
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import re
 import time
-from pathlib import Path
 from typing import Any
 from urllib.parse import quote_plus
 
@@ -18,6 +17,7 @@ import httpx
 
 from app.config import settings
 from app.media.learning_resources import learning_resource
+from app.media.media_cache import MediaCache, resolve_data_path
 
 logger = logging.getLogger(__name__)
 
@@ -88,31 +88,26 @@ PIPED_INSTANCES = (
 )
 
 
-def _cache_path() -> Path:
-    raw = getattr(settings, "EDUCATIONAL_VIDEO_CACHE_PATH", "data/educational_video_cache.json")
-    path = Path(raw)
-    if not path.is_absolute():
-        path = Path(__file__).resolve().parent.parent.parent / path
-    path.parent.mkdir(parents=True, exist_ok=True)
-    return path
-
-
-def _load_cache() -> dict[str, Any]:
-    path = _cache_path()
-    if not path.exists():
-        return {}
-    try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-        return raw if isinstance(raw, dict) else {}
-    except Exception:
-        return {}
-
-
-def _save_cache(cache: dict[str, Any]) -> None:
-    try:
-        _cache_path().write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
-    except Exception as exc:
-        logger.info("Could not save video cache: %s", exc)
+_cache: MediaCache | None = None
+
+
+def _video_cache() -> MediaCache:
+    """Shared video cache (SQLite); imports the legacy JSON file on first use."""
+    global _cache
+    if _cache is None:
+        _cache = MediaCache(
+            resolve_data_path(
+                getattr(settings, "EDUCATIONAL_MEDIA_CACHE_DB_PATH", "")
+                or "data/educational_media_cache.sqlite3"
+            ),
+            namespace="video",
+            default_ttl=float(getattr(settings, "EDUCATIONAL_VIDEO_CACHE_TTL_SECONDS", 86_400)),
+            max_entries=int(getattr(settings, "EDUCATIONAL_VIDEO_CACHE_MAX_ENTRIES", 2000)),
+            legacy_json=resolve_data_path(
+                getattr(settings, "EDUCATIONAL_VIDEO_CACHE_PATH", "data/educational_video_cache.json")
+            ),
+        )
+    return _cache
 
 
 def _subject_label(subject: str) -> str:
@@ -441,11 +436,10 @@ async def retrieve_educational_videos(
     queries = build_video_queries(title=title, subject=subject, shs_level=shs_level)
     primary_query = queries[0] if queries else title
 
-    cache = _load_cache()
+    cache = await asyncio.to_thread(_video_cache)
     cache_key = f"v1|{subject}|{shs_level}|{title}|{limit}".lower()
-    hit = cache.get(cache_key)
-    ttl = float(getattr(settings, "EDUCATIONAL_VIDEO_CACHE_TTL_SECONDS", 86_400))
-    if isinstance(hit, dict) and hit.get("resources") and (time.time() - float(hit.get("cached_at") or 0)) < ttl:
+    hit = await asyncio.to_thread(cache.get, cache_key)  # expired entries are dropped by the store (per-entry TTL)
+    if isinstance(hit, dict) and hit.get("resources"):
         return {"queries": hit.get("queries") or queries, "resources": hit["resources"]}
 
     candidates: list[dict[str, Any]] = []
@@ -511,6 +505,8 @@ async def retrieve_educational_videos(
             )
 
     payload = {"queries": queries, "resources": resources, "cached_at": time.time()}
-    cache[cache_key] = payload
-    _save_cache(cache)
+    try:
+        await asyncio.to_thread(cache.put, cache_key, payload)
+    except Exception as exc:
+        logger.info("Could not save video cache: %s", exc)
     return {"queries": queries, "resources": resources}
@@ -3,6 +3,7 @@
 Stage 9 architecture
 ────────────────────
 Generation : service.create_notification, engine, events
+Scheduling : scheduler.run_notification_sweep (Stage 7 rules for all learners)
 Delivery   : delivery.dispatch_notification → InApp / FCM stub / Web Push stub
 """
 from __future__ import annotations
@@ -19,6 +20,7 @@ from .delivery import (
 from .engine import run_notification_engine
 from .models import Notification
 from .push_tokens import NotificationPushToken
+from .scheduler import notification_scheduler, run_notification_sweep
 from .service import (
     create_notification,
     list_notifications,
@@ -51,6 +53,8 @@ __all__ = [
     "list_notifications",
     "mark_all_read",
     "mark_read",
+    "notification_scheduler",
     "run_notification_engine",
+    "run_notification_sweep",
     "unread_count",
 ]
@@ -10,7 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.assessment.models import CurriculumLesson
 from app.notifications.types import MONITORED_SIGNALS
-from app.phases.models import Level, Phase, UserLevelProgress, UserPhaseProgress
+from app.phases.snapshot import LevelInfo, PhaseInfo, load_progress_snapshot
 from app.users.models import User
 from app.users.gamification import STREAK_LAST_DATE_KEY
 
@@ -29,16 +29,11 @@ async def get_learner_activity_snapshot(
     user_id = user.id
     profile = user.learner_profile if isinstance(user.learner_profile, dict) else {}
 
-    phase_rows = (
-        await db.execute(
-            select(UserPhaseProgress).where(UserPhaseProgress.user_id == user_id)
-        )
-    ).scalars().all()
-    level_rows = (
-        await db.execute(
-            select(UserLevelProgress).where(UserLevelProgress.user_id == user_id)
-        )
-    ).scalars().all()
+    # Shared with eligibility below (and any other consumer in this request).
+    snap = await load_progress_snapshot(db, user_id, ensure=False)
+    catalogue = snap.catalogue
+    phase_rows = list(snap.phase_progress.values())
+    level_rows = list(snap.level_progress.values())
 
     completed_phases = sorted(
         [p.phase_id for p in phase_rows if (p.status or "") == "completed"]
@@ -50,13 +45,9 @@ async def get_learner_activity_snapshot(
     if completed_levels:
         dated = [lp for lp in completed_levels if getattr(lp, "completed_at", None)]
         pick = max(dated, key=lambda x: x.completed_at) if dated else completed_levels[-1]
-        level = (
-            await db.execute(select(Level).where(Level.id == pick.level_id))
-        ).scalar_one_or_none()
+        level = catalogue.level_by_id.get(pick.level_id)
         if level:
-            phase = (
-                await db.execute(select(Phase).where(Phase.id == level.phase_id))
-            ).scalar_one_or_none()
+            phase = catalogue.phase_by_id.get(level.phase_id)
             last_completed_level = {
                 "level_id": level.id,
                 "level_number": level.number,
@@ -70,9 +61,7 @@ async def get_learner_activity_snapshot(
     if completed_phase_progress:
         dated = [p for p in completed_phase_progress if getattr(p, "completed_at", None)]
         pick = max(dated, key=lambda x: x.completed_at) if dated else completed_phase_progress[-1]
-        phase = (
-            await db.execute(select(Phase).where(Phase.id == pick.phase_id))
-        ).scalar_one_or_none()
+        phase = catalogue.phase_by_id.get(pick.phase_id)
         last_completed_phase = {
             "phase_id": pick.phase_id,
             "phase_number": phase.number if phase else None,
@@ -83,22 +72,18 @@ async def get_learner_activity_snapshot(
     continue_point: dict[str, Any] | None = None
     if in_progress_levels:
         # Prefer the lowest phase/level number still in progress
-        candidates: list[tuple[int, int, UserLevelProgress, Level, Phase]] = []
+        candidates: list[tuple[int, int, LevelInfo, PhaseInfo]] = []
         for lp in in_progress_levels:
-            level = (
-                await db.execute(select(Level).where(Level.id == lp.level_id))
-            ).scalar_one_or_none()
+            level = catalogue.level_by_id.get(lp.level_id)
             if not level:
                 continue
-            phase = (
-                await db.execute(select(Phase).where(Phase.id == level.phase_id))
-            ).scalar_one_or_none()
+            phase = catalogue.phase_by_id.get(level.phase_id)
             if not phase:
                 continue
-            candidates.append((phase.number, level.number, lp, level, phase))
+            candidates.append((phase.number, level.number, level, phase))
         if candidates:
             candidates.sort(key=lambda t: (t[0], t[1]))
-            phase_n, level_n, _lp, level, phase = candidates[0]
+            phase_n, level_n, level, phase = candidates[0]
             continue_point = {
                 "phase_id": phase.id,
                 "phase_number": phase_n,
@@ -10,6 +10,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
 
+from app.auth.user_cache import lock_user_for_update
 from app.notifications.models import Notification
 from app.notifications.types import NotificationType
 from app.phases.models import Level, Phase, UserLevelProgress, UserPhaseProgress
@@ -69,6 +70,12 @@ async def ensure_progress_backfill(db: AsyncSession, user: User) -> int:
     profile: dict[str, Any] = (
         dict(user.learner_profile) if isinstance(user.learner_profile, dict) else {}
     )
+    if profile.get(BACKFILL_FLAG):
+        return 0
+    # The snapshot may be cached: re-read the row locked, so two workers
+    # cannot both backfill and the flag is written onto the current profile.
+    user = await lock_user_for_update(db, user.id)
+    profile = dict(user.learner_profile) if isinstance(user.learner_profile, dict) else {}
     if profile.get(BACKFILL_FLAG):
         return 0
 
@@ -23,7 +23,7 @@ from __future__ import annotations
 import logging
 import uuid
 from dataclasses import dataclass, field
-from typing import Any, Protocol
+from typing import Any, Mapping, Protocol, Sequence
 
 from app.config import settings
 from app.notifications.models import Notification
@@ -73,6 +73,22 @@ class DeliveryPayload:
             data=data,
         )
 
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> DeliveryPayload:
+        """Same as ``from_notification`` for a bulk-inserted column mapping."""
+        pval = int(row.get("priority") or 1)
+        return cls(
+            notification_id=row["id"],
+            user_id=row["user_id"],
+            title=row["title"],
+            message=row["message"],
+            category=str(row.get("category") or row.get("type") or "system"),
+            priority=priority_label(pval),
+            priority_value=pval,
+            action_link=row.get("action_link") or None,
+            data=dict(row.get("data") or {}),
+        )
+
     def as_push_data(self) -> dict[str, str]:
         """Flat string map suitable for FCM data / Web Push custom data."""
         out: dict[str, str] = {
@@ -197,8 +213,15 @@ async def dispatch_notification(notification: Notification) -> None:
 
     Failures in one channel never roll back generation and never block others.
     """
-    payload = DeliveryPayload.from_notification(notification)
-    for channel in get_delivery_channels():
+    await dispatch_payload(DeliveryPayload.from_notification(notification))
+
+
+async def dispatch_payload(
+    payload: DeliveryPayload,
+    channels: Sequence[DeliveryChannel] | None = None,
+) -> None:
+    """Fan one payload out to every channel (bulk generation skips the ORM row)."""
+    for channel in channels if channels is not None else get_delivery_channels():
         try:
             await channel.deliver(payload)
         except Exception:
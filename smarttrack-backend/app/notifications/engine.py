@@ -2,21 +2,37 @@
 
 Evaluates learner activity signals and creates reminder / nudge
 notifications with cooldown-based deduplication (rule_key).
+
+Rules are a pure function of ``LearnerFacts``. ``load_learner_facts`` builds
+facts for many learners at once (a handful of grouped queries, no per-user
+SELECTs) and ``apply_rules`` checks every cooldown with one grouped query and
+bulk-inserts what fired. The scheduled sweep (app.notifications.scheduler)
+runs them for all active learners; ``run_notification_engine`` runs the same
+path for one learner (manual endpoint, or inline when the scheduler is off).
 """
 from __future__ import annotations
 
 import logging
+import uuid
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
 
-from app.notifications.activity import get_learner_activity_snapshot
+from app.auth.user_cache import lock_user_for_update
+from app.config import settings
 from app.notifications.models import Notification
 from app.notifications.service import create_notification
-from app.notifications.types import NotificationCategory, NotificationPriority
+from app.notifications.types import (
+    NotificationCategory,
+    NotificationPriority,
+    priority_from_label,
+)
+from app.phases.models import Level, UserLevelProgress
+from app.phases.snapshot import PhaseCatalogue, get_phase_catalogue
 from app.users.models import User
 from app.users.gamification import STREAK_LAST_DATE_KEY, RANK_THRESHOLDS
 
@@ -62,20 +78,15 @@ async def has_recent_rule(
     """True if a notification with this rule_key was created recently."""
     cutoff = _now() - timedelta(hours=within_hours)
     result = await db.execute(
-        select(Notification)
+        select(Notification.id)
         .where(
             Notification.user_id == user_id,
+            Notification.rule_key == rule_key,
             Notification.created_at >= cutoff,
-            Notification.data.is_not(None),
         )
-        .order_by(Notification.created_at.desc())
-        .limit(40)
+        .limit(1)
     )
-    for row in result.scalars().all():
-        data = row.data if isinstance(row.data, dict) else {}
-        if data.get("rule_key") == rule_key:
-            return True
-    return False
+    return result.first() is not None
 
 
 async def has_any_rule(
@@ -85,19 +96,11 @@ async def has_any_rule(
 ) -> bool:
     """True if this rule_key was ever emitted (for one-shot milestones)."""
     result = await db.execute(
-        select(Notification)
-        .where(
-            Notification.user_id == user_id,
-            Notification.data.is_not(None),
-        )
-        .order_by(Notification.created_at.desc())
-        .limit(120)
+        select(Notification.id)
+        .where(Notification.user_id == user_id, Notification.rule_key == rule_key)
+        .limit(1)
     )
-    for row in result.scalars().all():
-        data = row.data if isinstance(row.data, dict) else {}
-        if data.get("rule_key") == rule_key:
-            return True
-    return False
+    return result.first() is not None
 
 
 async def _emit(
@@ -137,170 +140,170 @@ async def _emit(
     return True
 
 
-def _should_run_engine(user: User) -> bool:
-    profile = user.learner_profile if isinstance(user.learner_profile, dict) else {}
-    last = _parse_iso(profile.get(ENGINE_LAST_RUN_KEY))
-    if last is None:
-        return True
-    return (_now() - last) >= ENGINE_MIN_INTERVAL
-
-
-def _mark_engine_run(user: User) -> None:
-    profile = dict(user.learner_profile) if isinstance(user.learner_profile, dict) else {}
-    profile[ENGINE_LAST_RUN_KEY] = _now().isoformat()
-    user.learner_profile = profile
-    flag_modified(user, "learner_profile")
+# ── Facts and rules ───────────────────────────────────────────────────────────
+
+
+@dataclass
+class LearnerFacts:
+    """The learner signals Stage 7 rules read (see activity.get_learner_activity_snapshot)."""
+
+    user_id: uuid.UUID
+    created_at: datetime | None
+    streak: int
+    rank: str | None
+    shs_level: str | None
+    profile: dict[str, Any] = field(default_factory=dict)
+    levels_completed: int = 0
+    continue_point: dict[str, Any] | None = None
+    recommendations_eligible: bool = False
+
+    @classmethod
+    def from_user(cls, user: Any) -> "LearnerFacts":
+        profile = user.learner_profile if isinstance(user.learner_profile, dict) else {}
+        return cls(
+            user_id=user.id,
+            created_at=user.created_at,
+            streak=int(user.streak or 0),
+            rank=user.rank,
+            shs_level=user.shs_level,
+            profile=profile,
+        )
 
 
-async def run_notification_engine(
-    db: AsyncSession,
-    user: User,
-    *,
-    force: bool = False,
-) -> dict[str, Any]:
-    """
-    Evaluate Stage 7 rules and create notifications as needed.
+@dataclass(frozen=True)
+class RuleHit:
+    rule_key: str
+    title: str
+    message: str
+    category: NotificationCategory
+    action_link: str
+    priority: str
+    within_hours: float
+    one_shot: bool = False
+    extra: dict[str, Any] | None = None
 
-    Safe to call on every notifications list/unread fetch — throttled per user.
-    """
-    if not force and not _should_run_engine(user):
-        return {"ran": False, "created": 0, "rules_fired": []}
 
-    snapshot = await get_learner_activity_snapshot(db, user)
-    fired: list[str] = []
+def evaluate_rules(facts: LearnerFacts, *, now: datetime | None = None) -> list[RuleHit]:
+    """Stage 7 rules for one learner, in priority order (no I/O)."""
+    now = now or _now()
+    profile = facts.profile
+    hits: list[RuleHit] = []
 
     # ── Continue where you left off (exact phase • level) ─────────────────
-    continue_point = (snapshot.get("challenge_progress") or {}).get("continue_point")
+    continue_point = facts.continue_point
     if isinstance(continue_point, dict) and continue_point.get("level_number"):
         phase_n = continue_point.get("phase_number") or "?"
         level_n = continue_point.get("level_number")
         label = continue_point.get("label") or f"Continue from Phase {phase_n} • Level {level_n}"
-        rule_key = f"continue_phase_{phase_n}_level_{level_n}"
-        if await _emit(
-            db,
-            user,
-            rule_key=rule_key,
-            title="Continue where you left off",
-            message=label,
-            category=NotificationCategory.PROGRESS,
-            action_link="/challenges",
-            priority="high",
-            within_hours=36,
-            extra={
-                "phase_number": phase_n,
-                "level_number": level_n,
-            },
-        ):
-            fired.append(rule_key)
+        hits.append(
+            RuleHit(
+                rule_key=f"continue_phase_{phase_n}_level_{level_n}",
+                title="Continue where you left off",
+                message=label,
+                category=NotificationCategory.PROGRESS,
+                action_link="/challenges",
+                priority="high",
+                within_hours=36,
+                extra={"phase_number": phase_n, "level_number": level_n},
+            )
+        )
 
     # ── Continue today's challenges ───────────────────────────────────────
-    profile = user.learner_profile if isinstance(user.learner_profile, dict) else {}
     streak_last = str(profile.get(STREAK_LAST_DATE_KEY) or "")[:10]
-    today = _now().date().isoformat()
-    has_challenge_progress = int(
-        (snapshot.get("challenge_progress") or {}).get("levels_completed") or 0
-    ) > 0 or bool(continue_point)
+    today = now.date().isoformat()
+    has_challenge_progress = facts.levels_completed > 0 or bool(continue_point)
     if has_challenge_progress and streak_last != today:
-        if await _emit(
-            db,
-            user,
-            rule_key="continue_todays_challenges",
-            title="Continue today's challenges",
-            message="Jump back into Challenges and keep your progress moving today.",
-            category=NotificationCategory.REMINDER,
-            action_link="/challenges",
-            priority="normal",
-            within_hours=20,
-        ):
-            fired.append("continue_todays_challenges")
+        hits.append(
+            RuleHit(
+                rule_key="continue_todays_challenges",
+                title="Continue today's challenges",
+                message="Jump back into Challenges and keep your progress moving today.",
+                category=NotificationCategory.REMINDER,
+                action_link="/challenges",
+                priority="normal",
+                within_hours=20,
+            )
+        )
 
     # ── Learning Center idle nudge ────────────────────────────────────────
-    learning = snapshot.get("learning_center_activity") or {}
-    last_visit = _parse_iso(learning.get("last_visited_at"))
-    lessons_done = int(learning.get("completed_lesson_count") or 0)
-    idle_enough = False
+    recent = profile.get("learning_recent") or profile.get("recent") or []
+    last_recent = recent[0] if isinstance(recent, list) and recent else None
+    last_visit = _parse_iso(last_recent.get("visited_at")) if isinstance(last_recent, dict) else None
+    completed_lessons = profile.get("completed_lessons") or []
+    lessons_done = len(completed_lessons) if isinstance(completed_lessons, list) else 0
     if last_visit is None:
         # Never visited — nudge after account has had time to explore
-        created = _as_utc(user.created_at) or _now()
-        idle_enough = (_now() - created) >= timedelta(days=LEARNING_IDLE_DAYS)
+        created = _as_utc(facts.created_at) or now
+        idle_enough = (now - created) >= timedelta(days=LEARNING_IDLE_DAYS)
     else:
-        idle_enough = (_now() - last_visit) >= timedelta(days=LEARNING_IDLE_DAYS)
+        idle_enough = (now - last_visit) >= timedelta(days=LEARNING_IDLE_DAYS)
 
     if idle_enough:
-        msg = (
-            "Visit the Learning Center today to strengthen your subjects."
-            if lessons_done == 0
-            else "It's been a few days — open the Learning Center and continue studying."
+        hits.append(
+            RuleHit(
+                rule_key="learning_center_idle",
+                title="Visit the Learning Center today",
+                message=(
+                    "Visit the Learning Center today to strengthen your subjects."
+                    if lessons_done == 0
+                    else "It's been a few days — open the Learning Center and continue studying."
+                ),
+                category=NotificationCategory.LEARNING,
+                action_link="/learning",
+                priority="normal",
+                within_hours=72,
+            )
         )
-        if await _emit(
-            db,
-            user,
-            rule_key="learning_center_idle",
-            title="Visit the Learning Center today",
-            message=msg,
-            category=NotificationCategory.LEARNING,
-            action_link="/learning",
-            priority="normal",
-            within_hours=72,
-        ):
-            fired.append("learning_center_idle")
 
     # ── Recommendations available (safety net if event missed) ────────────
-    rec = snapshot.get("recommendation_eligibility") or {}
-    if rec.get("eligible"):
-        if await _emit(
-            db,
-            user,
-            rule_key="recommendations_available",
-            title="Recommendations are now available",
-            message=(
-                "Your programme recommendations are unlocked. "
-                "Open Recommendations to review them."
-            ),
-            category=NotificationCategory.RECOMMENDATION,
-            action_link="/recommendations",
-            priority="high",
-            within_hours=168,  # weekly
-            extra={"eligible": True},
-        ):
-            fired.append("recommendations_available")
+    if facts.recommendations_eligible:
+        hits.append(
+            RuleHit(
+                rule_key="recommendations_available",
+                title="Recommendations are now available",
+                message=(
+                    "Your programme recommendations are unlocked. "
+                    "Open Recommendations to review them."
+                ),
+                category=NotificationCategory.RECOMMENDATION,
+                action_link="/recommendations",
+                priority="high",
+                within_hours=168,  # weekly
+                extra={"eligible": True},
+            )
+        )
 
     # ── WASSCE upload nudge ───────────────────────────────────────────────
-    wassce = snapshot.get("wassce_upload_status") or {}
-    shs = (getattr(user, "shs_level", None) or "").strip()
-    should_prompt_wassce = (
-        not wassce.get("uploaded")
-        and (
-            bool(rec.get("eligible"))
-            or shs in {"SHS 3", "Completed SHS"}
-        )
+    wassce = profile.get("wassce") or profile.get("wassce_results") or {}
+    wassce_uploaded = bool(
+        wassce or profile.get("wassce_uploaded") or profile.get("academic_results_uploaded")
     )
-    if should_prompt_wassce:
-        if await _emit(
-            db,
-            user,
-            rule_key="wassce_upload_nudge",
-            title="Upload your WASSCE results",
-            message=(
-                "Upload your WASSCE / academic results to unlock stronger "
-                "programme recommendations."
-            ),
-            category=NotificationCategory.REMINDER,
-            action_link="/recommendations",
-            priority="normal",
-            within_hours=120,
-        ):
-            fired.append("wassce_upload_nudge")
+    shs = (facts.shs_level or "").strip()
+    if not wassce_uploaded and (
+        facts.recommendations_eligible or shs in {"SHS 3", "Completed SHS"}
+    ):
+        hits.append(
+            RuleHit(
+                rule_key="wassce_upload_nudge",
+                title="Upload your WASSCE results",
+                message=(
+                    "Upload your WASSCE / academic results to unlock stronger "
+                    "programme recommendations."
+                ),
+                category=NotificationCategory.REMINDER,
+                action_link="/recommendations",
+                priority="normal",
+                within_hours=120,
+            )
+        )
 
     # ── Keep streak alive ─────────────────────────────────────────────────
-    streak = int(snapshot.get("current_learning_streak") or 0)
-    if streak > 0 and streak_last and streak_last != today:
-        # At risk of breaking if they don't act today
-        yesterday = (_now().date() - timedelta(days=1)).isoformat()
-        if streak_last == yesterday or streak_last < yesterday:
-            if await _emit(
-                db,
-                user,
+    streak = facts.streak
+    yesterday = (now.date() - timedelta(days=1)).isoformat()
+    # At risk of breaking if they don't act today
+    if streak > 0 and streak_last and streak_last != today and streak_last <= yesterday:
+        hits.append(
+            RuleHit(
                 rule_key="keep_streak_alive",
                 title="Keep your learning streak alive",
                 message=(
@@ -312,51 +315,230 @@ async def run_notification_engine(
                 priority="high",
                 within_hours=18,
                 extra={"streak": streak},
-            ):
-                fired.append("keep_streak_alive")
+            )
+        )
 
     # ── Streak milestone celebration (one-shot per milestone) ──────────────
     if streak in STREAK_MILESTONES:
-        rule_key = f"streak_milestone_{streak}"
-        if await _emit(
-            db,
-            user,
-            rule_key=rule_key,
-            title="Streak milestone!",
-            message=f"Amazing — you've kept a {streak}-day learning streak.",
-            category=NotificationCategory.STREAK,
-            action_link="/dashboard",
-            priority="high",
-            within_hours=24,
-            one_shot=True,
-            extra={"streak": streak},
-        ):
-            fired.append(rule_key)
+        hits.append(
+            RuleHit(
+                rule_key=f"streak_milestone_{streak}",
+                title="Streak milestone!",
+                message=f"Amazing — you've kept a {streak}-day learning streak.",
+                category=NotificationCategory.STREAK,
+                action_link="/dashboard",
+                priority="high",
+                within_hours=24,
+                one_shot=True,
+                extra={"streak": streak},
+            )
+        )
 
     # ── Rank / badge celebration (if never notified for current rank) ──────
-    rank = (snapshot.get("achievement_milestones") or {}).get("rank") or user.rank
+    rank = facts.rank
     if rank and rank != "Beginner":
-        rule_key = f"badge_unlocked_{str(rank).lower().replace(' ', '_')}"
         threshold = next((m for name, m in RANK_THRESHOLDS if name == rank), None)
         msg = f"Badge unlocked: {rank}."
         if threshold is not None:
             msg = f"Badge unlocked: you've reached {rank} ({threshold}+ XP)."
-        if await _emit(
-            db,
-            user,
-            rule_key=rule_key,
-            title="Badge unlocked",
-            message=msg,
-            category=NotificationCategory.ACHIEVEMENT,
-            action_link="/dashboard",
-            priority="high",
-            within_hours=24,
-            one_shot=True,
-            extra={"rank": rank, "badge": rank},
+        hits.append(
+            RuleHit(
+                rule_key=f"badge_unlocked_{str(rank).lower().replace(' ', '_')}",
+                title="Badge unlocked",
+                message=msg,
+                category=NotificationCategory.ACHIEVEMENT,
+                action_link="/dashboard",
+                priority="high",
+                within_hours=24,
+                one_shot=True,
+                extra={"rank": rank, "badge": rank},
+            )
+        )
+
+    return hits
+
+
+def _continue_point(catalogue: PhaseCatalogue, level_ids: list[int]) -> dict[str, Any] | None:
+    # Prefer the lowest phase/level number still in progress
+    best = None
+    for level_id in level_ids:
+        level = catalogue.level_by_id.get(level_id)
+        phase = catalogue.phase_by_id.get(level.phase_id) if level else None
+        if level is None or phase is None:
+            continue
+        if best is None or (phase.number, level.number) < (best[0].number, best[1].number):
+            best = (phase, level)
+    if best is None:
+        return None
+    phase, level = best
+    return {
+        "phase_id": phase.id,
+        "phase_number": phase.number,
+        "phase_name": phase.name,
+        "level_id": level.id,
+        "level_number": level.number,
+        "label": f"Continue from Phase {phase.number} • Level {level.number}.",
+    }
+
+
+async def load_learner_facts(db: AsyncSession, users: Sequence[Any]) -> list[LearnerFacts]:
+    """
+    Facts for many learners with two grouped progress queries.
+
+    ``users`` are ``User`` rows or any rows with the same column names (the
+    sweep selects only the columns the rules read).
+    """
+    facts = {u.id: LearnerFacts.from_user(u) for u in users}
+    if not facts:
+        return []
+    ids = list(facts)
+    catalogue = await get_phase_catalogue(db)
+
+    completed = await db.execute(
+        select(UserLevelProgress.user_id, Level.phase_id, func.count())
+        .join(Level, Level.id == UserLevelProgress.level_id)
+        .where(UserLevelProgress.user_id.in_(ids), UserLevelProgress.status == "completed")
+        .group_by(UserLevelProgress.user_id, Level.phase_id)
+    )
+    for user_id, phase_id, count in completed.all():
+        f = facts[user_id]
+        f.levels_completed += int(count)
+        phase = catalogue.phase_by_id.get(phase_id)
+        # Eligibility gate: every level in at least one phase completed.
+        if phase is not None and phase.levels and int(count) >= len(phase.levels):
+            f.recommendations_eligible = True
+
+    in_progress: dict[uuid.UUID, list[int]] = {}
+    rows = await db.execute(
+        select(UserLevelProgress.user_id, UserLevelProgress.level_id).where(
+            UserLevelProgress.user_id.in_(ids), UserLevelProgress.status == "in_progress"
+        )
+    )
+    for user_id, level_id in rows.all():
+        in_progress.setdefault(user_id, []).append(level_id)
+    for user_id, level_ids in in_progress.items():
+        facts[user_id].continue_point = _continue_point(catalogue, level_ids)
+
+    return list(facts.values())
+
+
+async def _last_fired(
+    db: AsyncSession,
+    user_ids: list[uuid.UUID],
+    rule_keys: set[str],
+) -> dict[tuple[uuid.UUID, str], datetime]:
+    """Most recent emission of each (user, rule_key) — one grouped query."""
+    if not user_ids or not rule_keys:
+        return {}
+    rows = await db.execute(
+        select(Notification.user_id, Notification.rule_key, func.max(Notification.created_at))
+        .where(Notification.user_id.in_(user_ids), Notification.rule_key.in_(rule_keys))
+        .group_by(Notification.user_id, Notification.rule_key)
+    )
+    return {(u, k): _as_utc(at) for u, k, at in rows.all() if at is not None}
+
+
+def _notification_row(user_id: uuid.UUID, hit: RuleHit, now: datetime) -> dict[str, Any]:
+    data = {"rule_key": hit.rule_key, "event": hit.rule_key, "href": hit.action_link}
+    if hit.extra:
+        data.update(hit.extra)
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "title": hit.title[:200],
+        "message": hit.message.strip(),
+        "category": hit.category.value,
+        "type": hit.category.value,
+        "is_read": False,
+        "action_link": hit.action_link[:500],
+        "priority": priority_from_label(hit.priority),
+        "data": data,
+        "rule_key": hit.rule_key[:120],
+        "created_at": now,
+    }
+
+
+async def apply_rules(
+    db: AsyncSession,
+    facts: Sequence[LearnerFacts],
+    *,
+    now: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Evaluate rules for ``facts``, drop hits still in cooldown, bulk-insert the rest.
+
+    Does not commit. Returns the inserted column mappings for
+    ``deliver_created`` once the caller has committed.
+    """
+    now = now or _now()
+    pending = [(f.user_id, hit) for f in facts for hit in evaluate_rules(f, now=now)]
+    if not pending:
+        return []
+    last = await _last_fired(
+        db,
+        list({user_id for user_id, _hit in pending}),
+        {hit.rule_key for _user_id, hit in pending},
+    )
+    rows = []
+    for user_id, hit in pending:
+        fired_at = last.get((user_id, hit.rule_key))
+        if fired_at is not None and (
+            hit.one_shot or now - fired_at < timedelta(hours=hit.within_hours)
         ):
-            fired.append(rule_key)
+            continue
+        rows.append(_notification_row(user_id, hit, now))
+    if rows:
+        # Core executemany: no ORM identity/unit-of-work work per row.
+        await db.execute(insert(Notification.__table__), rows)
+    return rows
+
+
+async def deliver_created(created: Sequence[dict[str, Any]]) -> None:
+    from app.notifications.delivery import DeliveryPayload, dispatch_payload, get_delivery_channels
+
+    channels = get_delivery_channels()
+    for row in created:
+        await dispatch_payload(DeliveryPayload.from_row(row), channels)
+
+
+def _should_run_engine(user: User) -> bool:
+    profile = user.learner_profile if isinstance(user.learner_profile, dict) else {}
+    last = _parse_iso(profile.get(ENGINE_LAST_RUN_KEY))
+    if last is None:
+        return True
+    return (_now() - last) >= ENGINE_MIN_INTERVAL
+
+
+def _mark_engine_run(user: User) -> None:
+    profile = dict(user.learner_profile) if isinstance(user.learner_profile, dict) else {}
+    profile[ENGINE_LAST_RUN_KEY] = _now().isoformat()
+    user.learner_profile = profile
+    flag_modified(user, "learner_profile")
+
+
+def engine_runs_inline() -> bool:
+    """Read endpoints evaluate rules themselves only when the scheduled sweep is off."""
+    return float(getattr(settings, "NOTIFICATION_ENGINE_INTERVAL_SECONDS", 600) or 0) <= 0
+
+
+async def run_notification_engine(
+    db: AsyncSession,
+    user: User,
+    *,
+    force: bool = False,
+) -> dict[str, Any]:
+    """
+    Evaluate Stage 7 rules for one learner and create notifications as needed.
+
+    Throttled per user unless ``force``; the scheduled sweep covers everyone else.
+    """
+    if not force and not _should_run_engine(user):
+        return {"ran": False, "created": 0, "rules_fired": []}
+
+    facts = await load_learner_facts(db, [user])
+    created = await apply_rules(db, facts)
 
-    _mark_engine_run(user)
+    _mark_engine_run(await lock_user_for_update(db, user.id))
     try:
         await db.commit()
     except Exception:
@@ -364,6 +546,8 @@ async def run_notification_engine(
         logger.exception("Notification engine commit failed for user=%s", user.id)
         return {"ran": True, "created": 0, "rules_fired": []}
 
+    await deliver_created(created)
+    fired = [row["rule_key"] for row in created]
     return {"ran": True, "created": len(fired), "rules_fired": fired}
 
 
@@ -4,7 +4,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, JSON
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -21,6 +21,10 @@ class Notification(Base):
     """
 
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Cooldown / one-shot checks: last time a rule fired for a user.
+        Index("ix_notifications_user_rule_created", "user_id", "rule_key", "created_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True
@@ -42,6 +46,8 @@ class Notification(Base):
     priority: Mapped[int] = mapped_column(Integer, nullable=False, default=1, index=True)
     # Optional deep-link / metadata for clients and future push payloads
     data: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Engine rule that produced this row (copy of data["rule_key"]), for dedup.
+    rule_key: Mapped[str | None] = mapped_column(String(120), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
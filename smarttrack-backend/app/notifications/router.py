@@ -32,7 +32,7 @@ from app.notifications.service import (
 from app.notifications.activity import get_learner_activity_snapshot
 from app.notifications.backfill import ensure_progress_backfill
 from app.notifications.delivery import get_delivery_channels
-from app.notifications.engine import run_notification_engine
+from app.notifications.engine import engine_runs_inline, run_notification_engine
 from app.notifications.push_service import deactivate_push_token, upsert_push_token
 from app.config import settings
 from app.users.models import User
@@ -51,14 +51,15 @@ async def get_notifications(
 ):
     await ensure_progress_backfill(db, current_user)
     await db.refresh(current_user)
-    # Stage 7 — evaluate intelligent reminder rules (throttled)
-    try:
-        await run_notification_engine(db, current_user)
-        await db.refresh(current_user)
-    except Exception:
-        import logging
-
-        logging.getLogger(__name__).exception("Notification engine failed")
+    # Stage 7 rules run in the scheduled sweep; inline (throttled) only when it is off.
+    if engine_runs_inline():
+        try:
+            await run_notification_engine(db, current_user)
+            await db.refresh(current_user)
+        except Exception:
+            import logging
+
+            logging.getLogger(__name__).exception("Notification engine failed")
     rows = await list_notifications(
         db,
         current_user.id,
@@ -178,12 +179,13 @@ async def get_unread_count(
     db: AsyncSession = Depends(get_db),
 ):
     await ensure_progress_backfill(db, current_user)
-    try:
-        await run_notification_engine(db, current_user)
-    except Exception:
-        import logging
+    if engine_runs_inline():
+        try:
+            await run_notification_engine(db, current_user)
+        except Exception:
+            import logging
 
-        logging.getLogger(__name__).exception("Notification engine failed")
+            logging.getLogger(__name__).exception("Notification engine failed")
     count = await unread_count(db, current_user.id)
     return UnreadCountResponse(unread_count=count)
 
@@ -0,0 +1,189 @@
+"""
+Scheduled Stage 7 sweep: evaluate notification rules for all active learners.
+
+Listing notifications and polling the unread badge used to run the engine
+inline (activity snapshot + one cooldown query per rule per learner). The
+sweep replaces that with set-based work per chunk of learners:
+
+  • one keyset-paged SELECT of the columns the rules read
+  • two grouped progress queries (completed levels per phase, in-progress
+    levels) — see ``engine.load_learner_facts``
+  • one grouped cooldown query over (user_id, rule_key) and one bulk INSERT
+    — see ``engine.apply_rules``
+
+Each chunk commits on its own, so a failure only loses that chunk until the
+next tick. Only one worker sweeps at a time: a Postgres advisory lock when
+the database is Postgres, an in-process lock otherwise.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator
+
+from sqlalchemy import and_, or_, select, text
+
+from app.config import settings
+from app.notifications.engine import apply_rules, deliver_created, load_learner_facts
+from app.request_metrics import record_stage
+from app.users.models import User
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant shared by every worker (pg_try_advisory_lock key).
+_ADVISORY_LOCK_KEY = 7_316_001
+_STARTUP_DELAY_S = 30.0
+
+_local_lock = asyncio.Lock()
+
+
+def _default_sessions() -> Any:
+    from app.database import AsyncSessionLocal
+
+    return AsyncSessionLocal
+
+
+def sweep_interval_seconds() -> float:
+    return float(getattr(settings, "NOTIFICATION_ENGINE_INTERVAL_SECONDS", 600) or 0)
+
+
+@asynccontextmanager
+async def _exclusive(sessions: Any) -> AsyncIterator[bool]:
+    """Yield True if this worker may sweep now (never blocks)."""
+    if _local_lock.locked():
+        yield False
+        return
+    async with _local_lock, sessions() as db:
+        if db.bind.dialect.name != "postgresql":
+            yield True
+            return
+        got = bool(
+            (
+                await db.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+            ).scalar()
+        )
+        try:
+            yield got
+        finally:
+            if got:
+                await db.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+                await db.commit()
+
+
+def _active_learners(after: Any, limit: int, now: datetime):
+    days = float(getattr(settings, "NOTIFICATION_ENGINE_ACTIVE_DAYS", 30) or 0)
+    stmt = select(
+        User.id,
+        User.created_at,
+        User.streak,
+        User.rank,
+        User.shs_level,
+        User.learner_profile,
+    ).where(User.is_active.is_(True))
+    if days > 0:
+        cutoff = now - timedelta(days=days)
+        stmt = stmt.where(
+            or_(
+                User.last_login >= cutoff,
+                and_(User.last_login.is_(None), User.created_at >= cutoff),
+            )
+        )
+    if after is not None:
+        stmt = stmt.where(User.id > after)
+    return stmt.order_by(User.id).limit(limit)
+
+
+async def run_notification_sweep(
+    *,
+    sessions: Any | None = None,
+    batch_size: int | None = None,
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    """Evaluate Stage 7 rules for every active learner, one chunk per transaction."""
+    sessions = sessions or _default_sessions()
+    batch_size = max(1, int(batch_size or getattr(settings, "NOTIFICATION_ENGINE_BATCH_SIZE", 1000)))
+    now = now or datetime.now(timezone.utc)
+    started = time.perf_counter()
+    users = 0
+    created = 0
+    failed_chunks = 0
+    fired: Counter[str] = Counter()
+
+    async with _exclusive(sessions) as acquired:
+        if not acquired:
+            return {"ran": False, "users": 0, "created": 0, "rules_fired": {}}
+
+        after = None
+        while True:
+            async with sessions() as db:
+                rows = (await db.execute(_active_learners(after, batch_size, now))).all()
+                if not rows:
+                    break
+                after = rows[-1].id
+                try:
+                    facts = await load_learner_facts(db, rows)
+                    new_rows = await apply_rules(db, facts, now=now)
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    failed_chunks += 1
+                    logger.exception("Notification sweep chunk failed (after=%s)", after)
+                    continue
+            users += len(rows)
+            created += len(new_rows)
+            fired.update(row["rule_key"] for row in new_rows)
+            await deliver_created(new_rows)
+            if len(rows) < batch_size:
+                break
+
+    elapsed = time.perf_counter() - started
+    record_stage("notification_sweep", elapsed)
+    logger.info(
+        "Notification sweep: %d learners, %d notifications in %.1fs", users, created, elapsed
+    )
+    return {
+        "ran": True,
+        "users": users,
+        "created": created,
+        "failed_chunks": failed_chunks,
+        "rules_fired": dict(fired),
+        "elapsed_ms": round(elapsed * 1000.0, 1),
+    }
+
+
+class NotificationScheduler:
+    """Runs ``run_notification_sweep`` every NOTIFICATION_ENGINE_INTERVAL_SECONDS."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is not None or sweep_interval_seconds() <= 0:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _loop(self) -> None:
+        await asyncio.sleep(min(_STARTUP_DELAY_S, sweep_interval_seconds()))
+        while True:
+            try:
+                await run_notification_sweep()
+            except Exception:
+                logger.exception("Notification sweep failed")
+            await asyncio.sleep(sweep_interval_seconds())
+
+
+notification_scheduler = NotificationScheduler()
@@ -71,6 +71,7 @@ async def create_notification(
         action_link=href,
         priority=priority_from_label(priority),
         data=payload or None,
+        rule_key=str(payload["rule_key"])[:120] if payload.get("rule_key") else None,
     )
     db.add(row)
     await db.flush()
@@ -1,6 +1,11 @@
-"""Phase academic question bank — load + select by phase rules."""
+"""Phase academic question bank — load + select by phase rules.
+
+Rows are indexed once per bank load by (phase_number, subject) and bucketed
+by difficulty, so select_question is a bucket walk rather than a full scan.
+"""
 from __future__ import annotations
 
+import heapq
 import json
 import logging
 import random
@@ -41,39 +46,148 @@ def include_wassce_for_phase(phase_number: int) -> bool:
     return phase_number >= 3
 
 
+# Textbook-nav / meta / study-habit style bank rows are never served.
+_META_TEXT_RE = re.compile(
+    r"(?i)(\[\s*.*difficulty\s*\d+\s*\]|\b(section|chapter|unit)\s+\d+\b|"
+    r"most reliable next step|skip the problem and guess)"
+)
+
+
+def _servable(q: dict[str, Any]) -> bool:
+    text = str(q.get("question_text") or "")
+    if _META_TEXT_RE.search(text):
+        return False
+    return "what would you read" not in text.lower()
+
+
+def _excluded(q: dict[str, Any], exclude: set[str]) -> bool:
+    qid = str(q.get("id") or "")
+    return bool(qid) and qid in exclude
+
+
+def _phase_allows(q: dict[str, Any], levels: set[str], allow_wassce: bool) -> bool:
+    style = (q.get("exam_style") or "classroom").lower()
+    if style == "wassce":
+        return allow_wassce
+    return q.get("shs_level") in levels
+
+
+class _SubjectPool:
+    """Servable rows for one (phase, subject), bucketed by difficulty.
+
+    Buckets hold (bank_order, row) so a band spanning two difficulties can be
+    merged back into bank order — selection stays identical to the old
+    scan + stable sort for a given rng.
+    """
+
+    __slots__ = ("buckets", "min_difficulty", "max_difficulty")
+
+    def __init__(self) -> None:
+        self.buckets: dict[int, list[tuple[int, dict[str, Any]]]] = {}
+        self.min_difficulty = 0
+        self.max_difficulty = 0
+
+    def add(self, order: int, q: dict[str, Any]) -> None:
+        diff = int(q.get("difficulty") or 5)
+        if not self.buckets:
+            self.min_difficulty = self.max_difficulty = diff
+        else:
+            self.min_difficulty = min(self.min_difficulty, diff)
+            self.max_difficulty = max(self.max_difficulty, diff)
+        self.buckets.setdefault(diff, []).append((order, q))
+
+    def _ring(
+        self, target: int, delta: int, exclude: set[str]
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """Rows exactly ``delta`` away from target, in bank order."""
+        low = self.buckets.get(target - delta, ())
+        high = self.buckets.get(target + delta, ()) if delta else ()
+        rows = heapq.merge(low, high, key=lambda t: t[0]) if low and high else (low or high)
+        if not exclude:
+            return list(rows)
+        return [t for t in rows if not _excluded(t[1], exclude)]
+
+    def select(
+        self, target: int, exclude: set[str], rng: random.Random
+    ) -> dict[str, Any] | None:
+        # Walk outward from the target difficulty to the nearest non-empty ring,
+        # then sample among rings within +2 of it (same band as before).
+        reach = max(abs(target - self.min_difficulty), abs(self.max_difficulty - target))
+        best: int | None = None
+        band: list[dict[str, Any]] = []
+        for delta in range(reach + 1):
+            if best is not None and delta > best + 2:
+                break
+            ring = self._ring(target, delta, exclude)
+            if not ring:
+                continue
+            if best is None:
+                best = delta
+            band.extend(q for _order, q in ring)
+        if not band:
+            return None
+        return rng.choice(band)
+
+
+class BankIndex:
+    """(phase_number, subject) → difficulty-bucketed pools, built once per bank."""
+
+    def __init__(self, rows: list[dict[str, Any]]) -> None:
+        self._rows = [(i, q) for i, q in enumerate(rows) if _servable(q)]
+        self._pools: dict[tuple[int, str], _SubjectPool] = {}
+        self._built_phases: set[int] = set()
+
+    def _build_phase(self, phase_number: int) -> None:
+        levels = allowed_levels_for_phase(phase_number)
+        allow_wassce = include_wassce_for_phase(phase_number)
+        for order, q in self._rows:
+            if not _phase_allows(q, levels, allow_wassce):
+                continue
+            key = (phase_number, str(q.get("subject")))
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = _SubjectPool()
+                self._pools[key] = pool
+            pool.add(order, q)
+        self._built_phases.add(phase_number)
+
+    def pool(self, phase_number: int, subject: str) -> _SubjectPool | None:
+        if phase_number not in self._built_phases:
+            self._build_phase(phase_number)
+        return self._pools.get((phase_number, subject))
+
+    def select(
+        self,
+        phase_number: int,
+        subject: str,
+        effective_difficulty: int,
+        exclude_ids: set[str],
+        rng: random.Random,
+    ) -> dict[str, Any] | None:
+        pool = self.pool(phase_number, subject)
+        if pool is None:
+            return None
+        return pool.select(effective_difficulty, exclude_ids, rng)
+
+
+@lru_cache(maxsize=1)
+def bank_index() -> BankIndex:
+    return BankIndex(load_bank())
+
+
 def _eligible(
     phase_number: int,
     subject: str,
     exclude_ids: set[str],
 ) -> list[dict[str, Any]]:
-    levels = allowed_levels_for_phase(phase_number)
-    allow_wassce = include_wassce_for_phase(phase_number)
-    out: list[dict[str, Any]] = []
-    for q in load_bank():
-        qid = str(q.get("id") or "")
-        if qid and qid in exclude_ids:
-            continue
-        if q.get("subject") != subject:
-            continue
-        text = str(q.get("question_text") or "")
-        # Block textbook-nav / meta / study-habit style bank rows
-        low = text.lower()
-        if re.search(
-            r"(?i)(\[\s*.*difficulty\s*\d+\s*\]|\b(section|chapter|unit)\s+\d+\b|"
-            r"most reliable next step|skip the problem and guess)",
-            text,
-        ):
-            continue
-        if "what would you read" in low:
-            continue
-        style = (q.get("exam_style") or "classroom").lower()
-        if style == "wassce":
-            if allow_wassce:
-                out.append(q)
-            continue
-        if q.get("shs_level") in levels:
-            out.append(q)
-    return out
+    """All servable rows for phase + subject (bank order), minus exclusions."""
+    pool = bank_index().pool(phase_number, subject)
+    if pool is None:
+        return []
+    rows = sorted(
+        (t for bucket in pool.buckets.values() for t in bucket), key=lambda t: t[0]
+    )
+    return [q for _order, q in rows if not _excluded(q, exclude_ids)]
 
 
 def select_question(
@@ -88,23 +202,16 @@ def select_question(
     Pick one bank question for subject, filtered by phase rules.
     Prefers items near effective_difficulty. Returns None if pool empty.
     """
-    exclude = exclude_ids or set()
-    pool = _eligible(phase_number, subject, exclude)
-    if not pool:
+    chosen = bank_index().select(
+        phase_number,
+        subject,
+        effective_difficulty,
+        exclude_ids or set(),
+        rng or random.Random(),
+    )
+    if chosen is None:
         return None
 
-    rng = rng or random.Random()
-    # Score by closeness to target difficulty, then sample among best band
-    scored: list[tuple[int, dict[str, Any]]] = []
-    for q in pool:
-        diff = int(q.get("difficulty") or 5)
-        scored.append((abs(diff - effective_difficulty), q))
-    scored.sort(key=lambda t: t[0])
-    best_delta = scored[0][0]
-    # Keep items within +2 of best distance so sessions vary
-    band = [q for d, q in scored if d <= best_delta + 2]
-    chosen = rng.choice(band)
-
     opts = chosen.get("options") or {}
     if isinstance(opts, list):
         opts = {chr(65 + i): str(o) for i, o in enumerate(opts[:4])}
@@ -4,7 +4,17 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -108,3 +118,70 @@ class UserSubjectPerformance(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False,
     )
+
+
+class PhasePrefetchEntryRow(Base):
+    """Shared prefetch buffer slot (CHALLENGE_PREFETCH_BACKEND=sql).
+
+    ``payload`` is the zlib-compressed JSON PrefetchEntry; status and
+    started_at are duplicated as columns so claim / complete are single
+    conditional statements.
+    """
+
+    __tablename__ = "phase_prefetch_entries"
+
+    entry_key: Mapped[str] = mapped_column(String(80), primary_key=True)  # "{user_id}:{level_id}"
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), nullable=False, index=True
+    )
+    level_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="fetching")
+    started_at: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+class QuestionPoolItem(Base):
+    """Pre-generated challenge question (app.phases.question_pool).
+
+    Built offline per (phase, subject, question_type, difficulty band,
+    curriculum topic) through the same gates as live generation. ``text_key``
+    is the hash of ``normalize_question_text`` so a stem is pooled once per
+    phase/subject; ``payload`` is the generated item as live generation
+    returns it.
+    """
+
+    __tablename__ = "phase_question_pool"
+    __table_args__ = (
+        UniqueConstraint("phase_number", "subject", "text_key", name="uq_question_pool_stem"),
+        # Level start draw: one cell, least-served first.
+        Index(
+            "ix_question_pool_draw",
+            "phase_number",
+            "subject",
+            "band",
+            "format_version",
+            "served_count",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    phase_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    subject: Mapped[str] = mapped_column(String(40), nullable=False)
+    question_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    band: Mapped[str] = mapped_column(String(12), nullable=False)
+    topic: Mapped[str] = mapped_column(String(200), nullable=False, default="")
+    text_key: Mapped[str] = mapped_column(String(40), nullable=False)
+    format_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    served_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -0,0 +1,74 @@
+"""
+Question pipeline metrics (exported on ``/metrics``; see app.metrics).
+
+Stages timed per question: ``visual_analysis``, ``image_plan``,
+``image_retrieval``, ``llm_call``, ``json_parse``, ``quality_gates``,
+``bank_select``, ``fallback`` and ``concurrency_wait`` (time a slot queues for
+a CHALLENGE_GEN_CONCURRENCY permit). Compare ``concurrency_wait`` with
+``llm_call`` and the in-flight gauge when tuning the concurrency setting.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.metrics import registry
+
+QUESTION_STAGE_SECONDS = registry.histogram(
+    "smarttrack_question_stage_seconds",
+    "Time spent in one question pipeline stage.",
+    ("stage", "subject"),
+)
+QUESTION_SECONDS = registry.histogram(
+    "smarttrack_question_seconds",
+    "Time to produce one question, by the source that produced it (llm, bank, fallback).",
+    ("subject", "source"),
+)
+QUESTION_REJECTS = registry.counter(
+    "smarttrack_question_rejects_total",
+    "Generated items rejected or demoted, by gate rule.",
+    ("rule", "subject"),
+)
+LEVEL_BUILD_SECONDS = registry.histogram(
+    "smarttrack_level_build_seconds",
+    "Wall-clock time to build a full level question set.",
+)
+LEVEL_QUESTIONS = registry.counter(
+    "smarttrack_level_questions_total",
+    "Questions placed in built levels, by where they came from (pool, llm, bank, fallback).",
+    ("source",),
+)
+GENERATION_INFLIGHT = registry.gauge(
+    "smarttrack_question_generation_inflight",
+    "Level-build slots currently holding a CHALLENGE_GEN_CONCURRENCY permit.",
+)
+PREFETCH_CLAIMS = registry.counter(
+    "smarttrack_prefetch_claims_total",
+    "Level starts by prefetch outcome: hit, wait_hit (in-flight set finished) or miss.",
+    ("result",),
+)
+
+
+def _circuit() -> list[tuple[tuple[str, ...], float]]:
+    from app.llm.deepseek_client import llm_circuit_remaining_seconds
+
+    remaining = llm_circuit_remaining_seconds()
+    return [(("open",), 1.0 if remaining > 0 else 0.0), (("remaining_seconds",), remaining)]
+
+
+registry.gauge(
+    "smarttrack_llm_circuit",
+    "DeepSeek circuit breaker: open (1/0) and seconds until it closes.",
+    ("field",),
+    callback=_circuit,
+)
+
+
+@contextmanager
+def question_stage(stage: str, subject: str = "") -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        QUESTION_STAGE_SECONDS.observe(time.perf_counter() - started, stage, subject or "-")
@@ -15,41 +15,35 @@ import asyncio
 import logging
 import time
 import uuid
-from dataclasses import dataclass, field
 from typing import Any
 
 from app.config import settings
+from app.phases.pipeline_metrics import PREFETCH_CLAIMS
+from app.phases.prefetch_store import (  # noqa: F401 — PrefetchEntry re-exported
+    PrefetchEntry,
+    PrefetchStore,
+    build_prefetch_store,
+)
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class PrefetchEntry:
-    status: str = "idle"  # idle | fetching | ready | error
-    level_id: int = 0
-    format_version: int = 0
-    questions: list[dict[str, Any]] = field(default_factory=list)
-    mix: dict[str, int] = field(default_factory=dict)
-    phase_number: int = 0
-    level_number: int = 0
-    error: str | None = None
-    started_at: float = 0.0
-    ready_at: float | None = None
-    retried: bool = False
-
-
 class PhasePrefetchManager:
-    """Per-user rolling cache keyed by level_id (multiple levels at once)."""
+    """Per-user rolling cache keyed by level_id (multiple levels at once).
 
-    def __init__(self) -> None:
-        # key = "{user_id}:{level_id}"
-        self._cache: dict[str, PrefetchEntry] = {}
+    Entries live in a PrefetchStore (see CHALLENGE_PREFETCH_BACKEND) so a
+    buffer warmed by one worker can be claimed by another.
+    """
+
+    def __init__(self, store: PrefetchStore | None = None) -> None:
+        self._store = store or build_prefetch_store()
         self._lock = asyncio.Lock()
         # Serialize builds per user so buffer levels share exclude stems.
         self._user_build_locks: dict[str, asyncio.Lock] = {}
 
-    def _entry_key(self, user_id: uuid.UUID, level_id: int) -> str:
-        return f"{user_id}:{level_id}"
+    @property
+    def store(self) -> PrefetchStore:
+        return self._store
 
     def _user_build_lock(self, user_id: uuid.UUID) -> asyncio.Lock:
         key = str(user_id)
@@ -75,43 +69,37 @@ class PhasePrefetchManager:
             return False
         return (time.time() - entry.ready_at) > self._ttl()
 
-    def _user_entries(
-        self, user_id: uuid.UUID
-    ) -> list[tuple[str, PrefetchEntry]]:
-        prefix = f"{user_id}:"
-        return [(k, e) for k, e in self._cache.items() if k.startswith(prefix)]
+    async def _user_entries(self, user_id: uuid.UUID) -> list[PrefetchEntry]:
+        return await self._store.user_entries(user_id)
 
-    def _prune_user(self, user_id: uuid.UUID, *, protect_level_id: int | None = None) -> None:
+    async def _prune_user(
+        self, user_id: uuid.UUID, *, protect_level_id: int | None = None
+    ) -> None:
         """Drop stale entries; cap ready+fetching slots to buffer size."""
-        for key, entry in list(self._user_entries(user_id)):
+        live: list[PrefetchEntry] = []
+        for entry in await self._user_entries(user_id):
             if self._stale(entry) and entry.status != "fetching":
-                self._cache.pop(key, None)
+                await self._store.delete(user_id, entry.level_id)
+                continue
+            if entry.status in ("ready", "fetching"):
+                live.append(entry)
 
-        live = [
-            (k, e)
-            for k, e in self._user_entries(user_id)
-            if e.status in ("ready", "fetching")
-        ]
         limit = self._buffer_size()
         if len(live) <= limit:
             return
 
-        def _age(item: tuple[str, PrefetchEntry]) -> float:
-            _k, e = item
+        def _age(e: PrefetchEntry) -> float:
             return float(e.ready_at or e.started_at or 0.0)
 
         # Prefer dropping oldest *ready* first; never drop protect / fetching unless needed.
-        ready = sorted(
-            [(k, e) for k, e in live if e.status == "ready"],
-            key=_age,
-        )
+        ready = sorted([e for e in live if e.status == "ready"], key=_age)
         overflow = len(live) - limit
-        for key, entry in ready:
+        for entry in ready:
             if overflow <= 0:
                 break
             if protect_level_id is not None and entry.level_id == protect_level_id:
                 continue
-            self._cache.pop(key, None)
+            await self._store.delete(user_id, entry.level_id)
             overflow -= 1
 
     def _status_payload(
@@ -135,25 +123,24 @@ class PhasePrefetchManager:
     ) -> dict[str, Any]:
         if level_id is None:
             return await self.buffer_status(user_id)
-        key = self._entry_key(user_id, level_id)
-        entry = self._cache.get(key)
+        entry = await self._store.get(user_id, level_id)
         if not entry:
             return self._status_payload(None, level_id=level_id)
         if self._stale(entry):
             if entry.status != "fetching":
-                self._cache.pop(key, None)
+                await self._store.delete(user_id, level_id)
             return self._status_payload(None, level_id=level_id)
         return self._status_payload(entry, level_id=level_id)
 
     async def buffer_status(self, user_id: uuid.UUID) -> dict[str, Any]:
-        self._prune_user(user_id)
+        await self._prune_user(user_id)
         ready_levels: list[int] = []
         fetching_levels: list[int] = []
         error_levels: list[int] = []
         question_count = 0
         entries: list[dict[str, Any]] = []
-        for _key, entry in sorted(
-            self._user_entries(user_id), key=lambda kv: kv[1].level_id
+        for entry in sorted(
+            await self._user_entries(user_id), key=lambda e: e.level_id
         ):
             if self._stale(entry) and entry.status != "fetching":
                 continue
@@ -196,10 +183,9 @@ class PhasePrefetchManager:
         force: bool = False,
     ) -> dict[str, Any]:
         """Kick off background generation for a level; reuse valid ready sets."""
-        key = self._entry_key(user_id, level_id)
         async with self._lock:
-            self._prune_user(user_id, protect_level_id=level_id)
-            entry = self._cache.get(key)
+            await self._prune_user(user_id, protect_level_id=level_id)
+            entry = await self._store.get(user_id, level_id)
             if entry and not self._stale(entry):
                 if entry.status in ("fetching", "ready") and not force:
                     logger.info(
@@ -212,13 +198,16 @@ class PhasePrefetchManager:
                 if entry.status == "error" and not force and entry.retried:
                     return self._status_payload(entry, level_id=level_id)
 
-            self._cache[key] = PrefetchEntry(
-                status="fetching",
-                level_id=level_id,
-                format_version=self._current_format(),
-                started_at=time.time(),
+            await self._store.put(
+                user_id,
+                PrefetchEntry(
+                    status="fetching",
+                    level_id=level_id,
+                    format_version=self._current_format(),
+                    started_at=time.time(),
+                ),
             )
-            self._prune_user(user_id, protect_level_id=level_id)
+            await self._prune_user(user_id, protect_level_id=level_id)
 
         asyncio.create_task(self._run(user_id, level_id))
         logger.info("[PhasePrefetch] started user=%s level=%s", user_id, level_id)
@@ -257,33 +246,30 @@ class PhasePrefetchManager:
         """
         Consume a ready prefetch for this level only (other buffer slots remain).
         Returns {questions, mix, phase_number, level_number, format_version} or None.
+
+        The store removes the entry atomically, so two workers racing on the
+        same level can never both receive the set.
         """
-        key = self._entry_key(user_id, level_id)
-        async with self._lock:
-            entry = self._cache.get(key)
-            if not entry:
-                return None
-            if self._stale(entry):
-                self._cache.pop(key, None)
-                return None
-            if entry.status != "ready" or not entry.questions:
-                return None
-            payload = {
-                "questions": list(entry.questions),
-                "mix": dict(entry.mix),
-                "phase_number": entry.phase_number,
-                "level_number": entry.level_number,
-                "format_version": entry.format_version,
-            }
-            self._cache.pop(key, None)
-            logger.info(
-                "[PhasePrefetch] claimed user=%s level=%s questions=%s buffer_left=%s",
-                user_id,
-                level_id,
-                len(payload["questions"]),
-                len(self._user_entries(user_id)),
-            )
-            return payload
+        entry = await self._store.claim(user_id, level_id)
+        if not entry:
+            return None
+        if self._stale(entry) or not entry.questions:
+            return None
+        payload = {
+            "questions": list(entry.questions),
+            "mix": dict(entry.mix),
+            "phase_number": entry.phase_number,
+            "level_number": entry.level_number,
+            "format_version": entry.format_version,
+        }
+        logger.info(
+            "[PhasePrefetch] claimed user=%s level=%s questions=%s backend=%s",
+            user_id,
+            level_id,
+            len(payload["questions"]),
+            self._store.name,
+        )
+        return payload
 
     async def wait_until_ready(
         self,
@@ -319,13 +305,25 @@ class PhasePrefetchManager:
         """Claim a ready prefetch, or wait briefly if generation is already in flight."""
         ready = await self.claim(user_id, level_id)
         if ready:
+            PREFETCH_CLAIMS.inc("hit")
             return ready
 
-        key = self._entry_key(user_id, level_id)
-        entry = self._cache.get(key)
+        entry = await self._store.get(user_id, level_id)
         if not entry or entry.status != "fetching":
+            PREFETCH_CLAIMS.inc("miss")
             return None
+        ready = await self._wait_and_claim(user_id, level_id, timeout_s=timeout_s, poll_s=poll_s)
+        PREFETCH_CLAIMS.inc("wait_hit" if ready else "miss")
+        return ready
 
+    async def _wait_and_claim(
+        self,
+        user_id: uuid.UUID,
+        level_id: int,
+        *,
+        timeout_s: float,
+        poll_s: float,
+    ) -> dict[str, Any] | None:
         deadline = time.time() + max(1.0, timeout_s)
         logger.info(
             "[PhasePrefetch] waiting for in-flight user=%s level=%s timeout=%.0fs",
@@ -338,7 +336,7 @@ class PhasePrefetchManager:
             ready = await self.claim(user_id, level_id)
             if ready:
                 return ready
-            entry = self._cache.get(key)
+            entry = await self._store.get(user_id, level_id)
             if not entry:
                 return None
             if entry.status == "error":
@@ -347,7 +345,7 @@ class PhasePrefetchManager:
                 return None
         return await self.claim(user_id, level_id)
 
-    def reserved_stems(
+    async def reserved_stems(
         self,
         user_id: uuid.UUID,
         *,
@@ -357,7 +355,7 @@ class PhasePrefetchManager:
         from app.phases.adaptive import normalize_question_text
 
         stems: set[str] = set()
-        for _key, entry in self._user_entries(user_id):
+        for entry in await self._user_entries(user_id):
             if exclude_level_id is not None and entry.level_id == exclude_level_id:
                 continue
             if entry.status != "ready" or not entry.questions:
@@ -369,14 +367,16 @@ class PhasePrefetchManager:
         return stems
 
     async def _run(self, user_id: uuid.UUID, level_id: int) -> None:
-        key = self._entry_key(user_id, level_id)
         # One build at a time per user → later levels exclude earlier buffer stems.
         async with self._user_build_lock(user_id):
+            pending = await self._store.get(user_id, level_id)
+            if not pending or pending.status != "fetching":
+                return
             try:
                 from app.database import AsyncSessionLocal
                 from app.phases.service import build_level_question_set
 
-                extra_exclude = self.reserved_stems(
+                extra_exclude = await self.reserved_stems(
                     user_id, exclude_level_id=level_id
                 )
                 async with AsyncSessionLocal() as db:
@@ -388,42 +388,45 @@ class PhasePrefetchManager:
                     )
                     await db.commit()
 
+                ready = PrefetchEntry(
+                    status="ready",
+                    level_id=level_id,
+                    format_version=built["format_version"],
+                    questions=built["questions"],
+                    mix=built["mix"],
+                    phase_number=built["phase_number"],
+                    level_number=built["level_number"],
+                    started_at=pending.started_at,
+                    ready_at=time.time(),
+                    retried=pending.retried,
+                )
                 async with self._lock:
-                    current = self._cache.get(key)
-                    if (
-                        not current
-                        or current.level_id != level_id
-                        or current.status != "fetching"
+                    # Only publish if this slot was not pruned / restarted meanwhile.
+                    if not await self._store.complete(
+                        user_id, ready, started_at=pending.started_at
                     ):
                         return
-                    current.status = "ready"
-                    current.questions = built["questions"]
-                    current.mix = built["mix"]
-                    current.phase_number = built["phase_number"]
-                    current.level_number = built["level_number"]
-                    current.format_version = built["format_version"]
-                    current.ready_at = time.time()
-                    current.error = None
                 logger.info(
                     "[PhasePrefetch] ready user=%s level=%s count=%s excluded=%s in %.1fs",
                     user_id,
                     level_id,
                     len(built["questions"]),
                     len(extra_exclude),
-                    time.time() - (current.started_at or time.time()),
+                    time.time() - (pending.started_at or time.time()),
                 )
             except Exception as exc:
                 logger.exception(
                     "[PhasePrefetch] failed user=%s level=%s", user_id, level_id
                 )
                 async with self._lock:
-                    current = self._cache.get(key)
+                    current = await self._store.get(user_id, level_id)
                     if current and current.level_id == level_id:
                         if not current.retried:
                             current.retried = True
                             current.status = "fetching"
                             current.error = None
                             current.started_at = time.time()
+                            await self._store.put(user_id, current)
                             asyncio.create_task(self._run(user_id, level_id))
                             logger.info(
                                 "[PhasePrefetch] retrying once user=%s level=%s",
@@ -433,6 +436,7 @@ class PhasePrefetchManager:
                             return
                         current.status = "error"
                         current.error = str(exc)[:240]
+                        await self._store.put(user_id, current)
 
 
 phase_prefetch_manager = PhasePrefetchManager()
@@ -0,0 +1,546 @@
+"""Storage backends for the phase prefetch buffer.
+
+PhasePrefetchManager keeps per-learner level question sets in a store keyed by
+(user_id, level_id). Backends:
+
+  - memory — per-process dict (default; single worker / tests)
+  - sql    — ``phase_prefetch_entries`` table on the app database, shared by
+             every uvicorn worker (SQLite or Postgres)
+  - redis  — any Redis-protocol server (Redis, Valkey, a local stand-in)
+
+Entries are stored as compact zlib-compressed JSON. ``claim`` is atomic on
+every backend: a ready set is removed and returned by exactly one caller.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
+from urllib.parse import urlparse
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrefetchEntry:
+    status: str = "idle"  # idle | fetching | ready | error
+    level_id: int = 0
+    format_version: int = 0
+    questions: list[dict[str, Any]] = field(default_factory=list)
+    mix: dict[str, int] = field(default_factory=dict)
+    phase_number: int = 0
+    level_number: int = 0
+    error: str | None = None
+    started_at: float = 0.0
+    ready_at: float | None = None
+    retried: bool = False
+
+
+def encode_entry(entry: PrefetchEntry) -> bytes:
+    """Compact wire form: minified JSON, zlib-compressed."""
+    raw = json.dumps(
+        asdict(entry), separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return zlib.compress(raw.encode("utf-8"), 6)
+
+
+def decode_entry(blob: bytes | None) -> PrefetchEntry | None:
+    if not blob:
+        return None
+    try:
+        data = json.loads(zlib.decompress(blob).decode("utf-8"))
+    except (zlib.error, ValueError):
+        logger.warning("[PhasePrefetch] dropping undecodable store entry")
+        return None
+    known = PrefetchEntry.__dataclass_fields__
+    return PrefetchEntry(**{k: v for k, v in data.items() if k in known})
+
+
+class PrefetchStore:
+    """Async key/value contract used by PhasePrefetchManager."""
+
+    name = "base"
+
+    async def get(self, user_id: uuid.UUID, level_id: int) -> PrefetchEntry | None:
+        raise NotImplementedError
+
+    async def put(self, user_id: uuid.UUID, entry: PrefetchEntry) -> None:
+        raise NotImplementedError
+
+    async def delete(self, user_id: uuid.UUID, level_id: int) -> None:
+        raise NotImplementedError
+
+    async def user_entries(self, user_id: uuid.UUID) -> list[PrefetchEntry]:
+        raise NotImplementedError
+
+    async def claim(self, user_id: uuid.UUID, level_id: int) -> PrefetchEntry | None:
+        """Atomically remove and return the entry only if it is ``ready``."""
+        raise NotImplementedError
+
+    async def complete(
+        self,
+        user_id: uuid.UUID,
+        entry: PrefetchEntry,
+        *,
+        started_at: float,
+    ) -> bool:
+        """Store a finished build only if the slot is still the same in-flight fetch."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+# ── Memory ───────────────────────────────────────────────────────────────────
+
+
+class MemoryPrefetchStore(PrefetchStore):
+    """Per-process dict (the original behaviour). Not shared across workers."""
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        # key = "{user_id}:{level_id}"
+        self._cache: dict[str, PrefetchEntry] = {}
+
+    @staticmethod
+    def _key(user_id: uuid.UUID, level_id: int) -> str:
+        return f"{user_id}:{level_id}"
+
+    async def get(self, user_id: uuid.UUID, level_id: int) -> PrefetchEntry | None:
+        return self._cache.get(self._key(user_id, level_id))
+
+    async def put(self, user_id: uuid.UUID, entry: PrefetchEntry) -> None:
+        self._cache[self._key(user_id, entry.level_id)] = entry
+
+    async def delete(self, user_id: uuid.UUID, level_id: int) -> None:
+        self._cache.pop(self._key(user_id, level_id), None)
+
+    async def user_entries(self, user_id: uuid.UUID) -> list[PrefetchEntry]:
+        prefix = f"{user_id}:"
+        return [e for k, e in self._cache.items() if k.startswith(prefix)]
+
+    async def claim(self, user_id: uuid.UUID, level_id: int) -> PrefetchEntry | None:
+        key = self._key(user_id, level_id)
+        entry = self._cache.get(key)
+        if not entry or entry.status != "ready":
+            return None
+        return self._cache.pop(key, None)
+
+    async def complete(
+        self,
+        user_id: uuid.UUID,
+        entry: PrefetchEntry,
+        *,
+        started_at: float,
+    ) -> bool:
+        current = self._cache.get(self._key(user_id, entry.level_id))
+        if (
+            not current
+            or current.status != "fetching"
+            or current.started_at != started_at
+        ):
+            return False
+        await self.put(user_id, entry)
+        return True
+
+
+# ── SQL (SQLite / Postgres) ──────────────────────────────────────────────────
+
+
+class SqlPrefetchStore(PrefetchStore):
+    """Rows in ``phase_prefetch_entries`` on the app database."""
+
+    name = "sql"
+
+    def __init__(self, session_factory: Any | None = None) -> None:
+        self._session_factory = session_factory
+
+    def _sessions(self) -> Any:
+        if self._session_factory is None:
+            from app.database import AsyncSessionLocal
+
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory
+
+    @staticmethod
+    def _key(user_id: uuid.UUID, level_id: int) -> str:
+        return f"{user_id}:{level_id}"
+
+    async def get(self, user_id: uuid.UUID, level_id: int) -> PrefetchEntry | None:
+        from sqlalchemy import select
+
+        from app.phases.models import PhasePrefetchEntryRow
+
+        async with self._sessions()() as db:
+            blob = (
+                await db.execute(
+                    select(PhasePrefetchEntryRow.payload).where(
+                        PhasePrefetchEntryRow.entry_key == self._key(user_id, level_id)
+                    )
+                )
+            ).scalar_one_or_none()
+        return decode_entry(blob)
+
+    async def put(self, user_id: uuid.UUID, entry: PrefetchEntry) -> None:
+        from datetime import datetime, timezone
+
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        from app.phases.models import PhasePrefetchEntryRow
+
+        values = {
+            "entry_key": self._key(user_id, entry.level_id),
+            "user_id": user_id,
+            "level_id": entry.level_id,
+            "status": entry.status,
+            "started_at": entry.started_at,
+            "payload": encode_entry(entry),
+            "updated_at": datetime.now(timezone.utc),
+        }
+        async with self._sessions()() as db:
+            dialect = db.get_bind().dialect.name
+            if dialect in ("postgresql", "sqlite"):
+                # One statement: two workers writing the same slot first
+                # cannot both INSERT and trip the primary key.
+                insert = pg_insert if dialect == "postgresql" else sqlite_insert
+                stmt = insert(PhasePrefetchEntryRow).values(**values)
+                await db.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["entry_key"],
+                        set_={
+                            key: stmt.excluded[key]
+                            for key in ("status", "started_at", "payload", "updated_at")
+                        },
+                    )
+                )
+            else:
+                await db.merge(PhasePrefetchEntryRow(**values))
+            await db.commit()
+
+    async def delete(self, user_id: uuid.UUID, level_id: int) -> None:
+        from sqlalchemy import delete
+
+        from app.phases.models import PhasePrefetchEntryRow
+
+        async with self._sessions()() as db:
+            await db.execute(
+                delete(PhasePrefetchEntryRow).where(
+                    PhasePrefetchEntryRow.entry_key == self._key(user_id, level_id)
+                )
+            )
+            await db.commit()
+
+    async def user_entries(self, user_id: uuid.UUID) -> list[PrefetchEntry]:
+        from sqlalchemy import select
+
+        from app.phases.models import PhasePrefetchEntryRow
+
+        async with self._sessions()() as db:
+            blobs = (
+                await db.execute(
+                    select(PhasePrefetchEntryRow.payload).where(
+                        PhasePrefetchEntryRow.user_id == user_id
+                    )
+                )
+            ).scalars().all()
+        return [e for e in (decode_entry(b) for b in blobs) if e is not None]
+
+    async def claim(self, user_id: uuid.UUID, level_id: int) -> PrefetchEntry | None:
+        from sqlalchemy import delete
+
+        from app.phases.models import PhasePrefetchEntryRow
+
+        # DELETE … RETURNING is a single statement: only one worker gets the row.
+        async with self._sessions()() as db:
+            blob = (
+                await db.execute(
+                    delete(PhasePrefetchEntryRow)
+                    .where(
+                        PhasePrefetchEntryRow.entry_key == self._key(user_id, level_id),
+                        PhasePrefetchEntryRow.status == "ready",
+                    )
+                    .returning(PhasePrefetchEntryRow.payload)
+                )
+            ).scalar_one_or_none()
+            await db.commit()
+        return decode_entry(blob)
+
+    async def complete(
+        self,
+        user_id: uuid.UUID,
+        entry: PrefetchEntry,
+        *,
+        started_at: float,
+    ) -> bool:
+        from sqlalchemy import update
+
+        from app.phases.models import PhasePrefetchEntryRow
+
+        async with self._sessions()() as db:
+            result = await db.execute(
+                update(PhasePrefetchEntryRow)
+                .where(
+                    PhasePrefetchEntryRow.entry_key == self._key(user_id, entry.level_id),
+                    PhasePrefetchEntryRow.status == "fetching",
+                    PhasePrefetchEntryRow.started_at == started_at,
+                )
+                .values(
+                    status=entry.status,
+                    started_at=entry.started_at,
+                    payload=encode_entry(entry),
+                )
+            )
+            await db.commit()
+        return bool(result.rowcount)
+
+
+# ── Redis protocol ───────────────────────────────────────────────────────────
+
+
+class RespError(RuntimeError):
+    """Error reply from a Redis-protocol server."""
+
+
+class RespConnection:
+    """Minimal RESP2 client (one connection, serialized commands).
+
+    Only the handful of commands the prefetch store needs; avoids adding a
+    redis client dependency for one feature.
+    """
+
+    def __init__(self, url: str) -> None:
+        parsed = urlparse(url)
+        self._host = parsed.hostname or "127.0.0.1"
+        self._port = parsed.port or 6379
+        self._password = parsed.password
+        path = (parsed.path or "").lstrip("/")
+        self._db = int(path) if path.isdigit() else 0
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(
+            self._host, self._port
+        )
+        if self._password:
+            await self._roundtrip("AUTH", self._password)
+        if self._db:
+            await self._roundtrip("SELECT", self._db)
+
+    @staticmethod
+    def _encode(*args: Any) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            else:
+                data = str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    async def _read_reply(self) -> Any:
+        assert self._reader is not None
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise RespError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = await self._reader.readexactly(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(body)
+            if size < 0:
+                return None
+            return [await self._read_reply() for _ in range(size)]
+        raise RespError(f"Unexpected RESP reply: {line!r}")
+
+    async def _roundtrip(self, *args: Any) -> Any:
+        assert self._writer is not None
+        self._writer.write(self._encode(*args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def execute(self, *args: Any) -> Any:
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                await self._connect()
+            try:
+                return await self._roundtrip(*args)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # One reconnect for idle connections dropped by the server.
+                await self._connect()
+                return await self._roundtrip(*args)
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncIterator[Callable[..., Awaitable[Any]]]:
+        """Hold the connection for a multi-command exchange (WATCH … EXEC).
+
+        A failure mid-exchange drops the connection, so no WATCH or MULTI state
+        leaks into the next caller's commands.
+        """
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                await self._connect()
+            try:
+                yield self._roundtrip
+            except BaseException:
+                await self._drop()
+                raise
+
+    async def _drop(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+        self._reader = self._writer = None
+
+    async def close(self) -> None:
+        await self._drop()
+
+
+class RedisPrefetchStore(PrefetchStore):
+    """Redis-protocol backend.
+
+    Layout per learner:
+      ``{prefix}:{user}:{level}:ready`` — ready set (claimed with GETDEL)
+      ``{prefix}:{user}:{level}:state`` — fetching / error placeholder
+      ``{prefix}:{user}:levels``        — set of level ids in the buffer
+    Keys expire after twice the prefetch TTL so abandoned buffers are reclaimed.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, *, prefix: str = "atlas:prefetch") -> None:
+        self._conn = RespConnection(url)
+        self._prefix = prefix
+
+    def _ready_key(self, user_id: uuid.UUID, level_id: int) -> str:
+        return f"{self._prefix}:{user_id}:{level_id}:ready"
+
+    def _state_key(self, user_id: uuid.UUID, level_id: int) -> str:
+        return f"{self._prefix}:{user_id}:{level_id}:state"
+
+    def _levels_key(self, user_id: uuid.UUID) -> str:
+        return f"{self._prefix}:{user_id}:levels"
+
+    @staticmethod
+    def _expire_ms() -> int:
+        ttl = float(getattr(settings, "CHALLENGE_PREFETCH_TTL_SECONDS", 900))
+        return max(60_000, int(ttl * 2000))
+
+    async def get(self, user_id: uuid.UUID, level_id: int) -> PrefetchEntry | None:
+        ready, state = await self._conn.execute(
+            "MGET",
+            self._ready_key(user_id, level_id),
+            self._state_key(user_id, level_id),
+        )
+        return decode_entry(ready) or decode_entry(state)
+
+    def _put_commands(self, user_id: uuid.UUID, entry: PrefetchEntry) -> list[tuple[Any, ...]]:
+        ready_key = self._ready_key(user_id, entry.level_id)
+        state_key = self._state_key(user_id, entry.level_id)
+        target, other = (
+            (ready_key, state_key) if entry.status == "ready" else (state_key, ready_key)
+        )
+        return [
+            ("SET", target, encode_entry(entry), "PX", self._expire_ms()),
+            ("DEL", other),
+            ("SADD", self._levels_key(user_id), entry.level_id),
+            ("PEXPIRE", self._levels_key(user_id), self._expire_ms()),
+        ]
+
+    async def put(self, user_id: uuid.UUID, entry: PrefetchEntry) -> None:
+        for command in self._put_commands(user_id, entry):
+            await self._conn.execute(*command)
+
+    async def delete(self, user_id: uuid.UUID, level_id: int) -> None:
+        await self._conn.execute(
+            "DEL",
+            self._ready_key(user_id, level_id),
+            self._state_key(user_id, level_id),
+        )
+        await self._conn.execute("SREM", self._levels_key(user_id), level_id)
+
+    async def user_entries(self, user_id: uuid.UUID) -> list[PrefetchEntry]:
+        members = await self._conn.execute("SMEMBERS", self._levels_key(user_id))
+        out: list[PrefetchEntry] = []
+        for raw in members or []:
+            level_id = int(raw)
+            entry = await self.get(user_id, level_id)
+            if entry is None:
+                await self._conn.execute("SREM", self._levels_key(user_id), level_id)
+                continue
+            out.append(entry)
+        return out
+
+    async def claim(self, user_id: uuid.UUID, level_id: int) -> PrefetchEntry | None:
+        blob = await self._conn.execute("GETDEL", self._ready_key(user_id, level_id))
+        if blob is None:
+            return None
+        await self._conn.execute("SREM", self._levels_key(user_id), level_id)
+        return decode_entry(blob)
+
+    async def complete(
+        self,
+        user_id: uuid.UUID,
+        entry: PrefetchEntry,
+        *,
+        started_at: float,
+    ) -> bool:
+        state_key = self._state_key(user_id, entry.level_id)
+        async with self._conn.exclusive() as call:
+            # WATCH makes EXEC a no-op if another worker rewrites the slot
+            # between our read and the write.
+            await call("WATCH", state_key)
+            current = decode_entry(await call("GET", state_key))
+            if (
+                not current
+                or current.status != "fetching"
+                or current.started_at != started_at
+            ):
+                await call("UNWATCH")
+                return False
+            await call("MULTI")
+            for command in self._put_commands(user_id, entry):
+                await call(*command)
+            return await call("EXEC") is not None
+
+    async def close(self) -> None:
+        await self._conn.close()
+
+
+def build_prefetch_store(backend: str | None = None) -> PrefetchStore:
+    """Store selected by ``CHALLENGE_PREFETCH_BACKEND`` (memory | sql | redis)."""
+    name = (backend or getattr(settings, "CHALLENGE_PREFETCH_BACKEND", "memory") or "memory")
+    name = name.strip().lower()
+    if name == "sql":
+        return SqlPrefetchStore()
+    if name == "redis":
+        return RedisPrefetchStore(
+            getattr(settings, "CHALLENGE_PREFETCH_REDIS_URL", "redis://127.0.0.1:6379/0")
+        )
+    if name != "memory":
+        logger.warning("[PhasePrefetch] unknown backend %r; using memory", name)
+    return MemoryPrefetchStore()
+
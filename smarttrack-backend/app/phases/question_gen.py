@@ -22,6 +22,8 @@ import json
 import logging
 import random
 import re
+import time
+from dataclasses import dataclass
 from typing import Any
 
 from app.config import settings
@@ -37,6 +39,7 @@ from app.phases.curriculum_topics import (
     pick_curriculum_topic,
     topic_prompt_block,
 )
+from app.phases.pipeline_metrics import QUESTION_REJECTS, QUESTION_SECONDS, question_stage
 from app.phases.question_quality import (
     fill_blank_is_self_contained,
     needs_labelled_diagram,
@@ -48,6 +51,7 @@ logger = logging.getLogger(__name__)
 
 def _dev_log_reject(rule: str, *, detail: str = "", subject: str = "", qtype: str = "") -> None:
     """Development-only rejection / demotion diagnostics (never shown to learners)."""
+    QUESTION_REJECTS.inc(rule, subject or "-")
     logger.warning(
         "challenge_reject rule=%s subject=%s qtype=%s detail=%s",
         rule,
@@ -1163,46 +1167,76 @@ def _legend_for_image(image: dict[str, Any], *, labelled: bool) -> dict[str, str
 
 
 
-async def _deepseek_json(messages: list[dict[str, str]], *, temperature: float = 0.75) -> dict[str, Any] | None:
+async def _deepseek_json(
+    messages: list[dict[str, str]],
+    *,
+    temperature: float = 0.75,
+    read_timeout: float | None = None,
+    purpose: str = "challenge_question",
+    subject: str = "",
+) -> dict[str, Any] | None:
     from app.llm.deepseek_client import deepseek_message_content
 
-    content = await deepseek_message_content(
-        messages,
-        temperature=temperature,
-        purpose="challenge_question",
-    )
+    with question_stage("llm_call", subject):
+        content = await deepseek_message_content(
+            messages,
+            temperature=temperature,
+            read_timeout=read_timeout,
+            purpose=purpose,
+        )
     if not content:
         return None
-    return _parse_json(content)
+    with question_stage("json_parse", subject):
+        return _parse_json(content)
+
+
+_QUESTION_SYSTEM_PROMPT = (
+    "You are Atlas, an adaptive AI assessment designer for Ghana secondary learners. "
+    "Every item must be fully answerable from the text and any provided diagram. "
+    "Follow the requested Bloom cognitive level exactly "
+    "(recall, understanding, application, or analysis). "
+    "Obey the HARD TOPIC LOCK and phase curriculum scope exactly. "
+    "If a figure is provided, the question MUST match that figure exactly — "
+    "never ask about a plane mirror when the figure is a landscape, "
+    "never ask about a pie chart when the figure is something else. "
+    "Never reference missing charts/tables/images. "
+    "Never expose SHS, WAEC, WASSCE, Phase, or Year labels. "
+    "Never write meta tags like [Subject · difficulty N]. "
+    "Never ask study-habit or textbook section/chapter/unit navigation "
+    "questions. Reply with JSON only."
+)
 
 
-async def _llm_question(
+@dataclass
+class _SlotPlan:
+    """Per-item choices made before the LLM call (type, topic, Bloom level, figure)."""
+
+    qtype: str
+    topic: dict[str, Any] | None
+    bloom: str
+    target: str
+    images_mode: str
+    plan: Any
+    image: dict[str, Any] | None
+    labelled: bool
+    image_block: str
+    topic_block: str
+
+
+async def _plan_slot(
     *,
     phase_number: int,
-    level_number: int,
     subject: str,
     effective_difficulty: int,
-    performance_summary: str,
-    question_budget: int,
-    exclude_texts: set[str],
     rng: random.Random,
     forced_type: str | None = None,
-) -> dict[str, Any] | None:
-    if not settings.DEEPSEEK_API_KEY:
-        return None
-
-    from app.llm.deepseek_client import llm_circuit_open
-
-    # Network to DeepSeek is down — skip the whole LLM+planner path immediately.
-    if llm_circuit_open():
-        return None
-
+    forced_topic: dict[str, Any] | None = None,
+) -> _SlotPlan:
+    """Pick type / topic / Bloom level and resolve the figure (if any) for one item."""
     label = SUBJECT_LABELS.get(subject, subject)
-    scope = PHASE_SCOPE.get(phase_number, PHASE_SCOPE[1])
     target = _pick_target_level(phase_number, effective_difficulty, rng)
-    curriculum_tag = phase_curriculum_label(phase_number)
     qtype = forced_type or _pick_question_type(subject, rng)
-    topic = pick_curriculum_topic(phase_number, subject, rng)
+    topic = dict(forced_topic) if forced_topic else pick_curriculum_topic(phase_number, subject, rng)
     bloom = _pick_bloom_level(rng)
 
     qtype_l = (qtype or "").lower()
@@ -1237,29 +1271,30 @@ async def _llm_question(
 
     from app.media.content_analysis import analyze_visual_need, analyze_visual_need_rules
 
-    if images_mode == "off" or subject in NO_IMAGE_SUBJECTS:
-        visual_decision = analyze_visual_need_rules(
-            subject=SUBJECT_LABELS.get(subject, subject),
-            title=str((topic or {}).get("topic") or label),
-            context=topic_blob,
-            question_type="mcq",
-        )
-        visual_decision.needed = False
-    elif images_mode == "local_only":
-        # Rules only — never call LLM content-analysis for visuals on the hot path.
-        visual_decision = analyze_visual_need_rules(
-            subject=SUBJECT_LABELS.get(subject, subject),
-            title=str((topic or {}).get("topic") or label),
-            context=topic_blob,
-            question_type=qtype_l,
-        )
-    else:
-        visual_decision = await analyze_visual_need(
-            subject=SUBJECT_LABELS.get(subject, subject),
-            title=str((topic or {}).get("topic") or label),
-            context=topic_blob,
-            question_type=qtype_l,
-        )
+    with question_stage("visual_analysis", subject):
+        if images_mode == "off" or subject in NO_IMAGE_SUBJECTS:
+            visual_decision = analyze_visual_need_rules(
+                subject=SUBJECT_LABELS.get(subject, subject),
+                title=str((topic or {}).get("topic") or label),
+                context=topic_blob,
+                question_type="mcq",
+            )
+            visual_decision.needed = False
+        elif images_mode == "local_only":
+            # Rules only — never call LLM content-analysis for visuals on the hot path.
+            visual_decision = analyze_visual_need_rules(
+                subject=SUBJECT_LABELS.get(subject, subject),
+                title=str((topic or {}).get("topic") or label),
+                context=topic_blob,
+                question_type=qtype_l,
+            )
+        else:
+            visual_decision = await analyze_visual_need(
+                subject=SUBJECT_LABELS.get(subject, subject),
+                title=str((topic or {}).get("topic") or label),
+                context=topic_blob,
+                question_type=qtype_l,
+            )
 
     wants_image = (
         subject not in NO_IMAGE_SUBJECTS
@@ -1269,39 +1304,41 @@ async def _llm_question(
 
     # Local-only / off: sync curriculum plan only (no ImagePlanner LLM).
     # Full mode may use the richer planner when a visual is wanted.
-    if wants_image and images_mode == "full":
-        plan = await ImagePlanner.plan_for_challenge(
-            subject=SUBJECT_LABELS.get(subject, subject),
-            topic=topic,
-            question_type=qtype_l,
-            prefer_labels=prefer_labels,
-            topic_hint=visual_decision.topic_hint
-            or str((topic or {}).get("topic") or label),
-        )
-    else:
-        plan = ImagePlanner.plan_from_curriculum_topic(
-            topic,
-            subject=subject,
-            requires_labels=prefer_labels,
-            question_type=qtype,
-        )
-        plan.needed = bool(wants_image)
-        if not wants_image and qtype_l in ("image_mcq", "diagram_label"):
-            qtype = "mcq"
-            qtype_l = "mcq"
+    with question_stage("image_plan", subject):
+        if wants_image and images_mode == "full":
+            plan = await ImagePlanner.plan_for_challenge(
+                subject=SUBJECT_LABELS.get(subject, subject),
+                topic=topic,
+                question_type=qtype_l,
+                prefer_labels=prefer_labels,
+                topic_hint=visual_decision.topic_hint
+                or str((topic or {}).get("topic") or label),
+            )
+        else:
+            plan = ImagePlanner.plan_from_curriculum_topic(
+                topic,
+                subject=subject,
+                requires_labels=prefer_labels,
+                question_type=qtype,
+            )
+            plan.needed = bool(wants_image)
+            if not wants_image and qtype_l in ("image_mcq", "diagram_label"):
+                qtype = "mcq"
+                qtype_l = "mcq"
 
     image: dict[str, Any] | None = None
     labelled = False
     image_block = ""
     if plan.needed and wants_image:
         try:
-            if images_mode == "local_only":
-                # Instant path: never wait on Wikimedia/Pixabay.
-                image = await retrieve_for_plan_local_only(plan)
-            elif images_mode == "full":
-                image = await asyncio.wait_for(retrieve_for_plan(plan), timeout=9.0)
-            else:
-                image = None
+            with question_stage("image_retrieval", subject):
+                if images_mode == "local_only":
+                    # Instant path: never wait on Wikimedia/Pixabay.
+                    image = await retrieve_for_plan_local_only(plan)
+                elif images_mode == "full":
+                    image = await asyncio.wait_for(retrieve_for_plan(plan), timeout=9.0)
+                else:
+                    image = None
         except asyncio.TimeoutError:
             logger.info(
                 "Image retrieval timed out for subject=%s topic=%s mode=%s",
@@ -1356,24 +1393,6 @@ async def _llm_question(
         if qtype == "fill_blank":
             qtype = "image_mcq" if not labelled else "diagram_label"
 
-    avoid = ""
-    if exclude_texts:
-        samples = list(exclude_texts)[-24:]
-        avoid = (
-            "Do NOT repeat or paraphrase any of these already-used questions:\n- "
-            + "\n- ".join(samples)
-            + "\n"
-        )
-
-    if effective_difficulty <= 4:
-        band = "introductory / scaffolded"
-    elif effective_difficulty <= 8:
-        band = "standard classroom challenge"
-    elif effective_difficulty <= 11:
-        band = "advanced multi-step"
-    else:
-        band = "exam-hard / stretch"
-
     topic_block = topic_prompt_block(topic)
     if image and topic:
         # Figure constrains the ask, but the curriculum topic lock still applies.
@@ -1384,336 +1403,549 @@ async def _llm_question(
             "while remaining inside the topic lock above.\n"
         )
 
-    prompt = (
-        f"Generate ONE ORIGINAL {qtype} challenge item for Ghana secondary {label}.\n"
-        f"Phase {phase_number}, Level {level_number} of 10 "
-        f"(this level has {question_budget} questions — keep the item focused).\n"
-        f"Novelty seed: {rng.randint(1, 10_000_000)}.\n"
-        f"Hard constraint — curriculum scope (internal only): {scope}\n"
-        f"Internal curriculum mapping: {curriculum_tag}. "
-        f"Depth target: {target}. Do NOT write SHS/year labels into the question.\n"
-        f"{topic_block}"
-        f"{image_block}"
-        f"Difficulty MUST match {effective_difficulty} on a 1–15 scale ({band}).\n"
-        f"Adaptive context: {performance_summary}\n"
-        f"{avoid}"
-        f"{_bloom_prompt_block(bloom)}"
-        "Write ONLY at the cognitive level specified above. "
-        "Do not default every item to application or analysis — "
-        "Atlas balances recall, understanding, application, and analysis equally.\n"
-        "Keep the item necessary and curriculum-focused: one clear learning check, "
-        "no filler or vague \"good study habit\" questions.\n"
-        f"{_schema_instructions(qtype, has_image=bool(image), labelled=labelled)}"
+    return _SlotPlan(
+        qtype=qtype,
+        topic=topic,
+        bloom=bloom,
+        target=target,
+        images_mode=images_mode,
+        plan=plan,
+        image=image,
+        labelled=labelled,
+        image_block=image_block,
+        topic_block=topic_block,
     )
 
-    try:
-        parsed = await _deepseek_json(
-            [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are Atlas, an adaptive AI assessment designer for Ghana secondary learners. "
-                        "Every item must be fully answerable from the text and any provided diagram. "
-                        "Follow the requested Bloom cognitive level exactly "
-                        "(recall, understanding, application, or analysis). "
-                        "Obey the HARD TOPIC LOCK and phase curriculum scope exactly. "
-                        "If a figure is provided, the question MUST match that figure exactly — "
-                        "never ask about a plane mirror when the figure is a landscape, "
-                        "never ask about a pie chart when the figure is something else. "
-                        "Never reference missing charts/tables/images. "
-        "Never expose SHS, WAEC, WASSCE, Phase, or Year labels. "
-                        "Never write meta tags like [Subject · difficulty N]. "
-                        "Never ask study-habit or textbook section/chapter/unit navigation "
-                        "questions. Reply with JSON only."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.55 if labelled else 0.7,
-        )
-        if not parsed or not parsed.get("question_text"):
-            _dev_log_reject(
-                "empty_or_unparsed_llm",
-                subject=subject,
-                qtype=qtype,
-            )
-            return None
 
-        text = _sanitize_learner_text(str(parsed["question_text"]).strip())
-        if normalize_question_text(text) in exclude_texts:
-            _dev_log_reject(
-                "duplicate_stem",
-                detail=text[:80],
-                subject=subject,
-                qtype=qtype,
-            )
-            return None
+def _avoid_block(exclude_texts: set[str]) -> str:
+    if not exclude_texts:
+        return ""
+    samples = list(exclude_texts)[-24:]
+    return (
+        "Do NOT repeat or paraphrase any of these already-used questions:\n- "
+        + "\n- ".join(samples)
+        + "\n"
+    )
+
+
+def _difficulty_band(effective_difficulty: int) -> str:
+    if effective_difficulty <= 4:
+        return "introductory / scaffolded"
+    if effective_difficulty <= 8:
+        return "standard classroom challenge"
+    if effective_difficulty <= 11:
+        return "advanced multi-step"
+    return "exam-hard / stretch"
+
 
-        resolved_type = _align_type_to_payload(
-            qtype,
-            str(parsed.get("question_type") or qtype),
-            parsed,
+async def _finalize_llm_item(
+    parsed: dict[str, Any] | None,
+    slot: _SlotPlan,
+    *,
+    phase_number: int,
+    subject: str,
+    exclude_texts: set[str],
+) -> dict[str, Any] | None:
+    """Quality gates, image binding and curriculum gate for one parsed LLM item."""
+    qtype = slot.qtype
+    topic = slot.topic
+    bloom = slot.bloom
+    target = slot.target
+    images_mode = slot.images_mode
+    plan = slot.plan
+    image = slot.image
+    labelled = slot.labelled
+
+    if not parsed or not parsed.get("question_text"):
+        _dev_log_reject(
+            "empty_or_unparsed_llm",
+            subject=subject,
+            qtype=qtype,
         )
+        return None
 
-        # If model asks for labels but we don't have a labelled asset, re-plan + retrieve
-        if (
-            subject not in NO_IMAGE_SUBJECTS
-            and needs_labelled_diagram({"question_text": text, "question_type": resolved_type})
-            and not labelled
-        ):
-            label_plan = ImagePlanner.plan_from_curriculum_topic(
-                topic,
-                subject=subject,
-                requires_labels=True,
-                question_type="diagram_label",
-            )
-            if not label_plan.concept:
-                label_plan.concept = text[:80]
-                label_plan.search_keywords = [f"Labelled {label_plan.concept} Diagram"]
-            svg = None
-            if images_mode == "local_only":
-                svg = await retrieve_for_plan_local_only(label_plan)
-            elif images_mode == "full":
-                svg = await retrieve_for_plan(label_plan)
-            # images_mode == "off": leave svg None (no live retrieve)
-            if svg and (svg.get("labels") or svg.get("source") == "atlas_svg"):
-                image = svg
-                labelled = True
-                resolved_type = "diagram_label"
-                repaired = await _deepseek_json(
-                    [
-                        {
-                            "role": "system",
-                            "content": (
-                                "Rewrite as a diagram-labelling MCQ for the PROVIDED labelled diagram. "
-                                "Ask which letter matches a structure. JSON only."
-                            ),
-                        },
-                        {
-                            "role": "user",
-                            "content": (
-                                f"Labels: {labels_legend_text(image)}\n"
-                                f"Topic: {(topic or {}).get('topic')}\n"
-                                f"{_schema_instructions('diagram_label', has_image=True, labelled=True)}"
-                            ),
-                        },
-                    ],
-                    temperature=0.35,
-                )
-                if repaired and repaired.get("question_text"):
-                    parsed = repaired
-                    text = _sanitize_learner_text(str(parsed["question_text"]).strip())
-                    resolved_type = "diagram_label"
+    text = _sanitize_learner_text(str(parsed["question_text"]).strip())
+    if normalize_question_text(text) in exclude_texts:
+        _dev_log_reject(
+            "duplicate_stem",
+            detail=text[:80],
+            subject=subject,
+            qtype=qtype,
+        )
+        return None
 
-        # Fake labels on unlabelled stock → repair to whole-diagram question
-        if (
-            _asks_for_fake_labels(text)
-            and image
-            and image.get("source") != "atlas_svg"
-        ):
+    resolved_type = _align_type_to_payload(
+        qtype,
+        str(parsed.get("question_type") or qtype),
+        parsed,
+    )
+
+    # If model asks for labels but we don't have a labelled asset, re-plan + retrieve
+    if (
+        subject not in NO_IMAGE_SUBJECTS
+        and needs_labelled_diagram({"question_text": text, "question_type": resolved_type})
+        and not labelled
+    ):
+        label_plan = ImagePlanner.plan_from_curriculum_topic(
+            topic,
+            subject=subject,
+            requires_labels=True,
+            question_type="diagram_label",
+        )
+        if not label_plan.concept:
+            label_plan.concept = text[:80]
+            label_plan.search_keywords = [f"Labelled {label_plan.concept} Diagram"]
+        svg = None
+        if images_mode == "local_only":
+            svg = await retrieve_for_plan_local_only(label_plan)
+        elif images_mode == "full":
+            svg = await retrieve_for_plan(label_plan)
+        # images_mode == "off": leave svg None (no live retrieve)
+        if svg and (svg.get("labels") or svg.get("source") == "atlas_svg"):
+            image = svg
+            labelled = True
+            resolved_type = "diagram_label"
             repaired = await _deepseek_json(
                 [
                     {
                         "role": "system",
                         "content": (
-                            "Rewrite so you do NOT ask about lettered labels. "
-                            "Ask what the whole diagram shows. JSON only."
+                            "Rewrite as a diagram-labelling MCQ for the PROVIDED labelled diagram. "
+                            "Ask which letter matches a structure. JSON only."
                         ),
                     },
                     {
                         "role": "user",
                         "content": (
-                            f"Original: {json.dumps(parsed)}\nImage: {image.get('alt')}\n"
-                            f"{_schema_instructions(resolved_type, has_image=True, labelled=False)}"
+                            f"Labels: {labels_legend_text(image)}\n"
+                            f"Topic: {(topic or {}).get('topic')}\n"
+                            f"{_schema_instructions('diagram_label', has_image=True, labelled=True)}"
                         ),
                     },
                 ],
                 temperature=0.35,
+                subject=subject,
             )
             if repaired and repaired.get("question_text"):
                 parsed = repaired
                 text = _sanitize_learner_text(str(parsed["question_text"]).strip())
+                resolved_type = "diagram_label"
 
-        options, correct = _coerce_options(resolved_type, parsed)
-        if not correct:
-            _dev_log_reject(
-                "empty_correct_answer",
-                subject=subject,
-                qtype=resolved_type,
-            )
-            return None
-
-        # Merge stem into fill_blank template when template is too thin
-        if resolved_type == "fill_blank":
-            template = str(options.get("template") or "")
-            if text and text.lower() not in template.lower() and "___" in template:
-                options["template"] = f"{text} {template}".strip()
-            elif text and "___" not in template:
-                options["template"] = f"{text} ___".strip() if "___" not in text else text
-            template = str(options.get("template") or "")
-            template = re.sub(r"_{3,}", "___", template)
-            options["template"] = template
-            blanks = len(re.findall(r"___", template))
-            answers = list(options.get("answers") or [])
-            if blanks and answers and len(answers) != blanks:
-                if len(answers) < blanks:
-                    answers = answers + [answers[-1]] * (blanks - len(answers))
-                else:
-                    answers = answers[:blanks]
-                options["answers"] = answers
-                correct = "|".join(str(a) for a in answers)
-
-        if not _structure_valid(resolved_type, options, correct, text):
-            _dev_log_reject(
-                "invalid_structure",
-                subject=subject,
-                qtype=resolved_type,
-                detail="choices/items/matches incomplete",
-            )
-            return None
+    # Fake labels on unlabelled stock → repair to whole-diagram question
+    if (
+        _asks_for_fake_labels(text)
+        and image
+        and image.get("source") != "atlas_svg"
+    ):
+        repaired = await _deepseek_json(
+            [
+                {
+                    "role": "system",
+                    "content": (
+                        "Rewrite so you do NOT ask about lettered labels. "
+                        "Ask what the whole diagram shows. JSON only."
+                    ),
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        f"Original: {json.dumps(parsed)}\nImage: {image.get('alt')}\n"
+                        f"{_schema_instructions(resolved_type, has_image=True, labelled=False)}"
+                    ),
+                },
+            ],
+            temperature=0.35,
+            subject=subject,
+        )
+        if repaired and repaired.get("question_text"):
+            parsed = repaired
+            text = _sanitize_learner_text(str(parsed["question_text"]).strip())
+
+    options, correct = _coerce_options(resolved_type, parsed)
+    if not correct:
+        _dev_log_reject(
+            "empty_correct_answer",
+            subject=subject,
+            qtype=resolved_type,
+        )
+        return None
 
-        legend = None
-        concept_for_match = str((topic or {}).get("topic") or plan.concept or "")
-
-        # Validate image against FULL metadata (incl. source) BEFORE learner scrub.
-        keep_image = False
-        if image and subject not in NO_IMAGE_SUBJECTS:
-            match_ok = _image_matches_text(image, text, concept=concept_for_match)
-            conflict = _image_question_conflict(image, text)
-            if match_ok and not conflict:
-                keep_image = True
-                legend = _legend_for_image(image, labelled=labelled)
+    # Merge stem into fill_blank template when template is too thin
+    if resolved_type == "fill_blank":
+        template = str(options.get("template") or "")
+        if text and text.lower() not in template.lower() and "___" in template:
+            options["template"] = f"{text} {template}".strip()
+        elif text and "___" not in template:
+            options["template"] = f"{text} ___".strip() if "___" not in text else text
+        template = str(options.get("template") or "")
+        template = re.sub(r"_{3,}", "___", template)
+        options["template"] = template
+        blanks = len(re.findall(r"___", template))
+        answers = list(options.get("answers") or [])
+        if blanks and answers and len(answers) != blanks:
+            if len(answers) < blanks:
+                answers = answers + [answers[-1]] * (blanks - len(answers))
             else:
-                _dev_log_reject(
-                    "image_mismatch_demote",
-                    subject=subject,
-                    qtype=resolved_type,
-                    detail=f"alt={(image.get('alt') or '')[:60]} match={match_ok} conflict={conflict}",
-                )
+                answers = answers[:blanks]
+            options["answers"] = answers
+            correct = "|".join(str(a) for a in answers)
 
-        payload: dict[str, Any] = {
-            "question_text": text,
-            "question_type": resolved_type,
-            "options": options,
-            "correct_answer": correct,
-            "explanation": _sanitize_learner_text(str(parsed.get("explanation") or "")),
-            "image_query": (topic or {}).get("image_query") if keep_image else None,
-            "target_level": target,
-            "curriculum_topic": (topic or {}).get("topic"),
-            "cognitive_level": bloom,
-            "source": "llm",
-        }
-        if legend:
-            opts = dict(payload["options"] or {})
-            opts["legend"] = legend
-            payload["options"] = opts
-
-        if keep_image:
-            # Scrub attribution only AFTER successful validation
-            payload = _bind_image(payload, image)
-        else:
-            # Image failed / missing / banned subject → text question, keep LLM stem
-            if image or resolved_type in ("image_mcq", "diagram_label"):
-                payload = _demote_to_text_question(
-                    payload,
-                    reason="image_unavailable_or_mismatch",
-                    subject=subject,
-                )
-            elif subject in NO_IMAGE_SUBJECTS:
-                payload = _detach_image(payload)
-                if resolved_type in ("image_mcq", "diagram_label"):
-                    payload["question_type"] = "mcq"
-                payload = _scrub_visual_language(payload)
+    if not _structure_valid(resolved_type, options, correct, text):
+        _dev_log_reject(
+            "invalid_structure",
+            subject=subject,
+            qtype=resolved_type,
+            detail="choices/items/matches incomplete",
+        )
+        return None
 
-        # fill_blank that still references missing charts → unusable
-        if (
-            str(payload.get("question_type")) == "fill_blank"
-            and not fill_blank_is_self_contained(payload)
-        ):
+    legend = None
+    concept_for_match = str((topic or {}).get("topic") or plan.concept or "")
+
+    # Validate image against FULL metadata (incl. source) BEFORE learner scrub.
+    keep_image = False
+    if image and subject not in NO_IMAGE_SUBJECTS:
+        match_ok = _image_matches_text(image, text, concept=concept_for_match)
+        conflict = _image_question_conflict(image, text)
+        if match_ok and not conflict:
+            keep_image = True
+            legend = _legend_for_image(image, labelled=labelled)
+        else:
             _dev_log_reject(
-                "incomplete_fill_blank",
+                "image_mismatch_demote",
                 subject=subject,
-                qtype="fill_blank",
+                qtype=resolved_type,
+                detail=f"alt={(image.get('alt') or '')[:60]} match={match_ok} conflict={conflict}",
             )
-            return None
 
-        # Orphan visual language without an image → scrub; reject only if still broken
-        if visual_without_image(payload):
-            payload = _scrub_visual_language(payload)
-            if str(payload.get("question_type")) in ("image_mcq", "diagram_label"):
-                payload = _demote_to_text_question(
-                    payload,
-                    reason="visual_language_without_image",
-                    subject=subject,
-                )
-            if visual_without_image(payload):
-                _dev_log_reject(
-                    "visual_without_image",
-                    subject=subject,
-                    qtype=str(payload.get("question_type") or ""),
-                    detail=str(payload.get("question_text") or "")[:80],
-                )
-                return None
+    payload: dict[str, Any] = {
+        "question_text": text,
+        "question_type": resolved_type,
+        "options": options,
+        "correct_answer": correct,
+        "explanation": _sanitize_learner_text(str(parsed.get("explanation") or "")),
+        "image_query": (topic or {}).get("image_query") if keep_image else None,
+        "target_level": target,
+        "curriculum_topic": (topic or {}).get("topic"),
+        "cognitive_level": bloom,
+        "source": "llm",
+    }
+    if legend:
+        opts = dict(payload["options"] or {})
+        opts["legend"] = legend
+        payload["options"] = opts
 
-        final_opts = (
-            payload.get("options") if isinstance(payload.get("options"), dict) else {}
-        )
-        final_type = str(payload.get("question_type") or resolved_type)
-        if not _structure_valid(
-            final_type,
-            final_opts,
-            str(payload.get("correct_answer") or ""),
-            str(payload.get("question_text") or ""),
-        ):
-            _dev_log_reject(
-                "post_process_structure",
+    if keep_image:
+        # Scrub attribution only AFTER successful validation
+        payload = _bind_image(payload, image)
+    else:
+        # Image failed / missing / banned subject → text question, keep LLM stem
+        if image or resolved_type in ("image_mcq", "diagram_label"):
+            payload = _demote_to_text_question(
+                payload,
+                reason="image_unavailable_or_mismatch",
                 subject=subject,
-                qtype=final_type,
             )
-            return None
+        elif subject in NO_IMAGE_SUBJECTS:
+            payload = _detach_image(payload)
+            if resolved_type in ("image_mcq", "diagram_label"):
+                payload["question_type"] = "mcq"
+            payload = _scrub_visual_language(payload)
 
-        # Stage 3 — curriculum alignment (topic lock + no year-label leaks)
-        ok_curriculum, curriculum_reason = curriculum_gate(
-            payload,
-            topic=topic,
-            phase_number=phase_number,
+    # fill_blank that still references missing charts → unusable
+    if (
+        str(payload.get("question_type")) == "fill_blank"
+        and not fill_blank_is_self_contained(payload)
+    ):
+        _dev_log_reject(
+            "incomplete_fill_blank",
             subject=subject,
+            qtype="fill_blank",
         )
-        if not ok_curriculum:
-            _dev_log_reject(
-                "off_curriculum",
+        return None
+
+    # Orphan visual language without an image → scrub; reject only if still broken
+    if visual_without_image(payload):
+        payload = _scrub_visual_language(payload)
+        if str(payload.get("question_type")) in ("image_mcq", "diagram_label"):
+            payload = _demote_to_text_question(
+                payload,
+                reason="visual_language_without_image",
                 subject=subject,
-                qtype=final_type,
-                detail=curriculum_reason
-                or (topic or {}).get("topic", "")[:60],
             )
-            return None
-
-        if is_unsafe_learner_question(payload):
+        if visual_without_image(payload):
             _dev_log_reject(
-                "unsafe_filler_or_meta",
+                "visual_without_image",
                 subject=subject,
-                qtype=final_type,
+                qtype=str(payload.get("question_type") or ""),
                 detail=str(payload.get("question_text") or "")[:80],
             )
             return None
 
-        _dev_log_source(
-            "llm",
+    final_opts = (
+        payload.get("options") if isinstance(payload.get("options"), dict) else {}
+    )
+    final_type = str(payload.get("question_type") or resolved_type)
+    if not _structure_valid(
+        final_type,
+        final_opts,
+        str(payload.get("correct_answer") or ""),
+        str(payload.get("question_text") or ""),
+    ):
+        _dev_log_reject(
+            "post_process_structure",
             subject=subject,
             qtype=final_type,
-            note=(
-                f"bloom={bloom} topic={(topic or {}).get('topic', '-')!s} "
-                f"image=" + ("yes" if payload.get("image") else "no")
-            ),
         )
-        return payload
+        return None
+
+    # Stage 3 — curriculum alignment (topic lock + no year-label leaks)
+    ok_curriculum, curriculum_reason = curriculum_gate(
+        payload,
+        topic=topic,
+        phase_number=phase_number,
+        subject=subject,
+    )
+    if not ok_curriculum:
+        _dev_log_reject(
+            "off_curriculum",
+            subject=subject,
+            qtype=final_type,
+            detail=curriculum_reason
+            or (topic or {}).get("topic", "")[:60],
+        )
+        return None
+
+    if is_unsafe_learner_question(payload):
+        _dev_log_reject(
+            "unsafe_filler_or_meta",
+            subject=subject,
+            qtype=final_type,
+            detail=str(payload.get("question_text") or "")[:80],
+        )
+        return None
+
+    _dev_log_source(
+        "llm",
+        subject=subject,
+        qtype=final_type,
+        note=(
+            f"bloom={bloom} topic={(topic or {}).get('topic', '-')!s} "
+            f"image=" + ("yes" if payload.get("image") else "no")
+        ),
+    )
+    return payload
+
+
+async def _llm_question(
+    *,
+    phase_number: int,
+    level_number: int,
+    subject: str,
+    effective_difficulty: int,
+    performance_summary: str,
+    question_budget: int,
+    exclude_texts: set[str],
+    rng: random.Random,
+    forced_type: str | None = None,
+    forced_topic: dict[str, Any] | None = None,
+) -> dict[str, Any] | None:
+    if not settings.DEEPSEEK_API_KEY:
+        return None
+
+    from app.llm.deepseek_client import llm_circuit_open
+
+    # Network to DeepSeek is down — skip the whole LLM+planner path immediately.
+    if llm_circuit_open():
+        return None
+
+    slot = await _plan_slot(
+        phase_number=phase_number,
+        subject=subject,
+        effective_difficulty=effective_difficulty,
+        rng=rng,
+        forced_type=forced_type,
+        forced_topic=forced_topic,
+    )
+    label = SUBJECT_LABELS.get(subject, subject)
+    scope = PHASE_SCOPE.get(phase_number, PHASE_SCOPE[1])
+    curriculum_tag = phase_curriculum_label(phase_number)
+    qtype, target, bloom = slot.qtype, slot.target, slot.bloom
+    image, labelled = slot.image, slot.labelled
+    topic_block, image_block = slot.topic_block, slot.image_block
+    avoid = _avoid_block(exclude_texts)
+    band = _difficulty_band(effective_difficulty)
+
+    prompt = (
+        f"Generate ONE ORIGINAL {qtype} challenge item for Ghana secondary {label}.\n"
+        f"Phase {phase_number}, Level {level_number} of 10 "
+        f"(this level has {question_budget} questions — keep the item focused).\n"
+        f"Novelty seed: {rng.randint(1, 10_000_000)}.\n"
+        f"Hard constraint — curriculum scope (internal only): {scope}\n"
+        f"Internal curriculum mapping: {curriculum_tag}. "
+        f"Depth target: {target}. Do NOT write SHS/year labels into the question.\n"
+        f"{topic_block}"
+        f"{image_block}"
+        f"Difficulty MUST match {effective_difficulty} on a 1–15 scale ({band}).\n"
+        f"Adaptive context: {performance_summary}\n"
+        f"{avoid}"
+        f"{_bloom_prompt_block(bloom)}"
+        "Write ONLY at the cognitive level specified above. "
+        "Do not default every item to application or analysis — "
+        "Atlas balances recall, understanding, application, and analysis equally.\n"
+        "Keep the item necessary and curriculum-focused: one clear learning check, "
+        "no filler or vague \"good study habit\" questions.\n"
+        f"{_schema_instructions(qtype, has_image=bool(image), labelled=labelled)}"
+    )
+
+    try:
+        parsed = await _deepseek_json(
+            [
+                {"role": "system", "content": _QUESTION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.55 if labelled else 0.7,
+            subject=subject,
+        )
+        with question_stage("quality_gates", subject):
+            return await _finalize_llm_item(
+                parsed,
+                slot,
+                phase_number=phase_number,
+                subject=subject,
+                exclude_texts=exclude_texts,
+            )
     except Exception as exc:
         logger.warning("DeepSeek question gen failed: %s", exc)
         _dev_log_reject("exception", subject=subject, detail=str(exc)[:120])
     return None
 
 
+async def llm_question_batch(
+    *,
+    phase_number: int,
+    level_number: int,
+    subject: str,
+    effective_difficulty: int,
+    performance_summary: str,
+    question_budget: int,
+    exclude_texts: set[str],
+    rng: random.Random,
+    forced_types: list[str | None],
+) -> list[dict[str, Any] | None]:
+    """Several items for one subject from a single structured-JSON DeepSeek call.
+
+    Scope, curriculum, difficulty, adaptive context and the avoid list are sent
+    once; each item keeps its own type / topic / Bloom / figure spec. Every
+    returned item runs through ``_finalize_llm_item`` (the same gates as
+    ``_llm_question``). Slots the model skipped or that fail a gate come back as
+    ``None`` so the caller can regenerate them individually.
+    """
+    results: list[dict[str, Any] | None] = [None] * len(forced_types)
+    if not forced_types or not settings.DEEPSEEK_API_KEY:
+        return results
+
+    from app.llm.deepseek_client import llm_circuit_open
+
+    if llm_circuit_open():
+        return results
+
+    # Plan every item concurrently (figure lookups can await); each gets its
+    # own seeded rng so the plan does not depend on completion order.
+    slots = list(
+        await asyncio.gather(
+            *[
+                _plan_slot(
+                    phase_number=phase_number,
+                    subject=subject,
+                    effective_difficulty=effective_difficulty,
+                    rng=random.Random(rng.randint(1, 10_000_000)),
+                    forced_type=forced_type,
+                )
+                for forced_type in forced_types
+            ]
+        )
+    )
+    count = len(slots)
+    label = SUBJECT_LABELS.get(subject, subject)
+    scope = PHASE_SCOPE.get(phase_number, PHASE_SCOPE[1])
+    curriculum_tag = phase_curriculum_label(phase_number)
+    band = _difficulty_band(effective_difficulty)
+
+    item_specs = "".join(
+        f"\n### ITEM {n} — {slot.qtype}. Depth target: {slot.target}.\n"
+        f"{slot.topic_block}"
+        f"{slot.image_block}"
+        f"{_bloom_prompt_block(slot.bloom)}"
+        f"{_schema_instructions(slot.qtype, has_image=bool(slot.image), labelled=slot.labelled)}"
+        for n, slot in enumerate(slots, start=1)
+    )
+    prompt = (
+        f"Generate {count} ORIGINAL challenge items for Ghana secondary {label}.\n"
+        f"Phase {phase_number}, Level {level_number} of 10 "
+        f"(this level has {question_budget} questions — keep each item focused).\n"
+        f"Novelty seed: {rng.randint(1, 10_000_000)}.\n"
+        f"Hard constraint — curriculum scope (internal only): {scope}\n"
+        f"Internal curriculum mapping: {curriculum_tag}. "
+        "Do NOT write SHS/year labels into any question.\n"
+        f"Difficulty MUST match {effective_difficulty} on a 1–15 scale ({band}).\n"
+        f"Adaptive context: {performance_summary}\n"
+        f"{_avoid_block(exclude_texts)}"
+        "Each item below has its own type, topic lock, cognitive level and schema — "
+        "write each ONLY at its own cognitive level. Items must not repeat or "
+        "paraphrase each other. Keep every item necessary and curriculum-focused: "
+        "one clear learning check, no filler or vague \"good study habit\" questions.\n"
+        f"{item_specs}\n"
+        f'Return JSON only: {{"items": [ ... ]}} with exactly {count} objects in ITEM '
+        "order, each object following its own ITEM schema."
+    )
+
+    base_timeout = float(getattr(settings, "CHALLENGE_LLM_TIMEOUT_SECONDS", 20.0))
+    try:
+        parsed = await _deepseek_json(
+            [
+                {"role": "system", "content": _QUESTION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.55 if any(s.labelled for s in slots) else 0.7,
+            # Output grows with the item count; don't time out a healthy batch.
+            read_timeout=base_timeout * (1 + 0.5 * (count - 1)),
+            purpose="challenge_question_batch",
+            subject=subject,
+        )
+    except Exception as exc:
+        logger.warning("DeepSeek batch question gen failed: %s", exc)
+        _dev_log_reject("exception", subject=subject, detail=str(exc)[:120])
+        return results
+
+    items = parsed.get("items") if isinstance(parsed, dict) else None
+    if not isinstance(items, list):
+        _dev_log_reject("empty_or_unparsed_llm", subject=subject, qtype="batch")
+        return results
+
+    seen = set(exclude_texts)
+    for i, (slot, raw) in enumerate(zip(slots, items)):
+        if not isinstance(raw, dict):
+            continue
+        try:
+            with question_stage("quality_gates", subject):
+                item = await _finalize_llm_item(
+                    raw,
+                    slot,
+                    phase_number=phase_number,
+                    subject=subject,
+                    exclude_texts=seen,
+                )
+        except Exception as exc:
+            logger.warning("DeepSeek batch item %s failed: %s", i + 1, exc)
+            _dev_log_reject("exception", subject=subject, detail=str(exc)[:120])
+            continue
+        if item:
+            seen.add(normalize_question_text(str(item["question_text"])))
+            results[i] = item
+    return results
+
+
 async def generate_subject_question(
     *,
     phase_number: int,
@@ -1729,6 +1961,7 @@ async def generate_subject_question(
     forced_type: str | None = None,
 ) -> dict[str, Any]:
     """LLM-first multi-type generation with quality gates; bank then fallback."""
+    started = time.perf_counter()
     rng = rng or random.Random()
     used_ids = exclude_bank_ids or set()
     used_texts = set(exclude_texts or set())
@@ -1747,7 +1980,17 @@ async def generate_subject_question(
     except Exception:
         pass
 
+    def _served(item: dict[str, Any]) -> dict[str, Any]:
+        QUESTION_SECONDS.observe(
+            time.perf_counter() - started, subject, str(item.get("source") or "llm")
+        )
+        return item
+
     def _from_bank() -> dict[str, Any] | None:
+        with question_stage("bank_select", subject):
+            return _draw_bank()
+
+    def _draw_bank() -> dict[str, Any] | None:
         # Try several bank draws — skip filler/meta/section-style stems.
         for _ in range(6):
             from_bank = select_from_bank(
@@ -1787,12 +2030,13 @@ async def generate_subject_question(
         return None
 
     def _safe_fallback(salt: int) -> dict[str, Any]:
-        item = _fallback_question(
-            subject,
-            effective_difficulty,
-            salt=salt,
-            phase_number=phase_number,
-        )
+        with question_stage("fallback", subject):
+            item = _fallback_question(
+                subject,
+                effective_difficulty,
+                salt=salt,
+                phase_number=phase_number,
+            )
         # Curriculum fallbacks are authored safe; still guard.
         if is_unsafe_learner_question(item):
             raise RuntimeError("curriculum fallback marked unsafe")
@@ -1807,7 +2051,7 @@ async def generate_subject_question(
                 qtype=str(banked.get("question_type") or ""),
                 note="reason=circuit_or_bank_first",
             )
-            return banked
+            return _served(banked)
 
     for attempt_i in range(attempts):
         llm = await _llm_question(
@@ -1830,7 +2074,7 @@ async def generate_subject_question(
                     detail=str(llm.get("question_text") or "")[:80],
                 )
                 continue
-            return llm
+            return _served(llm)
         logger.info(
             "challenge_llm_attempt_failed attempt=%s/%s subject=%s forced_type=%s",
             attempt_i + 1,
@@ -1847,7 +2091,7 @@ async def generate_subject_question(
             qtype=str(banked.get("question_type") or ""),
             note=f"reason=llm_exhausted_after_{attempts}_attempts",
         )
-        return banked
+        return _served(banked)
 
     for salt in range(8):
         fallback = _safe_fallback(salt + rng.randint(0, 50))
@@ -1858,7 +2102,7 @@ async def generate_subject_question(
                 qtype=str(fallback.get("question_type") or ""),
                 note="reason=bank_miss",
             )
-            return fallback
+            return _served(fallback)
     fallback = _safe_fallback(rng.randint(0, 999))
     _dev_log_source(
         "fallback",
@@ -1866,7 +2110,7 @@ async def generate_subject_question(
         qtype=str(fallback.get("question_type") or ""),
         note="reason=last_resort",
     )
-    return fallback
+    return _served(fallback)
 
 
 def _parse_json(content: str) -> dict[str, Any] | None:
@@ -0,0 +1,468 @@
+"""
+Pre-generated challenge question pool (``phase_question_pool``).
+
+Live level builds call the LLM for every slot of a prefetch miss, with the
+academic bank as the only fast fallback. The pool moves that work offline:
+
+  • ``build_question_pool`` (scripts/build_question_pool.py) runs
+    ``_llm_question`` — quality gates, image binding, ``curriculum_gate`` —
+    for every (phase, subject, question_type, difficulty band, curriculum
+    topic) cell and stores the accepted items, deduped per phase/subject by
+    ``normalize_question_text``.
+  • ``draw_pool_questions`` fills a level's slots from the pool first (one
+    indexed query per subject/band, least-served first, skipping the
+    learner's recent stems). Only slots the pool cannot cover go to the LLM.
+  • A draw that leaves a (phase, subject, band) cell short records the
+    depletion and schedules ``refill_cell`` in the background (one refill
+    per cell at a time, with a cooldown), so the pool tops itself up.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.phases.adaptive import normalize_question_text
+from app.phases.curriculum_topics import allowed_topic_pool, pick_curriculum_topic
+from app.phases.models import QuestionPoolItem
+
+logger = logging.getLogger(__name__)
+
+# (band, lowest, highest effective difficulty, level used in the build prompt);
+# same cut points as question_gen._difficulty_band.
+BANDS: tuple[tuple[str, int, int, int], ...] = (
+    ("intro", 1, 4, 2),
+    ("standard", 5, 8, 5),
+    ("advanced", 9, 11, 8),
+    ("exam", 12, 15, 10),
+)
+_IMAGE_TYPES = frozenset({"image_mcq", "diagram_label"})
+_BUILD_CONTEXT = "Offline question pool build: no learner context; write a typical item for this band."
+
+
+def _default_sessions() -> Any:
+    from app.database import AsyncSessionLocal
+
+    return AsyncSessionLocal
+
+
+def pool_enabled() -> bool:
+    return bool(getattr(settings, "CHALLENGE_POOL_ENABLED", True))
+
+
+def _format_version() -> int:
+    return int(getattr(settings, "CHALLENGE_FORMAT_VERSION", 10))
+
+
+def _max_serves() -> int:
+    return max(1, int(getattr(settings, "CHALLENGE_POOL_MAX_SERVES", 200)))
+
+
+def band_for_difficulty(effective_difficulty: int) -> str:
+    for name, _low, high, _level in BANDS:
+        if effective_difficulty <= high:
+            return name
+    return BANDS[-1][0]
+
+
+def band_difficulty(band: str) -> tuple[int, int]:
+    """(effective difficulty, level number) used when generating for ``band``."""
+    for name, low, high, level in BANDS:
+        if name == band:
+            return (low + high + 1) // 2, level
+    raise ValueError(f"unknown band {band!r}")
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(normalize_question_text(text).encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class PoolCell:
+    phase_number: int
+    subject: str
+    band: str
+
+
+class _PoolStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.refills_scheduled = 0
+        self.refills_completed = 0
+        self.items_added = 0
+        self.depleted: Counter[str] = Counter()
+
+    def snapshot(self) -> dict[str, Any]:
+        slots = self.hits + self.misses
+        return {
+            "slot_hits": self.hits,
+            "slot_misses": self.misses,
+            "hit_rate": round(self.hits / slots, 4) if slots else None,
+            "refills_scheduled": self.refills_scheduled,
+            "refills_completed": self.refills_completed,
+            "refills_inflight": len(_refills),
+            "items_added": self.items_added,
+            "depleted_cells": dict(self.depleted.most_common(20)),
+        }
+
+
+pool_stats = _PoolStats()
+
+
+# ── Draw (level start / prefetch) ─────────────────────────────────────────
+
+
+async def draw_pool_questions(
+    db: AsyncSession,
+    *,
+    phase_number: int,
+    slots: Iterable[tuple[int, str, str, int]],
+    exclude_texts: set[str],
+) -> dict[int, dict[str, Any]]:
+    """
+    Pooled items for as many ``(slot, subject, planned_type, effective_difficulty)``
+    slots as the pool can cover, keyed by slot.
+
+    ``exclude_texts`` are normalized stems (the learner's recent history and
+    anything already reserved). Items keep their ``pool_id`` so the caller can
+    ``mark_pool_served`` only what it actually used.
+    """
+    by_cell: dict[PoolCell, list[tuple[int, str]]] = {}
+    for slot, subject, planned_type, eff in slots:
+        cell = PoolCell(phase_number, subject, band_for_difficulty(eff))
+        by_cell.setdefault(cell, []).append((slot, planned_type))
+    if not by_cell:
+        return {}
+
+    excluded = sorted({hashlib.sha1(t.encode("utf-8")).hexdigest() for t in exclude_texts if t})
+    low_watermark = max(0, int(getattr(settings, "CHALLENGE_POOL_LOW_WATERMARK", 2)))
+    drawn: dict[int, dict[str, Any]] = {}
+    for cell, wanted in by_cell.items():
+        stmt = (
+            select(
+                QuestionPoolItem.id,
+                QuestionPoolItem.question_type,
+                QuestionPoolItem.text_key,
+                QuestionPoolItem.payload,
+            )
+            .where(
+                QuestionPoolItem.phase_number == cell.phase_number,
+                QuestionPoolItem.subject == cell.subject,
+                QuestionPoolItem.band == cell.band,
+                QuestionPoolItem.format_version == _format_version(),
+                QuestionPoolItem.served_count < _max_serves(),
+            )
+            .order_by(QuestionPoolItem.served_count, func.random())
+            # Headroom so slots can get their planned type and depletion shows.
+            .limit(len(wanted) * 2 + low_watermark)
+        )
+        if excluded:
+            stmt = stmt.where(QuestionPoolItem.text_key.notin_(excluded))
+        candidates = (await db.execute(stmt)).all()
+
+        taken: set[int] = set()
+        keys_used: set[str] = set()
+
+        def _take(row: Any, slot: int) -> None:
+            taken.add(row.id)
+            keys_used.add(row.text_key)
+            drawn[slot] = {**row.payload, "source": "pool", "pool_id": row.id}
+
+        leftovers: list[int] = []
+        for slot, planned_type in wanted:
+            match = next(
+                (
+                    row
+                    for row in candidates
+                    if row.id not in taken
+                    and row.text_key not in keys_used
+                    and row.question_type == planned_type
+                ),
+                None,
+            )
+            if match is not None:
+                _take(match, slot)
+            else:
+                leftovers.append(slot)
+        for slot in leftovers:
+            match = next(
+                (row for row in candidates if row.id not in taken and row.text_key not in keys_used),
+                None,
+            )
+            if match is not None:
+                _take(match, slot)
+
+        filled = sum(1 for slot, _t in wanted if slot in drawn)
+        pool_stats.hits += filled
+        pool_stats.misses += len(wanted) - filled
+        if len(candidates) - filled < low_watermark or filled < len(wanted):
+            pool_stats.depleted[f"{cell.phase_number}:{cell.subject}:{cell.band}"] += 1
+            schedule_refill(cell)
+    return drawn
+
+
+async def mark_pool_served(db: AsyncSession, pool_ids: Iterable[int]) -> None:
+    """Bump served_count for the pooled items a level actually used (caller commits)."""
+    ids = sorted({int(i) for i in pool_ids})
+    if ids:
+        await db.execute(
+            update(QuestionPoolItem)
+            .where(QuestionPoolItem.id.in_(ids))
+            .values(served_count=QuestionPoolItem.served_count + 1)
+        )
+
+
+# ── Generate into the pool (offline build + background refill) ───────────
+
+
+def _pool_types(subject: str) -> list[str]:
+    from app.phases.question_gen import NO_IMAGE_SUBJECTS, TYPE_WEIGHTS
+
+    weights = TYPE_WEIGHTS.get(subject) or TYPE_WEIGHTS["integrated_science"]
+    images_off = (
+        str(getattr(settings, "CHALLENGE_IMAGES_MODE", "local_only")).strip().lower() == "off"
+        or bool(getattr(settings, "CHALLENGE_FAST_SKIP_IMAGES", False))
+        or subject in NO_IMAGE_SUBJECTS
+    )
+    return [t for t, w in weights.items() if w > 0 and not (images_off and t in _IMAGE_TYPES)]
+
+
+async def _insert_items(db: AsyncSession, rows: list[dict[str, Any]]) -> int:
+    """Insert pool rows, skipping stems already pooled for the phase/subject."""
+    if not rows:
+        return 0
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = (
+            insert(QuestionPoolItem)
+            .on_conflict_do_nothing(index_elements=["phase_number", "subject", "text_key"])
+            .returning(QuestionPoolItem.id)
+        )
+        return len((await db.execute(stmt, rows)).all())
+    added = 0
+    for row in rows:
+        exists = await db.execute(
+            select(QuestionPoolItem.id).where(
+                QuestionPoolItem.phase_number == row["phase_number"],
+                QuestionPoolItem.subject == row["subject"],
+                QuestionPoolItem.text_key == row["text_key"],
+            )
+        )
+        if exists.first() is None:
+            db.add(QuestionPoolItem(**row))
+            added += 1
+    return added
+
+
+async def _recent_stems(db: AsyncSession, cell: PoolCell, limit: int = 24) -> set[str]:
+    rows = await db.execute(
+        select(QuestionPoolItem.payload)
+        .where(
+            QuestionPoolItem.phase_number == cell.phase_number,
+            QuestionPoolItem.subject == cell.subject,
+            QuestionPoolItem.band == cell.band,
+        )
+        .order_by(QuestionPoolItem.id.desc())
+        .limit(limit)
+    )
+    return {
+        normalize_question_text(str((payload or {}).get("question_text") or ""))
+        for (payload,) in rows.all()
+    }
+
+
+async def generate_into_pool(
+    cell: PoolCell,
+    specs: list[tuple[str, dict[str, Any] | None]],
+    *,
+    sessions: Any | None = None,
+    concurrency: int = 3,
+    rng: random.Random | None = None,
+) -> dict[str, int]:
+    """Generate one gated item per (question_type, topic) spec and pool the accepted ones."""
+    from app.phases.question_gen import _llm_question
+
+    sessions = sessions or _default_sessions()
+    rng = rng or random.Random()
+    eff, level_number = band_difficulty(cell.band)
+    async with sessions() as db:
+        seen = await _recent_stems(db, cell)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    rows: list[dict[str, Any]] = []
+    failed = 0
+
+    async def _one(qtype: str, topic: dict[str, Any] | None, seed: int) -> None:
+        nonlocal failed
+        async with sem:
+            item = await _llm_question(
+                phase_number=cell.phase_number,
+                level_number=level_number,
+                subject=cell.subject,
+                effective_difficulty=eff,
+                performance_summary=_BUILD_CONTEXT,
+                question_budget=10,
+                exclude_texts=set(seen),
+                rng=random.Random(seed),
+                forced_type=qtype,
+                forced_topic=topic,
+            )
+        if not item or not item.get("question_text"):
+            failed += 1
+            return
+        norm = normalize_question_text(str(item["question_text"]))
+        if norm in seen:
+            return
+        seen.add(norm)
+        payload = {k: v for k, v in item.items() if k not in ("source", "pool_id")}
+        rows.append(
+            {
+                "phase_number": cell.phase_number,
+                "subject": cell.subject,
+                "question_type": str(item.get("question_type") or qtype),
+                "band": cell.band,
+                "topic": str((topic or {}).get("topic") or "")[:200],
+                "text_key": text_key(str(item["question_text"])),
+                "format_version": _format_version(),
+                "payload": payload,
+                "served_count": 0,
+            }
+        )
+
+    await asyncio.gather(*[_one(qtype, topic, rng.randint(1, 10_000_000)) for qtype, topic in specs])
+    async with sessions() as db:
+        added = await _insert_items(db, rows)
+        await db.commit()
+    pool_stats.items_added += added
+    return {"requested": len(specs), "added": added, "duplicates": len(rows) - added, "failed": failed}
+
+
+async def build_question_pool(
+    *,
+    phases: Iterable[int] = (1, 2, 3),
+    subjects: Iterable[str] | None = None,
+    bands: Iterable[str] | None = None,
+    per_cell: int = 1,
+    concurrency: int = 3,
+    sessions: Any | None = None,
+) -> dict[str, int]:
+    """
+    Fill every (phase, subject, question_type, band, topic) cell up to ``per_cell``
+    items. Cells already at target are skipped, so an interrupted build resumes.
+    """
+    from app.phases.service import SUBJECTS
+
+    sessions = sessions or _default_sessions()
+    totals: Counter[str] = Counter()
+    for phase_number in phases:
+        for subject in subjects or SUBJECTS:
+            topics = allowed_topic_pool(phase_number, subject) or [None]
+            for band in bands or [name for name, *_ in BANDS]:
+                cell = PoolCell(phase_number, subject, band)
+                async with sessions() as db:
+                    existing = Counter(
+                        {
+                            (qtype, topic): n
+                            for qtype, topic, n in (
+                                await db.execute(
+                                    select(
+                                        QuestionPoolItem.question_type,
+                                        QuestionPoolItem.topic,
+                                        func.count(),
+                                    )
+                                    .where(
+                                        QuestionPoolItem.phase_number == phase_number,
+                                        QuestionPoolItem.subject == subject,
+                                        QuestionPoolItem.band == band,
+                                        QuestionPoolItem.format_version == _format_version(),
+                                    )
+                                    .group_by(QuestionPoolItem.question_type, QuestionPoolItem.topic)
+                                )
+                            ).all()
+                        }
+                    )
+                specs = [
+                    (qtype, topic)
+                    for qtype in _pool_types(subject)
+                    for topic in topics
+                    for _ in range(per_cell - existing[(qtype, str((topic or {}).get("topic") or "")[:200])])
+                ]
+                if not specs:
+                    totals["skipped_cells"] += 1
+                    continue
+                counts = await generate_into_pool(cell, specs, sessions=sessions, concurrency=concurrency)
+                totals.update(counts)
+                logger.info(
+                    "[QuestionPool] phase=%s subject=%s band=%s added=%s failed=%s",
+                    phase_number,
+                    subject,
+                    band,
+                    counts["added"],
+                    counts["failed"],
+                )
+    return dict(totals)
+
+
+# ── Background refill ─────────────────────────────────────────────────────
+
+_refills: dict[PoolCell, asyncio.Task[dict[str, int]]] = {}
+_last_refill: dict[PoolCell, float] = {}
+
+
+async def refill_cell(cell: PoolCell, *, sessions: Any | None = None) -> dict[str, int]:
+    """Top up one depleted cell with CHALLENGE_POOL_REFILL_BATCH fresh items."""
+    count = max(1, int(getattr(settings, "CHALLENGE_POOL_REFILL_BATCH", 6)))
+    rng = random.Random()
+    types = _pool_types(cell.subject)
+    specs = [
+        (rng.choice(types), pick_curriculum_topic(cell.phase_number, cell.subject, rng))
+        for _ in range(count)
+    ]
+    counts = await generate_into_pool(cell, specs, sessions=sessions, concurrency=2, rng=rng)
+    pool_stats.refills_completed += 1
+    logger.info("[QuestionPool] refilled %s: %s", cell, counts)
+    return counts
+
+
+def schedule_refill(cell: PoolCell, *, sessions: Any | None = None) -> bool:
+    """Fire-and-forget refill of ``cell``; no-op while one runs or within the cooldown."""
+    if not (getattr(settings, "DEEPSEEK_API_KEY", "") or "").strip():
+        return False
+    from app.llm.deepseek_client import llm_circuit_open
+
+    if llm_circuit_open() or cell in _refills:
+        return False
+    cooldown = float(getattr(settings, "CHALLENGE_POOL_REFILL_COOLDOWN_SECONDS", 300) or 0)
+    now = time.monotonic()
+    if now - _last_refill.get(cell, -cooldown) < cooldown:
+        return False
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    _last_refill[cell] = now
+
+    async def _job() -> dict[str, int]:
+        try:
+            return await refill_cell(cell, sessions=sessions)
+        except Exception:
+            logger.exception("[QuestionPool] refill failed for %s", cell)
+            return {}
+
+    task = loop.create_task(_job())
+    _refills[cell] = task
+    task.add_done_callback(lambda _t, c=cell: _refills.pop(c, None))
+    pool_stats.refills_scheduled += 1
+    return True
@@ -1,15 +1,20 @@
 """Phase / Level API routes."""
 from __future__ import annotations
 
+import json
 import uuid
+from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
 from app.database import get_db
 from app.phases import service
 from app.phases.schemas import (
+    BatchSubmitAnswersRequest,
+    BatchSubmitAnswersResponse,
     CompleteSessionResponse,
     PrefetchStatusResponse,
     ProgressionMeResponse,
@@ -51,6 +56,54 @@ async def replay_level(
     return await service.start_level(db, current_user.id, level_id, replay=True)
 
 
+async def _streamed_start(user_id: uuid.UUID, level_id: int, *, replay: bool) -> StreamingResponse:
+    events = service.start_level_stream(user_id, level_id, replay=replay)
+    # Access checks and planning run before the response starts, so a locked or
+    # unknown level is still a plain 4xx rather than an in-stream error.
+    try:
+        first = await anext(events)
+    except HTTPException:
+        await events.aclose()
+        raise
+    if first["event"] == "error":
+        await events.aclose()
+        raise HTTPException(first["data"]["status_code"], first["data"]["detail"])
+
+    async def _lines() -> AsyncIterator[bytes]:
+        yield (json.dumps(first, default=str) + "\n").encode("utf-8")
+        async for event in events:
+            yield (json.dumps(event, default=str) + "\n").encode("utf-8")
+
+    return StreamingResponse(
+        _lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/levels/{level_id}/start/stream")
+async def start_level_stream(
+    level_id: int,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Streamed start (NDJSON, one ``{"event", "data"}`` object per line).
+
+    ``session`` (StartLevelResponse fields minus questions), then one
+    ``question`` per slot in order as soon as it is ready, then ``done`` with
+    ``time_to_first_question_ms`` — or ``error`` if generation fails midway.
+    """
+    return await _streamed_start(current_user.id, level_id, replay=False)
+
+
+@router.post("/levels/{level_id}/replay/stream")
+async def replay_level_stream(
+    level_id: int,
+    current_user: User = Depends(get_current_user),
+):
+    return await _streamed_start(current_user.id, level_id, replay=True)
+
+
 @router.post("/levels/{level_id}/prefetch", response_model=PrefetchStatusResponse)
 async def prefetch_level(
     level_id: int,
@@ -120,6 +173,24 @@ async def submit_answer(
     )
 
 
+@router.post(
+    "/sessions/{session_id}/submit-answers", response_model=BatchSubmitAnswersResponse
+)
+async def submit_answers(
+    session_id: int,
+    body: BatchSubmitAnswersRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Grade several answers in one transaction (e.g. an offline-queued level)."""
+    return await service.submit_answers(
+        db,
+        current_user.id,
+        session_id,
+        [item.model_dump() for item in body.answers],
+    )
+
+
 @router.post("/sessions/{session_id}/complete", response_model=CompleteSessionResponse)
 async def complete_session(
     session_id: int,
@@ -73,6 +73,15 @@ class SubmitAnswerRequest(BaseModel):
     time_taken_seconds: Optional[float] = None
 
 
+class BatchAnswerItem(SubmitAnswerRequest):
+    pass
+
+
+class BatchSubmitAnswersRequest(BaseModel):
+    # A whole level is at most 10 questions; leave headroom for retried items.
+    answers: List[BatchAnswerItem] = Field(min_length=1, max_length=50)
+
+
 class SessionStatusResponse(BaseModel):
     session_id: int
     status: str
@@ -93,6 +102,25 @@ class SubmitAnswerResponse(BaseModel):
     learning_nudge: Optional[dict[str, Any]] = None
 
 
+class BatchAnswerResult(SubmitAnswerResponse):
+    question_id: int
+    replayed: bool = False
+    streak: Optional[int] = None
+    streak_incremented: bool = False
+
+
+class BatchSubmitAnswersResponse(BaseModel):
+    session_id: int
+    results: List[BatchAnswerResult]
+    graded_count: int
+    correct_count: int
+    wrong_count: int
+    xp_earned: int = 0
+    user_xp: Optional[int] = None
+    rank: Optional[str] = None
+    streak: Optional[int] = None
+
+
 class CompleteSessionResponse(BaseModel):
     passed: bool
     score: float
@@ -6,8 +6,9 @@ import logging
 import random
 import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 from fastapi import HTTPException, status
 from sqlalchemy import select
@@ -15,6 +16,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.assessment.models import ChallengeResponse, ChallengeSession
+from app.assessment.near_duplicates import NearDuplicateIndex, from_bytes, signature
+from app.auth.user_cache import lock_user_for_update
 from app.config import settings
 from app.phases.adaptive import (
     AdaptiveConfig,
@@ -30,7 +33,21 @@ from app.phases.adaptive import (
     update_weak_streak,
 )
 from app.phases.models import Level, Phase, UserLevelProgress, UserPhaseProgress, UserSubjectPerformance
-from app.phases.question_gen import generate_subject_question, plan_types_for_subjects
+from app.phases.pipeline_metrics import (
+    GENERATION_INFLIGHT,
+    LEVEL_BUILD_SECONDS,
+    LEVEL_QUESTIONS,
+    QUESTION_REJECTS,
+    QUESTION_STAGE_SECONDS,
+)
+from app.phases.question_gen import (
+    generate_subject_question,
+    llm_question_batch,
+    plan_types_for_subjects,
+)
+from app.phases.question_pool import draw_pool_questions, mark_pool_served, pool_enabled
+from app.phases.snapshot import load_progress_snapshot
+from app.request_metrics import record_stage
 from app.users.gamification import apply_xp, rank_for_xp, record_daily_challenge_streak
 from app.users.models import User
 
@@ -54,71 +71,14 @@ def _adaptive_cfg() -> AdaptiveConfig:
 
 async def ensure_user_progression(db: AsyncSession, user_id: uuid.UUID) -> None:
     """Create locked/unlocked progress rows for all phases/levels if missing."""
-    phases = (
-        await db.execute(select(Phase).options(selectinload(Phase.levels)).order_by(Phase.number))
-    ).scalars().all()
-    if not phases:
-        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Phases not seeded")
-
-    for phase in phases:
-        upp = (
-            await db.execute(
-                select(UserPhaseProgress).where(
-                    UserPhaseProgress.user_id == user_id,
-                    UserPhaseProgress.phase_id == phase.id,
-                )
-            )
-        ).scalar_one_or_none()
-        if not upp:
-            status_val = "in_progress" if phase.number == 1 else "locked"
-            upp = UserPhaseProgress(
-                user_id=user_id,
-                phase_id=phase.id,
-                status=status_val,
-                started_at=datetime.now(timezone.utc) if phase.number == 1 else None,
-            )
-            db.add(upp)
-
-        for level in phase.levels:
-            ulp = (
-                await db.execute(
-                    select(UserLevelProgress).where(
-                        UserLevelProgress.user_id == user_id,
-                        UserLevelProgress.level_id == level.id,
-                    )
-                )
-            ).scalar_one_or_none()
-            if not ulp:
-                lvl_status = "locked"
-                if phase.number == 1 and level.number == 1:
-                    lvl_status = "available"
-                ulp = UserLevelProgress(
-                    user_id=user_id,
-                    level_id=level.id,
-                    status=lvl_status,
-                )
-                db.add(ulp)
-    await db.commit()
+    await load_progress_snapshot(db, user_id)
 
 
 async def get_progression(db: AsyncSession, user_id: uuid.UUID) -> dict[str, Any]:
-    await ensure_user_progression(db, user_id)
-    phases = (
-        await db.execute(select(Phase).options(selectinload(Phase.levels)).order_by(Phase.number))
-    ).scalars().all()
-
-    phase_prog = {
-        p.phase_id: p
-        for p in (
-            await db.execute(select(UserPhaseProgress).where(UserPhaseProgress.user_id == user_id))
-        ).scalars().all()
-    }
-    level_prog = {
-        p.level_id: p
-        for p in (
-            await db.execute(select(UserLevelProgress).where(UserLevelProgress.user_id == user_id))
-        ).scalars().all()
-    }
+    snap = await load_progress_snapshot(db, user_id)
+    phases = snap.phases
+    phase_prog = snap.phase_progress
+    level_prog = snap.level_progress
 
     result_phases = []
     current_phase = 1
@@ -126,7 +86,7 @@ async def get_progression(db: AsyncSession, user_id: uuid.UUID) -> dict[str, Any
     for phase in phases:
         pp = phase_prog.get(phase.id)
         levels_out = []
-        for level in sorted(phase.levels, key=lambda L: L.number):
+        for level in phase.levels:
             lp = level_prog.get(level.id)
             st = lp.status if lp else "locked"
             levels_out.append(
@@ -183,12 +143,24 @@ async def _get_or_create_subject_perf(
     return row
 
 
+def _batch_generation_enabled() -> bool:
+    if not bool(getattr(settings, "CHALLENGE_BATCH_GENERATION", False)):
+        return False
+    if not (getattr(settings, "DEEPSEEK_API_KEY", "") or "").strip():
+        return False
+    from app.llm.deepseek_client import llm_circuit_open
+
+    return not llm_circuit_open()
+
+
 async def build_level_question_set(
     db: AsyncSession,
     user_id: uuid.UUID,
     level_id: int,
     *,
     extra_exclude_texts: set[str] | None = None,
+    on_plan: Callable[[dict[str, Any]], Awaitable[None]] | None = None,
+    on_question: Callable[[dict[str, Any]], Awaitable[None]] | None = None,
 ) -> dict[str, Any]:
     """
     Build a full question payload for a level WITHOUT creating a ChallengeSession.
@@ -202,6 +174,10 @@ async def build_level_question_set(
 
     extra_exclude_texts: optional stems already reserved in the prefetch buffer
     for this learner (other levels) so parallel buffer fills do not duplicate.
+
+    on_plan / on_question (streamed start): on_plan gets the subject mix and
+    question count once all DB reads are done; on_question gets each finished
+    question in slot order as soon as it and every earlier slot are ready.
     """
     await ensure_user_progression(db, user_id)
     level = (
@@ -222,21 +198,28 @@ async def build_level_question_set(
     mix = subject_mix_for_level(level.number, accuracies, list(SUBJECTS))
 
     used_bank_ids: set[str] = set()
+    # used_texts (exact stems) feeds the prompts' avoid list and the pool draw;
+    # seen catches paraphrases across a much longer history.
     used_texts: set[str] = set()
+    seen = NearDuplicateIndex()
     history_limit = max(20, int(getattr(settings, "CHALLENGE_EXCLUDE_HISTORY", 80)))
+    near_limit = max(history_limit, int(getattr(settings, "CHALLENGE_NEAR_DUP_HISTORY", 500)))
     prior = (
         await db.execute(
-            select(ChallengeResponse.question_text)
+            select(ChallengeResponse.question_text, ChallengeResponse.question_signature)
             .where(ChallengeResponse.user_id == user_id)
             .order_by(ChallengeResponse.id.desc())
-            .limit(history_limit)
+            .limit(near_limit)
         )
-    ).scalars().all()
-    for text in prior:
-        used_texts.add(normalize_question_text(str(text or "")))
+    ).all()
+    for i, (text, raw_signature) in enumerate(prior):
+        if i < history_limit:
+            used_texts.add(normalize_question_text(str(text or "")))
+        seen.add(str(text or ""), from_bytes(raw_signature))
     if extra_exclude_texts:
         for text in extra_exclude_texts:
             used_texts.add(normalize_question_text(str(text or "")))
+            seen.add(str(text or ""))
 
     rng = random.Random()
     subject_queue = expand_subject_queue(mix, rng)
@@ -263,16 +246,82 @@ async def build_level_question_set(
         + "; ".join(perf_summary_parts)
     )
 
+    if on_plan is not None:
+        await on_plan({"mix": mix, "question_count": len(subject_queue), "level": level})
+
     concurrency = max(1, int(getattr(settings, "CHALLENGE_GEN_CONCURRENCY", 4)))
     sem = asyncio.Semaphore(concurrency)
     lock = asyncio.Lock()
     planned_types = plan_types_for_subjects(subject_queue, rng)
 
+    def _forced_type(slot: int) -> str:
+        return planned_types[slot] if slot < len(planned_types) else "mcq"
+
+    @asynccontextmanager
+    async def _permit(subject: str) -> AsyncIterator[None]:
+        waited = time.perf_counter()
+        async with sem:
+            QUESTION_STAGE_SECONDS.observe(time.perf_counter() - waited, "concurrency_wait", subject)
+            GENERATION_INFLIGHT.inc()
+            try:
+                yield
+            finally:
+                GENERATION_INFLIGHT.dec()
+
+    def _claim(text: str, subject: str) -> bool:
+        """Reserve a stem unless it repeats one already used (exactly or near). Under lock."""
+        norm = normalize_question_text(text)
+        if norm in used_texts:
+            return False
+        sig = signature(text)
+        if seen.is_near_duplicate(text, sig):
+            QUESTION_REJECTS.inc("near_duplicate", subject)
+            return False
+        used_texts.add(norm)
+        seen.add(text, sig)
+        return True
+
+    # Batch mode: one DeepSeek call per subject chunk; accepted items are handed
+    # to _one, everything else (gate failures, cross-batch dupes) is generated
+    # per slot exactly as before.
+    pregenerated: dict[int, dict[str, Any]] = {}
+    batch_of: dict[int, asyncio.Task[None]] = {}
+    batched_slots: set[int] = set()
+
+    async def _batch(subject: str, slots: list[int]) -> None:
+        async with _permit(subject):
+            async with lock:
+                local_texts = set(used_texts)
+            items = await llm_question_batch(
+                phase_number=phase.number,
+                level_number=level.number,
+                subject=subject,
+                effective_difficulty=eff_by_subject[subject],
+                performance_summary=performance_summary,
+                question_budget=question_budget,
+                exclude_texts=local_texts,
+                rng=random.Random(rng.randint(1, 10_000_000) + slots[0]),
+                forced_types=[_forced_type(slot) for slot in slots],
+            )
+        for slot, item in zip(slots, items):
+            if item is not None:
+                pregenerated[slot] = item
+                batched_slots.add(slot)
+
     async def _one(
         slot: int, subject: str, forced_type: str
     ) -> tuple[int, str, dict[str, Any], int]:
         eff = eff_by_subject[subject]
-        async with sem:
+        batch = batch_of.get(slot)
+        if batch is not None:
+            # Shared by the chunk's slots; shield so one slot's cancel can't kill it.
+            await asyncio.shield(batch)
+        ready = pregenerated.pop(slot, None)
+        if ready is not None:
+            async with lock:
+                if _claim(ready["question_text"], subject):
+                    return slot, subject, ready, eff
+        async with _permit(subject):
             async with lock:
                 local_bank = set(used_bank_ids)
                 local_texts = set(used_texts)
@@ -288,10 +337,9 @@ async def build_level_question_set(
                 rng=random.Random(rng.randint(1, 10_000_000) + slot),
                 forced_type=forced_type,
             )
-            norm = normalize_question_text(generated["question_text"])
             needs_retry = False
             async with lock:
-                if norm in used_texts:
+                if not _claim(generated["question_text"], subject):
                     needs_retry = True
                     retry_bank = set(used_bank_ids)
                     retry_texts = set(used_texts)
@@ -299,7 +347,6 @@ async def build_level_question_set(
                     bank_id = generated.get("bank_id")
                     if bank_id:
                         used_bank_ids.add(str(bank_id))
-                    used_texts.add(norm)
                     return slot, subject, generated, eff
 
             if needs_retry:
@@ -320,21 +367,61 @@ async def build_level_question_set(
                     if bank_id:
                         used_bank_ids.add(str(bank_id))
                     used_texts.add(normalize_question_text(regenerated["question_text"]))
+                    seen.add(regenerated["question_text"])
                 return slot, subject, regenerated, eff
             return slot, subject, generated, eff
 
     started = time.time()
-    results = await asyncio.gather(
-        *[
-            _one(i, subject, planned_types[i] if i < len(planned_types) else "mcq")
-            for i, subject in enumerate(subject_queue)
-        ]
-    )
-    results_sorted = sorted(results, key=lambda row: row[0])
+    if pool_enabled():
+        # Pre-generated, already gated items first; the LLM only sees the gaps.
+        pool_started = time.perf_counter()
+        try:
+            # Savepoint: a failed draw (lock, serialization, statement error)
+            # must not abort the level's transaction on Postgres, or the live
+            # fallback below would fail with it.
+            async with db.begin_nested():
+                drawn = await draw_pool_questions(
+                    db,
+                    phase_number=phase.number,
+                    slots=[
+                        (i, subject, _forced_type(i), eff_by_subject[subject])
+                        for i, subject in enumerate(subject_queue)
+                    ],
+                    exclude_texts=used_texts,
+                )
+            pregenerated.update(drawn)
+        except Exception:
+            logger.exception("Question pool draw failed for level=%s; generating live", level_id)
+        record_stage("question_pool", time.perf_counter() - pool_started)
+    pooled = len(pregenerated)
+    if _batch_generation_enabled() and pooled < len(subject_queue):
+        chunk = max(1, int(getattr(settings, "CHALLENGE_BATCH_MAX_ITEMS", 5)))
+        slots_by_subject: dict[str, list[int]] = {}
+        for i, subject in enumerate(subject_queue):
+            if i not in pregenerated:
+                slots_by_subject.setdefault(subject, []).append(i)
+        # Started, not awaited: each slot waits only for its own chunk, so
+        # slot 0 can be handed on while later chunks are still generating.
+        for subject, slots in slots_by_subject.items():
+            for start in range(0, len(slots), chunk):
+                part = slots[start : start + chunk]
+                task = asyncio.create_task(_batch(subject, part))
+                for slot in part:
+                    batch_of[slot] = task
+    tasks = [
+        asyncio.create_task(_one(i, subject, _forced_type(i)))
+        for i, subject in enumerate(subject_queue)
+    ]
     questions: list[dict[str, Any]] = []
-    for slot, subject, generated, eff in results_sorted:
-        questions.append(
-            {
+    pool_served: list[int] = []
+    try:
+        # Slot order: slot i is handed on once it and every earlier slot are done.
+        for task in tasks:
+            slot, subject, generated, eff = await task
+            if generated.get("pool_id") is not None:
+                pool_served.append(generated["pool_id"])
+            LEVEL_QUESTIONS.inc(str(generated.get("source") or "llm"))
+            question = {
                 "subject": subject,
                 "question_index": slot,
                 "question_text": generated["question_text"],
@@ -347,15 +434,30 @@ async def build_level_question_set(
                 if isinstance(generated.get("options"), dict)
                 else generated.get("image"),
             }
-        )
+            questions.append(question)
+            if on_question is not None:
+                await on_question(question)
+    finally:
+        pending = [task for task in (*tasks, *set(batch_of.values())) if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    # Served counts ride on the caller's commit, after all generation is done,
+    # so pool rows are only locked briefly.
+    await mark_pool_served(db, pool_served)
+    LEVEL_BUILD_SECONDS.observe(time.time() - started)
+    batched = len(batched_slots)
 
     logger.info(
-        "Built %s questions for level=%s user=%s in %.1fs (concurrency=%s)",
+        "Built %s questions for level=%s user=%s in %.1fs (concurrency=%s, pooled=%s, batched=%s)",
         len(questions),
         level_id,
         user_id,
         time.time() - started,
         concurrency,
+        pooled,
+        batched,
     )
     return {
         "questions": questions,
@@ -367,13 +469,13 @@ async def build_level_question_set(
     }
 
 
-async def start_level(
+async def _level_for_start(
     db: AsyncSession,
     user_id: uuid.UUID,
     level_id: int,
     *,
-    replay: bool = False,
-) -> dict[str, Any]:
+    replay: bool,
+) -> tuple[Level, UserLevelProgress]:
     await ensure_user_progression(db, user_id)
     level = (
         await db.execute(select(Level).options(selectinload(Level.phase)).where(Level.id == level_id))
@@ -398,39 +500,129 @@ async def start_level(
     else:
         if ulp.status not in ("available", "in_progress", "completed"):
             raise HTTPException(status.HTTP_403_FORBIDDEN, "Level is locked")
+    return level, ulp
+
+
+async def _claim_prefetched(
+    user_id: uuid.UUID, level_id: int, *, wait_s: float
+) -> dict[str, Any] | None:
+    """Claim background prefetch when available (skips LLM wait).
+
+    If prefetch is still in flight, wait up to ``wait_s`` instead of starting a
+    duplicate generation.
+    """
+    try:
+        from app.phases.prefetch import phase_prefetch_manager
+
+        claimed = await phase_prefetch_manager.claim_or_wait(user_id, level_id, timeout_s=wait_s)
+        if claimed and claimed.get("questions"):
+            logger.info(
+                "start_level using prefetch user=%s level=%s count=%s",
+                user_id,
+                level_id,
+                len(claimed["questions"]),
+            )
+            return claimed
+    except Exception:
+        logger.exception("Prefetch claim failed; falling back to live generation")
+    return None
+
+
+async def _persist_question(
+    db: AsyncSession,
+    session: ChallengeSession,
+    user_id: uuid.UUID,
+    q_index: int,
+    item: dict[str, Any],
+) -> dict[str, Any]:
+    """Store one drafted question on the session; returns the learner-safe view."""
+    resp = ChallengeResponse(
+        session_id=session.id,
+        user_id=user_id,
+        subject=str(item.get("subject") or "english"),
+        question_index=q_index,
+        question_text=str(item["question_text"]),
+        question_type=str(item.get("question_type") or "mcq"),
+        options=item.get("options"),
+        correct_answer=str(item.get("correct_answer") or ""),
+        difficulty=item.get("difficulty"),
+        explanation=item.get("explanation"),
+    )
+    db.add(resp)
+    await db.flush()
+    options = resp.options if isinstance(resp.options, dict) else {}
+    from app.media.learner_media import to_learner_image
+
+    raw_image = options.get("image") or item.get("image")
+    safe_image = to_learner_image(raw_image if isinstance(raw_image, dict) else None)
+    # Keep options educational (legend) but scrub nested image attribution
+    safe_options = options
+    if isinstance(options, dict) and isinstance(options.get("image"), dict):
+        safe_options = dict(options)
+        scrubbed = to_learner_image(options["image"])
+        if scrubbed:
+            if isinstance(options["image"].get("legend"), dict):
+                scrubbed = {**scrubbed, "legend": options["image"]["legend"]}
+            safe_options["image"] = scrubbed
+        else:
+            safe_options.pop("image", None)
+    return {
+        "id": resp.id,
+        "subject": resp.subject,
+        "question_index": q_index,
+        "question_text": resp.question_text,
+        "question_type": resp.question_type,
+        "options": safe_options,
+        "difficulty": resp.difficulty,
+        "image": safe_image,
+    }
+
+
+def _mark_level_started(ulp: UserLevelProgress, *, replay: bool) -> None:
+    if not replay and ulp.status == "available":
+        ulp.status = "in_progress"
+    ulp.attempts = (ulp.attempts or 0) + 1
+
+
+def _schedule_buffer_warm(user_id: uuid.UUID, level: Level, *, replay: bool) -> None:
+    # Stage 4 — after claiming/starting, top up the rolling buffer for upcoming levels.
+    if replay:
+        return
+    try:
+        from app.phases.prefetch import schedule_buffer_warm
+
+        schedule_buffer_warm(user_id, anchor_level_id=level.id)
+    except Exception:
+        logger.debug("Could not schedule prefetch buffer warm", exc_info=True)
+
+
+async def start_level(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    level_id: int,
+    *,
+    replay: bool = False,
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    level, ulp = await _level_for_start(db, user_id, level_id, replay=replay)
 
     phase = level.phase
     from_prefetch = False
     mix: dict[str, int] = {}
     draft_questions: list[dict[str, Any]] = []
 
-    # Claim background prefetch when available (skips LLM wait).
-    # If prefetch is still in flight, wait briefly instead of starting a duplicate generation.
     if not replay:
-        try:
-            from app.phases.prefetch import phase_prefetch_manager
-
-            wait_s = float(getattr(settings, "CHALLENGE_PREFETCH_WAIT_SECONDS", 75))
-            claimed = await phase_prefetch_manager.claim_or_wait(
-                user_id, level_id, timeout_s=wait_s
-            )
-            if claimed and claimed.get("questions"):
-                draft_questions = claimed["questions"]
-                mix = claimed.get("mix") or {}
-                from_prefetch = True
-                logger.info(
-                    "start_level using prefetch user=%s level=%s count=%s",
-                    user_id,
-                    level_id,
-                    len(draft_questions),
-                )
-        except Exception:
-            logger.exception("Prefetch claim failed; falling back to live generation")
+        wait_s = float(getattr(settings, "CHALLENGE_PREFETCH_WAIT_SECONDS", 75))
+        claimed = await _claim_prefetched(user_id, level_id, wait_s=wait_s)
+        if claimed:
+            draft_questions = claimed["questions"]
+            mix = claimed.get("mix") or {}
+            from_prefetch = True
 
     if not draft_questions:
         from app.phases.prefetch import phase_prefetch_manager
 
-        extra = phase_prefetch_manager.reserved_stems(
+        extra = await phase_prefetch_manager.reserved_stems(
             user_id, exclude_level_id=level_id
         )
         built = await build_level_question_set(
@@ -456,62 +648,14 @@ async def start_level(
 
     questions_out: list[dict[str, Any]] = []
     for q_index, item in enumerate(draft_questions):
-        resp = ChallengeResponse(
-            session_id=session.id,
-            user_id=user_id,
-            subject=str(item.get("subject") or "english"),
-            question_index=q_index,
-            question_text=str(item["question_text"]),
-            question_type=str(item.get("question_type") or "mcq"),
-            options=item.get("options"),
-            correct_answer=str(item.get("correct_answer") or ""),
-            difficulty=item.get("difficulty"),
-            explanation=item.get("explanation"),
-        )
-        db.add(resp)
-        await db.flush()
-        options = resp.options if isinstance(resp.options, dict) else {}
-        from app.media.learner_media import to_learner_image
-
-        raw_image = options.get("image") or item.get("image")
-        safe_image = to_learner_image(raw_image if isinstance(raw_image, dict) else None)
-        # Keep options educational (legend) but scrub nested image attribution
-        safe_options = options
-        if isinstance(options, dict) and isinstance(options.get("image"), dict):
-            safe_options = dict(options)
-            scrubbed = to_learner_image(options["image"])
-            if scrubbed:
-                if isinstance(options["image"].get("legend"), dict):
-                    scrubbed = {**scrubbed, "legend": options["image"]["legend"]}
-                safe_options["image"] = scrubbed
-            else:
-                safe_options.pop("image", None)
-        questions_out.append(
-            {
-                "id": resp.id,
-                "subject": resp.subject,
-                "question_index": q_index,
-                "question_text": resp.question_text,
-                "question_type": resp.question_type,
-                "options": safe_options,
-                "difficulty": resp.difficulty,
-                "image": safe_image,
-            }
-        )
+        questions_out.append(await _persist_question(db, session, user_id, q_index, item))
 
-    if not replay and ulp.status == "available":
-        ulp.status = "in_progress"
-    ulp.attempts = (ulp.attempts or 0) + 1
+    _mark_level_started(ulp, replay=replay)
     await db.commit()
+    # Without streaming the first question arrives with the last one.
+    record_stage("time_to_first_question", time.perf_counter() - started)
 
-    # Stage 4 — after claiming/starting, top up the rolling buffer for upcoming levels.
-    if not replay:
-        try:
-            from app.phases.prefetch import schedule_buffer_warm
-
-            schedule_buffer_warm(user_id, anchor_level_id=level.id)
-        except Exception:
-            logger.debug("Could not schedule prefetch buffer warm", exc_info=True)
+    _schedule_buffer_warm(user_id, level, replay=replay)
 
     return {
         "session_id": session.id,
@@ -527,50 +671,176 @@ async def start_level(
     }
 
 
+async def start_level_stream(
+    user_id: uuid.UUID,
+    level_id: int,
+    *,
+    replay: bool = False,
+    sessions: Any | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Streamed level start: ``session``, then each ``question`` as it is ready, then ``done``.
+
+    The ChallengeSession is created once the level is planned, and each question is
+    committed before it is emitted, so the learner can answer question 1 while later
+    slots are still generating. Slot order and cross-slot dedupe are exactly those of
+    build_level_question_set. A failure after the session event arrives as an
+    ``error`` event and the session is marked ``failed``.
+
+    Runs on its own DB session (``sessions`` factory): the stream outlives the
+    request's ``get_db`` session.
+    """
+    if sessions is None:
+        from app.database import AsyncSessionLocal
+
+        sessions = AsyncSessionLocal
+
+    async with sessions() as db:
+        started = time.perf_counter()
+        level, ulp = await _level_for_start(db, user_id, level_id, replay=replay)
+        claimed = None
+        if not replay:
+            wait_s = float(getattr(settings, "CHALLENGE_STREAM_PREFETCH_WAIT_SECONDS", 5))
+            claimed = await _claim_prefetched(user_id, level_id, wait_s=wait_s)
+
+        queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        state: dict[str, Any] = {"session": None, "count": 0, "first": None}
+
+        async def on_plan(plan: dict[str, Any]) -> None:
+            planned_level = plan.get("level") or level
+            session = ChallengeSession(
+                user_id=user_id,
+                challenge_level=min(planned_level.number, 3),
+                level_id=planned_level.id,
+                is_replay=replay,
+                status="in_progress",
+            )
+            db.add(session)
+            _mark_level_started(ulp, replay=replay)
+            await db.commit()
+            state["session"] = session
+            await queue.put(
+                {
+                    "event": "session",
+                    "data": {
+                        "session_id": session.id,
+                        "level_id": planned_level.id,
+                        "phase_number": planned_level.phase.number,
+                        "level_number": planned_level.number,
+                        "is_replay": replay,
+                        "format_version": int(getattr(settings, "CHALLENGE_FORMAT_VERSION", 10)),
+                        "question_count": plan["question_count"],
+                        "subject_mix": plan.get("mix") or {},
+                        "from_prefetch": claimed is not None,
+                    },
+                }
+            )
+
+        async def on_question(item: dict[str, Any]) -> None:
+            out = await _persist_question(db, state["session"], user_id, state["count"], item)
+            await db.commit()
+            state["count"] += 1
+            if state["first"] is None:
+                state["first"] = time.perf_counter() - started
+                record_stage("time_to_first_question", state["first"])
+            await queue.put({"event": "question", "data": out})
+
+        async def fail_session() -> None:
+            await db.rollback()
+            if state["session"] is not None:
+                state["session"].status = "failed"
+                await db.commit()
+
+        async def produce() -> None:
+            try:
+                if claimed is not None:
+                    await on_plan(
+                        {
+                            "mix": claimed.get("mix") or {},
+                            "question_count": len(claimed["questions"]),
+                        }
+                    )
+                    for item in claimed["questions"]:
+                        await on_question(item)
+                else:
+                    from app.phases.prefetch import phase_prefetch_manager
+
+                    extra = await phase_prefetch_manager.reserved_stems(
+                        user_id, exclude_level_id=level_id
+                    )
+                    await build_level_question_set(
+                        db,
+                        user_id,
+                        level_id,
+                        extra_exclude_texts=extra or None,
+                        on_plan=on_plan,
+                        on_question=on_question,
+                    )
+                    # Questions are already committed; this keeps mark_pool_served.
+                    await db.commit()
+                _schedule_buffer_warm(user_id, level, replay=replay)
+                await queue.put(
+                    {
+                        "event": "done",
+                        "data": {
+                            "session_id": state["session"].id,
+                            "question_count": state["count"],
+                            "time_to_first_question_ms": round((state["first"] or 0.0) * 1000, 1),
+                            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+                        },
+                    }
+                )
+            except Exception as exc:
+                if isinstance(exc, HTTPException):
+                    status_code, detail = exc.status_code, exc.detail
+                else:
+                    logger.exception("Streamed start failed user=%s level=%s", user_id, level_id)
+                    status_code, detail = 503, "Could not prepare this level. Please try again."
+                await fail_session()
+                await queue.put(
+                    {"event": "error", "data": {"status_code": status_code, "detail": detail}}
+                )
+            except asyncio.CancelledError:
+                # Client disconnected mid-build: don't leave a half-filled session in_progress.
+                try:
+                    await fail_session()
+                except Exception:
+                    logger.exception("Could not mark abandoned session failed user=%s", user_id)
+                raise
+            finally:
+                await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            if not producer.done():
+                producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+
 async def prefetch_level(
     db: AsyncSession,
     user_id: uuid.UUID,
     level_id: int,
 ) -> dict[str, Any]:
     """Validate access and kick off background question generation for a level."""
-    await ensure_user_progression(db, user_id)
-    level = (
-        await db.execute(select(Level).where(Level.id == level_id))
-    ).scalar_one_or_none()
+    snap = await load_progress_snapshot(db, user_id)
+    level = snap.catalogue.level_by_id.get(level_id)
     if not level:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Level not found")
 
-    ulp = (
-        await db.execute(
-            select(UserLevelProgress).where(
-                UserLevelProgress.user_id == user_id,
-                UserLevelProgress.level_id == level_id,
-            )
-        )
-    ).scalar_one_or_none()
+    ulp = snap.level_progress.get(level_id)
     if not ulp:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Progress not initialized")
 
     # Allow prefetch for the next locked level if the previous level is completed/in progress
     if ulp.status == "locked":
-        prev = (
-            await db.execute(
-                select(Level).where(
-                    Level.phase_id == level.phase_id,
-                    Level.number == level.number - 1,
-                )
-            )
-        ).scalar_one_or_none()
+        prev = snap.catalogue.previous_level(level)
         if not prev:
             raise HTTPException(status.HTTP_403_FORBIDDEN, "Level is locked")
-        prev_ulp = (
-            await db.execute(
-                select(UserLevelProgress).where(
-                    UserLevelProgress.user_id == user_id,
-                    UserLevelProgress.level_id == prev.id,
-                )
-            )
-        ).scalar_one_or_none()
+        prev_ulp = snap.level_progress.get(prev.id)
         if not prev_ulp or prev_ulp.status not in ("completed", "in_progress", "available"):
             raise HTTPException(status.HTTP_403_FORBIDDEN, "Level is locked")
 
@@ -588,17 +858,6 @@ async def prefetch_status(
     return await phase_prefetch_manager.status(user_id, level_id)
 
 
-async def _ordered_levels(db: AsyncSession) -> list[Level]:
-    phases = (
-        await db.execute(select(Phase).options(selectinload(Phase.levels)).order_by(Phase.number))
-    ).scalars().all()
-    out: list[Level] = []
-    for phase in phases:
-        levels = sorted(phase.levels or [], key=lambda lv: lv.number)
-        out.extend(levels)
-    return out
-
-
 async def upcoming_prefetch_targets(
     db: AsyncSession,
     user_id: uuid.UUID,
@@ -612,16 +871,13 @@ async def upcoming_prefetch_targets(
     Prefer: current playable (available/in_progress), then the following levels
     in phase order (including the immediate locked next level).
     """
-    await ensure_user_progression(db, user_id)
+    snap = await load_progress_snapshot(db, user_id)
     limit = count or max(1, int(getattr(settings, "CHALLENGE_PREFETCH_BUFFER_LEVELS", 3)))
-    levels = await _ordered_levels(db)
+    levels = snap.catalogue.ordered_levels
     if not levels:
         return []
 
-    progress_rows = (
-        await db.execute(select(UserLevelProgress).where(UserLevelProgress.user_id == user_id))
-    ).scalars().all()
-    status_by_id = {row.level_id: row.status for row in progress_rows}
+    status_by_id = {level_id: row.status for level_id, row in snap.level_progress.items()}
 
     start_idx = 0
     if anchor_level_id is not None:
@@ -696,18 +952,12 @@ async def warm_prefetch_buffer(
         db, user_id, anchor_level_id=anchor_level_id
     )
     # When no anchor, also include the current playable level itself
+    snap = await load_progress_snapshot(db, user_id)
     if anchor_level_id is None:
-        levels = await _ordered_levels(db)
-        progress_rows = (
-            await db.execute(
-                select(UserLevelProgress).where(UserLevelProgress.user_id == user_id)
-            )
-        ).scalars().all()
-        status_by_id = {row.level_id: row.status for row in progress_rows}
         current_ids = [
             lv.id
-            for lv in levels
-            if status_by_id.get(lv.id) in ("available", "in_progress")
+            for lv in snap.catalogue.ordered_levels
+            if snap.level_status(lv.id) in ("available", "in_progress")
         ][:1]
         merged: list[int] = []
         for lid in current_ids + targets:
@@ -722,41 +972,16 @@ async def warm_prefetch_buffer(
 
     async def _start_one(level_id: int) -> bool:
         try:
-            level = (
-                await db.execute(select(Level).where(Level.id == level_id))
-            ).scalar_one_or_none()
+            level = snap.catalogue.level_by_id.get(level_id)
             if not level:
                 return False
-            ulp = (
-                await db.execute(
-                    select(UserLevelProgress).where(
-                        UserLevelProgress.user_id == user_id,
-                        UserLevelProgress.level_id == level_id,
-                    )
-                )
-            ).scalar_one_or_none()
+            ulp = snap.level_progress.get(level_id)
             if not ulp:
                 return False
             if ulp.status == "locked":
-                prev = (
-                    await db.execute(
-                        select(Level).where(
-                            Level.phase_id == level.phase_id,
-                            Level.number == level.number - 1,
-                        )
-                    )
-                ).scalar_one_or_none()
-                prev_status = None
-                if prev:
-                    prev_ulp = (
-                        await db.execute(
-                            select(UserLevelProgress).where(
-                                UserLevelProgress.user_id == user_id,
-                                UserLevelProgress.level_id == prev.id,
-                            )
-                        )
-                    ).scalar_one_or_none()
-                    prev_status = prev_ulp.status if prev_ulp else None
+                prev = snap.catalogue.previous_level(level)
+                prev_ulp = snap.level_progress.get(prev.id) if prev else None
+                prev_status = prev_ulp.status if prev_ulp else None
                 if not _can_prefetch_locked(ulp.status, prev_status):
                     return False
 
@@ -833,47 +1058,67 @@ async def get_session_status(
     }
 
 
-async def submit_answer(
-    db: AsyncSession,
-    user_id: uuid.UUID,
-    session_id: int,
-    question_id: int,
-    answer: str,
-    time_taken_seconds: float | None = None,
-) -> dict[str, Any]:
-    session = (
-        await db.execute(select(ChallengeSession).where(ChallengeSession.id == session_id))
-    ).scalar_one_or_none()
-    if not session or session.user_id != user_id:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Session not found")
+def _replayed_answer(q: ChallengeResponse, session: ChallengeSession, user: User) -> dict[str, Any]:
+    return {
+        "is_correct": bool(q.is_correct),
+        "explanation": q.explanation,
+        "correct_count": session.correct_count,
+        "wrong_count": session.wrong_count,
+        "xp_earned": 0,
+        "user_xp": user.xp or 0,
+        "rank": user.rank,
+        "streak": user.streak,
+        "streak_incremented": False,
+        "learning_nudge": None,
+    }
 
-    q = (
-        await db.execute(select(ChallengeResponse).where(ChallengeResponse.id == question_id))
-    ).scalar_one_or_none()
-    if not q or q.session_id != session_id:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Question not found")
 
-    # Idempotent replay: after a slow/interrupted complete, the client may retry the
-    # last question. Returning the prior result (even if the session is completed)
-    # prevents the frontend from "recovering" into a brand-new Q1 session.
-    if q.user_answer is not None:
-        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one()
-        return {
-            "is_correct": bool(q.is_correct),
-            "explanation": q.explanation,
-            "correct_count": session.correct_count,
-            "wrong_count": session.wrong_count,
-            "xp_earned": 0,
-            "user_xp": user.xp or 0,
-            "rank": user.rank,
-            "streak": user.streak,
-            "streak_incremented": False,
-            "learning_nudge": None,
-        }
+class _AnswerContext:
+    """Per-request lookups shared by every answer graded in one transaction."""
+
+    def __init__(self, db: AsyncSession, user_id: uuid.UUID, session: ChallengeSession) -> None:
+        self.db = db
+        self.user_id = user_id
+        self.session = session
+        self.cfg = _adaptive_cfg()
+        self._baseline: int | None = None
+        self._perf: dict[str, UserSubjectPerformance] = {}
+        self._suggestions: dict[str, Any] = {}
+
+    async def baseline(self) -> int:
+        if self._baseline is None:
+            self._baseline = 1
+            if self.session.level_id:
+                level = await self.db.get(Level, self.session.level_id)
+                if level:
+                    self._baseline = level.difficulty_baseline
+        return self._baseline
+
+    async def perf(self, subject: str) -> UserSubjectPerformance:
+        row = self._perf.get(subject)
+        if row is None:
+            row = self._perf[subject] = await _get_or_create_subject_perf(
+                self.db, self.user_id, subject
+            )
+        return row
 
-    if session.status != "in_progress":
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Session is not active")
+    async def suggestion(self, subject: str) -> Any:
+        if subject not in self._suggestions:
+            from app.learning.service import suggest_topic_for_subject
+
+            self._suggestions[subject] = await suggest_topic_for_subject(self.db, subject)
+        return self._suggestions[subject]
 
+
+async def _grade_and_apply(
+    ctx: _AnswerContext,
+    q: ChallengeResponse,
+    user: User,
+    answer: str,
+    time_taken_seconds: float | None,
+) -> dict[str, Any]:
+    """Grade one unanswered question and apply XP, streak and adaptive updates (no commit)."""
+    db, session, user_id = ctx.db, ctx.session, ctx.user_id
     from app.phases.answer_grading import grade_answer
 
     is_correct = grade_answer(
@@ -889,7 +1134,6 @@ async def submit_answer(
     q.time_taken_seconds = time_taken_seconds
     q.answered_at = datetime.now(timezone.utc)
 
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one()
     xp_earned = 0
     prev_rank = user.rank or "Beginner"
 
@@ -897,7 +1141,7 @@ async def submit_answer(
         session.correct_count += 1
         q.xp_earned = XP_PER_CORRECT
         session.total_xp += XP_PER_CORRECT
-        xp_earned, user_rank, user_xp = apply_xp(user, XP_PER_CORRECT)
+        xp_earned, user_rank, user_xp = apply_xp(user, XP_PER_CORRECT, category=q.subject)
     else:
         session.wrong_count += 1
         user.rank = rank_for_xp(user.xp or 0)
@@ -929,19 +1173,11 @@ async def submit_answer(
         except Exception:
             logger.exception("Failed to create streak milestone notification")
 
-    cfg = _adaptive_cfg()
-    level = None
+    cfg = ctx.cfg
     phase_floor = 1
-    baseline = 1
-    if session.level_id:
-        level = (
-            await db.execute(select(Level).where(Level.id == session.level_id))
-        ).scalar_one_or_none()
-        if level:
-            baseline = level.difficulty_baseline
-            phase_floor = 1
+    baseline = await ctx.baseline()
 
-    perf = await _get_or_create_subject_perf(db, user_id, q.subject)
+    perf = await ctx.perf(q.subject)
     perf.rolling_accuracy = update_rolling_accuracy(
         perf.rolling_accuracy, is_correct, cfg.rolling_window
     )
@@ -957,9 +1193,7 @@ async def submit_answer(
     nudge = None
     # weak streak updated on session complete; preview if already weak
     if should_nudge_learning(perf.weak_level_streak, cfg):
-        from app.learning.service import suggest_topic_for_subject
-
-        suggested = await suggest_topic_for_subject(db, q.subject)
+        suggested = await ctx.suggestion(q.subject)
         nudge = {
             "subject": q.subject,
             "message": f"Practice {q.subject.replace('_', ' ')} in Learning Center",
@@ -967,7 +1201,6 @@ async def submit_answer(
             "topic_title": suggested.title if suggested else None,
         }
 
-    await db.commit()
     return {
         "is_correct": is_correct,
         "explanation": q.explanation,
@@ -982,6 +1215,121 @@ async def submit_answer(
     }
 
 
+async def _owned_session(db: AsyncSession, user_id: uuid.UUID, session_id: int) -> ChallengeSession:
+    session = (
+        await db.execute(select(ChallengeSession).where(ChallengeSession.id == session_id))
+    ).scalar_one_or_none()
+    if not session or session.user_id != user_id:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Session not found")
+    return session
+
+
+async def _session_user(db: AsyncSession, user_id: uuid.UUID) -> User:
+    # XP / streak writes follow: never build on get_current_user's cached snapshot.
+    return await lock_user_for_update(db, user_id)
+
+
+async def submit_answer(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    session_id: int,
+    question_id: int,
+    answer: str,
+    time_taken_seconds: float | None = None,
+) -> dict[str, Any]:
+    session = await _owned_session(db, user_id, session_id)
+
+    q = (
+        await db.execute(select(ChallengeResponse).where(ChallengeResponse.id == question_id))
+    ).scalar_one_or_none()
+    if not q or q.session_id != session_id:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Question not found")
+
+    # Idempotent replay: after a slow/interrupted complete, the client may retry the
+    # last question. Returning the prior result (even if the session is completed)
+    # prevents the frontend from "recovering" into a brand-new Q1 session.
+    if q.user_answer is not None:
+        return _replayed_answer(q, session, await _session_user(db, user_id))
+
+    if session.status != "in_progress":
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Session is not active")
+
+    ctx = _AnswerContext(db, user_id, session)
+    result = await _grade_and_apply(
+        ctx, q, await _session_user(db, user_id), answer, time_taken_seconds
+    )
+    await db.commit()
+    return result
+
+
+async def submit_answers(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    session_id: int,
+    answers: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """
+    Grade and persist several answers of one session in a single transaction.
+
+    Each answer gets the same result ``submit_answer`` would have returned had
+    the answers been sent one by one, in order: already-answered questions
+    (a retried flush from an offline queue) replay their stored result, and
+    XP / streak / adaptive updates accumulate answer by answer. Nothing is
+    written unless every question belongs to the session.
+    """
+    session = await _owned_session(db, user_id, session_id)
+
+    question_ids = {int(a["question_id"]) for a in answers}
+    rows = (
+        await db.execute(
+            select(ChallengeResponse).where(
+                ChallengeResponse.session_id == session_id,
+                ChallengeResponse.id.in_(question_ids),
+            )
+        )
+    ).scalars().all()
+    by_id = {q.id: q for q in rows}
+    missing = sorted(question_ids - by_id.keys())
+    if missing:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Question not found: {missing[0]}")
+    if session.status != "in_progress" and any(
+        by_id[int(a["question_id"])].user_answer is None for a in answers
+    ):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Session is not active")
+
+    user = await _session_user(db, user_id)
+    ctx = _AnswerContext(db, user_id, session)
+    results: list[dict[str, Any]] = []
+    xp_total = 0
+    graded = 0
+    for item in answers:
+        q = by_id[int(item["question_id"])]
+        if q.user_answer is not None:
+            result = {**_replayed_answer(q, session, user), "replayed": True}
+        else:
+            result = await _grade_and_apply(
+                ctx, q, user, str(item["answer"]), item.get("time_taken_seconds")
+            )
+            result["replayed"] = False
+            xp_total += int(result["xp_earned"] or 0)
+            graded += 1
+        results.append({"question_id": q.id, **result})
+
+    if graded:
+        await db.commit()
+    return {
+        "session_id": session.id,
+        "results": results,
+        "graded_count": graded,
+        "correct_count": session.correct_count,
+        "wrong_count": session.wrong_count,
+        "xp_earned": xp_total,
+        "user_xp": user.xp or 0,
+        "rank": user.rank,
+        "streak": user.streak,
+    }
+
+
 async def complete_session(db: AsyncSession, user_id: uuid.UUID, session_id: int) -> dict[str, Any]:
     session = (
         await db.execute(select(ChallengeSession).where(ChallengeSession.id == session_id))
@@ -1148,7 +1496,7 @@ async def complete_session(db: AsyncSession, user_id: uuid.UUID, session_id: int
 
     await db.commit()
 
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one()
+    user = await lock_user_for_update(db, user_id)
     streak_info = record_daily_challenge_streak(user)
 
     if level_completed and phase_number is not None:
@@ -0,0 +1,255 @@
+"""Learner progress snapshot shared by progress, notifications, eligibility and phases.
+
+Two layers:
+
+  - ``PhaseCatalogue`` — the seeded phases/levels as frozen dataclasses, loaded
+    with one joined query and cached in-process for PHASE_CATALOGUE_TTL_SECONDS
+    (keyed by database URL). Call ``invalidate_phase_catalogue`` after seeding.
+  - ``LearnerProgressSnapshot`` — one learner's UserPhaseProgress and
+    UserLevelProgress rows, one SELECT per table, cached on the request's
+    session (``db.info``) so every consumer in the same request shares it.
+
+The progress rows are the session's own ORM objects, so status changes made
+later in the request are visible through the snapshot. Adding or deleting
+progress rows (or a rollback) drops the cached snapshot.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from app.config import settings
+from app.phases.models import Level, Phase, UserLevelProgress, UserPhaseProgress
+
+_SNAPSHOT_INFO_KEY = "learner_progress_snapshots"
+
+
+@dataclass(frozen=True)
+class LevelInfo:
+    id: int
+    phase_id: int
+    number: int
+    difficulty_baseline: int
+
+
+@dataclass(frozen=True)
+class PhaseInfo:
+    id: int
+    number: int
+    name: str
+    description: str | None
+    shs_mapping: str
+    levels: tuple[LevelInfo, ...]
+
+
+@dataclass(frozen=True)
+class PhaseCatalogue:
+    phases: tuple[PhaseInfo, ...]
+    phase_by_id: dict[int, PhaseInfo] = field(default_factory=dict)
+    level_by_id: dict[int, LevelInfo] = field(default_factory=dict)
+
+    @classmethod
+    def from_phases(cls, phases: tuple[PhaseInfo, ...]) -> "PhaseCatalogue":
+        return cls(
+            phases=phases,
+            phase_by_id={p.id: p for p in phases},
+            level_by_id={lv.id: lv for p in phases for lv in p.levels},
+        )
+
+    @property
+    def ordered_levels(self) -> list[LevelInfo]:
+        """Every level in phase order, then level order."""
+        return [lv for phase in self.phases for lv in phase.levels]
+
+    def previous_level(self, level: LevelInfo) -> LevelInfo | None:
+        phase = self.phase_by_id.get(level.phase_id)
+        if phase is None:
+            return None
+        return next((lv for lv in phase.levels if lv.number == level.number - 1), None)
+
+
+# url -> (expires_at, catalogue)
+_catalogue_cache: dict[str, tuple[float, PhaseCatalogue]] = {}
+
+
+def invalidate_phase_catalogue() -> None:
+    """Forget cached catalogues (after seeding or editing phases/levels)."""
+    _catalogue_cache.clear()
+
+
+def _catalogue_key(db: AsyncSession) -> str:
+    return db.get_bind().url.render_as_string(hide_password=True)
+
+
+async def get_phase_catalogue(db: AsyncSession) -> PhaseCatalogue:
+    """Seeded phases with their levels, ordered by number (one query per TTL)."""
+    ttl = float(getattr(settings, "PHASE_CATALOGUE_TTL_SECONDS", 300.0) or 0)
+    key = _catalogue_key(db)
+    now = time.monotonic()
+    cached = _catalogue_cache.get(key)
+    if ttl > 0 and cached is not None and cached[0] > now:
+        return cached[1]
+
+    rows = (
+        await db.execute(
+            select(Phase).options(joinedload(Phase.levels)).order_by(Phase.number)
+        )
+    ).unique().scalars().all()
+    catalogue = PhaseCatalogue.from_phases(
+        tuple(
+            PhaseInfo(
+                id=p.id,
+                number=p.number,
+                name=p.name,
+                description=p.description,
+                shs_mapping=p.shs_mapping,
+                levels=tuple(
+                    LevelInfo(
+                        id=lv.id,
+                        phase_id=lv.phase_id,
+                        number=lv.number,
+                        difficulty_baseline=lv.difficulty_baseline,
+                    )
+                    for lv in sorted(p.levels, key=lambda L: L.number)
+                ),
+            )
+            for p in rows
+        )
+    )
+    # Don't pin an empty catalogue: seeding must show up immediately.
+    if ttl > 0 and catalogue.phases:
+        _catalogue_cache[key] = (now + ttl, catalogue)
+    return catalogue
+
+
+@dataclass
+class LearnerProgressSnapshot:
+    user_id: uuid.UUID
+    catalogue: PhaseCatalogue
+    phase_progress: dict[int, UserPhaseProgress]
+    level_progress: dict[int, UserLevelProgress]
+    ensured: bool = False
+
+    @property
+    def phases(self) -> tuple[PhaseInfo, ...]:
+        return self.catalogue.phases
+
+    def phase_status(self, phase_id: int) -> str:
+        row = self.phase_progress.get(phase_id)
+        return (row.status if row else None) or "locked"
+
+    def level_status(self, level_id: int) -> str:
+        row = self.level_progress.get(level_id)
+        return (row.status if row else None) or "locked"
+
+    def levels_completed(self, phase: PhaseInfo) -> int:
+        return sum(1 for lv in phase.levels if self.level_status(lv.id) == "completed")
+
+
+def _add_missing_rows(db: AsyncSession, snap: LearnerProgressSnapshot) -> None:
+    """Same defaults as a fresh learner: Phase 1 in progress, P1 L1 available."""
+    now = datetime.now(timezone.utc)
+    for phase in snap.catalogue.phases:
+        if phase.id not in snap.phase_progress:
+            row = UserPhaseProgress(
+                user_id=snap.user_id,
+                phase_id=phase.id,
+                status="in_progress" if phase.number == 1 else "locked",
+                started_at=now if phase.number == 1 else None,
+            )
+            db.add(row)
+            snap.phase_progress[phase.id] = row
+        for level in phase.levels:
+            if level.id not in snap.level_progress:
+                row = UserLevelProgress(
+                    user_id=snap.user_id,
+                    level_id=level.id,
+                    status="available" if phase.number == 1 and level.number == 1 else "locked",
+                )
+                db.add(row)
+                snap.level_progress[level.id] = row
+
+
+async def _read_progress(
+    db: AsyncSession, user_id: uuid.UUID, catalogue: PhaseCatalogue
+) -> LearnerProgressSnapshot:
+    phase_rows = (
+        await db.execute(select(UserPhaseProgress).where(UserPhaseProgress.user_id == user_id))
+    ).scalars().all()
+    level_rows = (
+        await db.execute(select(UserLevelProgress).where(UserLevelProgress.user_id == user_id))
+    ).scalars().all()
+    return LearnerProgressSnapshot(
+        user_id=user_id,
+        catalogue=catalogue,
+        phase_progress={row.phase_id: row for row in phase_rows},
+        level_progress={row.level_id: row for row in level_rows},
+    )
+
+
+async def load_progress_snapshot(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    *,
+    ensure: bool = True,
+) -> LearnerProgressSnapshot:
+    """
+    The learner's phase/level progress for this request (cached on ``db``).
+
+    ``ensure`` creates missing progress rows (and commits), raising 503 when
+    no phases are seeded — what ``ensure_user_progression`` always did.
+    """
+    snap = db.info.get(_SNAPSHOT_INFO_KEY, {}).get(user_id)
+    if snap is None:
+        catalogue = await get_phase_catalogue(db)
+        if ensure and not catalogue.phases:
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Phases not seeded")
+        snap = await _read_progress(db, user_id, catalogue)
+    elif ensure and not snap.catalogue.phases:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Phases not seeded")
+
+    if ensure and not snap.ensured:
+        _add_missing_rows(db, snap)
+        await db.commit()
+        if db.sync_session.expire_on_commit:
+            snap = await _read_progress(db, user_id, snap.catalogue)
+        snap.ensured = True
+    # Set after the commit: flushing new rows drops cached snapshots.
+    db.info.setdefault(_SNAPSHOT_INFO_KEY, {})[user_id] = snap
+    return snap
+
+
+def _drop_snapshots(session: Session) -> None:
+    session.info.pop(_SNAPSHOT_INFO_KEY, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _progress_rows_changed(session: Session, _flush_context: Any) -> None:
+    if any(isinstance(obj, (Phase, Level)) for obj in (*session.new, *session.dirty, *session.deleted)):
+        invalidate_phase_catalogue()
+        _drop_snapshots(session)
+        return
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, (UserPhaseProgress, UserLevelProgress)):
+            _drop_snapshots(session)
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _progress_rows_expired(session: Session) -> None:
+    # Loaded rows become expired (lazy loads are not allowed under asyncio).
+    if session.expire_on_commit:
+        _drop_snapshots(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _progress_rows_rolled_back(session: Session, _previous_transaction: Any) -> None:
+    _drop_snapshots(session)
@@ -1,62 +1,81 @@
 """
 Future Progress Dashboard modules (Stage 5).
 
-Competitive leaderboards are deferred for MVP. This module defines a stable
-extension contract so rankings can mount into the Personal Progress Dashboard
-later without reshaping Stages 1–4.
+Competitive leaderboards stay off the dashboard by default (personal growth
+first). Rankings themselves live in ``app.leaderboards``; this module keeps
+the stable extension contract so they can mount into the Personal Progress
+Dashboard without reshaping Stages 1–4.
 
-To enable later:
+To enable:
   1. Set PROGRESS_LEADERBOARD_MODULE_ENABLED=true
-  2. Implement payload builder (see build_leaderboard_module_payload)
+  2. build_leaderboard_module_payload attaches the weekly board + viewer rank
   3. Render via ProgressExtensionSlot / LeaderboardModuleHost on the frontend
 """
 from __future__ import annotations
 
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.config import settings
 from app.progress.schemas import FutureModules, LeaderboardModuleConfig
 
-# Planned ranking scopes — documented for future work; not active in MVP.
+# Scopes served by app.leaderboards.
+LEADERBOARD_SCOPES = (
+    "domain",
+    "weekly",
+)
+
+# Planned ranking scopes — documented for future work; not active yet.
 PLANNED_LEADERBOARD_SCOPES = (
-    "global",
     "school",
-    "weekly",
     "monthly",
     "friends",
 )
 
+_PAYLOAD_TOP_N = 5
+
 
-def build_leaderboard_module_payload(_user_id: Any = None) -> dict | None:
+async def build_leaderboard_module_payload(db: AsyncSession, user_id: Any = None) -> dict | None:
     """
-    Reserved hook for future leaderboard rows / personal rank context.
+    Weekly board snapshot for the dashboard slot:
+      { "scope": "weekly", "week": ..., "entries": [...], "viewer_rank": 12, ... }
 
-    Returns None while the module is disabled or unimplemented.
-    When enabling rankings, populate a stable shape here, e.g.:
-      { "scope": "weekly", "entries": [...], "viewer_rank": 12 }
+    Returns None while the module is disabled.
     """
-    if not getattr(settings, "PROGRESS_LEADERBOARD_MODULE_ENABLED", False):
+    if not getattr(settings, "PROGRESS_LEADERBOARD_MODULE_ENABLED", False) or user_id is None:
         return None
-    # Intentionally empty until a rankings product ships.
-    return None
+    from app.leaderboards.service import WEEKLY_DOMAIN, get_top, get_position, week_category
+
+    week = week_category()
+    top, _etag = await get_top(db, WEEKLY_DOMAIN, week, limit=_PAYLOAD_TOP_N)
+    me = await get_position(db, WEEKLY_DOMAIN, week, user_id, radius=0)
+    return {
+        "scope": "weekly",
+        "week": week,
+        "entries": top["entries"] if top else [],
+        "viewer_rank": me["rank"],
+        "viewer_score": me["score"],
+        "total": me["total"],
+    }
 
 
-def build_future_modules(*, user_id: Any = None) -> FutureModules:
+async def build_future_modules(db: AsyncSession, *, user_id: Any = None) -> FutureModules:
     """Typed future_modules block attached to GET /progress/me."""
     enabled = bool(getattr(settings, "PROGRESS_LEADERBOARD_MODULE_ENABLED", False))
-    payload = build_leaderboard_module_payload(user_id) if enabled else None
+    payload = await build_leaderboard_module_payload(db, user_id) if enabled else None
     return FutureModules(
         leaderboard=LeaderboardModuleConfig(
             enabled=enabled,
             reason=(
-                "Ready to mount — implement payload builder"
+                "Weekly XP board for your week"
                 if enabled
                 else "Deferred - personal growth first"
             ),
-            version=1,
+            version=2,
             mount_point="personal_progress_dashboard",
-            api_path="/api/v1/challenges/leaderboard",
-            scopes=list(PLANNED_LEADERBOARD_SCOPES),
+            api_path="/api/v1/leaderboards",
+            scopes=list(LEADERBOARD_SCOPES),
             payload=payload,
         )
     )
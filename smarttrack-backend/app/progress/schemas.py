@@ -83,20 +83,18 @@ class MotivationalInsight(BaseModel):
 
 class LeaderboardModuleConfig(BaseModel):
     """
-    Stage 5 — extension contract for an optional future leaderboard.
+    Stage 5 — extension contract for the optional leaderboard slot.
 
-    Disabled in MVP. When enabled, frontend ProgressExtensionSlot mounts
+    Disabled by default. When enabled, frontend ProgressExtensionSlot mounts
     at `mount_point` and may render `payload` without changing Stages 1–4.
     """
 
     enabled: bool = False
     reason: str = "Deferred - personal growth first"
-    version: int = 1
+    version: int = 2
     mount_point: str = "personal_progress_dashboard"
-    api_path: str = "/api/v1/challenges/leaderboard"
-    scopes: list[str] = Field(
-        default_factory=lambda: ["global", "school", "weekly", "monthly", "friends"]
-    )
+    api_path: str = "/api/v1/leaderboards"
+    scopes: list[str] = Field(default_factory=lambda: ["domain", "weekly"])
     payload: dict | None = None
 
 
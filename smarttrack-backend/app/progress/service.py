@@ -6,11 +6,10 @@ from typing import Any
 
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.assessment.models import ChallengeResponse, ChallengeSession
 from app.notifications.models import Notification
-from app.phases.models import Level, Phase, UserLevelProgress, UserPhaseProgress
+from app.phases.snapshot import LevelInfo, PhaseInfo, load_progress_snapshot
 from app.progress.future_modules import build_future_modules
 from app.progress.goals import pick_next_goal
 from app.progress.insights import build_motivational_insights
@@ -136,37 +135,17 @@ async def build_personal_progress(
     week_start_dt, now_dt, week_start_date, today = _week_bounds_utc()
 
     # Keep phase/level rows in sync with /phases/me so greeting never invents Phase 3.
-    from app.phases.service import ensure_user_progression
-
-    await ensure_user_progression(db, user_id)
+    snap = await load_progress_snapshot(db, user_id)
 
     # ── Phase / level ─────────────────────────────────────────────────────
-    phases = (
-        await db.execute(
-            select(Phase).options(selectinload(Phase.levels)).order_by(Phase.number)
-        )
-    ).scalars().all()
-    level_prog = {
-        p.level_id: p
-        for p in (
-            await db.execute(
-                select(UserLevelProgress).where(UserLevelProgress.user_id == user_id)
-            )
-        ).scalars().all()
-    }
-    phase_prog = {
-        p.phase_id: p
-        for p in (
-            await db.execute(
-                select(UserPhaseProgress).where(UserPhaseProgress.user_id == user_id)
-            )
-        ).scalars().all()
-    }
+    phases = snap.phases
+    level_prog = snap.level_progress
+    phase_prog = snap.phase_progress
 
     current_phase: int | None = None
     current_phase_name: str | None = None
     current_level: int | None = None
-    current_phase_obj: Phase | None = None
+    current_phase_obj: PhaseInfo | None = None
 
     for phase in phases:
         upp = phase_prog.get(phase.id)
@@ -174,7 +153,7 @@ async def build_personal_progress(
         if status == "completed" or status == "locked":
             continue
         levels = sorted(phase.levels, key=lambda L: L.number)
-        pick: Level | None = None
+        pick: LevelInfo | None = None
         for level in levels:
             lp = level_prog.get(level.id)
             st = (lp.status if lp else "locked") or "locked"
@@ -566,5 +545,5 @@ async def build_personal_progress(
         visualizations=visualizations,
         next_goal=next_goal,
         insights=insights,
-        future_modules=build_future_modules(user_id=user_id),
+        future_modules=await build_future_modules(db, user_id=user_id),
     )
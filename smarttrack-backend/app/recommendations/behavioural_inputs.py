@@ -0,0 +1,327 @@
+"""
+Behavioural-match signals for one learner: one round trip, materialized per user.
+
+``collect_behavioural_inputs`` used to run a serial chain: subject
+performance, psychometric responses, their options (tags summed in Python),
+behavioural profile, skill estimates, a session count and a per-phase level
+walk. ``load_behavioural_signals`` reads them all with one UNION ALL, and the
+psychometric trait / programme-affinity tags are expanded and summed in SQL
+(``json_array_elements`` on PostgreSQL, ``json_each`` on SQLite):
+
+    kind        key          value
+    subject     core_maths   rolling_accuracy
+    trait_tag   Analytical   times chosen
+    affinity    engineering  summed weight
+    profile     Persistence  BehavioralProfile.value
+    skill       Math         theta
+    sessions                 ChallengeSession count
+    phases                   phases with every level completed
+
+Tag maps keep the order the old loop produced (options by id, tags in list
+order): ``build_psychometric_prose`` breaks score ties by that order.
+
+The result is stored in ``user_behavioural_inputs`` (one JSON row per user),
+so a dashboard view is a single primary-key read. Any flush that writes one
+of the source tables bumps the affected learners' ``generation`` and clears
+their payload in the same transaction (every learner's when phases, levels
+or psychometric options change). The next read rebuilds the payload and
+stores it only if ``generation`` is still the one it read, so a rebuild
+computed from a snapshot that a concurrent writer has since changed is
+dropped rather than served. Core-level bulk writes bypass the hook and
+should call ``invalidate_behavioural_inputs``.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import Float, String, cast, event, exists, func, literal, null, select, true, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.assessment.models import BehavioralProfile, ChallengeSession, UserSkillEstimate
+from app.phases.models import Level, Phase, UserLevelProgress, UserSubjectPerformance
+from app.psychometrics.models import PsychometricOption, UserPsychometricBankResponse
+from app.recommendations.models import UserBehaviouralInputs
+from app.users.models import User
+
+logger = logging.getLogger(__name__)
+
+# Bump when the payload shape changes: older rows are rebuilt on read.
+FORMAT_VERSION = 1
+
+_table = UserBehaviouralInputs.__table__
+# Writes to these tables change one learner's signals (rows carry user_id).
+_PER_USER_SOURCES = (
+    UserSubjectPerformance,
+    UserPsychometricBankResponse,
+    BehavioralProfile,
+    UserSkillEstimate,
+    ChallengeSession,
+    UserLevelProgress,
+)
+# ... and these change everyone's (phase structure, option tags).
+_GLOBAL_SOURCES = (Phase, Level, PsychometricOption)
+# Tag positions per option stay far below this.
+_ORDER_STRIDE = 10_000
+
+
+def _row(kind: str, key: Any, value: Any, order: Any) -> list:
+    return [
+        literal(kind, String).label("kind"),
+        cast(key, String).label("key"),
+        cast(value, Float).label("value"),
+        cast(order, Float).label("ord"),
+    ]
+
+
+def _tag_selects(user_id: uuid.UUID, dialect: str) -> list:
+    """Psychometric tag totals over the distinct options the learner picked."""
+    chosen = (
+        select(UserPsychometricBankResponse.option_id)
+        .where(UserPsychometricBankResponse.user_id == user_id)
+        .distinct()
+        .subquery()
+    )
+    options = select(PsychometricOption).join(chosen, chosen.c.option_id == PsychometricOption.id).subquery()
+    if dialect == "postgresql":
+        tags = func.json_array_elements_text(options.c.trait_tags).table_valued(
+            "value", with_ordinality="idx"
+        )
+        affinity = func.json_array_elements(options.c.programme_affinity_tags).table_valued(
+            "value", with_ordinality="idx"
+        )
+        is_array = lambda col: func.json_typeof(col) == "array"  # noqa: E731
+        is_object = func.json_typeof(affinity.c.value) == "object"
+        programme = affinity.c.value.op("->>")("programme")
+        weight = affinity.c.value.op("->>")("weight")
+        tag_idx, affinity_idx = tags.c.idx, affinity.c.idx
+    else:
+        tags = func.json_each(options.c.trait_tags).table_valued("value", "key")
+        affinity = func.json_each(options.c.programme_affinity_tags).table_valued("value", "type", "key")
+        is_array = lambda col: func.json_type(col) == "array"  # noqa: E731
+        is_object = affinity.c.type == "object"
+        programme = func.json_extract(affinity.c.value, "$.programme")
+        weight = func.json_extract(affinity.c.value, "$.weight")
+        tag_idx, affinity_idx = tags.c.key, affinity.c.key
+    # First appearance (option id, then list position) orders the folded map.
+    first_seen = lambda idx: func.min(options.c.id * _ORDER_STRIDE + idx)  # noqa: E731
+    return [
+        select(*_row("trait_tag", tags.c.value, func.count(), first_seen(tag_idx)))
+        .select_from(options)
+        .join(tags, true())
+        .where(is_array(options.c.trait_tags))
+        .group_by(tags.c.value),
+        select(
+            *_row(
+                "affinity",
+                programme,
+                func.sum(func.coalesce(cast(weight, Float), 0.5)),
+                first_seen(affinity_idx),
+            )
+        )
+        .select_from(options)
+        .join(affinity, true())
+        .where(is_array(options.c.programme_affinity_tags), is_object, func.coalesce(programme, "") != "")
+        .group_by(programme),
+    ]
+
+
+def _phases_completed(user_id: uuid.UUID) -> Any:
+    """Phases with at least one level, every one of them completed by the learner."""
+    done = select(UserLevelProgress.level_id).where(
+        UserLevelProgress.user_id == user_id, UserLevelProgress.status == "completed"
+    )
+    return (
+        select(func.count())
+        .select_from(Phase)
+        .where(
+            exists().where(Level.phase_id == Phase.id),
+            ~exists().where(Level.phase_id == Phase.id, Level.id.not_in(done)),
+        )
+        .scalar_subquery()
+    )
+
+
+def signals_statement(user_id: uuid.UUID, dialect: str) -> Any:
+    """The single UNION ALL behind ``load_behavioural_signals``."""
+    parts = [
+        select(
+            *_row(
+                "subject",
+                UserSubjectPerformance.subject,
+                UserSubjectPerformance.rolling_accuracy,
+                UserSubjectPerformance.id,
+            )
+        ).where(UserSubjectPerformance.user_id == user_id),
+        select(
+            *_row("profile", BehavioralProfile.trait, BehavioralProfile.value, BehavioralProfile.id)
+        ).where(BehavioralProfile.user_id == user_id),
+        select(
+            *_row("skill", UserSkillEstimate.domain, UserSkillEstimate.theta, UserSkillEstimate.id)
+        ).where(UserSkillEstimate.user_id == user_id),
+        select(*_row("sessions", literal(""), func.count(), 0))
+        .select_from(ChallengeSession)
+        .where(ChallengeSession.user_id == user_id),
+        select(*_row("phases", literal(""), _phases_completed(user_id), 0)),
+    ]
+    if dialect in ("postgresql", "sqlite"):
+        parts.extend(_tag_selects(user_id, dialect))
+    return union_all(*parts)
+
+
+async def _python_tag_rows(db: AsyncSession, user_id: uuid.UUID) -> list[tuple[str, str, float, float]]:
+    """Tag totals for dialects without JSON table functions (sums in Python)."""
+    option_ids = select(UserPsychometricBankResponse.option_id).where(
+        UserPsychometricBankResponse.user_id == user_id
+    )
+    options = (
+        await db.execute(
+            select(PsychometricOption)
+            .where(PsychometricOption.id.in_(option_ids))
+            .order_by(PsychometricOption.id)
+        )
+    ).scalars().all()
+    traits: dict[str, float] = {}
+    programmes: dict[str, float] = {}
+    for opt in options:
+        for tag in opt.trait_tags or []:
+            traits[str(tag)] = traits.get(str(tag), 0.0) + 1
+        for aff in opt.programme_affinity_tags or []:
+            if isinstance(aff, dict) and aff.get("programme"):
+                name = aff["programme"]
+                programmes[name] = programmes.get(name, 0.0) + float(aff.get("weight", 0.5))
+    return [("trait_tag", k, v, float(n)) for n, (k, v) in enumerate(traits.items())] + [
+        ("affinity", k, v, float(n)) for n, (k, v) in enumerate(programmes.items())
+    ]
+
+
+def _fold(rows: Iterable[Any]) -> dict[str, Any]:
+    by_kind: dict[str, list[tuple[float, str, float | None]]] = {}
+    for kind, key, value, order in rows:
+        by_kind.setdefault(kind, []).append((float(order or 0), str(key or ""), value))
+    for entries in by_kind.values():
+        entries.sort(key=lambda e: (e[0], e[1]))
+
+    def _map(kind: str, default: float = 0.0) -> dict[str, float]:
+        return {key: float(default if value is None else value) for _, key, value in by_kind.get(kind, [])}
+
+    def _count(kind: str) -> int:
+        return int(sum(float(value or 0) for _, _, value in by_kind.get(kind, [])))
+
+    return {
+        # (subject, rolling_accuracy) in row order; None stays None for the 0.6 check.
+        "subjects": [[key, value] for _, key, value in by_kind.get("subject", [])],
+        "trait_tags": _map("trait_tag"),
+        "programme_affinity_scores": _map("affinity"),
+        "profile_traits": _map("profile"),
+        "skill_estimates": _map("skill"),
+        "session_count": _count("sessions"),
+        "phases_completed": _count("phases"),
+    }
+
+
+async def compute_behavioural_signals(db: AsyncSession, user_id: uuid.UUID) -> dict[str, Any]:
+    dialect = db.bind.dialect.name
+    rows = (await db.execute(signals_statement(user_id, dialect))).all()
+    if dialect not in ("postgresql", "sqlite"):
+        rows = [*rows, *await _python_tag_rows(db, user_id)]
+    return _fold(rows)
+
+
+async def _store(
+    db: AsyncSession, user_id: uuid.UUID, payload: dict[str, Any], generation: int | None
+) -> bool:
+    """Save a rebuild unless a source write bumped the row since it was read."""
+    values = {
+        "format_version": FORMAT_VERSION,
+        "payload": payload,
+        "refreshed_at": datetime.now(timezone.utc),
+    }
+    if generation is not None:
+        result = await db.execute(
+            update(_table)
+            .where(_table.c.user_id == user_id, _table.c.generation == generation)
+            .values(**values)
+        )
+        return result.rowcount == 1
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(_table).values(user_id=user_id, generation=0, **values)
+        # A writer's tombstone got there first: its generation wins.
+        result = await db.execute(stmt.on_conflict_do_nothing(index_elements=["user_id"]))
+        return result.rowcount == 1
+    # No upsert here: a concurrent tombstone surfaces as an IntegrityError.
+    await db.execute(_table.insert().values(user_id=user_id, generation=0, **values))
+    return True
+
+
+async def load_behavioural_signals(db: AsyncSession, user_id: uuid.UUID) -> dict[str, Any]:
+    """The learner's materialized signals; rebuilt (one round trip) when missing or stale."""
+    row = (
+        await db.execute(
+            select(_table.c.format_version, _table.c.generation, _table.c.payload).where(
+                _table.c.user_id == user_id
+            )
+        )
+    ).first()
+    if row is not None and row.format_version == FORMAT_VERSION and isinstance(row.payload, dict):
+        return row.payload
+    payload = await compute_behavioural_signals(db, user_id)
+    # Part of the caller's transaction: kept if it commits, dropped on rollback.
+    await _store(db, user_id, payload, None if row is None else row.generation)
+    return payload
+
+
+def _bump_statement(dialect: str, user_ids: Iterable[uuid.UUID] | None) -> Any:
+    """Tombstone the learners' rows (all learners when ``user_ids`` is None)."""
+    stale = {"generation": _table.c.generation + 1, "payload": null(), "refreshed_at": func.now()}
+    if dialect not in ("postgresql", "sqlite"):
+        stmt = update(_table).values(**stale)
+        return stmt if user_ids is None else stmt.where(_table.c.user_id.in_(list(user_ids)))
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    if user_ids is None:
+        stmt = insert(_table).from_select(
+            ["user_id", "generation", "payload"],
+            # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT.
+            select(User.id, literal(1), null()).where(true()),
+        )
+    else:
+        stmt = insert(_table).values(
+            [{"user_id": user_id, "generation": 1, "payload": None} for user_id in user_ids]
+        )
+    return stmt.on_conflict_do_update(index_elements=["user_id"], set_=stale)
+
+
+async def invalidate_behavioural_inputs(db: AsyncSession, user_ids: Iterable[uuid.UUID] | None = None) -> None:
+    """Mark rows stale (all of them when ``user_ids`` is None)."""
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+    await db.execute(_bump_statement(db.bind.dialect.name, user_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _sources_changed(session: Session, _flush_context: Any) -> None:
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if not changed:
+        return
+    dialect = session.get_bind().dialect.name
+    if any(isinstance(obj, _GLOBAL_SOURCES) for obj in changed):
+        session.execute(_bump_statement(dialect, None))
+        return
+    # A learner deleted in this flush takes its row with it (ON DELETE CASCADE).
+    gone = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    user_ids = {
+        obj.user_id
+        for obj in changed
+        if isinstance(obj, _PER_USER_SOURCES) and getattr(obj, "user_id", None) is not None
+    } - gone
+    if user_ids:
+        session.execute(_bump_statement(dialect, sorted(user_ids, key=str)))
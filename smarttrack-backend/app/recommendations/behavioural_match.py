@@ -3,11 +3,25 @@ BehaviouralProgrammeMatch (BPM) — rank KNUST programmes without WASSCE.
 
 Used after each phase completes. WASSCE/admission cut-offs are a separate
 optional refinement path once the learner uploads results.
+
+The cut-off catalogue is compiled once into a ``ProgrammeTable`` (family
+index + subject-hint bitmask per programme), so ranking is one vectorized
+score and a partial top-k selection. ``build_behavioural_match`` results are
+kept in a bounded LRU keyed on a fingerprint of the learner's inputs, so
+repeated dashboard views do not recompute them.
 """
 from __future__ import annotations
 
+import hashlib
+import json
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
 from typing import Any
 
+import numpy as np
+
+from app.config import settings
 from app.recommendations.cutoffs import FAMILY_ALIASES, load_knust_cutoffs
 from app.recommendations.presentation import enrich_programme
 
@@ -194,6 +208,7 @@ def _subject_overlap_bonus(
     programme_name: str,
     subject_accuracies: dict[str, float],
 ) -> float:
+    """Per-name form of the bonus ``ProgrammeTable.hint_mask`` precomputes."""
     name = str(programme_name or "").lower()
     strong = {
         str(s).lower().replace(" ", "_")
@@ -209,47 +224,123 @@ def _subject_overlap_bonus(
     return bonus
 
 
+class ProgrammeTable:
+    """
+    A cut-off catalogue compiled once for ranking: per-programme family index
+    and PROGRAMME_SUBJECT_HINTS bitmask, plus each name's position in sorted
+    order for the score tie-break.
+    """
+
+    def __init__(self, catalogue: dict[str, Any]) -> None:
+        rows = list(catalogue.get("programmes") or [])
+        university = catalogue.get("university", "KNUST")
+        self.items: list[dict[str, Any]] = []
+        self.raw_families: list[str] = []
+        family_index = np.empty(len(rows), dtype=np.int8)
+        hint_mask = np.zeros(len(rows), dtype=np.uint16)
+        for i, row in enumerate(rows):
+            family = str(row.get("family") or "")
+            atlas_family = FAMILY_ALIASES.get(family, family)
+            if atlas_family not in FAMILIES:
+                # Map Science → Natural Sciences already in FAMILY_ALIASES
+                atlas_family = FAMILY_ALIASES.get(atlas_family, "Natural Sciences")
+            family_index[i] = FAMILIES.index(atlas_family)
+            programme = str(row.get("programme") or "")
+            name = programme.lower()
+            for bit, (keywords, _subjects) in enumerate(PROGRAMME_SUBJECT_HINTS):
+                if any(k in name for k in keywords):
+                    hint_mask[i] |= 1 << bit
+            self.raw_families.append(family)
+            self.items.append(
+                {
+                    "university": row.get("university", university),
+                    "cycle": catalogue.get("cycle"),
+                    "family": family,
+                    "programme": programme,
+                    "cutoff": row.get("cutoff"),
+                    "demand": row.get("demand"),
+                    "level": row.get("level", "Degree"),
+                    "eligibility_band": None,
+                    "aggregate": None,
+                }
+            )
+        self.family_index = family_index
+        self.hint_mask = hint_mask
+        order = sorted(range(len(rows)), key=lambda i: self.items[i]["programme"])
+        self.name_rank = np.empty(len(rows), dtype=np.int32)
+        self.name_rank[order] = np.arange(len(rows), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def base_scores(self, family_scores: dict[str, int]) -> np.ndarray:
+        if all(f in family_scores for f in FAMILIES):
+            by_family = np.array([float(family_scores[f]) for f in FAMILIES])
+            return by_family[self.family_index]
+        # Partial score dicts fall back to the catalogue's own family label.
+        return np.array(
+            [
+                float(family_scores.get(FAMILIES[f], family_scores.get(raw, 50)))
+                for f, raw in zip(self.family_index, self.raw_families)
+            ]
+        )
+
+    def top(self, scores: np.ndarray, limit: int) -> np.ndarray:
+        """Indices of the ``limit`` best scores, ties broken by programme name."""
+        if limit <= 0 or not len(scores):
+            return np.empty(0, dtype=np.intp)
+        if limit < len(scores):
+            kth = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            # Keep every programme tied with the k-th score for the name tie-break.
+            candidates = np.flatnonzero(scores >= kth)
+        else:
+            candidates = np.arange(len(scores))
+        order = np.lexsort((self.name_rank[candidates], -scores[candidates]))
+        return candidates[order][:limit]
+
+
+@lru_cache(maxsize=1)
+def knust_programme_table() -> ProgrammeTable:
+    return ProgrammeTable(load_knust_cutoffs())
+
+
+def _active_hints(subject_accuracies: dict[str, float]) -> int:
+    """PROGRAMME_SUBJECT_HINTS bits whose subjects the learner is strong in."""
+    strong = {
+        str(s).lower().replace(" ", "_")
+        for s, acc in (subject_accuracies or {}).items()
+        if float(acc or 0) >= 0.6
+    }
+    mask = 0
+    for bit, (_keywords, subjects) in enumerate(PROGRAMME_SUBJECT_HINTS):
+        if any(s in strong for s in subjects):
+            mask |= 1 << bit
+    return mask
+
+
 def rank_programmes_behavioural(
     *,
     family_scores: dict[str, int],
     subject_accuracies: dict[str, float] | None = None,
     limit: int = 8,
+    table: ProgrammeTable | None = None,
 ) -> list[dict[str, Any]]:
     """
     Rank full KNUST catalogue by behavioural family fit (no cut-off gate).
     Returns enriched programme cards ready for UI / Recommendation rows.
     """
-    cutoffs = load_knust_cutoffs()
-    accuracies = subject_accuracies or {}
-    scored: list[tuple[float, dict[str, Any]]] = []
-
-    for row in cutoffs.get("programmes") or []:
-        family = str(row.get("family") or "")
-        atlas_family = FAMILY_ALIASES.get(family, family)
-        if atlas_family not in FAMILIES:
-            # Map Science → Natural Sciences already in FAMILY_ALIASES
-            atlas_family = FAMILY_ALIASES.get(atlas_family, "Natural Sciences")
-        base = float(family_scores.get(atlas_family, family_scores.get(family, 50)))
-        programme = str(row.get("programme") or "")
-        score = base + _subject_overlap_bonus(programme, accuracies)
-        item = {
-            "university": cutoffs.get("university", "KNUST"),
-            "cycle": cutoffs.get("cycle"),
-            "family": family,
-            "programme": programme,
-            "cutoff": row.get("cutoff"),
-            "demand": row.get("demand"),
-            "level": row.get("level", "Degree"),
-            "eligibility_band": None,
-            "aggregate": None,
-            "family_fit_score": int(round(base)),
-            "match_rank_score": score,
-        }
-        scored.append((score, item))
+    table = table or knust_programme_table()
+    base = table.base_scores(family_scores)
+    active = _active_hints(subject_accuracies or {})
+    scores = base + np.where(table.hint_mask & active, 6.0, 0.0) if active else base
 
-    scored.sort(key=lambda x: (-x[0], str(x[1].get("programme") or "")))
     cards: list[dict[str, Any]] = []
-    for rank, (_, item) in enumerate(scored[:limit], start=1):
+    for rank, index in enumerate(table.top(scores, limit), start=1):
+        item = {
+            **table.items[index],
+            "family_fit_score": int(round(float(base[index]))),
+            "match_rank_score": float(scores[index]),
+        }
         why = (
             f"Ranked #{rank} from your psychometric profile and challenge activity "
             f"in Atlas so far (no WASSCE required)."
@@ -260,6 +351,65 @@ def rank_programmes_behavioural(
     return cards
 
 
+def behavioural_fingerprint(**inputs: Any) -> str:
+    """Stable hash of build_behavioural_match inputs (dict order does not matter)."""
+    material = json.dumps(inputs, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _copy_match(result: dict[str, Any]) -> dict[str, Any]:
+    """Copy down to the cards and score dicts — the levels callers modify."""
+    return {
+        **result,
+        "family_fit_scores": dict(result["family_fit_scores"]),
+        "programmes": [dict(card) for card in result["programmes"]],
+        "signals": {name: dict(scores) for name, scores in result["signals"].items()},
+    }
+
+
+class BehaviouralMatchCache:
+    """Bounded LRU of build_behavioural_match results; the output depends on inputs alone."""
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def size() -> int:
+        return max(0, int(getattr(settings, "BEHAVIOURAL_MATCH_CACHE_SIZE", 2048)))
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            found = self._entries.get(key)
+            if found is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers number and annotate the cards in place.
+        return _copy_match(found)
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        limit = self.size()
+        if not limit:
+            return
+        with self._lock:
+            self._entries[key] = _copy_match(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+behavioural_match_cache = BehaviouralMatchCache()
+
+
 def build_behavioural_match(
     *,
     programme_affinity_scores: dict[str, float],
@@ -271,7 +421,21 @@ def build_behavioural_match(
     session_count: int = 0,
     limit: int = 8,
 ) -> dict[str, Any]:
-    """Full BPM pipeline → family scores + ranked programme cards."""
+    """Full BPM pipeline → family scores + ranked programme cards (cached per input fingerprint)."""
+    key = behavioural_fingerprint(
+        programme_affinity_scores=programme_affinity_scores,
+        subject_accuracies=subject_accuracies,
+        behavioral_traits=behavioral_traits,
+        skill_estimates=skill_estimates,
+        completed_lessons=completed_lessons,
+        phases_completed=phases_completed,
+        session_count=session_count,
+        limit=limit,
+    )
+    cached = behavioural_match_cache.get(key)
+    if cached is not None:
+        return cached
+
     psych = family_fit_from_psych_affinity(programme_affinity_scores)
     challenge = challenge_family_scores(subject_accuracies)
     learning = learning_family_scores(completed_lessons)
@@ -292,7 +456,7 @@ def build_behavioural_match(
         subject_accuracies=subject_accuracies,
         limit=limit,
     )
-    return {
+    result = {
         "family_fit_scores": family_scores,
         "confidence": confidence,
         "programmes": programmes,
@@ -303,3 +467,5 @@ def build_behavioural_match(
             "traits": traits,
         },
     }
+    behavioural_match_cache.put(key, result)
+    return result
@@ -8,12 +8,9 @@ from __future__ import annotations
 
 from typing import Any
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.phases.models import Phase, UserLevelProgress
-from app.phases.service import ensure_user_progression
+from app.phases.snapshot import load_progress_snapshot
 from app.users.models import User
 
 FRIENDLY_BLOCKED_TITLE = "You are not yet eligible for a recommendation."
@@ -42,17 +39,9 @@ async def evaluate_recommendation_eligibility(
     eligible (bool): mandatory phase-level requirement met
     learning_recommended_done (bool): soft Learning Center nudge
     """
-    await ensure_user_progression(db, user.id)
-
-    phases = (
-        await db.execute(select(Phase).options(selectinload(Phase.levels)).order_by(Phase.number))
-    ).scalars().all()
-    level_prog = {
-        p.level_id: p
-        for p in (
-            await db.execute(select(UserLevelProgress).where(UserLevelProgress.user_id == user.id))
-        ).scalars().all()
-    }
+    snap = await load_progress_snapshot(db, user.id)
+    phases = snap.phases
+    level_prog = snap.level_progress
 
     phase_summaries: list[dict[str, Any]] = []
     phases_with_all_levels_done: list[int] = []
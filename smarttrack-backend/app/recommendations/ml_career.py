@@ -167,5 +167,61 @@ def generate_ml_knust_alternate(
     }
 
 
+def score_profiles_batch(
+    profiles: list[dict[str, Any]],
+    *,
+    limit_per_band: int = 8,
+    top_n: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Score a cohort with the Decision Tree in one pass (e.g. after a cut-off update).
+
+    Each profile carries ``academic_grades`` and optionally ``behavioral_traits``,
+    ``skill_estimates`` and ``family_fit_scores``. Cut-off bands only depend on
+    the aggregate (and fit scores), so the gate payload is built once per
+    distinct aggregate rather than once per learner. Raises when the model
+    cannot load; callers decide how to surface that.
+    """
+    from app.recommendations.cutoffs import apply_cutoff_boundaries, compute_wassce_aggregate
+    from app.recommendations.presentation import format_ml_as_learner_programmes
+    from ml_aspect.knust_dt.predict import grades_to_dt_features, predict_knust_dt_batch
+
+    gate_payloads: dict[tuple, dict[str, Any]] = {}
+    features_list: list[dict[str, float]] = []
+    payloads: list[dict[str, Any]] = []
+    aggregates: list[int | None] = []
+    for profile in profiles:
+        grades = profile.get("academic_grades") or []
+        fit = profile.get("family_fit_scores") or {}
+        aggregate = compute_wassce_aggregate(grades).get("aggregate")
+        key = (aggregate, tuple(sorted(fit.items())))
+        payload = gate_payloads.get(key)
+        if payload is None:
+            payload = gate_payloads[key] = apply_cutoff_boundaries(
+                grades=grades, family_fit_scores=fit, limit_per_band=limit_per_band
+            )
+        features_list.append(
+            grades_to_dt_features(
+                academic_grades=grades,
+                behavioral_traits=profile.get("behavioral_traits"),
+                skill_estimates=profile.get("skill_estimates"),
+            )
+        )
+        payloads.append(payload)
+        aggregates.append(aggregate)
+
+    ranked = predict_knust_dt_batch(
+        features_list, knust_payloads=payloads, top_n=top_n or _ml_top_n()
+    )
+    return [
+        {
+            "aggregate": aggregate,
+            "predictions": predictions,
+            "programmes": format_ml_as_learner_programmes(predictions, aggregate=aggregate),
+        }
+        for aggregate, predictions in zip(aggregates, ranked)
+    ]
+
+
 # Back-compat alias
 generate_ml_knust_primary = generate_ml_knust_alternate
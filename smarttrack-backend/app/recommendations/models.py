@@ -34,3 +34,24 @@ class Recommendation(Base):
     programme_suggestions: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
     rationale_summary: Mapped[str] = mapped_column(Text, nullable=False, default="")
     is_final: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+
+class UserBehaviouralInputs(Base):
+    """Materialized behavioural-match signals per learner (app.recommendations.behavioural_inputs)."""
+
+    __tablename__ = "user_behavioural_inputs"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    format_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Bumped by every source write; a rebuild only lands if it is unchanged.
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    payload: Mapped[dict | None] = mapped_column(JSON(none_as_null=True), nullable=True)
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
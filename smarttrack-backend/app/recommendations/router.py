@@ -1,17 +1,40 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
 from app.config import settings
 from app.database import get_db
 from app.recommendations.eligibility import evaluate_recommendation_eligibility
+from app.recommendations.ml_career import score_profiles_batch
 from app.recommendations.self_test import run_recommendation_self_test
 from app.recommendations.service import list_recommendations
+from app.security.rate_limit import limiter
 from app.users.models import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
 
 
+class GradeProfile(BaseModel):
+    id: Optional[str] = None
+    academic_grades: list[dict[str, str]] = Field(default_factory=list)
+    behavioral_traits: Optional[dict[str, float]] = None
+    skill_estimates: Optional[dict[str, float]] = None
+    family_fit_scores: Optional[dict[str, int]] = None
+
+
+class BatchScoreRequest(BaseModel):
+    profiles: list[GradeProfile]
+    top_n: Optional[int] = Field(default=None, ge=1, le=50)
+    limit_per_band: int = Field(default=8, ge=1, le=100)
+
+
 def _debug_allowed() -> bool:
     return bool(
         getattr(settings, "RECOMMENDATION_DEBUG", False)
@@ -53,3 +76,52 @@ async def recommendation_self_test(
             detail="Recommendation self-test is only available in development/debug mode.",
         )
     return run_recommendation_self_test()
+
+
+@router.post("/batch-score")
+async def recommendation_batch_score(
+    body: BatchScoreRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Score many grade profiles with the Decision Tree in one call.
+
+    Meant for recomputing a cohort after a cut-off update; results come back in
+    request order. Capped by ML_BATCH_MAX_PROFILES, and each account may send
+    ML_BATCH_RATE_LIMIT batches a minute.
+    """
+    limiter.hit(
+        f"recommendations-batch-score:{current_user.id}",
+        limit=int(getattr(settings, "ML_BATCH_RATE_LIMIT", 3)),
+        window_seconds=60,
+    )
+    limit = int(getattr(settings, "ML_BATCH_MAX_PROFILES", 5000))
+    if len(body.profiles) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {limit} profiles per batch.",
+        )
+    profiles: list[dict[str, Any]] = [p.model_dump() for p in body.profiles]
+    try:
+        # CPU-bound for large cohorts: keep it off the event loop.
+        results = await asyncio.to_thread(
+            score_profiles_batch,
+            profiles,
+            limit_per_band=body.limit_per_band,
+            top_n=body.top_n,
+        )
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
+    except Exception:
+        logger.exception("Batch Decision Tree scoring failed")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Programme scoring is temporarily unavailable.",
+        )
+    return {
+        "count": len(results),
+        "model": "knust_dt",
+        "results": [
+            {"id": profile["id"], **result} for profile, result in zip(profiles, results)
+        ],
+    }
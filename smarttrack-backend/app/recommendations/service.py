@@ -3,16 +3,14 @@ from __future__ import annotations
 
 import logging
 import uuid
-from collections import defaultdict
 from datetime import datetime, timezone
 
 from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.assessment.models import BehavioralProfile, UserSkillEstimate
-from app.phases.models import Phase, UserLevelProgress, UserSubjectPerformance
+from app.phases.models import Phase
 from app.phases.service import unlock_next_phase_after_recommendation
-from app.psychometrics.models import PsychometricOption, UserPsychometricBankResponse
+from app.recommendations.behavioural_inputs import load_behavioural_signals
 from app.recommendations.behavioural_match import build_behavioural_match
 from app.recommendations.models import Recommendation
 from app.recommendations.presentation import (
@@ -31,122 +29,38 @@ async def _load_user_grades(db: AsyncSession, user_id: uuid.UUID) -> list[dict[s
     return [{"subject": r.subject, "grade": r.grade} for r in rows if r.subject and r.grade]
 
 
-async def _phases_completed_count(db: AsyncSession, user_id: uuid.UUID) -> int:
-    from app.phases.models import Level
-
-    phases = (await db.execute(select(Phase).order_by(Phase.number))).scalars().all()
-    if not phases:
-        return 0
-    level_prog = {
-        p.level_id: p
-        for p in (
-            await db.execute(select(UserLevelProgress).where(UserLevelProgress.user_id == user_id))
-        ).scalars().all()
-    }
-    done = 0
-    for phase in phases:
-        levels = (
-            await db.execute(select(Level).where(Level.phase_id == phase.id))
-        ).scalars().all()
-        if not levels:
-            continue
-        if all(
-            (level_prog.get(lv.id) and level_prog[lv.id].status == "completed")
-            for lv in levels
-        ):
-            done += 1
-    return done
-
-
 async def collect_behavioural_inputs(
     db: AsyncSession,
     user: User,
 ) -> dict:
-    """Gather cumulative Atlas signals for BPM (no WASSCE)."""
-    user_id = user.id
-    perfs = (
-        await db.execute(
-            select(UserSubjectPerformance).where(UserSubjectPerformance.user_id == user_id)
-        )
-    ).scalars().all()
-    subject_accuracies = {
-        str(p.subject): float(p.rolling_accuracy or 0.5) for p in perfs
-    }
+    """Gather cumulative Atlas signals for BPM (no WASSCE) — one materialized row read."""
+    signals = await load_behavioural_signals(db, user.id)
+    subjects = signals["subjects"]
+    subject_accuracies = {str(subject): float(acc or 0.5) for subject, acc in subjects}
     strong_subjects = [
-        p.subject.replace("_", " ")
-        for p in perfs
-        if float(p.rolling_accuracy or 0) >= 0.6
+        str(subject).replace("_", " ") for subject, acc in subjects if float(acc or 0) >= 0.6
     ][:3]
 
-    responses = (
-        await db.execute(
-            select(UserPsychometricBankResponse).where(
-                UserPsychometricBankResponse.user_id == user_id
-            )
-        )
-    ).scalars().all()
-    option_ids = [r.option_id for r in responses]
-    programme_scores: dict[str, float] = defaultdict(float)
-    trait_scores: dict[str, float] = defaultdict(float)
-
-    if option_ids:
-        options = (
-            await db.execute(
-                select(PsychometricOption).where(PsychometricOption.id.in_(option_ids))
-            )
-        ).scalars().all()
-        for opt in options:
-            for tag in opt.trait_tags or []:
-                trait_scores[str(tag)] += 1
-            for aff in opt.programme_affinity_tags or []:
-                if isinstance(aff, dict) and aff.get("programme"):
-                    programme_scores[aff["programme"]] += float(aff.get("weight", 0.5))
-
+    programme_scores = dict(signals["programme_affinity_scores"])
+    trait_scores = dict(signals["trait_tags"])
     # Merge BehavioralProfile rows (0–1 or scaled) into trait map for BPM
-    bp_rows = (
-        await db.execute(
-            select(BehavioralProfile).where(BehavioralProfile.user_id == user_id)
-        )
-    ).scalars().all()
-    behavioral_traits = {t.trait: float(t.value) for t in bp_rows}
+    behavioral_traits = dict(signals["profile_traits"])
     for k, v in trait_scores.items():
         behavioral_traits.setdefault(k, float(v))
 
-    skills = (
-        await db.execute(
-            select(UserSkillEstimate).where(UserSkillEstimate.user_id == user_id)
-        )
-    ).scalars().all()
-    skill_estimates = {s.domain: float(s.theta) for s in skills}
-
     profile = user.learner_profile if isinstance(user.learner_profile, dict) else {}
     completed_lessons = list(profile.get("completed_lessons") or [])
 
-    from app.assessment.models import ChallengeSession
-
-    session_count = int(
-        (
-            await db.execute(
-                select(func.count())
-                .select_from(ChallengeSession)
-                .where(ChallengeSession.user_id == user_id)
-            )
-        ).scalar()
-        or 0
-    )
-
-    phases_completed = await _phases_completed_count(db, user_id)
-
     return {
-        "programme_affinity_scores": dict(programme_scores),
+        "programme_affinity_scores": programme_scores,
         "subject_accuracies": subject_accuracies,
         "strong_subjects": strong_subjects,
-        "trait_scores": dict(trait_scores),
+        "trait_scores": trait_scores,
         "behavioral_traits": behavioral_traits,
-        "skill_estimates": skill_estimates,
+        "skill_estimates": dict(signals["skill_estimates"]),
         "completed_lessons": completed_lessons,
-        "phases_completed": phases_completed,
-        "session_count": session_count,
+        "phases_completed": int(signals["phases_completed"]),
+        "session_count": int(signals["session_count"]),
         "psych_prose": build_psychometric_prose(trait_scores),
     }
 
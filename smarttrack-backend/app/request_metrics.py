@@ -0,0 +1,148 @@
+"""
+Request latency instrumentation.
+
+``RequestTimingMiddleware`` times every HTTP request per route template and
+collects named stages recorded during the request (``db_ping``, ``auth``, …)
+via ``stage()``. Each response gets a ``Server-Timing`` header so the browser
+devtools show the breakdown; aggregates (count, mean, p50/p95/max per route
+and per stage) are served from ``/health/request-latency`` and as Prometheus
+histograms on ``/metrics``.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Iterator
+
+from app.metrics import registry
+
+_stages: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "request_stages", default=None
+)
+
+_SAMPLE_SIZE = 512
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "smarttrack_http_request_seconds",
+    "HTTP request latency per route template.",
+    ("route",),
+)
+REQUEST_STAGE_SECONDS = registry.histogram(
+    "smarttrack_request_stage_seconds",
+    "Named stages recorded during requests (db_pool_wait, db_ping, auth, question_pool, ...).",
+    ("stage",),
+)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    stages = _stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+class _Series:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque[float] = deque(maxlen=_SAMPLE_SIZE)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def _pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(_pct(0.50), 2),
+            "p95_ms": round(_pct(0.95), 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class RequestMetrics:
+    def __init__(self) -> None:
+        self._routes: dict[str, _Series] = {}
+        self._stages: dict[str, _Series] = {}
+        self._lock = Lock()
+
+    def record(self, route: str, seconds: float, stages: list[tuple[str, float]]) -> None:
+        with self._lock:
+            self._routes.setdefault(route, _Series()).add(seconds)
+            for name, value in stages:
+                self._stages.setdefault(name, _Series()).add(value)
+        HTTP_REQUEST_SECONDS.observe(seconds, route)
+        for name, value in stages:
+            REQUEST_STAGE_SECONDS.observe(value, name)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "routes": {k: v.as_dict() for k, v in sorted(self._routes.items())},
+                "stages": {k: v.as_dict() for k, v in sorted(self._stages.items())},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._stages.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware (keeps streaming responses streaming)."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: list[tuple[str, float]] = []
+        token = _stages.set(stages)
+        started = time.perf_counter()
+
+        async def _send(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                timing = [f"{name};dur={value * 1000:.1f}" for name, value in stages]
+                timing.append(f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+                headers = list(message.get("headers") or [])
+                headers.append((b"server-timing", ", ".join(timing).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _stages.reset(token)
+            route = scope.get("route")
+            label = f"{scope.get('method', '')} {getattr(route, 'path', '<unmatched>')}"
+            request_metrics.record(label, time.perf_counter() - started, stages)
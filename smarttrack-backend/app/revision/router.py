@@ -6,10 +6,18 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
+from app.database import get_db
+from app.llm.streaming import sse_response
 from app.users.models import User
-from app.revision.service import generate_topic_content, ask_ai_question
+from app.revision.service import (
+    ASK_UNAVAILABLE_MESSAGE,
+    ask_ai_question,
+    generate_topic_content,
+    stream_ai_question,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -72,16 +80,7 @@ async def generate_topic(
         )
 
 
-@router.post("/ask", response_model=AskAIResponse)
-async def ask_ai(
-    body: AskAIRequest,
-    current_user: User = Depends(get_current_user),
-):
-    """
-    Ask a follow-up question about a specific revision topic.
-
-    The AI uses the topic as context to provide relevant answers.
-    """
+def _validate_ask(body: AskAIRequest) -> None:
     if not body.question.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -94,6 +93,19 @@ async def ask_ai(
             detail="Topic cannot be empty.",
         )
 
+
+@router.post("/ask", response_model=AskAIResponse)
+async def ask_ai(
+    body: AskAIRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Ask a follow-up question about a specific revision topic.
+
+    The AI uses the topic as context to provide relevant answers.
+    """
+    _validate_ask(body)
+
     try:
         response = await ask_ai_question(
             topic=body.topic.strip(),
@@ -107,3 +119,27 @@ async def ask_ai(
             success=False,
             error=f"Failed to get AI response: {str(e)}",
         )
+
+
+@router.post("/ask/stream")
+async def ask_ai_stream(
+    body: AskAIRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Streamed /ask (SSE): ``token`` events as the answer is written, then
+    ``done`` with ``time_to_first_token_ms`` — or ``error``.
+    """
+    _validate_ask(body)
+    # Auth was the only DB work; give the connection back before streaming.
+    await db.close()
+    return sse_response(
+        stream_ai_question(
+            topic=body.topic.strip(),
+            question=body.question.strip(),
+            history=body.history,
+        ),
+        route="revision_ask",
+        failure_detail=ASK_UNAVAILABLE_MESSAGE,
+    )
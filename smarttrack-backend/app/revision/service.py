@@ -6,11 +6,11 @@ using DeepSeek AI (with NVIDIA fallback).
 """
 import json
 import logging
-from typing import Optional
-
-import httpx
+from typing import AsyncIterator, Optional
 
 from app.config import settings
+from app.llm.http_pool import llm_post
+from app.llm.streaming import StreamUnavailable, stream_chat
 
 logger = logging.getLogger(__name__)
 
@@ -134,30 +134,30 @@ Rules:
                 "max_tokens": 4096,
             }
 
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    provider["url"],
-                    headers=headers,
-                    json=payload,
-                )
-                response.raise_for_status()
-                result = response.json()
-                raw = result["choices"][0]["message"]["content"]
-
-                # Clean markdown code block wrappers if present
-                raw = raw.strip()
-                if raw.startswith("```json"):
-                    raw = raw[7:]
-                elif raw.startswith("```"):
-                    raw = raw[3:]
-                if raw.endswith("```"):
-                    raw = raw[:-3]
-                raw = raw.strip()
-
-                data = json.loads(raw)
-                data["_source"] = provider["name"]
-                logger.info(f"Topic content generated via {provider['name']} for '{topic}'")
-                return data
+            response = await llm_post(
+                provider["url"],
+                headers=headers,
+                json=payload,
+                timeout=120.0,
+            )
+            response.raise_for_status()
+            result = response.json()
+            raw = result["choices"][0]["message"]["content"]
+
+            # Clean markdown code block wrappers if present
+            raw = raw.strip()
+            if raw.startswith("```json"):
+                raw = raw[7:]
+            elif raw.startswith("```"):
+                raw = raw[3:]
+            if raw.endswith("```"):
+                raw = raw[:-3]
+            raw = raw.strip()
+
+            data = json.loads(raw)
+            data["_source"] = provider["name"]
+            logger.info(f"Topic content generated via {provider['name']} for '{topic}'")
+            return data
 
         except Exception as e:
             logger.warning(f"{provider['name']} failed for topic '{topic}': {e}")
@@ -189,14 +189,11 @@ def _fallback_topic_content(topic: str) -> dict:
     }
 
 
-async def ask_ai_question(topic: str, question: str, history: Optional[list] = None) -> str:
-    """
-    Ask a follow-up question about a specific revision topic.
-    Uses the existing AI chat infrastructure.
-    """
-    prompt = f"[Revising: {topic}]\n\n{question}"
+ASK_UNAVAILABLE_MESSAGE = "I'm sorry, I couldn't process your question right now. Please try again."
+ASK_NOT_CONFIGURED_MESSAGE = "The AI assistant is not configured. Please set an API key in the .env file."
+
 
-    # Reuse the same provider logic
+def _ask_providers() -> list[dict]:
     ai_providers = []
     if settings.DEEPSEEK_API_KEY:
         ai_providers.append({
@@ -212,16 +209,30 @@ async def ask_ai_question(topic: str, question: str, history: Optional[list] = N
             "model": settings.NVIDIA_MODEL,
             "api_key": settings.NVIDIA_API_KEY,
         })
+    return ai_providers
 
-    if not ai_providers:
-        return "The AI assistant is not configured. Please set an API key in the .env file."
 
+def _ask_messages(topic: str, question: str, history: Optional[list]) -> list[dict]:
+    prompt = f"[Revising: {topic}]\n\n{question}"
     messages = [{"role": "system", "content": WASSCE_SYSTEM_PROMPT}]
     if history:
         for msg in history[-10:]:
             role = "user" if msg.get("role") == "user" else "assistant"
             messages.append({"role": role, "content": msg.get("content", "")})
     messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+async def ask_ai_question(topic: str, question: str, history: Optional[list] = None) -> str:
+    """
+    Ask a follow-up question about a specific revision topic.
+    Uses the existing AI chat infrastructure.
+    """
+    ai_providers = _ask_providers()
+    if not ai_providers:
+        return ASK_NOT_CONFIGURED_MESSAGE
+
+    messages = _ask_messages(topic, question, history)
 
     for provider in ai_providers:
         try:
@@ -236,18 +247,44 @@ async def ask_ai_question(topic: str, question: str, history: Optional[list] = N
                 "max_tokens": 2048,
             }
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    provider["url"],
-                    headers=headers,
-                    json=payload,
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
+            response = await llm_post(
+                provider["url"],
+                headers=headers,
+                json=payload,
+                timeout=60.0,
+            )
+            response.raise_for_status()
+            result = response.json()
+            return result["choices"][0]["message"]["content"]
 
         except Exception as e:
             logger.warning(f"{provider['name']} failed for AI question: {e}")
             continue
 
-    return "I'm sorry, I couldn't process your question right now. Please try again."
+    return ASK_UNAVAILABLE_MESSAGE
+
+
+async def stream_ai_question(
+    topic: str, question: str, history: Optional[list] = None
+) -> AsyncIterator[str]:
+    """
+    ask_ai_question, yielded token by token (DeepSeek first, NVIDIA fallback
+    until the first token). Falls back to the same messages when nothing streams.
+    """
+    ai_providers = _ask_providers()
+    if not ai_providers:
+        yield ASK_NOT_CONFIGURED_MESSAGE
+        return
+
+    try:
+        async for text in stream_chat(
+            ai_providers,
+            _ask_messages(topic, question, history),
+            temperature=0.7,
+            max_tokens=2048,
+            timeout=60.0,
+        ):
+            yield text
+    except StreamUnavailable as e:
+        logger.warning(f"No provider streamed an answer for '{topic}': {e.__cause__ or e}")
+        yield ASK_UNAVAILABLE_MESSAGE
@@ -24,13 +24,20 @@ def rank_for_xp(xp: int) -> str:
     return "Beginner"
 
 
-def apply_xp(user, delta: int) -> tuple[int, str, int]:
+def apply_xp(user, delta: int, *, category: str | None = None) -> tuple[int, str, int]:
     """
     Add XP to user, refresh rank. Returns (xp_earned, new_rank, user_xp).
+
+    The XP is also credited to the learner's leaderboards (programme Overall,
+    programme × ``category`` when given, and this week's board) when the
+    user's session commits.
     """
     earned = max(0, int(delta or 0))
     if earned:
         user.xp = max(0, (user.xp or 0) + earned)
+        from app.leaderboards.service import credit_xp
+
+        credit_xp(user, earned, category=category)
     user.rank = rank_for_xp(user.xp or 0)
     return earned, user.rank, user.xp or 0
 
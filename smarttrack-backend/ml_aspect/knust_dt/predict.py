@@ -3,18 +3,19 @@ Serve-time KNUST Decision Tree ranker.
 
 Flow:
   1. Build features (aggregate + subject points + traits/accuracies)
-  2. predict_proba over KNUST programme classes
+  2. predict_proba over KNUST programme classes (one call per batch)
   3. Keep ONLY programmes in Eligible ∪ Stretch from the cut-off payload
+     (a boolean mask over the classes, built once per payload)
   4. Sort by model probability → ranked list
 """
 from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
 
 import joblib
-import pandas as pd
+import numpy as np
 
 from ml_aspect.knust_dt.features import FEATURE_COLUMNS, MISSING_SUBJECT_POINTS
 
@@ -172,31 +173,36 @@ def grades_to_dt_features(
     }
 
 
-def predict_knust_dt_alternate(
-    features: dict[str, float],
-    *,
-    knust_payload: dict[str, Any] | None,
-    top_n: int = 5,
-    model_path: Optional[Path] = None,
-) -> list[dict[str, Any]]:
+def features_matrix(
+    features_list: Sequence[dict[str, float]],
+    columns: Sequence[str] = FEATURE_COLUMNS,
+) -> np.ndarray:
     """
-    Rank KNUST programmes with the DT, restricted to Eligible ∪ Stretch.
+    Stack feature dicts into an (n, len(columns)) float32 matrix.
 
-    Reach is never returned here (stays informational on the primary cut-off UI).
+    Missing ``pts_*`` columns default to MISSING_SUBJECT_POINTS, a missing
+    aggregate to 24 and everything else to 50 (same as training-time rows).
+    float32 C-order is what sklearn trees predict on, so no copy is made later.
     """
-    bundle = load_model(model_path)
-    model = bundle["model"]
-    encoder = bundle["label_encoder"]
-    columns = bundle.get("feature_columns") or FEATURE_COLUMNS
+    defaults = [
+        24.0 if c == "aggregate" else MISSING_SUBJECT_POINTS if c.startswith("pts_") else 50.0
+        for c in columns
+    ]
+    X = np.empty((len(features_list), len(columns)), dtype=np.float32)
+    for i, features in enumerate(features_list):
+        X[i] = [features.get(c, d) for c, d in zip(columns, defaults)]
+    return X
 
-    row = {c: float(features.get(c, MISSING_SUBJECT_POINTS if c.startswith("pts_") else 50.0)) for c in columns}
-    if "aggregate" in columns:
-        row["aggregate"] = float(features.get("aggregate", 24))
 
-    X = pd.DataFrame([row], columns=columns)
-    proba = model.predict_proba(X)[0]
-    class_names = list(encoder.classes_)
+def _predict_proba(model, X: np.ndarray) -> np.ndarray:
+    if hasattr(model, "tree_"):
+        # Fitted on a DataFrame: skip the feature-name check (and its warning)
+        # that a bare ndarray would trigger. Column order comes from the bundle.
+        return model.predict_proba(X, check_input=False)
+    return model.predict_proba(X)
+
 
+def _allowed_from_payload(knust_payload: dict[str, Any] | None) -> dict[str, dict[str, Any]]:
     allowed: dict[str, dict[str, Any]] = {}
     bands = (knust_payload or {}).get("bands") or {}
     for band_name in ("eligible", "stretch"):
@@ -214,42 +220,122 @@ def predict_knust_dt_alternate(
                     "aggregate": item.get("aggregate"),
                     "headroom": item.get("headroom"),
                 }
+    return allowed
+
+
+class _ClassGate:
+    """Eligible ∪ Stretch for one cut-off payload, laid out over the model classes."""
+
+    __slots__ = ("allowed", "mask", "eligible", "unseen")
+
+    def __init__(self, knust_payload: dict[str, Any] | None, class_index: dict[str, int]) -> None:
+        self.allowed = _allowed_from_payload(knust_payload)
+        self.mask = np.zeros(len(class_index), dtype=bool)
+        self.eligible = np.zeros(len(class_index), dtype=bool)
+        self.unseen: list[str] = []
+        for name, meta in self.allowed.items():
+            idx = class_index.get(name)
+            if idx is None:
+                self.unseen.append(name)
+                continue
+            self.mask[idx] = True
+            self.eligible[idx] = meta["eligibility_band"] == "eligible"
+
 
-    if not allowed:
+def _entry(meta: dict[str, Any], confidence: float) -> dict[str, Any]:
+    return {
+        **meta,
+        "confidence": confidence,
+        "source": "knust_dt_alternate",
+        "role": "alternate",
+        "model": "knust_dt",
+    }
+
+
+def predict_knust_dt_batch(
+    features_list: Sequence[dict[str, float]],
+    *,
+    knust_payloads: Sequence[dict[str, Any] | None] | dict[str, Any] | None,
+    top_n: int = 5,
+    model_path: Optional[Path] = None,
+) -> list[list[dict[str, Any]]]:
+    """
+    Rank KNUST programmes for many learners with one ``predict_proba`` call.
+
+    ``knust_payloads`` is either one cut-off payload shared by every row or one
+    payload per row. Payloads are turned into boolean class masks once per
+    distinct object, so a cohort sharing a few aggregates pays for a few masks.
+    Each result list matches ``predict_knust_dt_alternate`` for that row.
+    """
+    n = len(features_list)
+    if n == 0:
         return []
+    if knust_payloads is None or isinstance(knust_payloads, dict):
+        payloads: Sequence[dict[str, Any] | None] = [knust_payloads] * n
+    else:
+        payloads = knust_payloads
+        if len(payloads) != n:
+            raise ValueError(f"expected {n} cut-off payloads, got {len(payloads)}")
 
-    ranked: list[dict[str, Any]] = []
-    for idx, name in enumerate(class_names):
-        if name not in allowed:
-            continue
-        ranked.append(
-            {
-                **allowed[name],
-                "confidence": float(proba[idx]),
-                "source": "knust_dt_alternate",
-                "role": "alternate",
-                "model": "knust_dt",
-            }
-        )
+    bundle = load_model(model_path)
+    model = bundle["model"]
+    encoder = bundle["label_encoder"]
+    columns = bundle.get("feature_columns") or FEATURE_COLUMNS
+    class_names = list(encoder.classes_)
+    class_index = {name: i for i, name in enumerate(class_names)}
+
+    gates: dict[int, _ClassGate] = {}
+    row_gates: list[_ClassGate] = []
+    for payload in payloads:
+        gate = gates.get(id(payload))
+        if gate is None:
+            gate = gates[id(payload)] = _ClassGate(payload, class_index)
+        row_gates.append(gate)
+
+    results: list[list[dict[str, Any]]] = [[] for _ in range(n)]
+    rows = [i for i, gate in enumerate(row_gates) if gate.allowed]
+    if not rows:
+        return results
+
+    proba = _predict_proba(model, features_matrix([features_list[i] for i in rows], columns))
+    mask = np.stack([row_gates[i].mask for i in rows])
+    eligible = np.stack([row_gates[i].eligible for i in rows])
+
+    # Eligible band first, then probability; masked-out classes sort last.
+    # lexsort is stable, so ties keep class order like the old list sort did.
+    band = np.where(mask, np.where(eligible, 0, 1), 2)
+    order = np.lexsort((-proba, band), axis=-1)
+    counts = mask.sum(axis=1)
+    limit = max(1, top_n)
+
+    for r, i in enumerate(rows):
+        gate = row_gates[i]
+        take = int(counts[r]) if gate.unseen else min(limit, int(counts[r]))
+        ranked = [
+            _entry(gate.allowed[class_names[c]], float(proba[r, c]))
+            for c in order[r, :take]
+        ]
+        if gate.unseen:
+            # Programmes the DT never saw as a class (rare): 0 confidence, band order kept.
+            ranked.extend(_entry(gate.allowed[name], 0.0) for name in gate.unseen)
+            ranked.sort(key=lambda e: (0 if e["eligibility_band"] == "eligible" else 1, -e["confidence"]))
+        results[i] = ranked[:limit]
+    return results
 
-    # Include eligible/stretch programmes the DT never saw as a class (rare) with 0 conf at end
-    seen = {r["programme"] for r in ranked}
-    for name, meta in allowed.items():
-        if name not in seen:
-            ranked.append(
-                {
-                    **meta,
-                    "confidence": 0.0,
-                    "source": "knust_dt_alternate",
-                    "role": "alternate",
-                    "model": "knust_dt",
-                }
-            )
 
-    ranked.sort(
-        key=lambda r: (
-            0 if r.get("eligibility_band") == "eligible" else 1,
-            -float(r["confidence"]),
-        )
-    )
-    return ranked[: max(1, top_n)]
+def predict_knust_dt_alternate(
+    features: dict[str, float],
+    *,
+    knust_payload: dict[str, Any] | None,
+    top_n: int = 5,
+    model_path: Optional[Path] = None,
+) -> list[dict[str, Any]]:
+    """
+    Rank KNUST programmes with the DT, restricted to Eligible ∪ Stretch.
+
+    Reach is never returned here (stays informational on the primary cut-off UI).
+    Single-row case of ``predict_knust_dt_batch`` (1×F NumPy row, no pandas).
+    """
+    return predict_knust_dt_batch(
+        [features], knust_payloads=[knust_payload], top_n=top_n, model_path=model_path
+    )[0]
@@ -0,0 +1,144 @@
+"""Micro-benchmark: indexed academic bank selection vs the old linear scan.
+
+Compares ``BankIndex`` (bucket walk) with the previous implementation (regex
++ filter over every row, then sort by difficulty distance) on the real
+``data/phase_academic_bank.json`` and on a synthetic bank, and checks both
+pick the same question for the same rng seed.
+
+    python -m scripts.bench_academic_bank --synthetic-rows 100000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Any
+
+from app.phases.academic_bank import (
+    BankIndex,
+    allowed_levels_for_phase,
+    include_wassce_for_phase,
+    load_bank,
+)
+
+SUBJECTS = ("english", "core_maths", "integrated_science", "social_studies")
+LEVELS = ("SHS 1", "SHS 2", "SHS 3")
+
+
+def _scan_select(
+    rows: list[dict[str, Any]],
+    phase_number: int,
+    subject: str,
+    effective_difficulty: int,
+    exclude_ids: set[str],
+    rng: random.Random,
+) -> dict[str, Any] | None:
+    """Reference: the pre-index _eligible + select_question body."""
+    levels = allowed_levels_for_phase(phase_number)
+    allow_wassce = include_wassce_for_phase(phase_number)
+    pool: list[dict[str, Any]] = []
+    for q in rows:
+        qid = str(q.get("id") or "")
+        if qid and qid in exclude_ids:
+            continue
+        if q.get("subject") != subject:
+            continue
+        text = str(q.get("question_text") or "")
+        low = text.lower()
+        if re.search(
+            r"(?i)(\[\s*.*difficulty\s*\d+\s*\]|\b(section|chapter|unit)\s+\d+\b|"
+            r"most reliable next step|skip the problem and guess)",
+            text,
+        ):
+            continue
+        if "what would you read" in low:
+            continue
+        style = (q.get("exam_style") or "classroom").lower()
+        if style == "wassce":
+            if allow_wassce:
+                pool.append(q)
+            continue
+        if q.get("shs_level") in levels:
+            pool.append(q)
+    if not pool:
+        return None
+    scored = sorted(
+        ((abs(int(q.get("difficulty") or 5) - effective_difficulty), q) for q in pool),
+        key=lambda t: t[0],
+    )
+    best = scored[0][0]
+    return rng.choice([q for d, q in scored if d <= best + 2])
+
+
+def _synthetic_bank(n: int, seed: int = 3) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        rows.append(
+            {
+                "id": f"syn-{i}",
+                "subject": rng.choice(SUBJECTS),
+                "shs_level": rng.choice(LEVELS),
+                "exam_style": "wassce" if rng.random() < 0.15 else "classroom",
+                "difficulty": rng.randint(1, 15),
+                "question_text": f"Synthetic question {i} about topic {rng.randint(1, 500)}?",
+                "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                "correct_answer": "A",
+            }
+        )
+    return rows
+
+
+def _workload(n: int, seed: int = 11) -> list[tuple[int, str, int]]:
+    rng = random.Random(seed)
+    return [
+        (rng.randint(1, 3), rng.choice(SUBJECTS), rng.randint(1, 15)) for _ in range(n)
+    ]
+
+
+def bench(label: str, rows: list[dict[str, Any]], calls: int) -> None:
+    work = _workload(calls)
+    exclude = {str(q.get("id")) for q in rows[: max(1, len(rows) // 50)]}
+
+    started = time.perf_counter()
+    index = BankIndex(rows)
+    for phase in (1, 2, 3):
+        for subject in SUBJECTS:
+            index.pool(phase, subject)
+    build_s = time.perf_counter() - started
+
+    rng_a, rng_b = random.Random(5), random.Random(5)
+    started = time.perf_counter()
+    scan_out = [_scan_select(rows, p, s, d, exclude, rng_a) for p, s, d in work]
+    scan_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index_out = [index.select(p, s, d, exclude, rng_b) for p, s, d in work]
+    index_s = time.perf_counter() - started
+
+    same = all(
+        (a or {}).get("id") == (b or {}).get("id") for a, b in zip(scan_out, index_out)
+    )
+    print(
+        f"{label:<22} rows={len(rows):>7} calls={calls:>5}  "
+        f"scan={scan_s / calls * 1e3:8.3f}ms/call  "
+        f"index={index_s / calls * 1e3:7.4f}ms/call  "
+        f"speedup={scan_s / index_s if index_s else 0:7.1f}x  "
+        f"build={build_s * 1e3:.1f}ms  identical={same}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--synthetic-rows", type=int, default=100_000)
+    parser.add_argument("--synthetic-calls", type=int, default=200)
+    args = parser.parse_args()
+
+    bench("phase_academic_bank", load_bank(), args.calls)
+    bench("synthetic", _synthetic_bank(args.synthetic_rows), args.synthetic_calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark: academic upload parsing on the event loop vs in the parse pool.
+
+Builds a multi-page WASSCE-style text PDF and analyses it ``--uploads`` times
+concurrently while a ticker task measures event-loop lag (how late a 5 ms
+sleep wakes up — what every other request on the worker would feel):
+
+  inline — ACADEMIC_PARSE_WORKERS=0 would still use a thread; this mode calls
+           ``parse_document_bytes`` directly on the loop, as the old upload did
+  pool   — ``parse_pool.run`` with ACADEMIC_PARSE_WORKERS processes
+  cached — the same bytes again through ``analyze_academic_document``
+
+    python -m scripts.bench_academic_parsing --uploads 8 --pages 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.assessment import academic_recommendations as mod
+from app.assessment.document_parsing import DocumentCache, parse_pool
+from app.config import settings
+
+SLIP_LINES = [
+    "WEST AFRICAN EXAMINATIONS COUNCIL",
+    "WASSCE STATEMENT OF RESULT",
+    "Candidate Name: ASIAMAH YAW KWAME",
+    "English Language B3",
+    "Core Mathematics A1",
+    "Integrated Science C4",
+    "Social Studies B2",
+    "Physics B3",
+]
+
+
+def text_pdf(pages: list[list[str]]) -> bytes:
+    """A minimal text PDF: one Helvetica text block per page."""
+    count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(f"{4 + 2 * i} 0 R".encode() for i in range(count))
+        + f"] /Count {count} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        ops = "BT /F1 11 Tf 14 TL 50 780 Td " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(ops)} >>\nstream\n{ops}\nendstream".encode())
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+async def _lag_probe(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append((time.perf_counter() - t0 - 0.005) * 1000)
+
+
+async def _measure(label: str, jobs) -> None:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    probe = asyncio.create_task(_lag_probe(stop, lags))
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    await asyncio.gather(*jobs)
+    wall = (time.perf_counter() - started) * 1000
+    stop.set()
+    await probe
+    print(
+        f"{label:<7} wall={wall:8.1f}ms  loop lag p50={statistics.median(lags):6.2f}ms "
+        f"max={max(lags):8.1f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    filler = [f"Line {n} of the candidate's statement of results" for n in range(40)]
+    pdf = text_pdf([SLIP_LINES + filler] * args.pages)
+    settings.ACADEMIC_PDF_MAX_PAGES = args.pages
+    settings.ACADEMIC_PARSE_WORKERS = args.workers
+    print(f"pdf={len(pdf) / 1024:.1f}KB pages={args.pages} uploads={args.uploads} workers={args.workers}")
+
+    async def _inline() -> None:
+        mod.parse_document_bytes(pdf, pdf=True)
+        await asyncio.sleep(0)
+
+    await _measure("inline", [_inline() for _ in range(args.uploads)])
+    await parse_pool.run(len, b"warm")  # start the forkserver outside the timing
+    await _measure("pool", [parse_pool.run(mod.parse_document_bytes, pdf, pdf=True) for _ in range(args.uploads)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.ACADEMIC_DOCUMENT_CACHE_DB_PATH = str(Path(tmp) / "docs.sqlite3")
+        mod.document_cache = DocumentCache()
+        await mod.analyze_academic_document(filename="slip.pdf", content_type="application/pdf", data=pdf)
+        await _measure(
+            "cached",
+            [
+                mod.analyze_academic_document(filename="slip.pdf", content_type="application/pdf", data=pdf)
+                for _ in range(args.uploads)
+            ],
+        )
+        mod.document_cache.close()
+    parse_pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    asyncio.run(main(parser.parse_args()))
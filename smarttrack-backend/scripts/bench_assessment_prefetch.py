@@ -0,0 +1,120 @@
+"""Benchmark: calibration AI-question prefetch against a mock provider.
+
+Generation goes through the shared LLM pool to the local mock LLM server
+(configurable latency), so no NVIDIA / DeepSeek key is needed. Reports:
+
+  refill  — time until the first prefetched question is usable and until the
+            whole batch is in, for the old serial loop (questions appear only
+            when all calls finish) and the concurrent, incremental refill
+  session — a learner answering one question every --answer-ms for
+            --session-questions questions: how many came from the AI
+            prefetch queue with and without the low-watermark top-up
+
+    python -m scripts.bench_assessment_prefetch --latency-ms 800 --count 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+from app.assessment import prefetch_manager as pm
+from app.config import settings
+from app.llm.http_pool import llm_pool, llm_post
+from scripts.mock_llm_server import running_mock_llm
+
+
+def _mock_provider(url: str):
+    async def generate(*, category: str, difficulty: str, programme: str, concept: str | None = None):
+        res = await llm_post(url, json={"model": "mock", "messages": []}, timeout=30.0)
+        res.raise_for_status()
+        raw = json.loads(res.json()["choices"][0]["message"]["content"])
+        return {
+            "success": True,
+            "data": {
+                "category": category,
+                "difficulty": difficulty,
+                "question": raw["question_text"],
+                "options": list(raw["options"].values()),
+                "correct_answer": raw["correct_answer"],
+                "explanation": raw.get("explanation", ""),
+            },
+        }
+
+    return generate
+
+
+async def _serial_refill(count: int, programme: str) -> tuple[float, float]:
+    """The pre-change loop: one call at a time, batch published at the end."""
+    manager = pm.PrefetchManager()
+    started = time.perf_counter()
+    for seq in range(count):
+        await manager._generate_one(seq, programme)
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed
+
+
+async def _concurrent_refill(count: int, programme: str) -> tuple[float, float]:
+    manager = pm.PrefetchManager()
+    started = time.perf_counter()
+    manager.start_prefetch("bench", programme, count=count)
+    first = None
+    while manager.status("bench") == "fetching":
+        if first is None and manager.has_questions("bench"):
+            first = time.perf_counter() - started
+        await asyncio.sleep(0.005)
+    total = time.perf_counter() - started
+    return (first if first is not None else total), total
+
+
+async def _session(count: int, questions: int, answer_s: float, *, top_up: bool) -> int:
+    settings.ASSESSMENT_PREFETCH_MAX_QUESTIONS = questions if top_up else count
+    manager = pm.PrefetchManager()
+    manager.start_prefetch("bench", "General Science", count=count)
+    served = 0
+    for _ in range(questions):
+        await asyncio.sleep(answer_s)
+        served += len(manager.get_questions("bench", limit=1))
+    manager.clear("bench")
+    return served
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.ASSESSMENT_PREFETCH_CONCURRENCY = args.concurrency
+    settings.ASSESSMENT_PREFETCH_LOW_WATERMARK = args.low_watermark
+    await llm_pool.start()
+    try:
+        async with running_mock_llm(latency_s=args.latency_ms / 1000.0) as url:
+            pm.generate_challenge_question = _mock_provider(url)
+            print(
+                f"latency={args.latency_ms:.0f}ms count={args.count} "
+                f"concurrency={args.concurrency} low_watermark={args.low_watermark}"
+            )
+            for label, run in (("serial", _serial_refill), ("concurrent", _concurrent_refill)):
+                first, total = await run(args.count, "General Science")
+                print(f"refill {label:<10}  first question={first * 1000:7.0f}ms  batch={total * 1000:7.0f}ms")
+
+            results: dict[str, Any] = {}
+            for label, top_up in (("no top-up", False), ("top-up", True)):
+                results[label] = await _session(
+                    args.count, args.session_questions, args.answer_ms / 1000.0, top_up=top_up
+                )
+                print(
+                    f"session {label:<9}  AI questions served={results[label]:>3}"
+                    f" / {args.session_questions}"
+                )
+    finally:
+        await llm_pool.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--low-watermark", type=int, default=2)
+    parser.add_argument("--session-questions", type=int, default=20)
+    parser.add_argument("--answer-ms", type=float, default=600.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,220 @@
+"""Benchmark: behavioural-input collection — serial chain vs one UNION vs the materialized row.
+
+Seeds a SQLite database with the phase structure, a psychometric bank and
+``--learners`` learners (subject performance, bank answers, profile traits,
+skill estimates, sessions, level progress), then collects each learner's
+signals three ways, counting statements per learner:
+
+  serial — ``collect_reference``: the old chain (one query per source, option
+           tags summed in Python, one level query per phase)
+  union  — ``compute_behavioural_signals``: one UNION ALL, tags summed in SQL
+  row    — ``load_behavioural_signals`` with the row materialized (PK read)
+
+Results are checked to agree before timing.
+
+    python -m scripts.bench_behavioural_inputs --learners 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app.assessment.models import BehavioralProfile, ChallengeSession, UserSkillEstimate
+from app.database import Base
+from app.phases.models import Level, Phase, UserLevelProgress, UserSubjectPerformance
+from app.psychometrics.models import PsychometricOption, PsychometricQuestion, UserPsychometricBankResponse
+from app.recommendations.behavioural_inputs import compute_behavioural_signals, load_behavioural_signals
+from app.users.models import User
+
+SUBJECTS = ("core_maths", "english", "integrated_science", "social_studies", "physics", "biology")
+TRAITS = ("Analytical", "Creative", "Social", "Practical", "Investigative")
+PROGRAMMES = ("engineering", "health", "business", "arts", "computing")
+
+
+async def seed_bank(db: AsyncSession, questions: int = 30) -> None:
+    """Phases 1–3 with three levels each, and a tagged four-option bank."""
+    rng = random.Random(0)
+    for number in (1, 2, 3):
+        phase = Phase(number=number, name=f"Phase {number}", shs_mapping=f"SHS{number}")
+        db.add(phase)
+        await db.flush()
+        db.add_all(Level(phase_id=phase.id, number=n) for n in (1, 2, 3))
+    for number in range(1, questions + 1):
+        question = PsychometricQuestion(
+            bank_id=f"Q{number:03d}", number=number, category="interests", text=f"Question {number}"
+        )
+        db.add(question)
+        await db.flush()
+        for label in "ABCD":
+            affinity: list[Any] = [
+                {"programme": p, "weight": rng.choice((0.25, 0.5, 1.0))} for p in rng.sample(PROGRAMMES, 2)
+            ]
+            if label == "D":
+                affinity.append({"programme": rng.choice(PROGRAMMES)})  # weight defaults to 0.5
+            db.add(
+                PsychometricOption(
+                    question_id=question.id,
+                    label=label,
+                    text=f"Option {label}",
+                    trait_tags=rng.sample(TRAITS, rng.randint(0, 2)),
+                    programme_affinity_tags=affinity,
+                )
+            )
+    await db.commit()
+
+
+async def seed_learner(db: AsyncSession, rng: random.Random, name: str) -> uuid.UUID:
+    user = User(email=f"{name}@example.com", full_name=name)
+    db.add(user)
+    await db.flush()
+    for subject in rng.sample(SUBJECTS, 4):
+        db.add(UserSubjectPerformance(user_id=user.id, subject=subject, rolling_accuracy=round(rng.random(), 2)))
+    options = (await db.execute(select(PsychometricOption))).scalars().all()
+    for question_id in rng.sample(sorted({o.question_id for o in options}), 12):
+        option = rng.choice([o for o in options if o.question_id == question_id])
+        db.add(UserPsychometricBankResponse(user_id=user.id, question_id=question_id, option_id=option.id))
+    for trait in rng.sample(TRAITS, 2):
+        db.add(BehavioralProfile(user_id=user.id, trait=trait, value=round(rng.random(), 2)))
+    for domain in ("Math", "Science"):
+        db.add(UserSkillEstimate(user_id=user.id, domain=domain, theta=round(rng.uniform(-2, 2), 2)))
+    db.add_all(ChallengeSession(user_id=user.id) for _ in range(rng.randrange(6)))
+    levels = (await db.execute(select(Level).order_by(Level.phase_id, Level.number))).scalars().all()
+    for level in levels[: rng.randrange(len(levels) + 1)]:
+        db.add(UserLevelProgress(user_id=user.id, level_id=level.id, status="completed"))
+    await db.commit()
+    return user.id
+
+
+async def collect_reference(db: AsyncSession, user_id: uuid.UUID) -> dict[str, Any]:
+    """The pre-union collection chain, in ``compute_behavioural_signals`` shape."""
+    perfs = (
+        await db.execute(
+            select(UserSubjectPerformance)
+            .where(UserSubjectPerformance.user_id == user_id)
+            .order_by(UserSubjectPerformance.id)
+        )
+    ).scalars().all()
+    responses = (
+        await db.execute(select(UserPsychometricBankResponse).where(UserPsychometricBankResponse.user_id == user_id))
+    ).scalars().all()
+    traits: dict[str, float] = {}
+    programmes: dict[str, float] = {}
+    option_ids = [r.option_id for r in responses]
+    if option_ids:
+        options = (
+            await db.execute(
+                select(PsychometricOption)
+                .where(PsychometricOption.id.in_(option_ids))
+                .order_by(PsychometricOption.id)
+            )
+        ).scalars().all()
+        for opt in options:
+            for tag in opt.trait_tags or []:
+                traits[str(tag)] = traits.get(str(tag), 0.0) + 1
+            for aff in opt.programme_affinity_tags or []:
+                if isinstance(aff, dict) and aff.get("programme"):
+                    programmes[aff["programme"]] = programmes.get(aff["programme"], 0.0) + float(aff.get("weight", 0.5))
+    profile = (
+        await db.execute(select(BehavioralProfile).where(BehavioralProfile.user_id == user_id))
+    ).scalars().all()
+    skills = (
+        await db.execute(select(UserSkillEstimate).where(UserSkillEstimate.user_id == user_id))
+    ).scalars().all()
+    sessions = (
+        await db.execute(select(func.count()).select_from(ChallengeSession).where(ChallengeSession.user_id == user_id))
+    ).scalar()
+    progress = {
+        p.level_id: p
+        for p in (
+            await db.execute(select(UserLevelProgress).where(UserLevelProgress.user_id == user_id))
+        ).scalars().all()
+    }
+    phases_completed = 0
+    for phase in (await db.execute(select(Phase).order_by(Phase.number))).scalars().all():
+        levels = (await db.execute(select(Level).where(Level.phase_id == phase.id))).scalars().all()
+        if levels and all(progress.get(lv.id) and progress[lv.id].status == "completed" for lv in levels):
+            phases_completed += 1
+    return {
+        "subjects": [[p.subject, p.rolling_accuracy] for p in perfs],
+        "trait_tags": traits,
+        "programme_affinity_scores": programmes,
+        "profile_traits": {t.trait: float(t.value) for t in profile},
+        "skill_estimates": {s.domain: float(s.theta) for s in skills},
+        "session_count": int(sessions or 0),
+        "phases_completed": phases_completed,
+    }
+
+
+def same_signals(a: dict[str, Any], b: dict[str, Any]) -> bool:
+    """Equal up to float rounding in the tag sums; maps must also agree on order."""
+    if a.keys() != b.keys():
+        return False
+    for key, value in a.items():
+        other = b[key]
+        if isinstance(value, dict):
+            if list(value) != list(other) or any(abs(value[k] - other[k]) > 1e-9 for k in value):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
+async def _time(sessions, fn, user_ids: list[uuid.UUID], statements: Counter) -> tuple[float, float]:
+    statements.clear()
+    times = []
+    for user_id in user_ids:
+        async with sessions() as db:
+            t0 = time.perf_counter()
+            await fn(db, user_id)
+            times.append((time.perf_counter() - t0) * 1000)
+            await db.commit()
+    return statistics.median(times), sum(statements.values()) / len(user_ids)
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'signals.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        statements: Counter[str] = Counter()
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, *rest):
+            statements[statement.lstrip().split(None, 1)[0].upper()] += 1
+
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        rng = random.Random(1)
+        async with sessions() as db:
+            await seed_bank(db)
+            user_ids = [await seed_learner(db, rng, f"learner{n}") for n in range(args.learners)]
+        async with sessions() as db:
+            for user_id in user_ids:
+                assert same_signals(await collect_reference(db, user_id), await compute_behavioural_signals(db, user_id))
+
+        for label, fn in (
+            ("serial", collect_reference),
+            ("union", compute_behavioural_signals),
+            ("row", load_behavioural_signals),  # first pass materializes
+            ("row", load_behavioural_signals),
+        ):
+            p50, per_learner = await _time(sessions, fn, user_ids, statements)
+            print(f"{label:<6} p50={p50:7.3f}ms  statements/learner={per_learner:5.1f}")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--learners", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
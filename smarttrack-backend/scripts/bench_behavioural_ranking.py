@@ -0,0 +1,181 @@
+"""Benchmark: compiled programme table vs the per-request catalogue walk.
+
+The catalogue is every university offering in ``data/course_directory.json``
+(KNUST, UG, UCC, UPSA …), tiled ``--replicas`` times with distinct names to
+reach national multi-university size. Each learner gets random family scores
+and subject accuracies, ranked by:
+
+  loop   — ``rank_reference``: the old walk (lower-case every name, keyword
+           scan per hint, build every item dict, full sort)
+  table  — ``rank_programmes_behavioural`` on a ``ProgrammeTable``
+           (vectorized score, partial top-k, dicts for the top k only)
+  cached — ``build_behavioural_match`` for an unchanged learner (fingerprint hit)
+
+Results are checked to agree before timing.
+
+    python -m scripts.bench_behavioural_ranking --replicas 1 10 100
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+from app.recommendations.behavioural_match import (
+    FAMILIES,
+    ProgrammeTable,
+    SUBJECT_TO_FAMILIES,
+    _subject_overlap_bonus,
+    behavioural_match_cache,
+    build_behavioural_match,
+    rank_programmes_behavioural,
+)
+from app.recommendations.cutoffs import FAMILY_ALIASES
+from app.recommendations.presentation import enrich_programme
+
+DIRECTORY = Path(__file__).resolve().parents[1] / "data" / "course_directory.json"
+
+
+def directory_catalogue(replicas: int = 1) -> dict[str, Any]:
+    programmes = json.loads(DIRECTORY.read_text(encoding="utf-8"))["programmes"]
+    rows = []
+    for copy in range(replicas):
+        suffix = f" ({copy + 1})" if copy else ""
+        for programme in programmes:
+            for offering in programme.get("offerings") or []:
+                rows.append(
+                    {
+                        "university": offering.get("university"),
+                        "family": programme.get("field"),
+                        "programme": f"{offering.get('programme_name') or programme['name']}{suffix}",
+                        "cutoff": None,
+                        "demand": None,
+                    }
+                )
+    return {"university": "Multiple", "cycle": None, "programmes": rows}
+
+
+def rank_reference(
+    catalogue: dict[str, Any],
+    family_scores: dict[str, int],
+    subject_accuracies: dict[str, float],
+    limit: int = 8,
+) -> list[dict[str, Any]]:
+    """The pre-table ranking loop, kept for parity checks and timing."""
+    scored = []
+    for row in catalogue.get("programmes") or []:
+        family = str(row.get("family") or "")
+        atlas_family = FAMILY_ALIASES.get(family, family)
+        if atlas_family not in FAMILIES:
+            atlas_family = FAMILY_ALIASES.get(atlas_family, "Natural Sciences")
+        base = float(family_scores.get(atlas_family, family_scores.get(family, 50)))
+        programme = str(row.get("programme") or "")
+        score = base + _subject_overlap_bonus(programme, subject_accuracies)
+        item = {
+            "university": row.get("university", catalogue.get("university", "KNUST")),
+            "cycle": catalogue.get("cycle"),
+            "family": family,
+            "programme": programme,
+            "cutoff": row.get("cutoff"),
+            "demand": row.get("demand"),
+            "level": row.get("level", "Degree"),
+            "eligibility_band": None,
+            "aggregate": None,
+            "family_fit_score": int(round(base)),
+            "match_rank_score": score,
+        }
+        scored.append((score, item))
+    scored.sort(key=lambda x: (-x[0], str(x[1].get("programme") or "")))
+    cards = []
+    for rank, (_, item) in enumerate(scored[:limit], start=1):
+        why = (
+            f"Ranked #{rank} from your psychometric profile and challenge activity "
+            f"in Atlas so far (no WASSCE required)."
+        )
+        card = enrich_programme(item, why=why, method="behavioural_match")
+        card["rank"] = rank
+        cards.append(card)
+    return cards
+
+
+def random_learner(rng: random.Random) -> tuple[dict[str, int], dict[str, float]]:
+    # Coarse family scores so ties (and the name tie-break) actually happen.
+    families = {f: rng.choice((40, 55, 70, 85, 100)) for f in FAMILIES}
+    subjects = {s: round(rng.random(), 2) for s in rng.sample(sorted(SUBJECT_TO_FAMILIES), 5)}
+    return families, subjects
+
+
+def _p50(fn, rounds: int) -> float:
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def run(replicas: int, learners: int) -> None:
+    rng = random.Random(replicas)
+    catalogue = directory_catalogue(replicas)
+    t0 = time.perf_counter()
+    table = ProgrammeTable(catalogue)
+    compile_ms = (time.perf_counter() - t0) * 1000
+    people = [random_learner(rng) for _ in range(learners)]
+    for families, subjects in people:
+        expected = rank_reference(catalogue, families, subjects)
+        assert rank_programmes_behavioural(family_scores=families, subject_accuracies=subjects, table=table) == expected
+
+    loop = _p50(lambda: [rank_reference(catalogue, f, s) for f, s in people], 3) / learners
+    fast = _p50(
+        lambda: [rank_programmes_behavioural(family_scores=f, subject_accuracies=s, table=table) for f, s in people],
+        3,
+    ) / learners
+    print(
+        f"programmes={len(table):>6}  compile={compile_ms:7.1f}ms  "
+        f"loop={loop:8.3f}ms  table={fast:7.3f}ms  speedup={loop / max(fast, 1e-6):6.1f}x"
+    )
+
+
+def run_cached(learners: int) -> None:
+    rng = random.Random(7)
+    inputs = []
+    for _ in range(learners):
+        _families, subjects = random_learner(rng)
+        inputs.append(
+            {
+                "programme_affinity_scores": {"engineering": rng.random() * 10, "health": rng.random() * 10},
+                "subject_accuracies": subjects,
+                "behavioral_traits": {"Persistence": rng.random(), "Carefulness": rng.random()},
+                "skill_estimates": {"Math": rng.uniform(-2, 2), "Science": rng.uniform(-2, 2)},
+                "completed_lessons": [f"lesson-{n}" for n in range(rng.randrange(30))],
+                "phases_completed": rng.randrange(4),
+                "session_count": rng.randrange(40),
+            }
+        )
+
+    def _all(*, fresh: bool) -> None:
+        if fresh:
+            behavioural_match_cache.clear()
+        for x in inputs:
+            build_behavioural_match(**x)
+
+    cold = _p50(lambda: _all(fresh=True), 3)
+    warm = _p50(lambda: _all(fresh=False), 3)
+    print(
+        f"build_behavioural_match (KNUST table): cold={cold / learners:.3f}ms  "
+        f"cached={warm / learners:.3f}ms per learner"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--learners", type=int, default=50)
+    args = parser.parse_args()
+    for n in args.replicas:
+        run(n, args.learners)
+    run_cached(args.learners)
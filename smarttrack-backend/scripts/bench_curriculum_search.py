@@ -0,0 +1,173 @@
+"""Benchmark: curriculum search index vs the old per-request full scan.
+
+Builds synthetic libraries of 1k / 10k / 50k lessons from the real
+``data/curriculum_lessons.json`` (titles recombined with extra vocabulary),
+then runs a mixed query set (exact titles, partial words, typos, phrases)
+through:
+
+  scan   — the previous ``_search_score`` over every lesson (plain difflib)
+  index  — ``CurriculumSearchIndex.search``
+
+and reports per-query latency plus how often the top-20 lists are identical.
+
+    python -m scripts.bench_curriculum_search --sizes 1000 10000 50000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from app.learning.search_index import CurriculumSearchIndex, normalise
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "curriculum_lessons.json"
+EXTRA_WORDS = (
+    "advanced", "introduction", "revision", "practical", "applied", "review",
+    "ghana", "local", "project", "investigation", "survey", "model", "systems",
+    "patterns", "measurement", "analysis", "history", "community", "energy",
+)
+
+
+def _collect_strings(value: Any, output: list[str]) -> None:
+    if isinstance(value, str):
+        output.append(value)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_strings(item, output)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_strings(item, output)
+
+
+def _scan_score(query: str, title: str, searchable: str) -> float:
+    """Reference: the pre-index router ``_search_score`` body."""
+    if not query:
+        return 1.0
+    if query == title:
+        return 1.0
+    if query in title:
+        return 0.96
+    if query in searchable:
+        return 0.82
+    title_ratio = SequenceMatcher(None, query, title).ratio()
+    query_words = query.split()
+    searchable_words = set(searchable.split())
+    keyword_coverage = (
+        sum(word in searchable_words for word in query_words) / max(1, len(query_words))
+    )
+    candidate_words = title.split()
+    word_scores = [
+        max(
+            (SequenceMatcher(None, word, candidate).ratio() for candidate in candidate_words),
+            default=0.0,
+        )
+        for word in query_words
+    ]
+    word_score = sum(word_scores) / max(1, len(word_scores))
+    return max(title_ratio, word_score * 0.9, keyword_coverage * 0.8)
+
+
+def _scan(rows: list[SimpleNamespace], query: str, limit: int = 20) -> list[str]:
+    normalised_query = normalise(query)
+    ranked = []
+    for row in rows:
+        # The old endpoint re-normalised every row on every request.
+        score = _scan_score(normalised_query, normalise(row.title), normalise(row.search_text))
+        if normalised_query and score < 0.40:
+            continue
+        ranked.append((score, row))
+    # curriculum_id breaks exact ties (the old DB scan order was unspecified).
+    ranked.sort(key=lambda item: (-item[0], item[1].subject, item[1].title, item[1].curriculum_id))
+    return [row.curriculum_id for _, row in ranked[:limit]]
+
+
+def build_library(size: int, seed: int = 7) -> list[SimpleNamespace]:
+    records = json.loads(DATA_PATH.read_text(encoding="utf-8"))
+    rng = random.Random(seed)
+    vocab = sorted({w for r in records for w in normalise(r["title"]).split()} | set(EXTRA_WORDS))
+    rows: list[SimpleNamespace] = []
+    for i in range(size):
+        base = records[i % len(records)]
+        title = base["title"]
+        if i >= len(records):
+            extra = " ".join(rng.sample(vocab, 2)).title()
+            title = f"{title} {extra}" if rng.random() < 0.6 else f"{extra} {title}"
+        parts: list[str] = [title, base["subject"]]
+        _collect_strings(base["source_content"], parts)
+        rows.append(
+            SimpleNamespace(
+                curriculum_id=f"bench-{i}",
+                title=title,
+                subject=base["subject"],
+                estimated_minutes=base.get("estimated_minutes", 10),
+                difficulty=base.get("difficulty", 1),
+                xp_reward=base.get("xp_reward", 10),
+                search_text=re.sub(r"\s+", " ", " ".join(parts)).strip().lower()[:4000],
+            )
+        )
+    return rows
+
+
+def _queries(rows: list[SimpleNamespace], rng: random.Random, count: int) -> list[str]:
+    out: list[str] = []
+    for _ in range(count):
+        title = rng.choice(rows).title
+        words = title.split()
+        kind = rng.randrange(5)
+        if kind == 0:
+            out.append(title)
+        elif kind == 1:
+            out.append(rng.choice(words)[: max(3, len(words[0]) - 2)])
+        elif kind == 2:
+            word = rng.choice(words)
+            pos = rng.randrange(len(word)) if word else 0
+            out.append(word[:pos] + word[pos + 1 :])  # typo: dropped letter
+        elif kind == 3:
+            out.append(" ".join(words[:2]))
+        else:
+            out.append(rng.choice(("photosynthesis", "simultaneous equations", "quadratc", "map reading")))
+    return out
+
+
+def run(size: int, queries: int) -> None:
+    rows = build_library(size)
+    started = time.perf_counter()
+    index = CurriculumSearchIndex()
+    index.rebuild(rows)
+    build_s = time.perf_counter() - started
+
+    qs = _queries(rows, random.Random(size), queries)
+    scan_ms: list[float] = []
+    index_ms: list[float] = []
+    same = 0
+    for q in qs:
+        t0 = time.perf_counter()
+        expected = _scan(rows, q)
+        scan_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        got = [doc.curriculum_id for _, doc in index.search(q, limit=20)]
+        index_ms.append((time.perf_counter() - t0) * 1000)
+        same += got == expected
+    print(
+        f"lessons={size:>6}  build={build_s:.2f}s  "
+        f"scan p50={statistics.median(scan_ms):8.1f}ms  "
+        f"index p50={statistics.median(index_ms):7.2f}ms  "
+        f"speedup={statistics.median(scan_ms) / max(statistics.median(index_ms), 1e-6):6.1f}x  "
+        f"top20 identical={same}/{len(qs)}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=30)
+    args = parser.parse_args()
+    for n in args.sizes:
+        run(n, args.queries)
@@ -0,0 +1,127 @@
+"""Benchmark: KNUST Decision Tree scoring for a synthetic cohort.
+
+Compares, for the same learners and cut-off payloads:
+
+  pandas — the previous per-learner path (one-row DataFrame + predict_proba)
+  single — ``predict_knust_dt_alternate`` (1×F NumPy row, no pandas)
+  batch  — ``predict_knust_dt_batch`` (one predict_proba for the cohort)
+
+and checks that all three return identical rankings.
+
+    python -m scripts.bench_knust_dt_batch --sizes 100 1000 5000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import warnings
+from typing import Any
+
+import pandas as pd
+
+from app.recommendations.cutoffs import apply_cutoff_boundaries
+from ml_aspect.knust_dt.features import FEATURE_COLUMNS, MISSING_SUBJECT_POINTS
+from ml_aspect.knust_dt.predict import (
+    _allowed_from_payload,
+    grades_to_dt_features,
+    load_model,
+    predict_knust_dt_alternate,
+    predict_knust_dt_batch,
+)
+
+SUBJECTS = (
+    "English Language",
+    "Core Mathematics",
+    "Biology",
+    "Chemistry",
+    "Physics",
+    "Elective Mathematics",
+    "Integrated Science",
+    "Social Studies",
+)
+GRADES = ("A1", "B2", "B3", "C4", "C5", "C6")
+
+
+def _pandas_single(features: dict[str, float], knust_payload: dict[str, Any], top_n: int) -> list[dict[str, Any]]:
+    """Reference: the pre-batch ``predict_knust_dt_alternate`` body."""
+    bundle = load_model()
+    model = bundle["model"]
+    columns = bundle.get("feature_columns") or FEATURE_COLUMNS
+    row = {c: float(features.get(c, MISSING_SUBJECT_POINTS if c.startswith("pts_") else 50.0)) for c in columns}
+    if "aggregate" in columns:
+        row["aggregate"] = float(features.get("aggregate", 24))
+    proba = model.predict_proba(pd.DataFrame([row], columns=columns))[0]
+    allowed = _allowed_from_payload(knust_payload)
+    if not allowed:
+        return []
+    ranked = [
+        {**allowed[name], "confidence": float(proba[idx]), "source": "knust_dt_alternate",
+         "role": "alternate", "model": "knust_dt"}
+        for idx, name in enumerate(bundle["label_encoder"].classes_)
+        if name in allowed
+    ]
+    seen = {r["programme"] for r in ranked}
+    ranked.extend(
+        {**meta, "confidence": 0.0, "source": "knust_dt_alternate", "role": "alternate", "model": "knust_dt"}
+        for name, meta in allowed.items()
+        if name not in seen
+    )
+    ranked.sort(key=lambda r: (0 if r.get("eligibility_band") == "eligible" else 1, -float(r["confidence"])))
+    return ranked[: max(1, top_n)]
+
+
+def build_cohort(size: int, seed: int = 11) -> tuple[list[dict[str, float]], list[dict[str, Any]]]:
+    rng = random.Random(seed)
+    gates: dict[int | None, dict[str, Any]] = {}
+    features: list[dict[str, float]] = []
+    payloads: list[dict[str, Any]] = []
+    for _ in range(size):
+        grades = [{"subject": s, "grade": rng.choice(GRADES)} for s in SUBJECTS if rng.random() < 0.92]
+        features.append(
+            grades_to_dt_features(
+                academic_grades=grades,
+                behavioral_traits={"analytical": rng.random(), "empathy": rng.random(), "creative": rng.random()},
+                skill_estimates={d: rng.uniform(-3, 3) for d in ("Logic", "Math", "Science", "Verbal")},
+            )
+        )
+        # Same sharing as score_profiles_batch: one gate payload per aggregate.
+        aggregate = int(features[-1]["aggregate"])
+        if aggregate not in gates:
+            gates[aggregate] = apply_cutoff_boundaries(grades=grades, limit_per_band=40)
+        payloads.append(gates[aggregate])
+    return features, payloads
+
+
+def run(size: int, top_n: int) -> None:
+    features, payloads = build_cohort(size)
+
+    t0 = time.perf_counter()
+    expected = [_pandas_single(f, p, top_n) for f, p in zip(features, payloads)]
+    pandas_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    single = [predict_knust_dt_alternate(f, knust_payload=p, top_n=top_n) for f, p in zip(features, payloads)]
+    single_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = predict_knust_dt_batch(features, knust_payloads=payloads, top_n=top_n)
+    batch_s = time.perf_counter() - t0
+
+    print(
+        f"learners={size:>6}  pandas={pandas_s * 1000:9.1f}ms  "
+        f"single={single_s * 1000:8.1f}ms  batch={batch_s * 1000:7.1f}ms  "
+        f"speedup={pandas_s / max(batch_s, 1e-9):6.1f}x  "
+        f"identical={single == expected and batch == expected}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--top-n", type=int, default=8)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", module="sklearn")
+    load_model()
+    for n in args.sizes:
+        run(n, args.top_n)
@@ -0,0 +1,97 @@
+"""Benchmark: per-call httpx clients vs the shared LLM connection pool.
+
+Runs waves of concurrent chat-completion POSTs (one wave ≈ one level build at
+CHALLENGE_GEN_CONCURRENCY) against the local mock LLM server and reports
+wall-clock and per-request latency for both strategies.
+
+    python -m scripts.bench_llm_http_pool --requests 200 --concurrency 6
+
+The mock is plain HTTP on localhost, so this only measures TCP setup and
+client construction; against the real providers each fresh client also pays
+a TLS handshake (~100–300 ms from Ghana), which the pool avoids as well.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.llm.http_pool import LLMClientPool
+from scripts.mock_llm_server import running_mock_llm
+
+PAYLOAD = {
+    "model": "mock",
+    "messages": [{"role": "user", "content": "Generate one question."}],
+    "temperature": 0.7,
+}
+
+
+async def _per_call(url: str) -> float:
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        res = await client.post(url, json=PAYLOAD)
+        res.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def _pooled(pool: LLMClientPool, url: str) -> float:
+    started = time.perf_counter()
+    res = await pool.post(url, json=PAYLOAD, timeout=30.0)
+    res.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def _run(label: str, call, total: int, concurrency: int) -> dict[str, float]:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one() -> float:
+        async with sem:
+            return await call()
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(_one() for _ in range(total)))
+    wall = time.perf_counter() - started
+    latencies = sorted(latencies)
+    result = {
+        "wall_s": wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "rps": total / wall if wall else 0.0,
+    }
+    print(
+        f"{label:<10} wall={result['wall_s']:.2f}s  p50={result['p50_ms']:.1f}ms  "
+        f"p95={result['p95_ms']:.1f}ms  rps={result['rps']:.0f}"
+    )
+    return result
+
+
+async def main(total: int, concurrency: int, latency_ms: float) -> None:
+    async with running_mock_llm(latency_s=latency_ms / 1000.0) as url:
+        print(
+            f"mock={url} requests={total} concurrency={concurrency} "
+            f"latency={latency_ms:.0f}ms"
+        )
+        per_call = await _run("per-call", lambda: _per_call(url), total, concurrency)
+
+        pool = LLMClientPool()
+        await pool.start()
+        try:
+            pooled = await _run("pooled", lambda: _pooled(pool, url), total, concurrency)
+            print("pool metrics:", pool.metrics()["providers"])
+        finally:
+            await pool.aclose()
+
+    saved = per_call["p50_ms"] - pooled["p50_ms"]
+    print(f"p50 saving per request: {saved:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency_ms))
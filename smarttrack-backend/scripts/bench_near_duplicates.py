@@ -0,0 +1,105 @@
+"""Benchmark: MinHash/LSH near-duplicate index vs the old pairwise check.
+
+Learner histories of 100 / 500 / 2000 stems are built from the academic bank
+and psychometric cards (pairs of stems joined once the real ones run out).
+Queries are half paraphrases of a history stem (word dropped, added, swapped
+or a number changed) and half stems held out of the history, each run through:
+
+  pairwise — ``_questions_are_similar`` against every stem (the old
+             ``_is_unique_question``: difflib ratio + word Jaccard)
+  index    — ``NearDuplicateIndex.is_near_duplicate`` (signature + LSH lookup)
+
+Reports per-query latency, the index load time from stored signature bytes,
+and how often each method flags paraphrases / held-out stems.
+
+    python -m scripts.bench_near_duplicates --sizes 100 500 2000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from app.assessment.near_duplicates import NearDuplicateIndex, from_bytes, signature_bytes, threshold
+from app.assessment.psychometric_cards import PSYCHOMETRIC_CARDS
+from app.assessment.starter_arena import _questions_are_similar
+from app.phases.academic_bank import load_bank
+
+FILLERS = ("first", "really", "exactly", "usually", "now", "today")
+
+
+def _stems() -> list[str]:
+    texts = [q["question_text"] for q in load_bank()] + [c["question"] for c in PSYCHOMETRIC_CARDS]
+    return list(dict.fromkeys(t.strip() for t in texts if t and t.strip()))
+
+
+def paraphrase(text: str, rng: random.Random) -> str:
+    words = text.split()
+    kind = rng.randrange(4)
+    if kind == 0 and len(words) > 4:
+        words.pop(rng.randrange(len(words)))
+    elif kind == 1 and len(words) > 3:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    elif kind == 2 and any(w.isascii() and w.isdigit() for w in words):
+        words = [str(int(w) + 1) if w.isascii() and w.isdigit() else w for w in words]
+    else:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(FILLERS))
+    return " ".join(words)
+
+
+def history(stems: list[str], size: int, rng: random.Random) -> list[str]:
+    out = list(stems[:size])
+    while len(out) < size:
+        first, second = rng.sample(stems, 2)
+        out.append(f"{first} {second}")
+    return out
+
+
+def run(size: int, queries: int, stems: list[str]) -> None:
+    rng = random.Random(size)
+    held_out = stems[-queries:]
+    past = history(stems[: -queries], size, rng)
+    stored = [signature_bytes(text) for text in past]
+
+    started = time.perf_counter()
+    index = NearDuplicateIndex()
+    for text, raw in zip(past, stored):
+        index.add(text, from_bytes(raw))
+    load_ms = (time.perf_counter() - started) * 1000
+
+    positives = [paraphrase(rng.choice(past), rng) for _ in range(queries // 2)]
+    negatives = rng.sample(held_out, queries - len(positives))
+    pair_ms: list[float] = []
+    index_ms: list[float] = []
+    flagged = {"pairwise": [0, 0], "index": [0, 0]}
+    for kind, batch in ((0, positives), (1, negatives)):
+        for text in batch:
+            t0 = time.perf_counter()
+            hit = any(_questions_are_similar(text, existing) for existing in past)
+            pair_ms.append((time.perf_counter() - t0) * 1000)
+            flagged["pairwise"][kind] += hit
+            t0 = time.perf_counter()
+            hit = index.is_near_duplicate(text)
+            index_ms.append((time.perf_counter() - t0) * 1000)
+            flagged["index"][kind] += hit
+    print(
+        f"history={size:>5}  load={load_ms:6.1f}ms  "
+        f"pairwise p50={statistics.median(pair_ms):8.2f}ms  "
+        f"index p50={statistics.median(index_ms):6.3f}ms  "
+        f"speedup={statistics.median(pair_ms) / max(statistics.median(index_ms), 1e-6):7.1f}x  "
+        f"paraphrases caught pairwise/index={flagged['pairwise'][0]}/{flagged['index'][0]} of {len(positives)}  "
+        f"held-out flagged={flagged['pairwise'][1]}/{flagged['index'][1]} of {len(negatives)}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--queries", type=int, default=60)
+    args = parser.parse_args()
+    corpus = _stems()
+    print(f"threshold={threshold():.2f}  corpus={len(corpus)} stems")
+    for n in args.sizes:
+        run(n, args.queries, corpus)
@@ -0,0 +1,132 @@
+"""Benchmark: scheduled notification sweep over many learners (local SQLite).
+
+Seeds --users learners (mixed progress, streaks and ranks) into a temporary
+SQLite database and times two sweeps: the first creates the due
+notifications, the second finds everything in cooldown. Reports learners per
+second and statements issued, so the per-chunk query count can be checked
+against the scheduler tick (NOTIFICATION_ENGINE_INTERVAL_SECONDS).
+
+    python -m scripts.bench_notification_sweep --users 100000 --batch-size 1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import re
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app.database import Base
+from app.notifications.scheduler import run_notification_sweep
+from app.phases.models import Level, Phase, UserLevelProgress
+from app.users.models import User
+
+
+# SQLite gives the postgres UUID column NUMERIC affinity: an all-digit hex
+# (optionally with one "e") would be read back as a number. Postgres is fine.
+_NUMERIC_HEX = re.compile(r"\d+(e\d+)?")
+
+
+def _sqlite_safe_uuid() -> uuid.UUID:
+    while True:
+        value = uuid.uuid4()
+        if not _NUMERIC_HEX.fullmatch(value.hex):
+            return value
+
+
+async def _seed(sessions, users: int, now: datetime) -> None:
+    rng = random.Random(7)
+    async with sessions() as db:
+        level_ids = []
+        for number in range(1, 4):
+            phase = Phase(number=number, name=f"Phase {number}", shs_mapping=f"SHS {number}")
+            db.add(phase)
+            await db.flush()
+            for lv in range(1, 11):
+                level = Level(phase_id=phase.id, number=lv, difficulty_baseline=min(lv, 5))
+                db.add(level)
+                await db.flush()
+                level_ids.append(level.id)
+        await db.commit()
+
+        for start in range(0, users, 5000):
+            user_rows, progress_rows = [], []
+            for i in range(start, min(users, start + 5000)):
+                uid = _sqlite_safe_uuid()
+                streak = rng.choice((0, 0, 1, 3, 7, 12))
+                last = (now.date() - timedelta(days=rng.choice((0, 1, 2)))).isoformat()
+                user_rows.append(
+                    {
+                        "id": uid,
+                        "email": f"learner{i}@example.com",
+                        "full_name": f"Learner {i}",
+                        "streak": streak,
+                        "xp": 0,
+                        "rank": rng.choice(("Beginner", "Beginner", "Bronze", "Silver")),
+                        "shs_level": rng.choice(("SHS 1", "SHS 2", "SHS 3")),
+                        "is_active": True,
+                        "is_verified": True,
+                        "created_at": now - timedelta(days=rng.randint(1, 25)),
+                        "updated_at": now,
+                        "last_login": now - timedelta(hours=rng.randint(1, 200)),
+                        "learner_profile": {"notifications_backfilled": True, "streak_last_date": last},
+                    }
+                )
+                done = rng.randint(0, 12)
+                for idx, level_id in enumerate(level_ids[: done + 1]):
+                    progress_rows.append(
+                        {
+                            "user_id": uid,
+                            "level_id": level_id,
+                            "status": "completed" if idx < done else "in_progress",
+                            "attempts": 1,
+                        }
+                    )
+            await db.execute(insert(User), user_rows)
+            await db.execute(insert(UserLevelProgress), progress_rows)
+            await db.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'sweep.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        statements: Counter[str] = Counter()
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, *rest):
+            statements[statement.lstrip().split(None, 1)[0].upper()] += 1
+
+        sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+        started = time.perf_counter()
+        await _seed(sessions, args.users, now)
+        print(f"seeded {args.users} learners in {time.perf_counter() - started:.1f}s")
+
+        for label in ("first sweep", "cooldown sweep"):
+            statements.clear()
+            result = await run_notification_sweep(sessions=sessions, batch_size=args.batch_size, now=now)
+            seconds = result["elapsed_ms"] / 1000.0
+            print(
+                f"{label:<15} learners={result['users']:>7} created={result['created']:>7} "
+                f"time={seconds:6.1f}s  ({result['users'] / max(seconds, 1e-9):,.0f} learners/s)  "
+                f"statements={dict(statements)}"
+            )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
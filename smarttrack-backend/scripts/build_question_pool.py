@@ -0,0 +1,52 @@
+"""Pre-generate the challenge question pool for the current CHALLENGE_FORMAT_VERSION.
+
+Run after bumping CHALLENGE_FORMAT_VERSION or editing the curriculum topics so
+level starts are served from phase_question_pool instead of waiting on the
+LLM. Every item goes through the live quality gates. Safe to interrupt: cells
+(phase, subject, question type, band, topic) already at --per-cell are skipped.
+
+    python -m scripts.build_question_pool --phase 1 --subject core_maths
+    python -m scripts.build_question_pool --per-cell 2 --concurrency 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.llm.http_pool import llm_pool
+from app.phases.question_pool import BANDS, build_question_pool
+from app.phases.service import SUBJECTS
+
+
+async def main(args: argparse.Namespace) -> None:
+    await llm_pool.start()
+    started = time.perf_counter()
+    try:
+        counts = await build_question_pool(
+            phases=args.phase or (1, 2, 3),
+            subjects=args.subject or None,
+            bands=args.band or None,
+            per_cell=args.per_cell,
+            concurrency=args.concurrency,
+        )
+    finally:
+        await llm_pool.aclose()
+    print(
+        f"format_version={settings.CHALLENGE_FORMAT_VERSION} added={counts.get('added', 0)} "
+        f"duplicates={counts.get('duplicates', 0)} failed={counts.get('failed', 0)} "
+        f"skipped_cells={counts.get('skipped_cells', 0)} in {time.perf_counter() - started:.0f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--phase", type=int, action="append", choices=(1, 2, 3), help="Repeatable")
+    parser.add_argument("--subject", action="append", choices=SUBJECTS, help="Repeatable")
+    parser.add_argument("--band", action="append", choices=[name for name, *_ in BANDS], help="Repeatable")
+    parser.add_argument("--per-cell", type=int, default=1, help="Items per type/band/topic cell")
+    parser.add_argument("--concurrency", type=int, default=3)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    asyncio.run(main(parser.parse_args()))
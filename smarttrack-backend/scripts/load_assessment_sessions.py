@@ -0,0 +1,133 @@
+"""Load test: Challenge Hub session memory over 10k simulated sessions.
+
+Drives the real ``start_challenge_session`` / ``submit_answer`` path
+(question generation stubbed with the fallback bank, DB writes faked) and
+samples process RSS as sessions accumulate:
+
+  legacy — every session kept in a plain module dict (the old behaviour)
+  store  — the configured session store (memory LRU + TTL, or sql)
+
+With the store, memory should level off once the entry cap is reached
+(memory) or stay flat throughout (sql); the legacy dict grows linearly.
+RSS is too noisy for CI, so the test suite runs this loop at a small scale
+and checks the store's entry count instead
+(``test_load_script_smoke_keeps_the_store_bounded``).
+
+    python -m scripts.load_assessment_sessions --sessions 10000 --max-entries 2000
+    python -m scripts.load_assessment_sessions --backend sql
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import resource
+import tempfile
+import uuid
+from pathlib import Path
+
+from app.assessment import challenge_hub, session_store as store_module
+from app.assessment.challenge_hub import CORE_SUBJECTS, FALLBACK_QUESTIONS
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        # Peak, not current, outside Linux — still shows unbounded growth.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+class _FakeDB:
+    """Just enough AsyncSession for start_challenge_session."""
+
+    def __init__(self) -> None:
+        self._next_id = 0
+
+    def add(self, obj) -> None:
+        self._next_id += 1
+        obj.id = self._next_id
+
+    async def commit(self) -> None:
+        return None
+
+    async def refresh(self, _obj) -> None:
+        return None
+
+
+async def _fallback_questions(subject: str, _shs_level: str, _level: int) -> list:
+    return list(FALLBACK_QUESTIONS.get(subject, []))[:6]
+
+
+async def _play_session(db: _FakeDB, legacy: dict | None) -> None:
+    started = await challenge_hub.start_challenge_session(db, uuid.uuid4(), "SHS 2")
+    session_id = started["session_id"]
+    for subject in CORE_SUBJECTS[:2]:
+        for index in range(3):
+            await challenge_hub.submit_answer(session_id, subject, index, "A", 4.0)
+    if legacy is not None:
+        legacy[session_id] = await challenge_hub.get_session_data(session_id)
+        await challenge_hub.session_store.delete(challenge_hub._SESSION_NAMESPACE, session_id)
+
+
+async def _build_store(backend: str, max_entries: int, workdir: Path):
+    if backend == "memory":
+        return store_module.MemorySessionStore(max_entries=max_entries), None
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.assessment.models import AssessmentSessionState
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{workdir / 'sessions.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync: AssessmentSessionState.__table__.create(sync))
+    return store_module.SqlSessionStore(async_sessionmaker(engine, expire_on_commit=False)), engine
+
+
+async def run(mode: str, backend: str, sessions: int, max_entries: int, step: int) -> list[float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        store, engine = await _build_store(backend, max_entries, Path(tmp))
+        challenge_hub.session_store = store
+        legacy: dict | None = {} if mode == "legacy" else None
+        db = _FakeDB()
+        samples: list[float] = []
+        gc.collect()
+        base = _rss_mb()
+        for i in range(1, sessions + 1):
+            await _play_session(db, legacy)
+            if i % step == 0:
+                gc.collect()
+                samples.append(_rss_mb() - base)
+        if engine is not None:
+            await engine.dispose()
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--backend", choices=("memory", "sql"), default="memory")
+    parser.add_argument("--max-entries", type=int, default=2_000)
+    parser.add_argument("--step", type=int, default=1_000)
+    args = parser.parse_args()
+
+    challenge_hub.generate_subject_questions = _fallback_questions
+    original_store = challenge_hub.session_store
+    try:
+        # Store first: the legacy pass leaves freed arenas the store could reuse.
+        store = asyncio.run(run("store", args.backend, args.sessions, args.max_entries, args.step))
+        legacy = asyncio.run(run("legacy", "memory", args.sessions, args.sessions, args.step))
+    finally:
+        challenge_hub.session_store = original_store
+
+    print(f"sessions   legacy dict   {args.backend} store   (RSS MB above start)")
+    for i, (a, b) in enumerate(zip(legacy, store), start=1):
+        print(f"{i * args.step:>8}   {a:11.1f}   {b:12.1f}")
+    half = len(store) // 2
+    growth = store[-1] - store[half - 1] if half else 0.0
+    print(f"store growth over the second half: {growth:+.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
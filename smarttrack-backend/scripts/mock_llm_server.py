@@ -0,0 +1,370 @@
+"""Local mock LLM, image and video providers for benchmarks and load tests.
+
+Serves an OpenAI-compatible ``POST /v1/chat/completions`` plus the image and
+video search APIs the app calls (Wikimedia/Wikipedia, Openverse, Pixabay,
+YouTube, Piped), each after a configurable latency with an optional error
+rate, so benchmarks can run without DeepSeek, NVIDIA or network access.
+
+Chat replies are canned JSON shaped for the caller: a ``{"items": [...]}``
+batch when the prompt asks for one, a JSON array for Starter Arena prompts,
+otherwise one challenge question on the prompt's locked topic. Stems carry a
+running number so the dedupe gates do not reject every reply.
+
+``"stream": true`` chat requests get an SSE stream instead: the first chunk
+after the latency, then one word-sized chunk every ``token_delay_s``, then
+``data: [DONE]``. Streams the client abandons are counted in
+``streams_cancelled``.
+
+``redirect_providers(base_url)`` points the app's httpx clients at the mock:
+a request to ``https://api.deepseek.com/v1/...`` becomes
+``{base_url}/api.deepseek.com/v1/...``.
+
+    python -m scripts.mock_llm_server --port 8099 --latency-ms 150 --error-rate 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import random
+import re
+import socket
+from typing import Any, AsyncIterator, Iterator
+
+import httpx
+import uvicorn
+
+DEFAULT_CONTENT = json.dumps(
+    {
+        "question_text": "What is 2 + 3?",
+        "options": {"A": "4", "B": "5", "C": "6", "D": "7"},
+        "correct_answer": "B",
+        "explanation": "2 + 3 = 5.",
+    }
+)
+
+PROVIDER_HOSTS = frozenset(
+    {
+        "api.deepseek.com",
+        "integrate.api.nvidia.com",
+        "commons.wikimedia.org",
+        "en.wikipedia.org",
+        "api.openverse.org",
+        "pixabay.com",
+        "www.googleapis.com",
+    }
+)
+
+_TOPIC_RE = re.compile(r"exactly this topic: (.+?)\.\n")
+_BATCH_RE = re.compile(r"with exactly (\d+) objects in ITEM order")
+_ARRAY_RE = re.compile(r"JSON array with exactly (\d+) objects")
+STREAM_REPLY = (
+    "Photosynthesis is how green plants make their own food. Chlorophyll in the leaves "
+    "traps light energy, and the plant uses it to join carbon dioxide from the air with "
+    "water from the soil. The products are glucose, which the plant uses for energy and "
+    "growth, and oxygen, which is released into the air. A simple way to remember it: "
+    "light plus carbon dioxide plus water gives glucose plus oxygen."
+)
+
+
+def _question(n: int, topic: str) -> dict[str, Any]:
+    a, b = 3 + n % 17, 5 + n % 23
+    return {
+        "question_type": "mcq",
+        "question_text": f"In a lesson on {topic}, a learner records {a} and then {b} more. "
+        f"What total should they record? (case {n})",
+        "options": {"A": str(a + b - 1), "B": str(a + b), "C": str(a + b + 2), "D": str(a * b)},
+        "correct_answer": "B",
+        "explanation": f"{a} + {b} = {a + b}.",
+    }
+
+
+def _cognitive(n: int) -> dict[str, Any]:
+    return {
+        "id": f"cognitive_{n}",
+        "type": "cognitive",
+        "source": "llm",
+        "cognitive_skill": "reasoning",
+        "format": "scenario",
+        "domain": "Logical reasoning",
+        "question": f"Your group gets two different plans for market day number {n}. "
+        "What do you check first before choosing one?",
+        "options": {
+            "A": "Which plan has evidence behind it",
+            "B": "Which plan is longer",
+            "C": "Which plan a friend likes",
+            "D": "Which plan was shared first",
+        },
+        "correct_key": None,
+        "explanation": "Shows how you weigh evidence.",
+    }
+
+
+class MockLLMApp:
+    """Minimal ASGI app: chat completions and search APIs with latency and errors."""
+
+    def __init__(
+        self,
+        *,
+        latency_s: float = 0.1,
+        content: str | None = None,
+        jitter_s: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+        token_delay_s: float = 0.02,
+    ) -> None:
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.error_rate = error_rate
+        self.content = content
+        self.token_delay_s = token_delay_s
+        self.requests = 0
+        self.errors = 0
+        self.streams = 0
+        self.streams_cancelled = 0
+        self.by_route: dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._counter = itertools.count(1)
+
+    def canned_reply(self, body: dict[str, Any]) -> str:
+        if self.content is not None:
+            return self.content
+        messages = body.get("messages") or []
+        prompt = str(messages[-1].get("content") or "") if messages else ""
+        match = _BATCH_RE.search(prompt)
+        if match:
+            topics = _TOPIC_RE.findall(prompt) or ["this topic"]
+            items = [
+                _question(next(self._counter), topics[i % len(topics)])
+                for i in range(int(match.group(1)))
+            ]
+            return json.dumps({"items": items})
+        match = _ARRAY_RE.search(prompt)
+        if match:
+            return json.dumps([_cognitive(next(self._counter)) for _ in range(int(match.group(1)))])
+        topic = _TOPIC_RE.search(prompt)
+        return json.dumps(_question(next(self._counter), topic.group(1) if topic else "number work"))
+
+    def _route(self, path: str) -> str:
+        if path.endswith("/chat/completions"):
+            return "chat"
+        if path.endswith("/w/api.php"):
+            return "wikimedia"
+        if "/v1/images" in path:
+            return "openverse"
+        if path.rstrip("/").endswith("/api"):
+            return "pixabay"
+        if "/youtube/v3/" in path:
+            return "youtube"
+        if path.endswith("/search") or "/streams/" in path:
+            return "piped"
+        return "unknown"
+
+    def _reply(self, route: str, body: dict[str, Any]) -> dict[str, Any]:
+        if route == "chat":
+            return {
+                "id": f"mock-{self.requests}",
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": self.canned_reply(body)},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+        # Valid, empty search results: callers fall back to local assets.
+        return {
+            "wikimedia": {"batchcomplete": "", "query": {"pages": {}, "search": []}},
+            "openverse": {"result_count": 0, "page_count": 0, "results": []},
+            "pixabay": {"total": 0, "totalHits": 0, "hits": []},
+            "youtube": {"kind": "youtube#searchListResponse", "items": []},
+            "piped": {"items": [], "relatedStreams": []},
+        }.get(route, {})
+
+    async def _stream(self, receive: Any, send: Any) -> None:
+        self.streams += 1
+        text = self.content if self.content is not None else STREAM_REPLY
+        pieces = re.findall(r"\S+\s*", text)
+        disconnected = asyncio.Event()
+
+        async def _watch() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(_watch())
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream")],
+            }
+        )
+        try:
+            for i, piece in enumerate(pieces):
+                if i and self.token_delay_s:
+                    await asyncio.sleep(self.token_delay_s)
+                if disconnected.is_set():
+                    self.streams_cancelled += 1
+                    return
+                chunk = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": f"data: {json.dumps(chunk)}\n\n".encode("utf-8"),
+                        "more_body": True,
+                    }
+                )
+            await send({"type": "http.response.body", "body": b"data: [DONE]\n\n", "more_body": False})
+        finally:
+            watcher.cancel()
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        chunks: list[bytes] = []
+        more = True
+        while more:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+
+        self.requests += 1
+        route = self._route(scope.get("path", ""))
+        self.by_route[route] = self.by_route.get(route, 0) + 1
+        delay = self.latency_s + (self._random.uniform(0, self.jitter_s) if self.jitter_s else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        try:
+            body = json.loads(b"".join(chunks) or b"{}")
+        except ValueError:
+            body = {}
+        body = body if isinstance(body, dict) else {}
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            status, payload = 503, {"error": {"message": "mock provider overloaded"}}
+        elif route == "chat" and body.get("stream"):
+            await self._stream(receive, send)
+            return
+        else:
+            status, payload = 200, self._reply(route, body)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": json.dumps(payload).encode("utf-8")})
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+@contextlib.asynccontextmanager
+async def running_mock_providers(
+    *,
+    latency_s: float = 0.1,
+    jitter_s: float = 0.0,
+    error_rate: float = 0.0,
+    content: str | None = None,
+    port: int | None = None,
+    token_delay_s: float = 0.02,
+) -> AsyncIterator[tuple[str, MockLLMApp]]:
+    """Start the mock in-process; yields (base URL, app) for redirects and counters."""
+    port = port or _free_port()
+    app = MockLLMApp(
+        latency_s=latency_s,
+        jitter_s=jitter_s,
+        error_rate=error_rate,
+        content=content,
+        token_delay_s=token_delay_s,
+    )
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}", app
+    finally:
+        server.should_exit = True
+        await task
+
+
+@contextlib.asynccontextmanager
+async def running_mock_llm(
+    *, latency_s: float = 0.1, port: int | None = None
+) -> AsyncIterator[str]:
+    """Start the mock in-process with fixed content; yields the chat completions URL."""
+    async with running_mock_providers(
+        latency_s=latency_s, content=DEFAULT_CONTENT, port=port
+    ) as (base_url, _app):
+        yield f"{base_url}/v1/chat/completions"
+
+
+@contextlib.contextmanager
+def redirect_providers(base_url: str) -> Iterator[None]:
+    """Send the app's outbound provider calls (any httpx.AsyncClient) to the mock."""
+    target = httpx.URL(base_url)
+    original = httpx.AsyncClient.send
+
+    async def send(self: httpx.AsyncClient, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        host = request.url.host
+        if host in PROVIDER_HOSTS or host.startswith("pipedapi."):
+            request.url = request.url.copy_with(
+                scheme=target.scheme,
+                host=target.host,
+                port=target.port,
+                raw_path=f"/{host}".encode("ascii") + request.url.raw_path,
+            )
+            request.headers["host"] = f"{target.host}:{target.port}"
+        return await original(self, request, **kwargs)
+
+    httpx.AsyncClient.send = send  # type: ignore[method-assign]
+    try:
+        yield
+    finally:
+        httpx.AsyncClient.send = original  # type: ignore[method-assign]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay-ms", type=float, default=20.0, help="Gap between streamed chunks")
+    args = parser.parse_args()
+    uvicorn.run(
+        MockLLMApp(
+            latency_s=args.latency_ms / 1000.0,
+            jitter_s=args.jitter_ms / 1000.0,
+            error_rate=args.error_rate,
+            token_delay_s=args.token_delay_ms / 1000.0,
+        ),
+        host="127.0.0.1",
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
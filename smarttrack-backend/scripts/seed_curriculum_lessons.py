@@ -8,6 +8,7 @@ import sys
 from pathlib import Path
 from typing import Any
 
+from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import insert
 
 from app.assessment.models import CurriculumLesson
@@ -81,6 +82,8 @@ async def seed() -> None:
                     "xp_reward": excluded.xp_reward,
                     "source_content": excluded.source_content,
                     "search_text": excluded.search_text,
+                    # Bumped explicitly so the search index picks up re-seeded rows.
+                    "updated_at": func.now(),
                 },
             )
             await session.execute(statement)
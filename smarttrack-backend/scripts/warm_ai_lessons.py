@@ -0,0 +1,52 @@
+"""Pre-generate AI-taught Learning Center lessons for the current AI_CONTENT_VERSION.
+
+Run after bumping AI_CONTENT_VERSION (or seeding new lessons) so learners
+don't wait on the lesson pipeline. Safe to interrupt: lessons already stored
+at the current version are skipped, and --progress records what this run
+finished and which lessons failed (failed ones are retried next time).
+
+    python -m scripts.warm_ai_lessons --subject "Core Mathematics" --level "SHS 1"
+    python -m scripts.warm_ai_lessons --concurrency 4 --progress data/lesson_warmup.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+from app.learning.lesson_cache import warm_lessons
+from app.learning.service import AI_CONTENT_VERSION
+from app.llm.http_pool import llm_pool
+
+
+async def main(args: argparse.Namespace) -> None:
+    await llm_pool.start()
+    started = time.perf_counter()
+    try:
+        counts = await warm_lessons(
+            subject=args.subject,
+            shs_level=args.level,
+            curriculum_ids=args.curriculum_id or None,
+            concurrency=args.concurrency,
+            progress_path=Path(args.progress) if args.progress else None,
+        )
+    finally:
+        await llm_pool.aclose()
+    print(
+        f"version={AI_CONTENT_VERSION} generated={counts['generated']} "
+        f"skipped={counts['skipped']} failed={counts['failed']} "
+        f"in {time.perf_counter() - started:.0f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subject", help="Only lessons of this subject (exact match)")
+    parser.add_argument("--level", choices=("SHS 1", "SHS 2", "SHS 3"), help="Only this SHS level")
+    parser.add_argument("--curriculum-id", action="append", help="Specific lesson (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--progress", default="data/lesson_warmup.json")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    asyncio.run(main(parser.parse_args()))
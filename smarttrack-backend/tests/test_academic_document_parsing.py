@@ -0,0 +1,96 @@
+"""Academic uploads: parsing in the process pool, page/time limits and the content-hash cache."""
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.assessment import academic_recommendations as mod
+from app.assessment.document_parsing import PARSE_JOBS, DocumentCache, ParseTimeout, parse_pool
+from app.config import settings
+from scripts.bench_academic_parsing import SLIP_LINES, text_pdf
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ACADEMIC_DOCUMENT_CACHE_DB_PATH", str(tmp_path / "docs.sqlite3"))
+    fresh = DocumentCache()
+    monkeypatch.setattr(mod, "document_cache", fresh)
+    yield fresh
+    fresh.close()
+
+
+def test_page_limit_stops_extraction():
+    pdf = text_pdf([["Page one text"], ["Page two text"], ["Page three text"]])
+    assert "Page three" in mod.extract_text_from_pdf(pdf, max_pages=0)
+    limited = mod.extract_text_from_pdf(pdf, max_pages=2)
+    assert "Page two" in limited and "Page three" not in limited
+
+
+async def test_pdf_is_parsed_in_a_worker_and_cached_by_content(cache, monkeypatch):
+    monkeypatch.setattr(settings, "ACADEMIC_PARSE_WORKERS", 1)
+    pdf = text_pdf([SLIP_LINES])
+    jobs = PARSE_JOBS.value("ok")
+
+    first = await mod.analyze_academic_document(
+        filename="wassce.pdf", content_type="application/pdf", data=pdf, profile_name="Yaw Kwame Asiamah"
+    )
+    assert first["method"] == "pdf_text"
+    assert first["candidate_name"] == "ASIAMAH YAW KWAME"
+    assert {g["subject"]: g["grade"] for g in first["grades"]}["Core Mathematics"] == "A1"
+    assert first["waec"]["is_waec"] and first["name_match"]["matched"]
+    assert PARSE_JOBS.value("ok") == jobs + 1
+
+    again = await mod.analyze_academic_document(
+        filename="copy.pdf", content_type="application/pdf", data=pdf, profile_name="Kofi Mensah"
+    )
+    assert PARSE_JOBS.value("ok") == jobs + 1
+    assert again["grades"] == first["grades"]
+    # The match is recomputed for whoever uploads the cached document.
+    assert again["name_match"]["reason"] == "name_mismatch"
+
+
+async def test_repeat_image_upload_skips_the_vision_call(cache, monkeypatch):
+    calls: list[bytes] = []
+
+    async def _vision(*, filename, content_type, data):
+        calls.append(data)
+        return {
+            "grades": [{"subject": "Physics", "grade": "B3"}],
+            "candidate_name": "ASIAMAH YAW KWAME",
+            "waec": {"is_waec": True, "confidence": 0.8, "reasons": ["vision_model", "wassce_results"]},
+        }
+
+    store_threads: list[int] = []
+    persistent = cache._persistent
+
+    def _recording_persistent():
+        store_threads.append(threading.get_ident())
+        return persistent()
+
+    monkeypatch.setattr(mod, "_analyze_image_document", _vision)
+    monkeypatch.setattr(cache, "_persistent", _recording_persistent)
+    for _ in range(2):
+        result = await mod.analyze_academic_document(
+            filename="slip.jpg", content_type="image/jpeg", data=b"\xff\xd8jpeg-bytes"
+        )
+        assert result["method"] == "image_vision"
+    assert len(calls) == 1
+    # get, put, get: SQLite is only touched from worker threads.
+    assert len(store_threads) == 3 and threading.get_ident() not in store_threads
+
+
+async def test_overrunning_job_times_out_and_the_pool_recovers(monkeypatch):
+    monkeypatch.setattr(settings, "ACADEMIC_PARSE_WORKERS", 1)
+    monkeypatch.setattr(settings, "ACADEMIC_PARSE_TIMEOUT_SECONDS", 0.5)
+    timeouts = PARSE_JOBS.value("timeout")
+    started = time.perf_counter()
+    with pytest.raises(ParseTimeout):
+        await parse_pool.run(time.sleep, 30)
+    assert time.perf_counter() - started < 5
+    assert PARSE_JOBS.value("timeout") == timeouts + 1
+
+    monkeypatch.setattr(settings, "ACADEMIC_PARSE_TIMEOUT_SECONDS", 20.0)
+    assert await parse_pool.run(len, b"abc") == 3
+    parse_pool.shutdown()
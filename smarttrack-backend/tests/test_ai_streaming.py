@@ -0,0 +1,142 @@
+"""Streamed (SSE) AI answers: relay order, provider fallback, disconnects and DB release."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.auth.dependencies import get_current_user
+from app.config import settings
+from app.database import get_db
+from app.llm.streaming import STREAMS, stream_chat
+from app.revision.router import router as revision_router
+from app.users.models import User
+from scripts.mock_llm_server import STREAM_REPLY, redirect_providers, running_mock_providers
+
+_ASK = {"topic": "Photosynthesis", "question": "Explain photosynthesis simply."}
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.closed_at: float | None = None
+
+    async def close(self) -> None:
+        self.closed_at = asyncio.get_running_loop().time()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", "mock-key")
+    monkeypatch.setattr(settings, "NVIDIA_API_KEY", "")
+    session = _Session()
+
+    async def _db():
+        yield session
+
+    app = FastAPI()
+    app.include_router(revision_router)
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="ama@example.com")
+    app.dependency_overrides[get_db] = _db
+    return app, session
+
+
+def _events(raw: str) -> list[tuple[str, dict]]:
+    out = []
+    for block in raw.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+async def test_tokens_are_relayed_in_order_then_done(api):
+    app, session = api
+    async with running_mock_providers(latency_s=0.0, token_delay_s=0.0) as (base_url, mock):
+        with redirect_providers(base_url):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                response = await client.post("/revision/ask/stream", json=_ASK)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    tokens = [data["text"] for kind, data in events if kind == "token"]
+    assert len(tokens) > 10 and "".join(tokens) == STREAM_REPLY
+    kind, done = events[-1]
+    assert kind == "done" and done["chars"] == len(STREAM_REPLY)
+    assert done["time_to_first_token_ms"] is not None
+    assert done["time_to_first_token_ms"] <= done["total_ms"]
+    assert session.closed_at is not None
+    assert mock.streams == 1
+
+
+async def test_next_provider_is_used_until_the_first_token():
+    async with running_mock_providers(latency_s=0.0, token_delay_s=0.0) as (base_url, mock):
+        providers = [
+            # Nothing listens on port 9: the connection fails before any token.
+            {"name": "Down", "url": "http://127.0.0.1:9/v1/chat/completions", "model": "m", "api_key": "k"},
+            {"name": "Mock", "url": f"{base_url}/api.deepseek.com/chat/completions", "model": "m", "api_key": "k"},
+        ]
+        text = "".join(
+            [
+                chunk
+                async for chunk in stream_chat(
+                    providers, [{"role": "user", "content": "hi"}], temperature=0.5, max_tokens=50
+                )
+            ]
+        )
+    assert text == STREAM_REPLY
+    assert mock.streams == 1
+
+
+async def test_client_disconnect_cancels_the_upstream_stream(api):
+    app, _session = api
+    cancelled = STREAMS.value("revision_ask", "cancelled")
+    disconnect = asyncio.Event()
+    sent: list[dict] = []
+    body = json.dumps(_ASK).encode()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if b"event: token" in message.get("body", b""):
+            disconnect.set()  # the learner closes the tab after the first token
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/revision/ask/stream",
+        "raw_path": b"/revision/ask/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+        "client": ("127.0.0.1", 5000),
+        "server": ("test", 80),
+    }
+    async with running_mock_providers(latency_s=0.0, token_delay_s=0.05) as (base_url, mock):
+        with redirect_providers(base_url):
+            await asyncio.wait_for(app(scope, receive, send), timeout=10)
+            for _ in range(50):
+                if mock.streams_cancelled:
+                    break
+                await asyncio.sleep(0.02)
+
+    relayed = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    assert relayed.count(b"event: token") < len(STREAM_REPLY.split())
+    assert b"event: done" not in relayed
+    assert mock.streams_cancelled == 1
+    assert STREAMS.value("revision_ask", "cancelled") == cancelled + 1
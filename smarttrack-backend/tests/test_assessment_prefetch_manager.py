@@ -0,0 +1,101 @@
+"""Calibration AI prefetch: bounded-concurrent, incremental refill with a low watermark."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.assessment import prefetch_manager as pm
+from app.config import settings
+
+
+class _FakeProvider:
+    def __init__(self, latency: float = 0.02, fail: bool = False) -> None:
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, *, category, difficulty, programme, concept=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency * self.calls if self.calls <= 6 else self.latency)
+        finally:
+            self.active -= 1
+        if self.fail:
+            return {"success": False, "error": "provider down"}
+        return {
+            "success": True,
+            "data": {
+                "category": category,
+                "difficulty": difficulty,
+                "question": f"{category} question ({concept or programme})",
+                "options": ["1", "2", "3", "4"],
+                "correct_answer": "2",
+            },
+        }
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    fake = _FakeProvider()
+    monkeypatch.setattr(pm, "generate_challenge_question", fake)
+    monkeypatch.setattr(settings, "ASSESSMENT_PREFETCH_CONCURRENCY", 3)
+    monkeypatch.setattr(settings, "ASSESSMENT_PREFETCH_LOW_WATERMARK", 2)
+    monkeypatch.setattr(settings, "ASSESSMENT_PREFETCH_MAX_QUESTIONS", 10)
+    return fake
+
+
+async def _wait_idle(manager: pm.PrefetchManager, user_id: str) -> None:
+    for _ in range(200):
+        if manager.status(user_id) != "fetching":
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("prefetch never finished")
+
+
+async def test_questions_are_usable_before_the_batch_finishes(provider):
+    manager = pm.PrefetchManager()
+    manager.start_prefetch("u1", "Computer Science", count=5)
+
+    await asyncio.sleep(0.03)
+    assert manager.status("u1") == "fetching"
+    first = manager.get_questions("u1", limit=3)
+    assert 1 <= len(first) < 5
+    assert first[0]["correct_answer"] == "B" and first[0]["id"] < 0
+
+    await _wait_idle(manager, "u1")
+    assert provider.peak == 3
+    assert provider.calls == 5
+
+
+async def test_low_watermark_tops_up_until_the_session_cap(provider):
+    manager = pm.PrefetchManager()
+    manager.start_prefetch("u1", "Medicine", count=5)
+    await _wait_idle(manager, "u1")
+
+    served = []
+    for _ in range(10):
+        served.extend(manager.get_questions("u1", limit=2))
+        await _wait_idle(manager, "u1")
+
+    assert provider.calls == 10
+    assert len(served) == 10
+    assert len({q["id"] for q in served}) == 10
+    assert manager.get_questions("u1") == []
+    assert provider.calls == 10
+
+
+async def test_failed_refill_reports_error_without_retrying(provider):
+    provider.fail = True
+    manager = pm.PrefetchManager()
+    manager.start_prefetch("u1", "Law", count=4)
+    await _wait_idle(manager, "u1")
+
+    assert manager.status("u1") == "error"
+    assert manager.get_questions("u1") == []
+    await asyncio.sleep(0.01)
+    assert provider.calls == 4
@@ -0,0 +1,110 @@
+"""Assessment session store: compact round-trip, TTL/LRU eviction, shared SQL rows."""
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.assessment.models import AssessmentSessionState
+from app.assessment.session_store import (
+    MemorySessionStore,
+    SqlSessionStore,
+    decode_state,
+    encode_state,
+)
+
+
+def _state(i: int = 0) -> dict:
+    return {
+        "session_id": f"s{i}",
+        "user_id": uuid.UUID(int=i),
+        "used_ids": {1, 2, 3},
+        "questions": {"Core Mathematics": [{"question": "What is 3² + 4²?", "correct_answer": "C"}] * 6},
+        "total_xp": 10,
+    }
+
+
+def test_encode_round_trips_sets_and_uuids_compactly():
+    state = _state(7)
+    blob = encode_state(state)
+    assert decode_state(blob) == state
+    plain = json.dumps(state, default=str).encode("utf-8")
+    assert len(blob) < len(plain) / 2
+    assert decode_state(b"not zlib") is None
+
+
+async def test_memory_store_expires_and_caps_entries():
+    store = MemorySessionStore(max_entries=100)
+    await store.put("hub", "short", _state(), ttl=0.05)
+    assert (await store.get("hub", "short"))["total_xp"] == 10
+    await asyncio.sleep(0.06)
+    assert await store.get("hub", "short") is None
+
+    for i in range(2_000):
+        await store.put("hub", f"s{i}", _state(i))
+    assert len(store) == 100
+    assert await store.get("hub", "s0") is None
+    assert (await store.get("hub", "s1999"))["user_id"] == uuid.UUID(int=1999)
+
+
+async def test_loaded_state_is_a_copy():
+    store = MemorySessionStore()
+    await store.put("hub", "a", _state())
+    loaded = await store.get("hub", "a")
+    loaded["total_xp"] = 99
+    assert (await store.get("hub", "a"))["total_xp"] == 10
+
+
+async def test_sql_store_is_shared_between_workers(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'sessions.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync: AssessmentSessionState.__table__.create(sync))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    worker_a, worker_b = SqlSessionStore(sessions), SqlSessionStore(sessions)
+
+    await worker_a.put("challenge_hub", "s1", _state(1))
+    state = await worker_b.get("challenge_hub", "s1")
+    assert state == _state(1)
+
+    state["total_xp"] = 15
+    await worker_b.put("challenge_hub", "s1", state)
+    assert (await worker_a.get("challenge_hub", "s1"))["total_xp"] == 15
+
+    await worker_a.put("challenge_hub", "old", _state(2), ttl=0.01)
+    await asyncio.sleep(0.02)
+    assert await worker_b.get("challenge_hub", "old") is None
+    assert await worker_b.purge_expired() == 1
+
+    await worker_b.delete("challenge_hub", "s1")
+    assert await worker_a.get("challenge_hub", "s1") is None
+    await engine.dispose()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sql"])
+async def test_load_script_smoke_keeps_the_store_bounded(tmp_path, monkeypatch, backend):
+    """scripts.load_assessment_sessions at a small scale: real hub path, bounded store."""
+    from app.assessment import challenge_hub
+    from scripts.load_assessment_sessions import _FakeDB, _build_store, _fallback_questions, _play_session
+
+    monkeypatch.setattr(challenge_hub, "generate_subject_questions", _fallback_questions)
+    store, engine = await _build_store(backend, 10, tmp_path)
+    monkeypatch.setattr(challenge_hub, "session_store", store)
+    db = _FakeDB()
+    try:
+        for _ in range(40):
+            await _play_session(db, None)
+        last = await challenge_hub.get_session_data(str(db._next_id))
+        assert last is not None and last["session_id"] == str(db._next_id)
+        if backend == "memory":
+            assert len(store) == 10  # capped; the legacy dict would hold 40
+        else:
+            async with store._sessions()() as check:
+                rows = (await check.execute(select(func.count()).select_from(AssessmentSessionState))).scalar()
+            assert rows == 40
+    finally:
+        if engine is not None:
+            await engine.dispose()
@@ -0,0 +1,170 @@
+"""get_current_user identity cache: skips the SELECT, invalidates on writes."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.auth.dependencies import get_current_user
+from app.auth.service import create_access_token, revoke_all_refresh_tokens
+from app.auth.user_cache import StaleUserWrite, lock_user_for_update, user_cache
+from app.config import settings
+from app.users.models import RefreshToken, User
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_USER_CACHE_TTL_SECONDS", 60.0)
+    user_cache.clear()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync: User.__table__.create(sync))
+        await conn.run_sync(lambda sync: RefreshToken.__table__.create(sync))
+    selects: list[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            selects.append(statement)
+
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    factory.selects = selects  # type: ignore[attr-defined]
+    yield factory
+    user_cache.clear()
+    await engine.dispose()
+
+
+async def _make_user(sessions) -> uuid.UUID:
+    async with sessions() as db:
+        user = User(email=f"{uuid.uuid4().hex[:8]}@example.com", full_name="Ama Mensah")
+        db.add(user)
+        await db.commit()
+        return user.id
+
+
+def _bearer(user_id: uuid.UUID) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(user_id))
+
+
+async def test_second_request_skips_user_select(sessions):
+    user_id = await _make_user(sessions)
+    async with sessions() as db:
+        first = await get_current_user(_bearer(user_id), db)
+    async with sessions() as db:
+        before = len(sessions.selects)
+        second = await get_current_user(_bearer(user_id), db)
+        assert len(sessions.selects) == before
+        assert second.id == first.id and second.full_name == "Ama Mensah"
+
+        # The cached user is a normal persistent object: edits are saved.
+        second.full_name = "Ama Owusu"
+        await db.commit()
+
+    async with sessions() as db:
+        fresh = await get_current_user(_bearer(user_id), db)
+    assert fresh.full_name == "Ama Owusu"
+
+
+async def test_deactivation_and_revoke_invalidate(sessions):
+    user_id = await _make_user(sessions)
+    async with sessions() as db:
+        user = await get_current_user(_bearer(user_id), db)
+        user.is_active = False
+        await db.commit()
+
+    async with sessions() as db:
+        with pytest.raises(HTTPException) as exc:
+            await get_current_user(_bearer(user_id), db)
+    assert exc.value.status_code == 403
+
+    user_cache.put(user)
+    async with sessions() as db:
+        await revoke_all_refresh_tokens(user_id, db)
+    assert user_cache.get(user_id) is None
+
+
+async def test_ttl_zero_disables_cache(sessions, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_USER_CACHE_TTL_SECONDS", 0)
+    user_id = await _make_user(sessions)
+    for _ in range(2):
+        async with sessions() as db:
+            before = len(sessions.selects)
+            await get_current_user(_bearer(user_id), db)
+            assert len(sessions.selects) == before + 1
+
+
+async def test_writers_reload_the_row_instead_of_the_cached_snapshot(sessions):
+    user_id = await _make_user(sessions)
+    async with sessions() as db:
+        await get_current_user(_bearer(user_id), db)  # cache xp=0
+
+    # Another worker credits XP; this process never sees the invalidation.
+    async with sessions() as db:
+        await db.execute(update(User).where(User.id == user_id).values(xp=90))
+        await db.commit()
+
+    async with sessions() as db:
+        user = await get_current_user(_bearer(user_id), db)
+        assert user.xp == 0  # authentication is served from the snapshot
+        locked = await lock_user_for_update(db, user_id)
+        assert locked is user and user.xp == 90
+        user.xp += 10
+        await db.commit()
+
+    async with sessions() as db:
+        assert (await db.get(User, user_id)).xp == 100
+
+
+async def test_unlocked_cached_snapshot_cannot_overwrite_counters(sessions):
+    user_id = await _make_user(sessions)
+    async with sessions() as db:
+        await get_current_user(_bearer(user_id), db)
+
+    async with sessions() as db:
+        user = await get_current_user(_bearer(user_id), db)
+        user.learner_profile = {"learning_bookmarks": []}
+        with pytest.raises(StaleUserWrite, match="learner_profile"):
+            await db.commit()
+
+
+async def test_bookmark_toggle_keeps_another_workers_profile_writes(sessions):
+    from app.assessment.models import CurriculumLesson
+    from app.learning.router import toggle_bookmark
+
+    async with sessions() as db:
+        await (await db.connection()).run_sync(lambda sync: CurriculumLesson.__table__.create(sync))
+        db.add(
+            CurriculumLesson(
+                curriculum_id="maths-1",
+                title="Fractions",
+                subject="core_maths",
+                programme="core",
+                shs_levels=["SHS 1"],
+                unit_id="u1",
+                source_content={},
+                search_text="fractions",
+            )
+        )
+        await db.commit()
+    user_id = await _make_user(sessions)
+    async with sessions() as db:
+        await get_current_user(_bearer(user_id), db)
+
+    async with sessions() as db:
+        await db.execute(
+            update(User).where(User.id == user_id).values(learner_profile={"completed_lessons": ["maths-0"]})
+        )
+        await db.commit()
+
+    async with sessions() as db:
+        user = await get_current_user(_bearer(user_id), db)
+        await toggle_bookmark("maths-1", user=user, db=db)
+
+    async with sessions() as db:
+        profile = (await db.get(User, user_id)).learner_profile
+    assert profile["completed_lessons"] == ["maths-0"]
+    assert [b["curriculum_id"] for b in profile["learning_bookmarks"]] == ["maths-1"]
@@ -0,0 +1,140 @@
+"""Behavioural inputs: one UNION round trip, SQL tag sums, and the materialized per-user row."""
+from __future__ import annotations
+
+import random
+from collections import Counter
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.phases.models import UserSubjectPerformance
+from app.psychometrics.models import PsychometricOption
+from app.recommendations import behavioural_inputs
+from app.recommendations.behavioural_inputs import compute_behavioural_signals, load_behavioural_signals
+from app.recommendations.models import UserBehaviouralInputs
+from app.recommendations.service import collect_behavioural_inputs
+from app.users.models import User
+from scripts.bench_behavioural_inputs import collect_reference, same_signals, seed_bank, seed_learner
+
+
+@pytest.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'signals.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    statements: Counter[str] = Counter()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        statements[statement.lstrip().split(None, 1)[0].upper()] += 1
+
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as db:
+        await seed_bank(db, questions=12)
+        rng = random.Random(5)
+        factory.user_ids = [await seed_learner(db, rng, f"learner{n}") for n in range(6)]  # type: ignore[attr-defined]
+    factory.statements = statements  # type: ignore[attr-defined]
+    yield factory
+    await engine.dispose()
+
+
+async def _stored(sessions) -> set:
+    """Learners with a usable materialized payload."""
+    async with sessions() as db:
+        return set(
+            (
+                await db.execute(
+                    select(UserBehaviouralInputs.user_id).where(UserBehaviouralInputs.payload.is_not(None))
+                )
+            ).scalars()
+        )
+
+
+async def test_union_matches_the_serial_collection(sessions):
+    async with sessions() as db:
+        for user_id in sessions.user_ids:
+            sessions.statements.clear()
+            signals = await compute_behavioural_signals(db, user_id)
+            assert sum(sessions.statements.values()) == 1
+            assert same_signals(signals, await collect_reference(db, user_id))
+
+        user = await db.get(User, sessions.user_ids[0])
+        inputs = await collect_behavioural_inputs(db, user)
+        reference = await collect_reference(db, user.id)
+    assert inputs["trait_scores"] == pytest.approx(reference["trait_tags"])
+    # Same insertion order, so build_psychometric_prose breaks ties the same way.
+    assert list(inputs["trait_scores"]) == list(reference["trait_tags"])
+    assert inputs["subject_accuracies"] == {s: float(a or 0.5) for s, a in reference["subjects"]}
+    assert inputs["phases_completed"] == reference["phases_completed"]
+
+
+async def test_signals_are_materialized_and_served_from_the_row(sessions):
+    user_id = sessions.user_ids[0]
+    async with sessions() as db:
+        first = await load_behavioural_signals(db, user_id)
+        await db.rollback()
+    assert await _stored(sessions) == set()  # stored in the caller's transaction only
+
+    async with sessions() as db:
+        await load_behavioural_signals(db, user_id)
+        await db.commit()
+    assert await _stored(sessions) == {user_id}
+
+    sessions.statements.clear()
+    async with sessions() as db:
+        assert await load_behavioural_signals(db, user_id) == first
+    assert sum(sessions.statements.values()) == 1
+
+
+async def test_source_writes_invalidate_the_row(sessions):
+    learner, other = sessions.user_ids[:2]
+    async with sessions() as db:
+        for user_id in (learner, other):
+            await load_behavioural_signals(db, user_id)
+        await db.commit()
+
+    async with sessions() as db:
+        db.add(UserSubjectPerformance(user_id=learner, subject="chemistry", rolling_accuracy=0.9))
+        await db.commit()
+    assert await _stored(sessions) == {other}  # learner's row is a tombstone now
+
+    async with sessions() as db:
+        signals = await load_behavioural_signals(db, learner)
+        assert ["chemistry", 0.9] in signals["subjects"]
+        option = (await db.execute(select(PsychometricOption).limit(1))).scalar_one()
+        option.trait_tags = ["Curious"]
+        await db.commit()
+    assert await _stored(sessions) == set()
+
+
+@pytest.mark.parametrize("materialized", [False, True])
+async def test_rebuild_racing_a_write_is_not_stored(sessions, monkeypatch, materialized):
+    learner = sessions.user_ids[0]
+    if materialized:
+        async with sessions() as db:
+            await load_behavioural_signals(db, learner)
+            db.add(UserSubjectPerformance(user_id=learner, subject="french", rolling_accuracy=0.3))
+            await db.commit()  # row is now a tombstone with a generation
+
+    async def _compute_then_concurrent_write(db, user_id):
+        signals = await compute(db, user_id)
+        async with sessions() as writer:
+            writer.add(UserSubjectPerformance(user_id=user_id, subject="chemistry", rolling_accuracy=0.9))
+            await writer.commit()
+        return signals
+
+    compute = behavioural_inputs.compute_behavioural_signals
+    monkeypatch.setattr(behavioural_inputs, "compute_behavioural_signals", _compute_then_concurrent_write)
+    async with sessions() as db:
+        stale = await load_behavioural_signals(db, learner)
+        await db.commit()
+    assert ["chemistry", 0.9] not in stale["subjects"]
+    assert learner not in await _stored(sessions)
+
+    monkeypatch.setattr(behavioural_inputs, "compute_behavioural_signals", compute)
+    async with sessions() as db:
+        assert ["chemistry", 0.9] in (await load_behavioural_signals(db, learner))["subjects"]
+        await db.commit()
+    assert learner in await _stored(sessions)
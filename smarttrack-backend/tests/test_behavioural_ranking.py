@@ -0,0 +1,53 @@
+"""Compiled programme table ranking and the behavioural match cache."""
+from __future__ import annotations
+
+import random
+
+from app.recommendations.behavioural_match import (
+    ProgrammeTable,
+    behavioural_match_cache,
+    build_behavioural_match,
+    rank_programmes_behavioural,
+)
+from app.recommendations.cutoffs import load_knust_cutoffs
+from scripts.bench_behavioural_ranking import directory_catalogue, random_learner, rank_reference
+
+
+def test_table_ranking_matches_the_catalogue_walk():
+    rng = random.Random(3)
+    for catalogue in (load_knust_cutoffs(), directory_catalogue(3)):
+        table = ProgrammeTable(catalogue)
+        for _ in range(40):
+            families, subjects = random_learner(rng)
+            limit = rng.choice((1, 8, 25))
+            assert rank_programmes_behavioural(
+                family_scores=families, subject_accuracies=subjects, limit=limit, table=table
+            ) == rank_reference(catalogue, families, subjects, limit)
+    # Partial family scores fall back to the catalogue's own family label.
+    partial = {"Engineering": 90, "Science": 70}
+    assert rank_programmes_behavioural(family_scores=partial) == rank_reference(
+        load_knust_cutoffs(), partial, {}
+    )
+
+
+def test_behavioural_match_is_cached_per_input_fingerprint():
+    behavioural_match_cache.clear()
+    inputs = {
+        "programme_affinity_scores": {"engineering": 7.0, "health": 3.0},
+        "subject_accuracies": {"physics": 0.8, "biology": 0.4},
+        "behavioral_traits": {"Persistence": 0.7},
+        "skill_estimates": {"Math": 1.2},
+        "completed_lessons": ["algebra-1"],
+        "phases_completed": 1,
+        "session_count": 6,
+    }
+    first = build_behavioural_match(**inputs)
+    first["programmes"][0]["rank"] = 99  # callers renumber cards in place
+
+    again = build_behavioural_match(**dict(reversed(list(inputs.items()))))
+    assert behavioural_match_cache.hits == 1
+    assert again["programmes"][0]["rank"] == 1
+    assert [c["programme"] for c in again["programmes"]] == [c["programme"] for c in first["programmes"]]
+
+    build_behavioural_match(**{**inputs, "session_count": 7})
+    assert behavioural_match_cache.misses == 2
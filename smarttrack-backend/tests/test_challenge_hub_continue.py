@@ -1,11 +1,14 @@
 """Regression tests for Challenge Hub level continue / submit."""
 
 from app.assessment.challenge_hub import (
+    _SESSION_NAMESPACE,
     CORE_SUBJECTS,
-    _challenge_sessions,
+    _save_session,
     continue_challenge_level,
+    get_session_data,
     submit_answer,
 )
+from app.assessment.session_store import session_store
 
 
 class _DummyDBSession:
@@ -69,7 +72,7 @@ async def test_continue_level_allows_fresh_submits_on_level_two(monkeypatch):
         for subject in CORE_SUBJECTS
     }
 
-    _challenge_sessions[session_id] = {
+    await _save_session({
         "session_id": session_id,
         "db_session_id": db_session.id,
         "user_id": user_id,
@@ -85,7 +88,7 @@ async def test_continue_level_allows_fresh_submits_on_level_two(monkeypatch):
         "correct_count": 24,
         "wrong_count": 0,
         "started_at": "2026-01-01T00:00:00+00:00",
-    }
+    })
 
     async def fake_generate(subject, shs_level, level):
         return [
@@ -111,7 +114,7 @@ async def test_continue_level_allows_fresh_submits_on_level_two(monkeypatch):
         session_id=session_id,
     )
 
-    session = _challenge_sessions[session_id]
+    session = await get_session_data(session_id)
     assert result["challenge_level"] == 2
     assert session["challenge_level"] == 2
     assert session["status"] == "in_progress"
@@ -122,7 +125,7 @@ async def test_continue_level_allows_fresh_submits_on_level_two(monkeypatch):
 
     # First Level 2 answer for each subject must succeed (previously returned None).
     for subject in CORE_SUBJECTS:
-        feedback = submit_answer(
+        feedback = await submit_answer(
             session_id=session_id,
             subject=subject,
             question_index=0,
@@ -133,5 +136,8 @@ async def test_continue_level_allows_fresh_submits_on_level_two(monkeypatch):
         assert feedback["is_correct"] is True
         assert feedback["xp_earned"] == 5
 
-    # Clean up in-memory session
-    _challenge_sessions.pop(session_id, None)
+    # Level 2 answers were persisted back to the store.
+    session = await get_session_data(session_id)
+    assert session["total_xp"] == 120 + 5 * len(CORE_SUBJECTS)
+
+    await session_store.delete(_SESSION_NAMESPACE, session_id)
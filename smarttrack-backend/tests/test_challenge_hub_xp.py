@@ -1,16 +1,22 @@
 """Regression tests for Challenge Hub XP persistence before Level 3."""
 
+import pytest
+
+from app.assessment import challenge_hub
 from app.assessment.challenge_hub import (
-    _challenge_sessions,
+    _SESSION_NAMESPACE,
+    _save_session,
     complete_session,
     credit_pending_xp,
+    get_session_data,
 )
+from app.assessment.session_store import session_store
+from app.leaderboards import service as leaderboards
+from app.users.models import User
 
 
-class _DummyUser:
-    def __init__(self, user_id: str = "user-1", xp: int = 100):
-        self.id = user_id
-        self.xp = xp
+def _user(user_id: str = "user-1", xp: int = 100) -> User:
+    return User(id=user_id, xp=xp)  # transient: never attached to a session
 
 
 class _DummyDBSession:
@@ -25,7 +31,7 @@ class _DummyDBSession:
 
 
 class _FakeDB:
-    def __init__(self, db_session: _DummyDBSession, user: _DummyUser):
+    def __init__(self, db_session: _DummyDBSession, user: User):
         self._db_session = db_session
         self._user = user
         self.added = []
@@ -47,13 +53,21 @@ class _FakeDB:
         return None
 
 
-def _seed_level_complete_session(
+@pytest.fixture(autouse=True)
+def _lock_returns_the_fake_user(monkeypatch):
+    async def _lock(db, user_id):
+        return await db.get(User, user_id)
+
+    monkeypatch.setattr(challenge_hub, "lock_user_for_update", _lock)
+
+
+async def _seed_level_complete_session(
     session_id: str = "xp-session",
     user_id: str = "user-1",
     total_xp: int = 40,
     xp_credited: int = 0,
 ):
-    _challenge_sessions[session_id] = {
+    await _save_session({
         "session_id": session_id,
         "db_session_id": 1,
         "user_id": user_id,
@@ -83,13 +97,15 @@ def _seed_level_complete_session(
         "correct_count": 8,
         "wrong_count": 0,
         "started_at": "2026-01-01T00:00:00+00:00",
-    }
+    })
     return session_id
 
 
-async def test_credit_pending_xp_on_level_complete_persists_to_user():
-    session_id = _seed_level_complete_session(total_xp=40, xp_credited=0)
-    user = _DummyUser(xp=100)
+async def test_credit_pending_xp_on_level_complete_persists_to_user(monkeypatch):
+    credited: list[int] = []
+    monkeypatch.setattr(leaderboards, "credit_xp", lambda user, earned, **_: credited.append(earned))
+    session_id = await _seed_level_complete_session(total_xp=40, xp_credited=0)
+    user = _user(xp=100)
     db = _FakeDB(_DummyDBSession(), user)
 
     result = await credit_pending_xp(db, user.id, session_id)
@@ -97,19 +113,21 @@ async def test_credit_pending_xp_on_level_complete_persists_to_user():
     assert result["xp_credited_delta"] == 40
     assert result["user_xp"] == 140
     assert user.xp == 140
-    assert _challenge_sessions[session_id]["xp_credited"] == 40
+    assert credited == [40]  # staged for the Overall and weekly boards
+    assert (await get_session_data(session_id))["xp_credited"] == 40
 
     # Idempotent: second credit adds nothing
     again = await credit_pending_xp(db, user.id, session_id)
     assert again["xp_credited_delta"] == 0
     assert user.xp == 140
+    assert credited == [40]
 
-    _challenge_sessions.pop(session_id, None)
+    await session_store.delete(_SESSION_NAMESPACE, session_id)
 
 
 async def test_complete_after_level_credit_only_adds_remaining_xp():
-    session_id = _seed_level_complete_session(total_xp=60, xp_credited=40)
-    user = _DummyUser(xp=140)
+    session_id = await _seed_level_complete_session(total_xp=60, xp_credited=40)
+    user = _user(xp=140)
     db = _FakeDB(_DummyDBSession(), user)
 
     summary = await complete_session(db, user.id, session_id)
@@ -120,4 +138,4 @@ async def test_complete_after_level_credit_only_adds_remaining_xp():
     assert user.xp == 160
     assert db._db_session.status == "completed"
 
-    _challenge_sessions.pop(session_id, None)
+    await session_store.delete(_SESSION_NAMESPACE, session_id)
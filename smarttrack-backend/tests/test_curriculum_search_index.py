@@ -0,0 +1,133 @@
+"""Curriculum search index: same ranking as the full scan, incremental upserts."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from app.learning.search_index import (
+    MIN_SCORE,
+    CurriculumSearchIndex,
+    normalise,
+    search_score,
+)
+
+TITLES = [
+    ("core_maths", "Simultaneous Linear Equations"),
+    ("core_maths", "Quadratic Equations"),
+    ("core_maths", "Operations with Fractions"),
+    ("integrated_science", "Photosynthesis in Green Plants"),
+    ("integrated_science", "Electronegativity and Bonding"),
+    ("integrated_science", "Resistors in Series and Parallel"),
+    ("english", "Fact vs Opinion in Non-Fiction"),
+    ("english", "Forms of Adjectives"),
+    ("social_studies", "Map Reading and Interpretation"),
+]
+
+
+def _row(i: int, subject: str, title: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        curriculum_id=f"L{i}",
+        title=title,
+        subject=subject,
+        estimated_minutes=10,
+        difficulty=1,
+        xp_reward=10,
+        search_text=f"{title} {subject} worked examples and practice".lower(),
+    )
+
+
+def _scan(rows, query: str, limit: int = 20) -> list[str]:
+    q = normalise(query)
+    ranked = [
+        (search_score(q, normalise(r.title), normalise(r.search_text)), r) for r in rows
+    ]
+    if q:
+        ranked = [item for item in ranked if item[0] >= MIN_SCORE]
+    ranked.sort(key=lambda item: (-item[0], item[1].subject, item[1].title, item[1].curriculum_id))
+    return [r.curriculum_id for _, r in ranked[:limit]]
+
+
+def test_index_matches_full_scan():
+    rows = [_row(i, subject, title) for i, (subject, title) in enumerate(TITLES)]
+    index = CurriculumSearchIndex()
+    index.rebuild(rows)
+    for query in (
+        "",
+        "equations",
+        "quadratc",
+        "photo",
+        "fact vs",
+        "resstors",
+        "map reading",
+        "series and par",
+        "worked examples",
+        "zzz",
+    ):
+        for limit in (1, 3, 20):
+            got = [doc.curriculum_id for _, doc in index.search(query, limit=limit)]
+            assert got == _scan(rows, query, limit), (query, limit)
+
+
+def test_upsert_and_remove_refresh_postings():
+    index = CurriculumSearchIndex()
+    index.rebuild([_row(0, "core_maths", "Fractions")])
+    assert [d.curriculum_id for _, d in index.search("fractions")] == ["L0"]
+
+    index.upsert(_row(0, "core_maths", "Percentages"))
+    assert index.search("fractions") == []
+    assert [d.title for _, d in index.search("percent")] == ["Percentages"]
+
+    index.remove("L0")
+    assert len(index) == 0
+    assert index.search("percent") == []
+
+
+def test_subject_filter():
+    rows = [_row(i, subject, title) for i, (subject, title) in enumerate(TITLES)]
+    index = CurriculumSearchIndex()
+    index.rebuild(rows)
+    results = index.search("equations", subject="Integrated_Science")
+    assert all(doc.subject == "integrated_science" for _, doc in results)
+
+
+async def test_ensure_fresh_pulls_new_and_edited_rows(tmp_path, monkeypatch):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.assessment.models import CurriculumLesson
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "CURRICULUM_SEARCH_REFRESH_SECONDS", 0.0)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'lessons.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync: CurriculumLesson.__table__.create(sync))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    def _lesson(cid: str, title: str) -> CurriculumLesson:
+        return CurriculumLesson(
+            curriculum_id=cid,
+            title=title,
+            subject="core_maths",
+            programme="Both",
+            shs_levels=["SHS 1"],
+            unit_id="u1",
+            source_content={},
+            search_text=title.lower(),
+            ai_content_by_level={},
+        )
+
+    index = CurriculumSearchIndex()
+    async with sessions() as db:
+        db.add(_lesson("a", "Fractions"))
+        await db.commit()
+        await index.ensure_fresh(db)
+        assert len(index) == 1
+
+        db.add(_lesson("b", "Percentages"))
+        lesson_a = await db.get(CurriculumLesson, 1)
+        lesson_a.title = "Decimal Fractions"
+        await db.commit()
+        await index.ensure_fresh(db)
+
+    assert len(index) == 2
+    assert index.get("a").title == "Decimal Fractions"
+    assert [d.curriculum_id for _, d in index.search("percentages")] == ["b"]
+    await engine.dispose()
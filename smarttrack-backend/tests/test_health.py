@@ -5,3 +5,23 @@ async def test_health(client):
     response = await client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok", "service": "atlas-api"}
+
+
+@pytest.mark.asyncio
+async def test_request_latency_is_recorded(client):
+    response = await client.get("/health")
+    assert "app;dur=" in response.headers["server-timing"]
+    stats = (await client.get("/health/request-latency")).json()
+    assert stats["routes"]["GET /health"]["count"] >= 1
+    assert "user_cache" in stats
+
+
+@pytest.mark.asyncio
+async def test_prometheus_metrics_endpoint(client):
+    await client.get("/health")
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'smarttrack_http_request_seconds_count{route="GET /health"}' in body
+    assert 'smarttrack_llm_circuit{field="open"}' in body
@@ -1,7 +1,14 @@
 """Tests for KNUST Decision Tree alternate ranker (gate + soft teacher)."""
 
+import random
+
 from ml_aspect.knust_dt.soft_label import programme_soft_score
-from ml_aspect.knust_dt.predict import predict_knust_dt_alternate
+from ml_aspect.knust_dt.predict import (
+    features_matrix,
+    grades_to_dt_features,
+    predict_knust_dt_alternate,
+    predict_knust_dt_batch,
+)
 
 
 def test_soft_score_prefers_health_for_bio_chem_profile():
@@ -105,3 +112,109 @@ def test_dt_predict_only_returns_eligible_or_stretch():
     )
     assert all(r["role"] == "alternate" for r in out)
     assert all(r["eligibility_band"] in {"eligible", "stretch"} for r in out)
+
+
+_SUBJECTS = [
+    "English Language",
+    "Core Mathematics",
+    "Biology",
+    "Chemistry",
+    "Physics",
+    "Elective Mathematics",
+    "Integrated Science",
+    "Social Studies",
+]
+
+
+def _cohort(size: int, seed: int = 3):
+    from app.recommendations.cutoffs import apply_cutoff_boundaries
+
+    rng = random.Random(seed)
+    features, payloads = [], []
+    for _ in range(size):
+        grades = [
+            {"subject": s, "grade": rng.choice(["A1", "B2", "B3", "C4", "C5", "C6"])}
+            for s in _SUBJECTS
+            if rng.random() < 0.9
+        ]
+        features.append(
+            grades_to_dt_features(
+                academic_grades=grades,
+                behavioral_traits={"analytical": rng.random(), "empathy": rng.random()},
+                skill_estimates={"Math": rng.uniform(-3, 3)},
+            )
+        )
+        payloads.append(apply_cutoff_boundaries(grades=grades, limit_per_band=40))
+    return features, payloads
+
+
+def test_features_matrix_fills_training_defaults():
+    X = features_matrix([{"aggregate": 12, "trait_empathy": 80}, {}], ["aggregate", "pts_biology", "trait_empathy"])
+    assert X.dtype.name == "float32"
+    assert X.tolist() == [[12.0, 9.0, 80.0], [24.0, 9.0, 50.0]]
+
+
+def test_batch_matches_single_row_ranking():
+    features, payloads = _cohort(60)
+    batch = predict_knust_dt_batch(features, knust_payloads=payloads, top_n=6)
+    assert len(batch) == 60
+    assert any(batch)
+    for f, p, got in zip(features, payloads, batch):
+        assert got == predict_knust_dt_alternate(f, knust_payload=p, top_n=6)
+        assert all(r["eligibility_band"] in {"eligible", "stretch"} for r in got)
+        bands = [r["eligibility_band"] for r in got]
+        assert bands == sorted(bands, key=lambda b: b != "eligible")
+
+
+def test_batch_shared_payload_and_unknown_programme():
+    features, payloads = _cohort(5)
+    shared = {
+        "bands": {
+            "eligible": [{"programme": "BSc Not A Model Class", "family": "Engineering"}],
+            "stretch": list(payloads[0]["bands"]["stretch"]) or list(payloads[0]["bands"]["eligible"]),
+        }
+    }
+    out = predict_knust_dt_batch(features, knust_payloads=shared, top_n=50)
+    for ranked in out:
+        assert ranked[0]["programme"] == "BSc Not A Model Class"
+        assert ranked[0]["confidence"] == 0.0
+    assert predict_knust_dt_batch(features, knust_payloads=None) == [[] for _ in features]
+
+
+def test_score_profiles_batch_reuses_gate_per_aggregate():
+    from app.recommendations.ml_career import score_profiles_batch
+
+    grades = [{"subject": s, "grade": "B3"} for s in _SUBJECTS]
+    results = score_profiles_batch(
+        [{"academic_grades": grades}, {"academic_grades": grades, "behavioral_traits": {"creative": 90}}],
+        top_n=3,
+    )
+    assert len(results) == 2
+    assert all(r["aggregate"] == results[0]["aggregate"] for r in results)
+    assert all(len(r["predictions"]) <= 3 for r in results)
+    assert all(p["programme"] for r in results for p in r["programmes"])
+
+
+async def test_batch_score_route_is_rate_limited_per_account(monkeypatch):
+    import uuid
+    from types import SimpleNamespace
+
+    import httpx
+    from fastapi import FastAPI
+
+    from app.auth.dependencies import get_current_user
+    from app.config import settings
+    from app.recommendations import router as recommendations
+
+    monkeypatch.setattr(settings, "ML_BATCH_RATE_LIMIT", 2)
+    monkeypatch.setattr(recommendations, "score_profiles_batch", lambda profiles, **_: [{} for _ in profiles])
+    api = FastAPI()
+    api.include_router(recommendations.router)
+    accounts = iter([uuid.uuid4()] * 3 + [uuid.uuid4()])
+    api.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=next(accounts))
+
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        body = {"profiles": [{"academic_grades": []}]}
+        codes = [(await client.post("/recommendations/batch-score", json=body)).status_code for _ in range(4)]
+    assert codes == [200, 200, 429, 200]  # the fourth call is another account
@@ -0,0 +1,231 @@
+"""Materialized leaderboards: order-statistics index, transactional XP credits, ETag top-N."""
+from __future__ import annotations
+
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app.assessment.models import Leaderboard
+from app.auth.dependencies import get_current_user
+from app.config import settings
+from app.database import Base, get_db
+from app.leaderboards.ranking import RankIndex
+from app.leaderboards.router import router as leaderboards_router
+from app.leaderboards.service import WEEKLY_DOMAIN, get_position, get_top, leaderboards, week_category
+from app.users.gamification import apply_xp
+from app.users.models import User
+
+_PROGRAMME = "General Science"
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LEADERBOARD_REFRESH_SECONDS", 3600)
+    leaderboards.clear()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'boards.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    statements: Counter[str] = Counter()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        statements[statement.lstrip().split(None, 1)[0].upper()] += 1
+
+    factory = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with factory() as db:
+        for name in ("Ama", "Kofi", "Esi", "Yaw", "Akua"):
+            db.add(User(email=f"{name.lower()}@example.com", full_name=name, programme=_PROGRAMME))
+        await db.commit()
+    factory.statements = statements  # type: ignore[attr-defined]
+    yield factory
+    leaderboards.clear()
+    await engine.dispose()
+
+
+async def _earn(sessions, name: str, xp: int, *, category: str | None = None, commit: bool = True) -> None:
+    async with sessions() as db:
+        user = (await db.execute(select(User).where(User.full_name == name))).scalar_one()
+        apply_xp(user, xp, category=category)
+        if commit:
+            await db.commit()
+        else:
+            await db.rollback()
+
+
+async def _user_id(sessions, name: str):
+    async with sessions() as db:
+        return (await db.execute(select(User.id).where(User.full_name == name))).scalar_one()
+
+
+def test_rank_index_matches_a_sorted_list():
+    rng = random.Random(5)
+    index = RankIndex(seed=1)
+    reference: dict[int, tuple[int, float]] = {}
+    for step in range(3000):
+        member = rng.randrange(120)
+        if rng.random() < 0.2:
+            index.remove(member)
+            reference.pop(member, None)
+        elif rng.random() < 0.01:
+            index.rebuild((m, s, t) for m, (s, t) in reference.items())
+        else:
+            reference[member] = (rng.randrange(30), float(step))
+            index.set(member, *reference[member])
+
+    order = sorted(reference, key=lambda m: (-reference[m][0], reference[m][1], str(m)))
+    assert [m for _rank, m, _score in index.top(len(order) + 3)] == order
+    assert [index.rank(m) for m in order] == list(range(1, len(order) + 1))
+    middle = order[len(order) // 2]
+    assert [m for _rank, m, _score in index.around(middle, 2)] == order[
+        len(order) // 2 - 2 : len(order) // 2 + 3
+    ]
+    assert index.window(len(order), 5) == [(len(order), order[-1], float(reference[order[-1]][0]))]
+
+
+async def test_xp_is_credited_at_commit_and_dropped_on_rollback(sessions):
+    await _earn(sessions, "Ama", 30, category="core-mathematics")
+    await _earn(sessions, "Kofi", 50, commit=False)
+
+    async with sessions() as db:
+        rows = (
+            await db.execute(select(Leaderboard.domain, Leaderboard.category, Leaderboard.score))
+        ).all()
+    assert sorted(rows) == sorted(
+        [
+            (_PROGRAMME, "Overall", 30.0),
+            (_PROGRAMME, "Core Mathematics", 30.0),
+            (WEEKLY_DOMAIN, week_category(), 30.0),
+        ]
+    )
+
+    await _earn(sessions, "Ama", 10, category="Core Mathematics")
+    async with sessions() as db:
+        top, _etag = await get_top(db, _PROGRAMME, "Core Mathematics")
+    assert [(e["user_name"], e["score"]) for e in top["entries"]] == [("Ama", 40.0)]
+
+
+async def test_commits_update_loaded_boards_without_rereading(sessions):
+    for name, xp in (("Ama", 30), ("Kofi", 50), ("Esi", 20), ("Yaw", 40)):
+        await _earn(sessions, name, xp)
+    yaw = await _user_id(sessions, "Yaw")
+
+    async with sessions() as db:
+        before = await get_position(db, _PROGRAMME, "Overall", yaw, radius=1)
+    assert (before["rank"], before["total"]) == (2, 4)
+    assert [(e["user_name"], e["is_me"]) for e in before["entries"]] == [
+        ("Kofi", False),
+        ("Yaw", True),
+        ("Ama", False),
+    ]
+
+    await _earn(sessions, "Yaw", 15)
+    sessions.statements.clear()
+    async with sessions() as db:
+        after = await get_position(db, _PROGRAMME, "Overall", yaw, radius=1)
+    assert (after["rank"], after["score"]) == (1, 55.0)
+    # Only the display-name lookup: the board itself was updated in memory.
+    assert sessions.statements == {"SELECT": 1}
+
+
+async def test_refresh_picks_up_other_workers_incrementally(sessions, monkeypatch):
+    await _earn(sessions, "Ama", 30)
+    async with sessions() as db:
+        await get_top(db, _PROGRAMME, "Overall")
+
+    # Another worker's commit: the row changes, but not in this process's memory.
+    akua = await _user_id(sessions, "Akua")
+    async with sessions() as db:
+        await db.execute(
+            insert(Leaderboard).values(
+                domain=_PROGRAMME,
+                category="Overall",
+                user_id=akua,
+                score=90.0,
+                last_updated=datetime.now(timezone.utc) + timedelta(seconds=1),
+            )
+        )
+        await db.commit()
+
+    async with sessions() as db:
+        stale, _etag = await get_top(db, _PROGRAMME, "Overall")
+    assert [e["user_name"] for e in stale["entries"]] == ["Ama"]
+
+    monkeypatch.setattr(settings, "LEADERBOARD_REFRESH_SECONDS", 0)
+    async with sessions() as db:
+        fresh, _etag = await get_top(db, _PROGRAMME, "Overall")
+    assert [(e["rank"], e["user_name"]) for e in fresh["entries"]] == [(1, "Akua"), (2, "Ama")]
+
+
+async def test_top_n_etag_and_my_rank_routes(sessions):
+    for name, xp in (("Ama", 30), ("Kofi", 50), ("Esi", 20)):
+        await _earn(sessions, name, xp, category="integrated-science")
+    esi = await _user_id(sessions, "Esi")
+
+    api = FastAPI()
+    api.include_router(leaderboards_router)
+
+    async def _db():
+        async with sessions() as db:
+            yield db
+
+    async def _user(db=Depends(get_db)):
+        return await db.get(User, esi)
+
+    api.dependency_overrides[get_db] = _db
+    api.dependency_overrides[get_current_user] = _user
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/leaderboards/General Science/Integrated Science", params={"limit": 2})
+        etag = first.headers["etag"]
+        assert [e["user_name"] for e in first.json()["entries"]] == ["Kofi", "Ama"]
+
+        sessions.statements.clear()
+        cached = await client.get(
+            "/leaderboards/General Science/integrated-science",
+            params={"limit": 2},
+            headers={"If-None-Match": etag},
+        )
+        assert cached.status_code == 304 and cached.headers["etag"] == etag
+        assert sessions.statements == {"SELECT": 1}  # the viewer lookup only
+
+        # Movement below the top 2 keeps the ETag; a change inside it does not.
+        await _earn(sessions, "Esi", 5)
+        assert (
+            await client.get(
+                "/leaderboards/General Science/Integrated Science",
+                params={"limit": 2},
+                headers={"If-None-Match": etag},
+            )
+        ).status_code == 304
+        await _earn(sessions, "Esi", 40, category="Integrated Science")
+        moved = await client.get(
+            "/leaderboards/General Science/Integrated Science",
+            params={"limit": 2},
+            headers={"If-None-Match": etag},
+        )
+        assert moved.status_code == 200 and moved.headers["etag"] != etag
+        assert moved.json()["entries"][0] == {
+            "rank": 1,
+            "user_name": "Esi",
+            "school": "",
+            "score": 60.0,
+            "is_me": False,
+        }
+
+        me = (await client.get("/leaderboards/weekly/me")).json()
+        assert (me["scope"], me["category"], me["rank"], me["score"], me["total"]) == (
+            "weekly",
+            week_category(),
+            1,
+            65.0,
+            3,
+        )
+        weekly = (await client.get("/leaderboards/weekly")).json()
+        assert [e["user_name"] for e in weekly["entries"]] == ["Esi", "Kofi", "Ama"]
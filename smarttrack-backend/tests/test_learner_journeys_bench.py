@@ -0,0 +1,50 @@
+"""Load-test harness smoke run: every journey step succeeds against the mock providers."""
+from __future__ import annotations
+
+import argparse
+
+from app import database
+from app.config import settings
+from scripts import bench_learner_journeys
+from scripts.mock_llm_server import MockLLMApp
+
+
+def test_mock_chat_replies_match_the_prompt_shape():
+    mock = MockLLMApp(latency_s=0)
+
+    def _reply(prompt: str) -> str:
+        return mock.canned_reply({"messages": [{"role": "user", "content": prompt}]})
+
+    batch = _reply("... with exactly 3 objects in ITEM order ...")
+    array = _reply("Return ONLY a valid JSON array with exactly 2 objects.")
+    single = _reply("The item MUST be about exactly this topic: Fractions.\nConcept focus: parts.")
+    assert batch.count('"question_text"') == 3 and batch.startswith('{"items"')
+    assert array.startswith("[") and array.count('"cognitive"') == 2
+    assert "lesson on Fractions" in single
+
+
+async def test_two_learner_journeys_complete_without_errors(tmp_path, monkeypatch):
+    # main() swaps in its own database and mock keys; restore them afterwards.
+    monkeypatch.setattr(database, "AsyncSessionLocal", database.AsyncSessionLocal)
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", settings.DEEPSEEK_API_KEY)
+    monkeypatch.setattr(settings, "NVIDIA_API_KEY", settings.NVIDIA_API_KEY)
+    args = argparse.Namespace(
+        learners=2,
+        journeys=1,
+        llm_latency_ms=0.0,
+        llm_jitter_ms=0.0,
+        error_rate=0.0,
+        batch_answers=True,
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'journeys.db'}",
+    )
+
+    report = await bench_learner_journeys.main(args)
+
+    assert report["journeys"] == 2
+    assert {step: row["errors"] for step, row in report["steps"].items()} == {
+        step: 0 for step in report["steps"]
+    }
+    assert {"register", "start_level", "submit_answers", "complete_session", "recommendations"} <= set(
+        report["steps"]
+    )
+    assert report["mock_requests"].get("chat", 0) > 0
@@ -0,0 +1,151 @@
+"""Learner progress snapshot: one SELECT per progress table per request, cached catalogue."""
+from __future__ import annotations
+
+import re
+from collections import Counter
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app.config import settings
+from app.database import Base
+from app.notifications.activity import get_learner_activity_snapshot
+from app.phases.models import Level, Phase
+from app.phases.service import get_progression, upcoming_prefetch_targets
+from app.phases.snapshot import invalidate_phase_catalogue, load_progress_snapshot
+from app.progress.service import build_personal_progress
+from app.recommendations.eligibility import evaluate_recommendation_eligibility
+from app.users.models import User
+
+_FROM = re.compile(r"\bFROM (\w+)", re.IGNORECASE)
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PHASE_CATALOGUE_TTL_SECONDS", 300.0)
+    invalidate_phase_catalogue()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'progress.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    selects: Counter[str] = Counter()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            match = _FROM.search(statement)
+            if match:
+                selects[match.group(1)] += 1
+
+    factory = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with factory() as db:
+        for number, name in ((1, "Foundation"), (2, "Growth")):
+            phase = Phase(number=number, name=name, shs_mapping=f"SHS {number}")
+            db.add(phase)
+            await db.flush()
+            for lv in range(1, 4):
+                db.add(Level(phase_id=phase.id, number=lv, difficulty_baseline=lv))
+        db.add(User(email="ama@example.com", full_name="Ama Mensah"))
+        await db.commit()
+    invalidate_phase_catalogue()
+    selects.clear()
+    factory.selects = selects  # type: ignore[attr-defined]
+    yield factory
+    invalidate_phase_catalogue()
+    await engine.dispose()
+
+
+async def _user(db) -> User:
+    from sqlalchemy import select
+
+    return (await db.execute(select(User))).scalar_one()
+
+
+async def test_request_reads_each_progress_table_once(sessions):
+    async with sessions() as db:
+        user = await _user(db)
+        sessions.selects.clear()
+
+        progression = await get_progression(db, user.id)
+        progress = await build_personal_progress(db, user)
+        activity = await get_learner_activity_snapshot(db, user)
+        eligibility = await evaluate_recommendation_eligibility(db, user)
+        targets = await upcoming_prefetch_targets(db, user.id)
+
+    assert sessions.selects["phases"] == 1
+    assert sessions.selects["levels"] == 0
+    assert sessions.selects["user_phase_progress"] == 1
+    assert sessions.selects["user_level_progress"] == 1
+
+    assert progression["current_phase_number"] == 1
+    assert [lv["status"] for lv in progression["phases"][0]["levels"]] == [
+        "available",
+        "locked",
+        "locked",
+    ]
+    assert progress.stats.current_phase == 1
+    assert activity["challenge_progress"]["levels_completed"] == 0
+    assert eligibility["eligible"] is False
+    assert targets[0] == progression["phases"][0]["levels"][0]["id"]
+
+
+async def test_catalogue_is_cached_across_requests(sessions):
+    async with sessions() as db:
+        await load_progress_snapshot(db, (await _user(db)).id)
+    assert sessions.selects["phases"] == 1
+
+    async with sessions() as db:
+        user = await _user(db)
+        sessions.selects.clear()
+        await get_progression(db, user.id)
+    assert sessions.selects["phases"] == 0
+    assert sessions.selects["user_level_progress"] == 1
+
+    invalidate_phase_catalogue()
+    async with sessions() as db:
+        await load_progress_snapshot(db, (await _user(db)).id)
+    assert sessions.selects["phases"] == 1
+
+
+async def test_activity_uses_catalogue_and_sees_status_changes(sessions):
+    async with sessions() as db:
+        user = await _user(db)
+        snap = await load_progress_snapshot(db, user.id)
+        growth = snap.phases[1]
+        snap.level_progress[snap.phases[0].levels[0].id].status = "completed"
+        snap.level_progress[growth.levels[1].id].status = "in_progress"
+        await db.commit()
+        sessions.selects.clear()
+
+        activity = await get_learner_activity_snapshot(db, user)
+
+    assert sessions.selects["levels"] == 0
+    assert sessions.selects["phases"] == 0
+    assert sessions.selects["user_level_progress"] == 0
+    point = activity["challenge_progress"]["continue_point"]
+    assert point["phase_name"] == "Growth"
+    assert point["level_number"] == 2
+    assert activity["last_completed_level"]["phase_number"] == 1
+
+
+async def test_unseeded_catalogue_is_not_pinned(sessions):
+    from fastapi import HTTPException
+    from sqlalchemy import delete
+
+    async with sessions() as db:
+        await db.execute(delete(Level))
+        await db.execute(delete(Phase))
+        await db.commit()
+    async with sessions() as db:
+        user = await _user(db)
+        with pytest.raises(HTTPException) as exc:
+            await load_progress_snapshot(db, user.id)
+    assert exc.value.status_code == 503
+
+    async with sessions() as db:
+        db.add(Phase(number=1, name="Foundation", shs_mapping="SHS 1"))
+        await db.commit()
+    async with sessions() as db:
+        snap = await load_progress_snapshot(db, (await _user(db)).id)
+    assert [p.name for p in snap.phases] == ["Foundation"]
@@ -0,0 +1,144 @@
+"""AI lesson cache: one generation per lesson/level/version, merged writes, resumable warm-up."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.assessment.models import CurriculumLesson
+from app.learning import lesson_cache
+from app.learning.service import AI_CONTENT_VERSION, TutorUnavailable
+
+
+class _FakePipeline:
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+        self.calls: list[tuple[str, str]] = []
+        self.fail_titles: set[str] = set()
+
+    async def __call__(self, *, title, subject, shs_level, source_content):
+        self.calls.append((title, shs_level))
+        await asyncio.sleep(self.delay)
+        if title in self.fail_titles:
+            raise TutorUnavailable("provider down")
+        return {"title": title, "level": shs_level, "sections": ["..."]}
+
+
+@pytest.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'lessons.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync: CurriculumLesson.__table__.create(sync))
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as db:
+        for cid, subject, levels in (
+            ("math-1", "Core Mathematics", ["SHS 1", "SHS 2"]),
+            ("math-2", "Core Mathematics", ["SHS 1"]),
+            ("bio-1", "Biology", ["SHS 2"]),
+        ):
+            db.add(
+                CurriculumLesson(
+                    curriculum_id=cid,
+                    title=cid.upper(),
+                    subject=subject,
+                    programme="core",
+                    shs_levels=levels,
+                    unit_id="u1",
+                    source_content={"text": cid},
+                    search_text=cid,
+                    ai_content_by_level={"SHS 1": {"title": "stale"}},
+                    ai_content_version="v1",
+                )
+            )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    fake = _FakePipeline()
+    monkeypatch.setattr(lesson_cache, "generate_ai_lesson", fake)
+    return fake
+
+
+async def _row(sessions, cid: str) -> CurriculumLesson:
+    async with sessions() as db:
+        return (
+            await db.execute(select(CurriculumLesson).where(CurriculumLesson.curriculum_id == cid))
+        ).scalar_one()
+
+
+async def test_a_class_opening_one_lesson_generates_it_once(sessions, pipeline):
+    lesson = await _row(sessions, "math-1")
+    results = await asyncio.gather(
+        *(lesson_cache.get_or_generate_lesson(lesson, "SHS 1", sessions=sessions) for _ in range(40))
+    )
+    assert pipeline.calls == [("MATH-1", "SHS 1")]
+    assert all(r == results[0] for r in results)
+    assert lesson_cache.inflight_count() == 0
+
+    stored = await _row(sessions, "math-1")
+    assert stored.ai_content_version == AI_CONTENT_VERSION
+    # The v1 entry for SHS 1 was replaced, not merged with stale content.
+    assert stored.ai_content_by_level == {"SHS 1": results[0]}
+    assert lesson_cache.cached_lesson(stored, "SHS 1") == results[0]
+
+
+async def test_levels_generated_together_are_both_kept(sessions, pipeline):
+    lesson = await _row(sessions, "math-1")
+    await asyncio.gather(
+        lesson_cache.get_or_generate_lesson(lesson, "SHS 1", sessions=sessions),
+        lesson_cache.get_or_generate_lesson(lesson, "SHS 2", sessions=sessions),
+    )
+    stored = await _row(sessions, "math-1")
+    assert set(stored.ai_content_by_level) == {"SHS 1", "SHS 2"}
+
+    # A request holding the stale row reuses what another request stored.
+    await lesson_cache.get_or_generate_lesson(lesson, "SHS 2", sessions=sessions)
+    assert len(pipeline.calls) == 2
+
+
+async def test_failure_reaches_every_waiter_and_is_not_cached(sessions, pipeline):
+    pipeline.fail_titles.add("BIO-1")
+    lesson = await _row(sessions, "bio-1")
+    results = await asyncio.gather(
+        *(lesson_cache.get_or_generate_lesson(lesson, "SHS 2", sessions=sessions) for _ in range(5)),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, TutorUnavailable) for r in results)
+    assert len(pipeline.calls) == 1
+    assert lesson_cache.inflight_count() == 0
+
+    pipeline.fail_titles.clear()
+    await lesson_cache.get_or_generate_lesson(lesson, "SHS 2", sessions=sessions)
+    assert len(pipeline.calls) == 2
+
+
+async def test_warm_up_is_bounded_filtered_and_resumable(sessions, pipeline, tmp_path):
+    progress = tmp_path / "warmup.json"
+    pipeline.fail_titles.add("MATH-2")
+
+    counts = await lesson_cache.warm_lessons(
+        subject="Core Mathematics", concurrency=2, progress_path=progress, sessions=sessions
+    )
+    assert counts == {"generated": 2, "skipped": 0, "failed": 1}
+    assert sorted(pipeline.calls) == [("MATH-1", "SHS 1"), ("MATH-1", "SHS 2"), ("MATH-2", "SHS 1")]
+    saved = json.loads(progress.read_text())
+    assert saved["version"] == AI_CONTENT_VERSION
+    assert set(saved["failed"]) == {"math-2|SHS 1"}
+
+    pipeline.fail_titles.clear()
+    pipeline.calls.clear()
+    counts = await lesson_cache.warm_lessons(
+        subject="Core Mathematics", concurrency=2, progress_path=progress, sessions=sessions
+    )
+    assert counts == {"generated": 1, "skipped": 2, "failed": 0}
+    assert pipeline.calls == [("MATH-2", "SHS 1")]
+    assert json.loads(progress.read_text())["failed"] == {}
+
+    counts = await lesson_cache.warm_lessons(shs_level="SHS 2", sessions=sessions)
+    assert counts == {"generated": 1, "skipped": 1, "failed": 0}
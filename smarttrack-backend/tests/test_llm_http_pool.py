@@ -0,0 +1,82 @@
+"""Shared LLM HTTP pool: provider routing, client reuse and wait metrics."""
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from app.config import settings
+from app.llm.http_pool import LLMClientPool, pool_max_connections, provider_for_url
+
+
+def test_provider_for_url():
+    assert provider_for_url("https://api.deepseek.com/v1/chat/completions") == "deepseek"
+    assert provider_for_url("https://integrate.api.nvidia.com/v1/chat/completions") == "nvidia"
+    assert provider_for_url("http://127.0.0.1:8099/v1/chat/completions") == "default"
+
+
+def test_pool_size_follows_generation_concurrency(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_POOL_MAX_CONNECTIONS", 0)
+    monkeypatch.setattr(settings, "CHALLENGE_GEN_CONCURRENCY", 4)
+    assert pool_max_connections() == 12
+    monkeypatch.setattr(settings, "LLM_POOL_MAX_CONNECTIONS", 3)
+    assert pool_max_connections() == 3
+
+
+async def test_started_pool_reuses_one_client_per_provider(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_POOL_MAX_CONNECTIONS", 2)
+    built: list[httpx.AsyncClient] = []
+
+    async def _handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    pool = LLMClientPool()
+
+    def _build() -> httpx.AsyncClient:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+        built.append(client)
+        return client
+
+    monkeypatch.setattr(pool, "_build_client", _build)
+    await pool.start()
+    try:
+        responses = await asyncio.gather(
+            *(
+                pool.post("https://api.deepseek.com/v1/chat/completions", json={})
+                for _ in range(6)
+            ),
+            pool.post("https://integrate.api.nvidia.com/v1/chat/completions", json={}),
+        )
+    finally:
+        await pool.aclose()
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len(built) == 2
+    metrics = pool.metrics()["providers"]
+    assert metrics["deepseek"]["requests"] == 6
+    # Six concurrent calls through two slots → later calls queue for a connection.
+    assert metrics["deepseek"]["waited"] >= 3
+    assert metrics["deepseek"]["wait_max_ms"] > 0
+    assert metrics["nvidia"]["requests"] == 1
+
+
+async def test_unstarted_pool_falls_back_with_the_configured_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "CHALLENGE_LLM_TIMEOUT_SECONDS", 7.0)
+    timeouts: list[httpx.Timeout] = []
+    real_client = httpx.AsyncClient
+
+    def _client(*, timeout):
+        timeouts.append(timeout)
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+        return real_client(transport=transport, timeout=timeout)
+
+    monkeypatch.setattr(httpx, "AsyncClient", _client)
+    pool = LLMClientPool()
+    url = "https://api.deepseek.com/v1/chat/completions"
+    await pool.post(url, json={})
+    async with pool.stream(url, json={}) as response:
+        assert response.status_code == 200
+    await pool.post(url, json={}, timeout=2.0)
+    assert [t.read for t in timeouts[:2]] == [7.0, 7.0]
+    assert timeouts[2] == 2.0
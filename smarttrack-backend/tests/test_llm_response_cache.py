@@ -0,0 +1,112 @@
+"""LLM response cache: content-addressed, two tiers, opt-in and low temperature only."""
+from __future__ import annotations
+
+import pytest
+
+from app.config import settings
+from app.llm import deepseek_client
+from app.llm.response_cache import cache_key, response_cache
+from app.media.content_analysis import analyze_visual_need
+
+
+class _FakeCompletion:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.reply = '{"needed": true, "reason": "cell structure", "topic_hint": "plant cell"}'
+
+    async def __call__(self, messages, *, temperature, max_tokens, read_timeout, purpose):
+        self.calls.append(purpose)
+        if self.reply is None:
+            return None
+        return {"choices": [{"message": {"content": self.reply}}]}
+
+
+@pytest.fixture
+def completion(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RESPONSE_CACHE_DB_PATH", str(tmp_path / "llm.sqlite3"))
+    monkeypatch.setattr(settings, "LLM_RESPONSE_CACHE_TTL_SECONDS", 3600.0)
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", "test-key")
+    response_cache.clear(persistent=True)
+    fake = _FakeCompletion()
+    monkeypatch.setattr(deepseek_client, "deepseek_chat_completion", fake)
+    yield fake
+    response_cache.clear(persistent=True)
+
+
+def _messages(topic: str = "Plant cell") -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": "JSON only."},
+        {"role": "user", "content": f"Subject: Biology\nTitle: {topic}\n"},
+    ]
+
+
+async def _ask(messages, **kwargs):
+    kwargs.setdefault("temperature", 0.1)
+    kwargs.setdefault("cache", True)
+    return await deepseek_client.deepseek_message_content(messages, purpose="visual_need", **kwargs)
+
+
+def test_key_ignores_whitespace_but_not_model_or_temperature():
+    base = cache_key(_messages(), model="deepseek-chat", temperature=0.1)
+    spaced = [{**m, "content": "  " + m["content"].replace(" ", "   ") + "\n"} for m in _messages()]
+    assert cache_key(spaced, model="deepseek-chat", temperature=0.1) == base
+    assert cache_key(_messages(), model="deepseek-reasoner", temperature=0.1) != base
+    assert cache_key(_messages(), model="deepseek-chat", temperature=0.2) != base
+    assert cache_key(_messages("Animal cell"), model="deepseek-chat", temperature=0.1) != base
+
+
+async def test_repeat_prompts_hit_memory_then_persistent_tier(completion):
+    first = await _ask(_messages())
+    assert await _ask(_messages()) == first
+    assert completion.calls == ["visual_need"]
+    assert response_cache.stats()["memory_hits"] == 1
+
+    # A restarted worker (empty memory tier) still reads the SQLite tier.
+    response_cache.clear()
+    assert await _ask(_messages()) == first
+    assert completion.calls == ["visual_need"]
+    stats = response_cache.stats()
+    assert (stats["hits"], stats["memory_hits"], stats["misses"]) == (1, 0, 0)
+    assert stats["by_purpose"] == {"visual_need:hit": 1}
+
+
+async def test_creative_and_opted_out_calls_bypass_the_cache(completion):
+    await _ask(_messages(), temperature=0.75)
+    await _ask(_messages(), temperature=0.75)
+    await _ask(_messages(), cache=False)
+    await _ask(_messages(), cache=False)
+    assert len(completion.calls) == 4
+    assert response_cache.stats()["hits"] == response_cache.stats()["misses"] == 0
+
+
+async def test_failures_are_not_cached_and_entries_expire(completion, monkeypatch):
+    completion.reply = None
+    assert await _ask(_messages()) is None
+    completion.reply = '{"needed": false}'
+    assert await _ask(_messages()) == '{"needed": false}'
+    assert len(completion.calls) == 2
+
+    monkeypatch.setattr(settings, "LLM_RESPONSE_CACHE_TTL_SECONDS", 0.0)
+    await _ask(_messages())
+    assert len(completion.calls) == 3
+
+
+async def test_visual_need_is_served_from_cache_while_circuit_is_open(completion, monkeypatch):
+    kwargs = dict(subject="Biology", title="Plant cell", context="Label the parts of a plant cell.")
+    first = await analyze_visual_need(**kwargs)
+    assert first.source == "llm"
+
+    monkeypatch.setattr(deepseek_client, "_circuit_open_until", float("inf"))
+    again = await analyze_visual_need(**kwargs)
+    assert again == first
+    assert completion.calls == ["visual_need"]
+
+
+async def test_unusable_answers_are_not_cached(completion):
+    completion.reply = "Sure! Here is the analysis you asked for"
+    kwargs = dict(subject="Biology", title="Plant cell", context="Label the parts of a plant cell.")
+    assert (await analyze_visual_need(**kwargs)).source != "llm"
+    completion.reply = '{"needed": true, "reason": "cell structure"}'
+    assert (await analyze_visual_need(**kwargs)).source == "llm"
+    assert (await analyze_visual_need(**kwargs)).source == "llm"
+    assert len(completion.calls) == 2
@@ -0,0 +1,95 @@
+"""SQLite media cache: JSON import, per-entry TTL, LRU eviction, shared writers."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+from app.media import media_cache
+from app.media.media_cache import MediaCache
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "educational_image_cache.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "v6|heart": {"url": "https://x/heart.svg", "cached_at": 100},
+                "bad": "not a dict",
+            }
+        ),
+        encoding="utf-8",
+    )
+    db = tmp_path / "media.sqlite3"
+    cache = MediaCache(db, namespace="image", legacy_json=legacy)
+    assert cache.get("v6|heart")["url"] == "https://x/heart.svg"
+    assert len(cache) == 1
+    cache.delete("v6|heart")
+    cache.close()
+
+    # A second worker opening the same file must not re-import.
+    again = MediaCache(db, namespace="image", legacy_json=legacy)
+    assert again.get("v6|heart") is None
+    again.close()
+
+
+def test_per_entry_ttl(tmp_path):
+    cache = MediaCache(tmp_path / "m.sqlite3", namespace="video", default_ttl=60)
+    cache.put("short", {"resources": [1]}, ttl=0.01)
+    cache.put("default", {"resources": [2]})
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("default") == {"resources": [2]}
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_cache, "_TOUCH_INTERVAL_S", 0.0)
+    cache = MediaCache(tmp_path / "m.sqlite3", namespace="image", max_entries=3)
+    for i in range(3):
+        cache.put(f"k{i}", {"url": str(i)})
+        time.sleep(0.002)
+    cache.get("k0")  # k1 is now least recently used
+    cache.put("k3", {"url": "3"})
+    cache.evict()
+    assert cache.get("k1") is None
+    assert {k for k in ("k0", "k2", "k3") if cache.get(k)} == {"k0", "k2", "k3"}
+
+
+def test_concurrent_writers_do_not_lose_entries(tmp_path):
+    db = tmp_path / "m.sqlite3"
+    workers = [MediaCache(db, namespace="image") for _ in range(3)]
+
+    def _fill(n: int, cache: MediaCache) -> None:
+        for i in range(50):
+            cache.put(f"w{n}-{i}", {"url": f"{n}/{i}"})
+
+    threads = [threading.Thread(target=_fill, args=(n, c)) for n, c in enumerate(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(workers[0]) == 150
+    assert workers[1].get("w2-49") == {"url": "2/49"}
+
+
+async def test_retrieval_reads_the_cache_off_the_event_loop(tmp_path, monkeypatch):
+    from app.media import video_retrieval
+
+    loop_thread = threading.get_ident()
+    threads: list[int] = []
+
+    class _Recording(MediaCache):
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return super().get(key)
+
+    cache = _Recording(tmp_path / "m.sqlite3", namespace="video")
+    key = "v1|core_maths|shs1|fractions|3"
+    cache.put(key, {"queries": ["fractions"], "resources": [{"id": "yt:1"}]})
+    monkeypatch.setattr(video_retrieval, "_cache", cache)
+
+    found = await video_retrieval.retrieve_educational_videos(
+        title="Fractions", subject="core_maths", shs_level="SHS1"
+    )
+    assert found["resources"] == [{"id": "yt:1"}]
+    assert threads and loop_thread not in threads
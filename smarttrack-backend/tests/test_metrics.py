@@ -0,0 +1,63 @@
+"""Prometheus exposition and question pipeline instrumentation."""
+from __future__ import annotations
+
+import random
+
+from app.config import settings
+from app.metrics import MetricsRegistry
+from app.phases import question_gen
+from app.phases.pipeline_metrics import QUESTION_REJECTS, QUESTION_SECONDS, QUESTION_STAGE_SECONDS
+
+
+def test_histogram_counter_and_gauge_exposition():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, 'GET "/x"')
+    registry.counter("demo_total", "Demo count.", ("kind",)).inc("a", amount=2)
+    registry.gauge("demo_state", "Demo state.", callback=lambda: [((), 1.5)])
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_seconds Demo latency.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{route="GET \\"/x\\"",le="0.1"} 2',
+        'demo_seconds_bucket{route="GET \\"/x\\"",le="1"} 3',
+        'demo_seconds_bucket{route="GET \\"/x\\"",le="+Inf"} 4',
+        'demo_seconds_sum{route="GET \\"/x\\""} 3.65',
+        'demo_seconds_count{route="GET \\"/x\\""} 4',
+        "# HELP demo_state Demo state.",
+        "# TYPE demo_state gauge",
+        "demo_state 1.5",
+        "# HELP demo_total Demo count.",
+        "# TYPE demo_total counter",
+        'demo_total{kind="a"} 2',
+    ]
+
+
+async def test_generation_records_stages_sources_and_rejects(monkeypatch):
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", "")
+    before_source = sum(
+        QUESTION_SECONDS.count("core_maths", source) for source in ("bank", "fallback")
+    )
+    before_bank = QUESTION_STAGE_SECONDS.count("bank_select", "core_maths")
+    before_rejects = QUESTION_REJECTS.value("duplicate_stem", "core_maths")
+
+    item = await question_gen.generate_subject_question(
+        phase_number=1,
+        level_number=1,
+        subject="core_maths",
+        effective_difficulty=3,
+        performance_summary="",
+        rng=random.Random(3),
+        max_attempts=1,
+    )
+    question_gen._dev_log_reject("duplicate_stem", subject="core_maths")
+
+    assert item["source"] in ("bank", "fallback")
+    assert QUESTION_SECONDS.count("core_maths", item["source"]) >= 1
+    assert (
+        sum(QUESTION_SECONDS.count("core_maths", source) for source in ("bank", "fallback"))
+        == before_source + 1
+    )
+    assert QUESTION_STAGE_SECONDS.count("bank_select", "core_maths") == before_bank + 1
+    assert QUESTION_REJECTS.value("duplicate_stem", "core_maths") == before_rejects + 1
@@ -0,0 +1,127 @@
+"""MinHash/LSH near-duplicate index and its use in phase challenge builds."""
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app.assessment.models import ChallengeResponse, ChallengeSession
+from app.assessment.near_duplicates import (
+    NearDuplicateIndex,
+    band_layout,
+    from_bytes,
+    signature,
+    signature_bytes,
+    similarity,
+)
+from app.config import settings
+from app.database import Base
+from app.phases import service
+from app.phases.models import Level, Phase
+from app.phases.pipeline_metrics import QUESTION_REJECTS
+from app.users.models import User
+
+_ANSWERED = "In a science lesson, Kofi heats 200 g of ice until it all melts. What happens to its mass?"
+_PARAPHRASE = "In a science lesson Ama heats 200g of ice until it has all melted. What happens to the mass?"
+
+
+@pytest.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dedupe.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    await engine.dispose()
+
+
+def test_index_flags_paraphrases_but_not_new_questions():
+    index = NearDuplicateIndex(0.6)
+    index.update(
+        [
+            _ANSWERED,
+            "Which of these is a renewable source of energy for a rural clinic?",
+            "Simplify 3(x + 4) - 2x.",
+        ]
+    )
+    assert index.is_near_duplicate(_PARAPHRASE)
+    assert index.match("simplify 3(x+4) − 2x") == 1.0
+    assert not index.is_near_duplicate("Name two functions of the Electoral Commission of Ghana.")
+    assert not index.is_near_duplicate("")
+
+    sig = signature(_ANSWERED)
+    assert (from_bytes(signature_bytes(_ANSWERED)) == sig).all()
+    assert from_bytes(b"\x00" * 12) is None
+    assert similarity(sig, signature(_PARAPHRASE)) >= 0.6
+    bands, rows = band_layout(0.6)
+    # The LSH curve sits below the threshold so candidates are not missed.
+    assert (1 / bands) ** (1 / rows) < 0.6
+
+
+
+def test_numeric_variants_of_a_stem_are_not_duplicates():
+    index = NearDuplicateIndex(0.6)
+    index.update(["Solve for x: 3x + 4 = 19.", "A trader buys 12 oranges at GH₵2 each. What is the cost?"])
+    # Same template, new numbers: a valid new question.
+    assert not index.is_near_duplicate("Solve for x: 5x + 2 = 27.")
+    assert not index.is_near_duplicate("A trader buys 15 oranges at GH₵3 each. What is the cost?")
+    assert index.match("Solve for x: 5x + 2 = 27.") == 0.0
+    # Same numbers, reworded: still a repeat.
+    assert index.is_near_duplicate("Solve for x:  3x+4 = 19")
+    assert index.is_near_duplicate("A trader buys 12 oranges at GH₵2 each. Find the cost.")
+
+async def test_level_build_rejects_paraphrases_of_answered_questions(sessions, monkeypatch):
+    async with sessions() as db:
+        phase = Phase(number=1, name="Foundation", shs_mapping="SHS 1")
+        user = User(email="kojo@example.com", full_name="Kojo Asante")
+        db.add_all([phase, user])
+        await db.flush()
+        level = Level(phase_id=phase.id, number=1, difficulty_baseline=1)
+        db.add(level)
+        await db.flush()
+        earlier = ChallengeSession(user_id=user.id, level_id=level.id)
+        db.add(earlier)
+        await db.flush()
+        db.add(
+            ChallengeResponse(
+                session_id=earlier.id,
+                user_id=user.id,
+                subject="integrated_science",
+                question_index=0,
+                question_text=_ANSWERED,
+                correct_answer="B",
+            )
+        )
+        await db.commit()
+        stored = (await db.execute(select(ChallengeResponse.question_signature))).scalar_one()
+    assert from_bytes(stored) is not None
+
+    calls: list[str] = []
+
+    async def _fake_generate(*, subject, **_kwargs):
+        text = (
+            _PARAPHRASE
+            if not calls
+            else f"Fresh {hashlib.sha1(str(len(calls)).encode()).hexdigest()[:24]}"
+        )
+        calls.append(text)
+        return {
+            "question_text": text,
+            "question_type": "mcq",
+            "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+            "correct_answer": "B",
+            "source": "llm",
+        }
+
+    monkeypatch.setattr(settings, "CHALLENGE_POOL_ENABLED", False)
+    monkeypatch.setattr(service, "generate_subject_question", _fake_generate)
+    rejected = sum(QUESTION_REJECTS.value("near_duplicate", s) for s in service.SUBJECTS)
+    async with sessions() as db:
+        built = await service.build_level_question_set(db, user.id, level.id)
+
+    texts = [q["question_text"] for q in built["questions"]]
+    assert _PARAPHRASE not in texts
+    assert len(calls) == len(texts) + 1
+    assert sum(QUESTION_REJECTS.value("near_duplicate", s) for s in service.SUBJECTS) == rejected + 1
@@ -0,0 +1,203 @@
+"""Scheduled notification sweep: set-based rules, grouped cooldowns, pure-read endpoints."""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app.auth.dependencies import get_current_user
+from app.config import settings
+from app.database import Base, get_db
+from app.notifications.engine import run_notification_engine
+from app.notifications.models import Notification
+from app.notifications.router import router as notifications_router
+from app.notifications.scheduler import run_notification_sweep
+from app.phases.models import Level, Phase, UserLevelProgress
+from app.phases.snapshot import invalidate_phase_catalogue
+from app.users.models import User
+
+NOW = datetime(2026, 3, 10, 18, 0, tzinfo=timezone.utc)
+YESTERDAY = (NOW.date() - timedelta(days=1)).isoformat()
+_SEEN = {"notifications_backfilled": True}
+_RECENT_VISIT = {"learning_recent": [{"visited_at": (NOW - timedelta(hours=2)).isoformat()}]}
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_ENGINE_ACTIVE_DAYS", 30)
+    invalidate_phase_catalogue()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'notify.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    statements: Counter[str] = Counter()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        statements[statement.lstrip().split(None, 1)[0].upper()] += 1
+
+    factory = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with factory() as db:
+        for number in (1, 2):
+            phase = Phase(number=number, name=f"Phase {number}", shs_mapping=f"SHS {number}")
+            db.add(phase)
+            await db.flush()
+            for lv in (1, 2):
+                db.add(Level(phase_id=phase.id, number=lv, difficulty_baseline=lv))
+        await db.commit()
+    factory.statements = statements  # type: ignore[attr-defined]
+    yield factory
+    invalidate_phase_catalogue()
+    await engine.dispose()
+
+
+async def _add_user(sessions, name: str, *, profile=None, progress=(), **columns) -> User:
+    async with sessions() as db:
+        user = User(
+            email=f"{name.lower()}@example.com",
+            full_name=name,
+            created_at=columns.pop("created_at", NOW - timedelta(days=10)),
+            last_login=columns.pop("last_login", NOW - timedelta(hours=30)),
+            learner_profile={**_SEEN, **(profile or {})},
+            **columns,
+        )
+        db.add(user)
+        await db.flush()
+        rows = await db.execute(select(Phase.number, Level.number, Level.id).join(Level))
+        levels = {(phase_n, level_n): level_id for phase_n, level_n, level_id in rows.all()}
+        for (phase_n, level_n), status in progress:
+            db.add(UserLevelProgress(user_id=user.id, level_id=levels[(phase_n, level_n)], status=status))
+        await db.commit()
+        return user
+
+
+async def _rules(sessions, user: User) -> set[str]:
+    async with sessions() as db:
+        rows = await db.execute(select(Notification.rule_key).where(Notification.user_id == user.id))
+        return {r for (r,) in rows.all()}
+
+
+async def test_sweep_fires_each_rule_once_per_cooldown(sessions):
+    finisher = await _add_user(
+        sessions,
+        "Esi",
+        profile={"streak_last_date": YESTERDAY, **_RECENT_VISIT},
+        progress=[((1, 1), "completed"), ((1, 2), "completed"), ((2, 1), "in_progress")],
+        streak=7,
+        rank="Silver",
+    )
+    newcomer = await _add_user(sessions, "Yaw", shs_level="SHS 3")
+    away = await _add_user(sessions, "Abena", last_login=NOW - timedelta(days=90))
+
+    result = await run_notification_sweep(sessions=sessions, batch_size=2, now=NOW)
+    assert result["users"] == 2 and result["failed_chunks"] == 0
+
+    assert await _rules(sessions, finisher) == {
+        "continue_phase_2_level_1",
+        "continue_todays_challenges",
+        "recommendations_available",
+        "wassce_upload_nudge",
+        "keep_streak_alive",
+        "streak_milestone_7",
+        "badge_unlocked_silver",
+    }
+    assert await _rules(sessions, newcomer) == {"learning_center_idle", "wassce_upload_nudge"}
+    assert await _rules(sessions, away) == set()
+
+    async with sessions() as db:
+        row = (
+            await db.execute(
+                select(Notification).where(Notification.rule_key == "keep_streak_alive")
+            )
+        ).scalar_one()
+    assert row.data == {
+        "rule_key": "keep_streak_alive",
+        "event": "keep_streak_alive",
+        "href": "/challenges",
+        "streak": 7,
+    }
+    assert (row.priority, row.category, row.is_read) == (2, "streak", False)
+
+    again = await run_notification_sweep(sessions=sessions, now=NOW + timedelta(hours=1))
+    assert again["created"] == 0
+
+    # 21h later only the short cooldowns (20h / 18h) are due again; one-shots never.
+    later = await run_notification_sweep(sessions=sessions, now=NOW + timedelta(hours=21))
+    assert later["rules_fired"] == {"continue_todays_challenges": 1, "keep_streak_alive": 1}
+
+
+async def test_sweep_query_count_does_not_grow_with_learners(sessions):
+    for i in range(12):
+        await _add_user(sessions, f"Learner{i}", progress=[((1, 1), "in_progress")])
+
+    sessions.statements.clear()
+    await run_notification_sweep(sessions=sessions, batch_size=50, now=NOW)
+    small = sum(sessions.statements.values())
+
+    for i in range(12, 60):
+        await _add_user(sessions, f"Learner{i}", progress=[((1, 1), "in_progress")])
+    sessions.statements.clear()
+    result = await run_notification_sweep(sessions=sessions, batch_size=100, now=NOW + timedelta(days=4))
+    assert result["users"] == 60
+    assert result["rules_fired"]["learning_center_idle"] == 60
+    assert sum(sessions.statements.values()) <= small
+    assert sessions.statements["INSERT"] == 1
+
+
+async def test_single_learner_run_matches_the_sweep(sessions):
+    profile = {"streak_last_date": YESTERDAY}
+    a = await _add_user(sessions, "Kwame", profile=profile, streak=3, progress=[((1, 1), "completed")])
+    await run_notification_sweep(sessions=sessions, now=NOW)
+    swept = await _rules(sessions, a)
+
+    b = await _add_user(sessions, "Akua", profile=profile, streak=3, progress=[((1, 1), "completed")])
+    async with sessions() as db:
+        user = await db.get(User, b.id)
+        result = await run_notification_engine(db, user, force=True)
+    assert set(result["rules_fired"]) == swept == await _rules(sessions, b)
+    assert "streak_milestone_3" in swept
+
+    async with sessions() as db:
+        user = await db.get(User, b.id)
+        assert (await run_notification_engine(db, user, force=True))["created"] == 0
+
+
+async def test_read_endpoints_are_pure_reads_while_the_sweep_runs(sessions, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_ENGINE_INTERVAL_SECONDS", 600)
+    user = await _add_user(sessions, "Efua", streak=3, profile={"streak_last_date": YESTERDAY})
+
+    api = FastAPI()
+    api.include_router(notifications_router)
+
+    async def _db():
+        async with sessions() as db:
+            yield db
+
+    async def _user(db=Depends(get_db)):
+        return await db.get(User, user.id)
+
+    api.dependency_overrides[get_db] = _db
+    api.dependency_overrides[get_current_user] = _user
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        sessions.statements.clear()
+        listing = await client.get("/notifications")
+        badge = await client.get("/notifications/unread-count")
+        assert (listing.status_code, badge.status_code) == (200, 200)
+        assert sessions.statements["INSERT"] == sessions.statements["UPDATE"] == 0
+        assert badge.json()["unread_count"] == 0
+
+        monkeypatch.setattr(settings, "NOTIFICATION_ENGINE_ACTIVE_DAYS", 0)
+        await run_notification_sweep(sessions=sessions, now=datetime.now(timezone.utc))
+        badge = await client.get("/notifications/unread-count")
+        assert badge.json()["unread_count"] == len(await _rules(sessions, user)) > 0
+
+        monkeypatch.setattr(settings, "NOTIFICATION_ENGINE_INTERVAL_SECONDS", 0)
+        await client.get("/notifications/unread-count")
+    # Inline fallback runs (and stamps its throttle) when the sweep is off.
+    assert sessions.statements["UPDATE"] == 1
@@ -4,6 +4,7 @@ from __future__ import annotations
 import random
 
 from app.phases.academic_bank import (
+    BankIndex,
     bank_stats,
     include_wassce_for_phase,
     load_bank,
@@ -92,3 +93,23 @@ def test_exclude_ids_avoids_repeats():
     )
     assert second is not None
     assert second.get("bank_id") != first.get("bank_id")
+
+
+def test_index_prefers_nearest_difficulty_and_skips_meta_rows():
+    rows = [
+        {"id": "far", "subject": "english", "shs_level": "SHS 1", "difficulty": 12,
+         "question_text": "Far question?", "correct_answer": "A"},
+        {"id": "meta", "subject": "english", "shs_level": "SHS 1", "difficulty": 4,
+         "question_text": "Read Chapter 3 first?", "correct_answer": "A"},
+        {"id": "near", "subject": "english", "shs_level": "SHS 1", "difficulty": 5,
+         "question_text": "Near question?", "correct_answer": "A"},
+        {"id": "shs2", "subject": "english", "shs_level": "SHS 2", "difficulty": 4,
+         "question_text": "Wrong phase?", "correct_answer": "A"},
+    ]
+    index = BankIndex(rows)
+    rng = random.Random(0)
+    picks = {index.select(1, "english", 4, set(), rng)["id"] for _ in range(20)}
+    assert picks == {"near"}
+    assert index.select(1, "english", 4, {"near"}, rng)["id"] == "far"
+    assert index.select(1, "english", 4, {"near", "far"}, rng) is None
+    assert index.select(1, "core_maths", 4, set(), rng) is None
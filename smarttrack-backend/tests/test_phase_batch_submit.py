@@ -0,0 +1,204 @@
+"""Batch answer submission: one transaction, same per-answer results, idempotent replays."""
+from __future__ import annotations
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app.assessment.models import ChallengeResponse, ChallengeSession
+from app.auth.dependencies import get_current_user
+from app.database import Base, get_db
+from app.phases import service
+from app.phases.models import Level, Phase
+from app.phases.router import router as phases_router
+from app.users.models import User
+
+_QUESTIONS = (
+    ("mathematics", "mcq", "B", "B"),
+    ("english", "mcq", "C", "A"),
+    ("science", "true_false", "True", "true"),
+    ("mathematics", "mcq", "D", "D"),
+)
+
+
+@pytest.fixture
+async def world(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'submit.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    statements: list[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement.lstrip().split(None, 1)[0].upper())
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def _commit(conn):
+        statements.append("COMMIT")
+
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with sessions() as db:
+        phase = Phase(number=1, name="Foundation", shs_mapping="SHS 1")
+        db.add(phase)
+        await db.flush()
+        level = Level(phase_id=phase.id, number=1, difficulty_baseline=1)
+        db.add(level)
+        await db.flush()
+        for name in ("Ama", "Kofi"):
+            user = User(email=f"{name.lower()}@example.com", full_name=name)
+            db.add(user)
+            await db.flush()
+            session = ChallengeSession(user_id=user.id, level_id=level.id)
+            db.add(session)
+            await db.flush()
+            for idx, (subject, qtype, correct, _answer) in enumerate(_QUESTIONS):
+                db.add(
+                    ChallengeResponse(
+                        session_id=session.id,
+                        user_id=user.id,
+                        subject=subject,
+                        question_index=idx,
+                        question_text=f"Q{idx}",
+                        question_type=qtype,
+                        options={"A": "1", "B": "2", "C": "3", "D": "4"} if qtype == "mcq" else None,
+                        correct_answer=correct,
+                        explanation=f"E{idx}",
+                    )
+                )
+        await db.commit()
+    sessions.statements = statements  # type: ignore[attr-defined]
+    yield sessions
+    await engine.dispose()
+
+
+async def _learner(sessions, name: str) -> tuple[User, int, list[int]]:
+    async with sessions() as db:
+        user = (await db.execute(select(User).where(User.full_name == name))).scalar_one()
+        session = (
+            await db.execute(select(ChallengeSession).where(ChallengeSession.user_id == user.id))
+        ).scalar_one()
+        ids = (
+            await db.execute(
+                select(ChallengeResponse.id)
+                .where(ChallengeResponse.session_id == session.id)
+                .order_by(ChallengeResponse.question_index)
+            )
+        ).scalars().all()
+    return user, session.id, list(ids)
+
+
+def _payload(ids: list[int]) -> list[dict]:
+    return [
+        {"question_id": qid, "answer": answer, "time_taken_seconds": 4.0}
+        for qid, (*_q, answer) in zip(ids, _QUESTIONS)
+    ]
+
+
+async def test_batch_matches_one_by_one_and_uses_one_commit(world):
+    ama, ama_session, ama_ids = await _learner(world, "Ama")
+    kofi, kofi_session, kofi_ids = await _learner(world, "Kofi")
+
+    world.statements.clear()
+    one_by_one = []
+    for item in _payload(ama_ids):
+        async with world() as db:
+            one_by_one.append(
+                await service.submit_answer(
+                    db, ama.id, ama_session, item["question_id"], item["answer"], 4.0
+                )
+            )
+    sequential_statements = len(world.statements)
+
+    world.statements.clear()
+    async with world() as db:
+        batch = await service.submit_answers(db, kofi.id, kofi_session, _payload(kofi_ids))
+    assert world.statements.count("COMMIT") == 1
+    assert len(world.statements) < sequential_statements
+
+    assert [r["question_id"] for r in batch["results"]] == kofi_ids
+    per_answer = [
+        {k: v for k, v in r.items() if k not in ("question_id", "replayed")} for r in batch["results"]
+    ]
+    assert per_answer == one_by_one
+    assert [r["is_correct"] for r in batch["results"]] == [True, False, True, True]
+    assert (batch["correct_count"], batch["wrong_count"], batch["graded_count"]) == (3, 1, 4)
+    assert batch["xp_earned"] == sum(r["xp_earned"] for r in one_by_one) > 0
+    assert batch["results"][0]["streak_incremented"] is True
+    assert not any(r["streak_incremented"] for r in batch["results"][1:])
+
+    async with world() as db:
+        stored = await db.get(ChallengeSession, kofi_session)
+        assert (stored.correct_count, stored.wrong_count) == (3, 1)
+        assert (await db.get(User, kofi.id)).xp == batch["user_xp"]
+
+
+async def test_retried_flush_replays_without_double_counting(world):
+    user, session_id, ids = await _learner(world, "Ama")
+    async with world() as db:
+        await service.submit_answer(db, user.id, session_id, ids[0], "B", None)
+
+    payload = _payload(ids) + [{"question_id": ids[1], "answer": "C"}]
+    async with world() as db:
+        first = await service.submit_answers(db, user.id, session_id, payload)
+    assert [r["replayed"] for r in first["results"]] == [True, False, False, False, True]
+    # The duplicate keeps the first answer's result, like a retried single submit.
+    assert first["results"][-1]["is_correct"] is False
+    assert first["graded_count"] == 3
+
+    world.statements.clear()
+    async with world() as db:
+        again = await service.submit_answers(db, user.id, session_id, payload)
+    assert all(r["replayed"] for r in again["results"])
+    assert again["xp_earned"] == 0 and again["graded_count"] == 0
+    assert (again["correct_count"], again["wrong_count"]) == (first["correct_count"], first["wrong_count"])
+    assert "COMMIT" not in world.statements
+
+
+async def test_foreign_question_rejects_the_whole_batch(world):
+    user, session_id, ids = await _learner(world, "Ama")
+    _other, _other_session, other_ids = await _learner(world, "Kofi")
+
+    async with world() as db:
+        with pytest.raises(HTTPException) as exc:
+            await service.submit_answers(
+                db, user.id, session_id, _payload(ids[:2]) + [{"question_id": other_ids[0], "answer": "B"}]
+            )
+    assert exc.value.status_code == 404
+    async with world() as db:
+        assert (await db.get(ChallengeResponse, ids[0])).user_answer is None
+
+        session = await db.get(ChallengeSession, session_id)
+        session.status = "completed"
+        await db.commit()
+    async with world() as db:
+        with pytest.raises(HTTPException) as exc:
+            await service.submit_answers(db, user.id, session_id, _payload(ids))
+    assert exc.value.status_code == 400
+
+
+async def test_submit_answers_route(world):
+    user, session_id, ids = await _learner(world, "Ama")
+    api = FastAPI()
+    api.include_router(phases_router)
+    api.dependency_overrides[get_current_user] = lambda: user
+
+    async def _db():
+        async with world() as db:
+            yield db
+
+    api.dependency_overrides[get_db] = _db
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        res = await client.post(
+            f"/phases/sessions/{session_id}/submit-answers", json={"answers": _payload(ids)}
+        )
+        empty = await client.post(f"/phases/sessions/{session_id}/submit-answers", json={"answers": []})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["graded_count"] == 4
+    assert body["results"][2]["streak"] == 1
+    assert empty.status_code == 422
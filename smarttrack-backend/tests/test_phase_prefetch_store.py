@@ -0,0 +1,283 @@
+"""Prefetch buffer backends: serialization, staleness and atomic claim."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import asdict
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.phases.models import PhasePrefetchEntryRow
+from app.phases.prefetch import PhasePrefetchManager
+from app.phases.prefetch_store import (
+    MemoryPrefetchStore,
+    PrefetchEntry,
+    RedisPrefetchStore,
+    SqlPrefetchStore,
+    decode_entry,
+    encode_entry,
+)
+
+
+def _ready_entry(level_id: int, *, ready_at: float | None = None) -> PrefetchEntry:
+    return PrefetchEntry(
+        status="ready",
+        level_id=level_id,
+        format_version=settings.CHALLENGE_FORMAT_VERSION,
+        questions=[
+            {
+                "question_text": f"What is {i} + {i}?",
+                "subject": "core_maths",
+                "options": {"A": str(i), "B": str(2 * i), "C": "0", "D": "1"},
+                "correct_answer": "B",
+            }
+            for i in range(10)
+        ],
+        mix={"core_maths": 10},
+        phase_number=1,
+        level_number=level_id,
+        started_at=time.time(),
+        ready_at=ready_at if ready_at is not None else time.time(),
+    )
+
+
+class _RespStandIn:
+    """Tiny in-process Redis-protocol server covering the commands the store uses."""
+
+    def __init__(self) -> None:
+        self.data: dict[bytes, bytes] = {}
+        self.sets: dict[bytes, set[bytes]] = {}
+        self.versions: dict[bytes, int] = {}  # bumped on every write, for WATCH
+        self.after_get = None  # hook to simulate another client writing mid-exchange
+        self.server: asyncio.base_events.Server | None = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{port}/0"
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    @staticmethod
+    def _bulk(value: bytes | None) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _touch(self, *keys: bytes) -> None:
+        for key in keys:
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    def _dispatch(self, args: list[bytes]) -> bytes:
+        cmd = args[0].upper()
+        if cmd == b"SET":
+            self.data[args[1]] = args[2]
+            self._touch(args[1])
+            return b"+OK\r\n"
+        if cmd == b"GET":
+            reply = self._bulk(self.data.get(args[1]))
+            if self.after_get is not None:
+                self.after_get(args[1])
+            return reply
+        if cmd == b"GETDEL":
+            self._touch(args[1])
+            return self._bulk(self.data.pop(args[1], None))
+        if cmd == b"MGET":
+            return b"*%d\r\n" % (len(args) - 1) + b"".join(
+                self._bulk(self.data.get(k)) for k in args[1:]
+            )
+        if cmd == b"DEL":
+            self._touch(*args[1:])
+            removed = sum(1 for k in args[1:] if self.data.pop(k, None) is not None)
+            return b":%d\r\n" % removed
+        if cmd == b"SADD":
+            self.sets.setdefault(args[1], set()).update(args[2:])
+            return b":1\r\n"
+        if cmd == b"SREM":
+            self.sets.get(args[1], set()).difference_update(args[2:])
+            return b":1\r\n"
+        if cmd == b"SMEMBERS":
+            members = sorted(self.sets.get(args[1], set()))
+            return b"*%d\r\n" % len(members) + b"".join(self._bulk(m) for m in members)
+        if cmd == b"PEXPIRE":
+            return b":1\r\n"
+        return b"-ERR unknown command\r\n"
+
+    def _transaction(self, args: list[bytes], watched: dict, queued: list | None) -> tuple[bytes, list | None]:
+        """WATCH / MULTI / EXEC for one connection; returns (reply, queued)."""
+        cmd = args[0].upper()
+        if cmd == b"WATCH":
+            watched.update((k, self.versions.get(k, 0)) for k in args[1:])
+            return b"+OK\r\n", queued
+        if cmd == b"UNWATCH":
+            watched.clear()
+            return b"+OK\r\n", queued
+        if cmd == b"MULTI":
+            return b"+OK\r\n", []
+        if cmd == b"EXEC":
+            dirty = any(self.versions.get(k, 0) != v for k, v in watched.items())
+            watched.clear()
+            if dirty:
+                return b"*-1\r\n", None
+            replies = [self._dispatch(q) for q in queued or []]
+            return b"*%d\r\n" % len(replies) + b"".join(replies), None
+        if queued is not None:
+            queued.append(args)
+            return b"+QUEUED\r\n", queued
+        return self._dispatch(args), queued
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        watched: dict[bytes, int] = {}
+        queued: list | None = None
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:-2])):
+                    size = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(size + 2))[:-2])
+                reply, queued = self._transaction(args, watched, queued)
+                writer.write(reply)
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def sql_store(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'prefetch.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync: PhasePrefetchEntryRow.__table__.create(sync)
+        )
+    yield SqlPrefetchStore(async_sessionmaker(engine, expire_on_commit=False))
+    await engine.dispose()
+
+
+@pytest.fixture
+async def redis_store():
+    stand_in = _RespStandIn()
+    url = await stand_in.start()
+    store = RedisPrefetchStore(url)
+    yield store
+    await store.close()
+    await stand_in.stop()
+
+
+@pytest.fixture(params=["memory", "sql", "redis"])
+def store(request):
+    if request.param == "memory":
+        return MemoryPrefetchStore()
+    return request.getfixturevalue(f"{request.param}_store")
+
+
+def test_encoding_is_compact_and_round_trips():
+    entry = _ready_entry(4)
+    blob = encode_entry(entry)
+    assert len(blob) < len(json.dumps(asdict(entry), indent=2))
+    assert decode_entry(blob) == entry
+    assert decode_entry(b"not zlib") is None
+
+
+async def test_claim_is_single_use_across_managers(store):
+    user_id = uuid.uuid4()
+    await store.put(user_id, _ready_entry(3))
+    worker_a = PhasePrefetchManager(store)
+    worker_b = PhasePrefetchManager(store)
+
+    results = await asyncio.gather(
+        *(m.claim(user_id, 3) for m in (worker_a, worker_b, worker_a, worker_b))
+    )
+    claimed = [r for r in results if r]
+    assert len(claimed) == 1
+    assert len(claimed[0]["questions"]) == 10
+    assert await store.get(user_id, 3) is None
+
+
+async def test_fetching_entry_is_not_claimable(store):
+    user_id = uuid.uuid4()
+    await store.put(
+        user_id,
+        PrefetchEntry(
+            status="fetching",
+            level_id=5,
+            format_version=settings.CHALLENGE_FORMAT_VERSION,
+            started_at=time.time(),
+        ),
+    )
+    assert await PhasePrefetchManager(store).claim(user_id, 5) is None
+    assert (await store.get(user_id, 5)).status == "fetching"
+
+
+async def test_complete_only_publishes_matching_fetch(store):
+    user_id = uuid.uuid4()
+    pending = PrefetchEntry(
+        status="fetching",
+        level_id=2,
+        format_version=settings.CHALLENGE_FORMAT_VERSION,
+        started_at=100.0,
+    )
+    await store.put(user_id, pending)
+    assert not await store.complete(user_id, _ready_entry(2), started_at=99.0)
+    assert await store.complete(user_id, _ready_entry(2), started_at=100.0)
+    assert (await store.get(user_id, 2)).status == "ready"
+
+
+async def test_concurrent_first_writes_to_one_slot(store):
+    user_id = uuid.uuid4()
+    await asyncio.gather(
+        *(
+            store.put(user_id, PrefetchEntry(status="fetching", level_id=3, started_at=float(n)))
+            for n in range(4)
+        )
+    )
+    assert (await store.get(user_id, 3)).status == "fetching"
+    assert len(await store.user_entries(user_id)) == 1
+
+
+async def test_redis_complete_loses_to_a_concurrent_rewrite():
+    stand_in = _RespStandIn()
+    store = RedisPrefetchStore(await stand_in.start())
+    user_id = uuid.uuid4()
+    try:
+        await store.put(
+            user_id, PrefetchEntry(status="fetching", level_id=2, started_at=100.0)
+        )
+        newer = PrefetchEntry(status="fetching", level_id=2, started_at=200.0)
+
+        def _another_worker_restarts_the_fetch(key: bytes) -> None:
+            stand_in.after_get = None
+            stand_in.data[key] = encode_entry(newer)
+            stand_in._touch(key)
+
+        stand_in.after_get = _another_worker_restarts_the_fetch
+        assert not await store.complete(user_id, _ready_entry(2), started_at=100.0)
+        assert await store.get(user_id, 2) == newer
+    finally:
+        await store.close()
+        await stand_in.stop()
+
+
+async def test_stale_sets_are_dropped(store, monkeypatch):
+    user_id = uuid.uuid4()
+    manager = PhasePrefetchManager(store)
+    expired = _ready_entry(1, ready_at=time.time() - settings.CHALLENGE_PREFETCH_TTL_SECONDS - 5)
+    await store.put(user_id, expired)
+    assert await manager.claim(user_id, 1) is None
+
+    await store.put(user_id, _ready_entry(2))
+    monkeypatch.setattr(
+        settings, "CHALLENGE_FORMAT_VERSION", settings.CHALLENGE_FORMAT_VERSION + 1
+    )
+    status = await manager.buffer_status(user_id)
+    assert status["ready_levels"] == []
+    assert await store.user_entries(user_id) == []
@@ -0,0 +1,74 @@
+"""Batched challenge generation: one LLM call, per-item quality gates."""
+from __future__ import annotations
+
+import random
+
+from app.config import settings
+from app.phases import question_gen
+
+
+def _mcq(text: str) -> dict:
+    return {
+        "question_type": "mcq",
+        "question_text": text,
+        "choices": {"A": "5x", "B": "6x", "C": "x", "D": "5"},
+        "correct_answer": "A",
+        "explanation": "Add the like terms.",
+    }
+
+
+async def test_batch_runs_each_item_through_the_gates(monkeypatch):
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "CHALLENGE_IMAGES_MODE", "off")
+    monkeypatch.setattr(question_gen, "pick_curriculum_topic", lambda *a, **k: None)
+    calls: list[dict] = []
+
+    async def _fake_json(messages, **kwargs):
+        calls.append({"messages": messages, **kwargs})
+        return {
+            "items": [
+                _mcq("Simplify 3x + 2x."),
+                _mcq("Simplify 3x + 2x."),  # in-batch duplicate
+                {**_mcq("Simplify 4x + x."), "choices": {"A": "5x"}},  # one choice
+                "not an object",
+            ]
+        }
+
+    monkeypatch.setattr(question_gen, "_deepseek_json", _fake_json)
+    results = await question_gen.llm_question_batch(
+        phase_number=1,
+        level_number=1,
+        subject="core_maths",
+        effective_difficulty=3,
+        performance_summary="core_maths: accuracy=0.50",
+        question_budget=10,
+        exclude_texts=set(),
+        rng=random.Random(7),
+        forced_types=["mcq"] * 5,
+    )
+
+    assert len(calls) == 1
+    prompt = calls[0]["messages"][1]["content"]
+    assert prompt.count("Adaptive context:") == 1
+    assert prompt.count("### ITEM") == 5
+    assert calls[0]["purpose"] == "challenge_question_batch"
+
+    assert results[0]["question_text"] == "Simplify 3x + 2x."
+    assert results[0]["options"]["choices"]["A"] == "5x"
+    assert results[1:] == [None, None, None, None]
+
+
+async def test_batch_is_empty_without_key(monkeypatch):
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", "")
+    results = await question_gen.llm_question_batch(
+        phase_number=1,
+        level_number=1,
+        subject="core_maths",
+        effective_difficulty=3,
+        performance_summary="",
+        question_budget=10,
+        exclude_texts=set(),
+        rng=random.Random(1),
+        forced_types=["mcq", "mcq"],
+    )
+    assert results == [None, None]
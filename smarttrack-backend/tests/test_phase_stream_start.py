@@ -0,0 +1,237 @@
+"""Streamed level start: session first, questions in slot order as they are ready."""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import random
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app import database
+from app.assessment.models import ChallengeResponse, ChallengeSession
+from app.auth.dependencies import get_current_user
+from app.config import settings
+from app.database import Base
+from app.phases import prefetch as phase_prefetch
+from app.phases import service
+from app.phases.models import Level, Phase
+from app.phases.router import router as phases_router
+from app.phases.snapshot import invalidate_phase_catalogue
+from app.request_metrics import RequestTimingMiddleware, request_metrics
+from app.users.models import User
+
+
+class _FakeGenerator:
+    def __init__(self) -> None:
+        self.counter = itertools.count(1)
+        self.duplicates = 0
+        self.fail_after: int | None = None
+        self.delay = 0.01
+
+    async def __call__(self, *, subject, forced_type, rng, **_kwargs):
+        n = next(self.counter)
+        if self.fail_after is not None and n > self.fail_after:
+            raise RuntimeError("provider down")
+        await asyncio.sleep(self.delay * random.Random(n).randint(1, 5))
+        # The first few calls collide on purpose: the slot lock must retry them.
+        text = "Which is larger?" if n <= self.duplicates else f"{subject} question {n}"
+        return {
+            "question_text": text,
+            "question_type": "mcq",
+            "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+            "correct_answer": "B",
+            "explanation": "Because.",
+        }
+
+
+@pytest.fixture
+async def world(tmp_path, monkeypatch):
+    invalidate_phase_catalogue()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stream.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with sessions() as db:
+        phase = Phase(number=1, name="Foundation", shs_mapping="SHS 1")
+        db.add(phase)
+        await db.flush()
+        db.add(Level(phase_id=phase.id, number=1, difficulty_baseline=1))
+        db.add(Level(phase_id=phase.id, number=2, difficulty_baseline=2))
+        user = User(email="kofi@example.com", full_name="Kofi Boateng")
+        db.add(user)
+        await db.commit()
+
+    generator = _FakeGenerator()
+    monkeypatch.setattr(service, "generate_subject_question", generator)
+    monkeypatch.setattr(phase_prefetch, "schedule_buffer_warm", lambda *a, **k: None)
+    monkeypatch.setattr(database, "AsyncSessionLocal", sessions)
+    yield sessions, user, generator
+    invalidate_phase_catalogue()
+    await engine.dispose()
+
+
+async def _level_id(sessions, number: int) -> int:
+    async with sessions() as db:
+        return (await db.execute(select(Level.id).where(Level.number == number))).scalar_one()
+
+
+async def test_questions_stream_in_slot_order_and_are_committed_first(world):
+    sessions, user, generator = world
+    generator.duplicates = 3
+    level_id = await _level_id(sessions, 1)
+
+    events = []
+    stored_when_seen = []
+    async for event in service.start_level_stream(user.id, level_id, sessions=sessions):
+        events.append(event)
+        if event["event"] == "question":
+            async with sessions() as db:
+                stored_when_seen.append(
+                    (
+                        await db.execute(
+                            select(func.count()).select_from(ChallengeResponse).where(
+                                ChallengeResponse.id == event["data"]["id"]
+                            )
+                        )
+                    ).scalar_one()
+                )
+
+    kinds = [e["event"] for e in events]
+    assert kinds[0] == "session" and kinds[-1] == "done"
+    questions = [e["data"] for e in events if e["event"] == "question"]
+    header = events[0]["data"]
+    assert len(questions) == header["question_count"] == events[-1]["data"]["question_count"]
+    assert [q["question_index"] for q in questions] == list(range(len(questions)))
+    assert len({q["question_text"] for q in questions}) == len(questions)
+    assert all(stored_when_seen)
+    assert "correct_answer" not in questions[0]
+
+    done = events[-1]["data"]
+    assert 0 < done["time_to_first_question_ms"] <= done["total_ms"]
+    async with sessions() as db:
+        session = await db.get(ChallengeSession, header["session_id"])
+        assert session.status == "in_progress"
+
+
+async def test_locked_level_fails_before_streaming(world):
+    sessions, user, _generator = world
+    events = service.start_level_stream(user.id, await _level_id(sessions, 2), sessions=sessions)
+    with pytest.raises(HTTPException) as exc:
+        await anext(events)
+    assert exc.value.status_code == 403
+
+
+async def test_generation_failure_marks_the_session_failed(world):
+    sessions, user, generator = world
+    generator.fail_after = 2
+    level_id = await _level_id(sessions, 1)
+
+    events = [e async for e in service.start_level_stream(user.id, level_id, sessions=sessions)]
+    assert events[0]["event"] == "session"
+    assert events[-1] == {
+        "event": "error",
+        "data": {"status_code": 503, "detail": "Could not prepare this level. Please try again."},
+    }
+    async with sessions() as db:
+        session = await db.get(ChallengeSession, events[0]["data"]["session_id"])
+    assert session.status == "failed"
+
+
+async def test_ndjson_route_and_time_to_first_question_stage(world):
+    sessions, user, _generator = world
+    api = FastAPI()
+    api.add_middleware(RequestTimingMiddleware)
+    api.include_router(phases_router)
+    api.dependency_overrides[get_current_user] = lambda: user
+    request_metrics.reset()
+
+    level_id = await _level_id(sessions, 1)
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        res = await client.post(f"/phases/levels/{level_id}/start/stream")
+        locked = await client.post(f"/phases/levels/{await _level_id(sessions, 2)}/start/stream")
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert lines[0]["event"] == "session" and lines[-1]["event"] == "done"
+    assert locked.status_code == 403
+    ttfq = request_metrics.snapshot()["stages"]["time_to_first_question"]
+    assert ttfq["count"] == 1
+    assert ttfq["max_ms"] <= lines[-1]["data"]["total_ms"]
+
+
+async def test_batched_slots_are_handed_on_without_waiting_for_other_batches(world, monkeypatch):
+    sessions, user, generator = world
+    monkeypatch.setattr(settings, "CHALLENGE_BATCH_GENERATION", True)
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "CHALLENGE_BATCH_MAX_ITEMS", 2)
+    monkeypatch.setattr(settings, "CHALLENGE_POOL_ENABLED", False)  # no background top-ups
+    release = asyncio.Event()
+    calls = itertools.count()
+    stems = iter(
+        [
+            "Name the capital of Ghana.",
+            "What is 12 divided by 4?",
+            "Define photosynthesis.",
+            "Who led the 1948 riots?",
+            "Spell the plural of mouse.",
+            "What gas do plants release?",
+            "Convert 3 km to metres.",
+            "Give an antonym of brave.",
+            "Which river feeds Akosombo?",
+            "State Newton's first law.",
+            "Solve 2x = 10.",
+            "What is a noun?",
+        ]
+    )
+
+    async def _batch(*, subject, forced_types, **_kwargs):
+        # The first chunk (it holds slot 0) answers at once; the rest wait until
+        # a question has been handed on — a build that awaits every batch first hangs.
+        if next(calls):
+            await release.wait()
+        return [
+            {
+                "question_text": next(stems),
+                "question_type": "mcq",
+                "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                "correct_answer": "A",
+                "explanation": "Because.",
+            }
+            for _ in forced_types
+        ]
+
+    async def on_question(question):
+        release.set()
+
+    monkeypatch.setattr(service, "llm_question_batch", _batch)
+    level_id = await _level_id(sessions, 1)
+    async with sessions() as db:
+        built = await asyncio.wait_for(
+            service.build_level_question_set(db, user.id, level_id, on_question=on_question), 10
+        )
+    assert len(built["questions"]) == len({q["question_text"] for q in built["questions"]})
+    assert next(generator.counter) == 1  # every slot came from its batch
+
+
+async def test_client_disconnect_marks_the_session_failed(world):
+    sessions, user, generator = world
+    generator.delay = 0.2
+    level_id = await _level_id(sessions, 1)
+
+    events = service.start_level_stream(user.id, level_id, sessions=sessions)
+    header = await anext(events)
+    assert header["event"] == "session"
+    assert (await anext(events))["event"] == "question"
+    await events.aclose()  # the client went away; later slots are still generating
+
+    async with sessions() as db:
+        session = await db.get(ChallengeSession, header["data"]["session_id"])
+    assert session.status == "failed"
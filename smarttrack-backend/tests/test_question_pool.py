@@ -0,0 +1,195 @@
+"""Pre-generated question pool: offline build, pool-first level builds, depletion refills."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.main  # noqa: F401  (registers every model on Base.metadata)
+from app.config import settings
+from app.database import Base
+from app.phases import prefetch as phase_prefetch
+from app.phases import question_gen, question_pool, service
+from app.phases.curriculum_topics import allowed_topic_pool
+from app.phases.models import Level, Phase, QuestionPoolItem
+from app.phases.question_pool import PoolCell, build_question_pool, draw_pool_questions, text_key
+from app.users.models import User
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(question_pool, "_refills", {})
+    monkeypatch.setattr(question_pool, "_last_refill", {})
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    await engine.dispose()
+
+
+def _item(text: str, qtype: str = "mcq") -> dict:
+    return {
+        "question_text": text,
+        "question_type": qtype,
+        "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+        "correct_answer": "B",
+        "explanation": "Because.",
+        "source": "llm",
+    }
+
+
+async def _seed(sessions, phase_number: int, subject: str, band: str, texts: list[str]) -> None:
+    async with sessions() as db:
+        for text in texts:
+            db.add(
+                QuestionPoolItem(
+                    phase_number=phase_number,
+                    subject=subject,
+                    question_type="mcq",
+                    band=band,
+                    text_key=text_key(text),
+                    format_version=settings.CHALLENGE_FORMAT_VERSION,
+                    payload=_item(text),
+                )
+            )
+        await db.commit()
+
+
+async def test_build_dedupes_stems_and_resumes(sessions, monkeypatch):
+    calls = []
+
+    async def _fake_llm(*, subject, forced_type, forced_topic, effective_difficulty, **_kwargs):
+        calls.append((forced_type, forced_topic["topic"], effective_difficulty))
+        # Every type for a topic writes the same stem, spelled differently.
+        stem = f"What  is {forced_topic['topic']}?"
+        return _item(stem.upper() if len(calls) % 2 else stem.lower(), forced_type)
+
+    monkeypatch.setattr(question_gen, "_llm_question", _fake_llm)
+    monkeypatch.setattr(settings, "CHALLENGE_IMAGES_MODE", "off")
+    topics = allowed_topic_pool(1, "core_maths")
+    types = question_pool._pool_types("core_maths")
+
+    counts = await build_question_pool(phases=(1,), subjects=("core_maths",), bands=("intro",), sessions=sessions)
+    assert len(calls) == len(topics) * len(types) == counts["requested"]
+    assert {eff for *_x, eff in calls} == {3}
+    async with sessions() as db:
+        stored = (await db.execute(select(QuestionPoolItem.topic, QuestionPoolItem.text_key))).all()
+    assert sorted(t for t, _k in stored) == sorted(t["topic"] for t in topics)
+    assert len({k for _t, k in stored}) == len(stored)
+    assert counts["added"] == len(topics)
+
+    # Cells whose stems were deduped get retried; cells already pooled are skipped.
+    calls.clear()
+    again = await build_question_pool(phases=(1,), subjects=("core_maths",), bands=("intro",), sessions=sessions)
+    assert again.get("added", 0) == 0
+    assert len(calls) == len(topics) * (len(types) - 1)
+
+
+async def test_level_build_is_served_from_the_pool(sessions, monkeypatch):
+    async with sessions() as db:
+        phase = Phase(number=1, name="Foundation", shs_mapping="SHS 1")
+        db.add(phase)
+        await db.flush()
+        level = Level(phase_id=phase.id, number=1, difficulty_baseline=1)
+        user = User(email="esi@example.com", full_name="Esi Mensah")
+        db.add_all([level, user])
+        await db.commit()
+    for subject in service.SUBJECTS:
+        await _seed(sessions, 1, subject, "intro", [f"{subject} pooled {n}" for n in range(8)])
+
+    async def _no_live_generation(**_kwargs):
+        raise AssertionError("the pool should cover every slot")
+
+    monkeypatch.setattr(service, "generate_subject_question", _no_live_generation)
+    seen = {f"{subject} pooled {n}" for subject in service.SUBJECTS for n in range(6)}
+    async with sessions() as db:
+        built = await service.build_level_question_set(db, user.id, level.id, extra_exclude_texts=seen)
+        await db.commit()
+
+    texts = [q["question_text"] for q in built["questions"]]
+    assert texts and len(set(texts)) == len(texts)
+    assert not set(texts) & seen
+    assert all(t.rsplit(" ", 1)[-1] in ("6", "7") for t in texts)
+    async with sessions() as db:
+        served = (await db.execute(select(func.sum(QuestionPoolItem.served_count)))).scalar_one()
+    assert served == len(texts)
+
+
+async def test_streamed_start_commits_served_counts(sessions, monkeypatch):
+    async with sessions() as db:
+        phase = Phase(number=1, name="Foundation", shs_mapping="SHS 1")
+        db.add(phase)
+        await db.flush()
+        level = Level(phase_id=phase.id, number=1, difficulty_baseline=1)
+        user = User(email="kwame@example.com", full_name="Kwame Asante")
+        db.add_all([level, user])
+        await db.commit()
+    for subject in service.SUBJECTS:
+        await _seed(sessions, 1, subject, "intro", [f"{subject} pooled {n}" for n in range(8)])
+
+    async def _no_live_generation(**_kwargs):
+        raise AssertionError("the pool should cover every slot")
+
+    monkeypatch.setattr(service, "generate_subject_question", _no_live_generation)
+    monkeypatch.setattr(phase_prefetch, "schedule_buffer_warm", lambda *a, **k: None)
+    events = [e async for e in service.start_level_stream(user.id, level.id, sessions=sessions)]
+
+    assert events[-1]["event"] == "done"
+    async with sessions() as db:
+        served = (await db.execute(select(func.sum(QuestionPoolItem.served_count)))).scalar_one()
+    assert served == events[-1]["data"]["question_count"] > 0
+
+
+async def test_failed_pool_draw_falls_back_to_live_generation(sessions, monkeypatch):
+    async with sessions() as db:
+        phase = Phase(number=1, name="Foundation", shs_mapping="SHS 1")
+        db.add(phase)
+        await db.flush()
+        level = Level(phase_id=phase.id, number=1, difficulty_baseline=1)
+        user = User(email="kwame@example.com", full_name="Kwame Asante")
+        db.add_all([level, user])
+        await db.commit()
+    monkeypatch.setattr(settings, "CHALLENGE_POOL_ENABLED", True)
+    monkeypatch.setattr(settings, "CHALLENGE_BATCH_GENERATION", False)
+
+    async def _failing_draw(db, **_kwargs):
+        # A database error inside the draw, as a lock or serialization failure would be.
+        db.add(User(email="kwame@example.com", full_name="Duplicate"))
+        await db.flush()
+
+    async def _live(*, subject, rng, **_kwargs):
+        return _item(f"{subject} live {rng.random()}")
+
+    monkeypatch.setattr(service, "draw_pool_questions", _failing_draw)
+    monkeypatch.setattr(service, "generate_subject_question", _live)
+    monkeypatch.setattr(phase_prefetch, "schedule_buffer_warm", lambda *a, **k: None)
+    events = [e async for e in service.start_level_stream(user.id, level.id, sessions=sessions)]
+
+    assert events[-1]["event"] == "done", events[-1]
+    assert events[-1]["data"]["question_count"] > 0
+
+
+async def test_depleted_cell_schedules_one_refill(sessions, monkeypatch):
+    await _seed(sessions, 2, "english", "standard", ["Pick the synonym of big.", "Pick the antonym of hot."])
+    refilled: list[PoolCell] = []
+
+    async def _fake_refill(cell, *, sessions=None):
+        refilled.append(cell)
+        return {}
+
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(question_pool, "refill_cell", _fake_refill)
+    slots = [(0, "english", "mcq", 6), (1, "english", "mcq", 7), (2, "english", "fill_blank", 5)]
+
+    async with sessions() as db:
+        drawn = await draw_pool_questions(db, phase_number=2, slots=slots, exclude_texts=set())
+        again = await draw_pool_questions(db, phase_number=2, slots=slots, exclude_texts=set())
+    await asyncio.sleep(0)
+
+    assert sorted(drawn) == [0, 1] and all(item["source"] == "pool" for item in drawn.values())
+    assert len(again) == 2
+    # The cooldown keeps the second short draw from queueing another refill.
+    assert refilled == [PoolCell(2, "english", "standard")]
+    assert question_pool.pool_stats.depleted["2:english:standard"] >= 2
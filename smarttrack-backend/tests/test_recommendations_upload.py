@@ -196,6 +196,9 @@ def test_extract_grades_uses_pypdf_text(monkeypatch):
         "Elective Mathematics A1\n"
     )
     monkeypatch.setattr(mod, "extract_text_from_pdf", lambda _data: sample)
+    # The patch only exists in this process: parse inline, skip the hash cache.
+    monkeypatch.setattr(mod.settings, "ACADEMIC_PARSE_WORKERS", 0)
+    monkeypatch.setattr(mod.settings, "ACADEMIC_DOCUMENT_CACHE_TTL_SECONDS", 0)
 
     grades = asyncio.run(
         mod.extract_grades_with_ai(
@@ -223,6 +226,9 @@ def test_analyze_rejects_non_waec_pdf_text(monkeypatch):
         "Physics B3\n"
     )
     monkeypatch.setattr(mod, "extract_text_from_pdf", lambda _data: sample)
+    # The patch only exists in this process: parse inline, skip the hash cache.
+    monkeypatch.setattr(mod.settings, "ACADEMIC_PARSE_WORKERS", 0)
+    monkeypatch.setattr(mod.settings, "ACADEMIC_DOCUMENT_CACHE_TTL_SECONDS", 0)
 
     result = asyncio.run(
         mod.analyze_academic_document(
@@ -536,14 +536,59 @@ export async function getLeaderboard(
   if (!res.ok) return [];
   const body = await res.json();
   const entries = Array.isArray(body?.entries) ? body.entries : Array.isArray(body) ? body : [];
-  return entries.map((e: Record<string, unknown>) => ({
+  return entries.map((e: Record<string, unknown>) => toLeaderboardEntry(e, programme));
+}
+
+export interface LeaderboardPosition {
+  scope: 'domain' | 'weekly';
+  domain: string;
+  category: string;
+  total: number;
+  rank: number | null;
+  score: number;
+  neighbours: LeaderboardEntry[];
+}
+
+function toLeaderboardEntry(e: Record<string, unknown>, programme = ''): LeaderboardEntry {
+  return {
     rank: Number(e.rank ?? 0),
     user_name: String(e.user_name ?? ''),
     xp: Number(e.score ?? e.xp ?? 0),
     streak: Number(e.streak ?? 0),
     school: String(e.school ?? ''),
-    programme: String(e.programme ?? programme ?? ''),
-  }));
+    programme: String(e.programme ?? programme),
+    is_me: Boolean(e.is_me),
+  };
+}
+
+/**
+ * The learner's own rank plus the learners just above and below.
+ * Omit `programme` / `category` for this week's XP board.
+ */
+export async function getMyLeaderboardPosition(
+  programme?: string,
+  category: string = 'Overall',
+  radius: number = 3
+): Promise<LeaderboardPosition | null> {
+  const path = programme
+    ? `${encodeURIComponent(programme)}/${encodeURIComponent(category || 'Overall')}`
+    : 'weekly';
+  const res = await fetch(`${API_BASE}/leaderboards/${path}/me?radius=${radius}`, {
+    headers: getHeaders(),
+  });
+  if (!res.ok) return null;
+  const body = await res.json();
+  return {
+    scope: body.scope === 'weekly' ? 'weekly' : 'domain',
+    domain: String(body.domain ?? ''),
+    category: String(body.category ?? ''),
+    total: Number(body.total ?? 0),
+    rank: body.rank == null ? null : Number(body.rank),
+    score: Number(body.score ?? 0),
+    neighbours: (Array.isArray(body.entries) ? body.entries : []).map(
+      (e: Record<string, unknown>) => toLeaderboardEntry(e, programme)
+    ),
+  };
 }
 
 /** Get learning modules recommended from challenge thetas */
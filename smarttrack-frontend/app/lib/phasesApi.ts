@@ -328,6 +328,67 @@ export async function submitPhaseAnswer(
   }>;
 }
 
+export type QueuedPhaseAnswer = {
+  questionId: number;
+  answer: string;
+  timeTakenSeconds?: number;
+};
+
+/**
+ * Flush several answers (e.g. queued while offline) in one request.
+ * Answers the server already has are replayed, so retrying a flush is safe.
+ */
+export async function submitPhaseAnswers(sessionId: number, answers: QueuedPhaseAnswer[]) {
+  const res = await fetchWithAuth(
+    `${API_BASE}/phases/sessions/${sessionId}/submit-answers`,
+    {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        answers: answers.map((a) => ({
+          question_id: a.questionId,
+          answer: a.answer,
+          time_taken_seconds: a.timeTakenSeconds ?? null,
+        })),
+      }),
+    },
+  );
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    const detail = typeof err?.detail === 'string' ? err.detail : null;
+    throw new Error(detail || `Failed to submit answers (${res.status})`);
+  }
+  return res.json() as Promise<{
+    session_id: number;
+    results: Array<{
+      question_id: number;
+      replayed: boolean;
+      is_correct: boolean;
+      explanation?: string;
+      correct_count: number;
+      wrong_count: number;
+      xp_earned: number;
+      user_xp?: number;
+      rank?: string;
+      streak?: number;
+      streak_incremented?: boolean;
+      learning_nudge?: {
+        subject: string;
+        message?: string;
+        curriculum_id?: string | null;
+        topic_title?: string | null;
+      } | null;
+    }>;
+    graded_count: number;
+    correct_count: number;
+    wrong_count: number;
+    xp_earned: number;
+    user_xp?: number;
+    rank?: string;
+    streak?: number;
+  }>;
+}
+
 export type CompletePhaseResult = {
   passed: boolean;
   score: number;